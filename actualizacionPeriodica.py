@@ -0,0 +1,115 @@
+# --- Importaciones de Módulos ---
+import queue      # Resultados del hilo de actualización hacia la ventana
+import threading  # El hilo que actualiza y el Event para detenerlo
+from almacenSqlite import crear_motor, ALMACEN_MEMORIA # Motor en memoria o sobre SQLite
+from instantanea import version_del_archivo # Tamaño y fecha de 'Todos.csv' (¿cambió?)
+import rendimiento # Medición de cada actualización
+
+INTERVALO_MS = 500  # Cada cuánto la ventana revisa si terminó una actualización
+
+class ActualizacionPeriodica:
+    """
+    Vuelve a traer los datos cada 'intervalo' segundos en un hilo aparte y, si 'Todos.csv'
+    cambió, arma el motor nuevo (tabla + índices) también en ese hilo: la ventana sigue
+    usando el motor anterior hasta recibir el nuevo completo.
+    - actualizar(): la ingesta (ej. 'refrescar_datos' de main.py). Devuelve los rangos
+      [inicio, fin) de filas que cambiaron ([] si no reescribió nada; None si no se saben)
+      y lanza una excepción si no pudo verificar los datos. Si es None, sólo se vigila el CSV.
+    Igual que CargaEnSegundoPlano, el hilo deja mensajes en una cola que la ventana revisa
+    con after(), y llama (siempre en el hilo principal) a:
+    - al_revisar(): empezó una actualización (opcional),
+    - al_actualizar(motor, rangos): hay datos nuevos ('rangos' None: pueden haber cambiado todas las filas),
+    - al_sin_cambios(): los datos siguen iguales (opcional),
+    - al_fallar(error): la actualización falló; el motor vigente no se tocó.
+    """
+
+    def __init__(self, ventana, ruta_csv, intervalo, al_actualizar, al_fallar, actualizar=None,
+                 al_revisar=None, al_sin_cambios=None, almacen=ALMACEN_MEMORIA, intervalo_ms=INTERVALO_MS):
+        self.ventana = ventana
+        self.ruta_csv = ruta_csv
+        self.intervalo = intervalo
+        self.actualizar = actualizar
+        self.al_actualizar = al_actualizar
+        self.al_fallar = al_fallar
+        self.al_revisar = al_revisar
+        self.al_sin_cambios = al_sin_cambios
+        self.almacen = almacen
+        self.intervalo_ms = intervalo_ms
+        # '_version' y '_fallo_anterior' sólo los usa el hilo de actualización (después de iniciar())
+        self._version = None  # Versión del CSV con la que se armó el último motor entregado
+        self._fallo_anterior = False  # Si falló, el CSV pudo cambiar sin que se entregaran sus rangos
+        self._descartado = threading.Event()  # La ventana no pudo usar el último motor entregado
+        self._detener = threading.Event()
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._trabajar, name="actualizacion-periodica", daemon=True)
+
+    def iniciar(self):
+        """
+        Arranca el hilo y la revisión periódica de la cola. Se llama cuando el motor
+        vigente ya está cargado: su CSV es la versión de partida.
+        """
+        self._version = version_del_archivo(self.ruta_csv)
+        self._hilo.start()
+        self.ventana.after(self.intervalo_ms, self._revisar)
+
+    def descartar(self):
+        """
+        El último motor entregado no se pudo usar: en la próxima vuelta se vuelve a armar.
+        Sólo avisa al hilo (que puede estar a mitad de una actualización); él lo aplica al empezar la siguiente.
+        """
+        self._descartado.set()
+
+    def detener(self):
+        """Deja de actualizar (una actualización en curso termina, pero ya no se entrega)."""
+        self._detener.set()
+
+    # --- Hilo de actualización (NO toca la interfaz) ---
+
+    def _trabajar(self):
+        while not self._detener.wait(self.intervalo):
+            self._cola.put(("revisando",))
+            try:
+                self._cola.put(self._actualizar_una_vez())
+            except Exception as error:
+                self._fallo_anterior = True
+                self._cola.put(("error", error))
+
+    def _actualizar_una_vez(self):
+        if self._descartado.is_set():
+            self._descartado.clear()
+            self._version = None
+            self._fallo_anterior = True
+        with rendimiento.etapa('actualizacion_periodica'):
+            rangos = self.actualizar() if self.actualizar is not None else None
+            version = version_del_archivo(self.ruta_csv)
+            if version == self._version:
+                return ("sin_cambios",)
+            if not rangos or self._fallo_anterior:
+                # El CSV cambió, pero no (sólo) por esta ingesta: ej. un intento anterior
+                # cuyo motor no se pudo armar, u otro proceso. No se sabe qué filas cambiaron.
+                rangos = None
+            motor = crear_motor(self.ruta_csv, self.almacen)
+        self._version = version
+        self._fallo_anterior = False
+        return ("listo", motor, rangos)
+
+    # --- Hilo principal (revisión con after) ---
+
+    def _revisar(self):
+        while not self._detener.is_set():
+            try:
+                mensaje = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if mensaje[0] == "revisando":
+                if self.al_revisar is not None:
+                    self.al_revisar()
+            elif mensaje[0] == "listo":
+                self.al_actualizar(*mensaje[1:])
+            elif mensaje[0] == "sin_cambios":
+                if self.al_sin_cambios is not None:
+                    self.al_sin_cambios()
+            else:
+                self.al_fallar(mensaje[1])
+        if not self._detener.is_set():
+            self.ventana.after(self.intervalo_ms, self._revisar)
@@ -0,0 +1,739 @@
+# --- Importaciones de Módulos ---
+import csv               # Para leer 'Todos.csv' al importarlo
+import json              # Cabecera del CSV guardada en los metadatos
+import os                # Rutas, tamaños y reemplazo atómico del archivo
+import sqlite3           # El almacenamiento en disco
+import threading         # Una conexión por hilo (la interfaz y el hilo de consultas leen a la vez)
+import time              # Duración de la importación
+from collections import Counter, OrderedDict  # Ranking de sugerencias y memorias LRU
+from busqueda import COLUMNAS_BUSQUEDA, normalizar, clave_colacion, ngramas
+from estadisticas import resumir, PERCENTILES, MAXIMO_VISTAS_GUARDADAS
+from indices import COLUMNAS_ORDENABLES, COLUMNAS_TEXTO_ORDEN
+from instantanea import huella_archivo  # Misma verificación del CSV de origen que la instantánea
+from motor import ConsultaCancelada, MotorConsultas, validar_orden, claves_de_primeros
+from tablaPaises import COLUMNAS_NUMERICAS, ColumnaCategorica, FILAS_POR_LOTE, convertidor
+import rendimiento       # Medición de la importación y de las consultas
+
+# --- Almacenamiento en SQLite ---
+# Alternativa a la tabla en memoria para datos que no entran en la RAM:
+# 'Todos.csv' se importa UNA vez a 'Todos.csv.sqlite' y las consultas se resuelven con SQL.
+# - 'paises': una fila por país ('id' = número de fila del CSV), con las columnas
+#   numéricas como enteros y, para las de texto que se ordenan, su clave de colación
+#   ('clave_<columna>', ver clave_colacion) para ordenar en español con un índice.
+# - Índices B-tree sobre población, superficie, continente y nombre.
+# - 'busqueda': tabla FTS5 (tokenizador 'trigram') con nombre, nombre oficial y
+#   capital normalizados: la búsqueda de subcadenas usa el índice.
+# - 'meta': huella del CSV de origen; si no cambió, la base se abre sin volver a leerlo.
+EXTENSION = ".sqlite"       # "Todos.csv" -> "Todos.csv.sqlite"
+VERSION_ESQUEMA = 1
+SEPARADOR_TEXTO = '\x1f'    # Separa nombre, oficial y capital en el texto de búsqueda (nunca aparece en una búsqueda)
+FILAS_POR_PAGINA = 256      # Filas que se piden juntas al mostrar una vista (LIMIT/OFFSET)
+PAGINAS_GUARDADAS = 64      # Páginas que recuerda cada vista
+FILAS_GUARDADAS = 4096      # Filas completas que recuerda la tabla (lo que se ve en pantalla y su margen)
+PASOS_ENTRE_REVISIONES = 10000  # Instrucciones de SQLite entre dos revisiones de 'cancelado'
+MAXIMO_ENTERO = 2 ** 63 - 1 # Los límites se recortan al rango de un entero de SQLite
+ALMACEN_MEMORIA, ALMACEN_SQLITE = "memoria", "sqlite"  # Dónde se guarda la tabla (opción --almacen)
+ALMACENES = (ALMACEN_MEMORIA, ALMACEN_SQLITE)
+
+def ruta_base(ruta_csv):
+    """Devuelve la ruta de la base SQLite que corresponde a un CSV."""
+    return ruta_csv + EXTENSION
+
+def _nombre(columna):
+    """Nombre de columna entre comillas (las columnas salen de la cabecera del CSV)."""
+    return '"' + columna.replace('"', '""') + '"'
+
+def _columna_sql(columna):
+    """Columna de 'paises' donde se guarda una columna del CSV (las numéricas, como enteros)."""
+    return COLUMNAS_NUMERICAS.get(columna, columna)
+
+def _terminos_orden(columna, descendente):
+    """Columnas de 'paises' por las que se ordena una columna ordenable, con su sentido."""
+    origen = COLUMNAS_ORDENABLES[columna]
+    columnas = ['clave_' + origen, origen] if columna in COLUMNAS_TEXTO_ORDEN else [origen]
+    return [f"{_nombre(nombre)}{' DESC' if descendente else ''}" for nombre in columnas]
+
+def _recortar(valor):
+    return max(-MAXIMO_ENTERO, min(MAXIMO_ENTERO, valor))
+
+# --- Importación ---
+
+def _fts5_disponible(conexion):
+    """Indica si este SQLite tiene FTS5 con el tokenizador 'trigram' (SQLite 3.34 o posterior)."""
+    try:
+        conexion.execute("CREATE VIRTUAL TABLE temp.prueba_fts USING fts5(texto, tokenize='trigram')")
+        conexion.execute("DROP TABLE temp.prueba_fts")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def importar_csv_por_lotes(ruta_csv, ruta_salida=None, filas_por_lote=FILAS_POR_LOTE):
+    """
+    Importa 'ruta_csv' a una base SQLite nueva. Es un generador de (filas_importadas, fraccion_leida).
+    - Todas las filas se insertan por lotes (executemany) dentro de UNA transacción, en modo WAL.
+    - Los índices se crean al final (es más rápido que mantenerlos durante la carga).
+    - Los valores se convierten igual que en TablaPaises (un número inválido es 0).
+    Se escribe en un archivo temporal y se renombra (nunca queda una base a medias).
+    """
+    ruta_salida = ruta_salida or ruta_base(ruta_csv)
+    info_csv = os.stat(ruta_csv)
+    huella = huella_archivo(ruta_csv)
+    tamano = info_csv.st_size or 1
+    ruta_temporal = ruta_salida + ".tmp"
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta_temporal + sufijo):
+            os.remove(ruta_temporal + sufijo)
+
+    comienzo = time.perf_counter()
+    conexion = sqlite3.connect(ruta_temporal, isolation_level=None)  # Las transacciones se manejan a mano
+    filas = 0
+    try:
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        conexion.execute("PRAGMA cache_size=-65536")  # 64 MB de caché para crear los índices
+        fts = _fts5_disponible(conexion)
+        leidos = 0
+        with open(ruta_csv, mode='r', encoding='utf-8', newline='') as archivo:
+            def lineas():
+                # Cuenta lo leído (en caracteres, casi igual que en bytes) para calcular el avance
+                nonlocal leidos
+                for linea in archivo:
+                    leidos += len(linea)
+                    yield linea
+            lector = csv.reader(lineas())
+            cabecera = next(lector, [])
+
+            # --- 1. Esquema ---
+            invalidas = {}  # Celdas numéricas que no eran un número (como TablaPaises.celdas_invalidas)
+            convertir = [convertidor(columna, invalidas) if columna in COLUMNAS_NUMERICAS else str for columna in cabecera]
+            de_orden = [cabecera.index(COLUMNAS_ORDENABLES[columna]) for columna in COLUMNAS_TEXTO_ORDEN
+                        if COLUMNAS_ORDENABLES[columna] in cabecera]
+            de_busqueda = [cabecera.index(columna) for columna in COLUMNAS_BUSQUEDA if columna in cabecera]
+            columnas = ([f"{_nombre(_columna_sql(columna))} {'INTEGER' if columna in COLUMNAS_NUMERICAS else 'TEXT'}"
+                         for columna in cabecera] + [f"{_nombre('clave_' + cabecera[i])} TEXT" for i in de_orden])
+            conexion.execute(f"CREATE TABLE paises (id INTEGER PRIMARY KEY, {', '.join(columnas)})")
+            if fts:
+                conexion.execute("CREATE VIRTUAL TABLE busqueda USING fts5(texto, tokenize='trigram case_sensitive 1')")
+            else:
+                conexion.execute("CREATE TABLE busqueda (texto TEXT)")  # Sin FTS5: la búsqueda recorre la tabla
+            conexion.execute("CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT)")
+            marcas = ", ".join("?" * (1 + len(cabecera) + len(de_orden)))
+            insertar_pais = f"INSERT INTO paises VALUES ({marcas})"
+
+            # --- 2. Filas, por lotes, en una sola transacción ---
+            conexion.execute("BEGIN")
+            lote, textos = [], []
+            for fila in lector:
+                # Si la fila vino corta, se completa con vacíos (como TablaPaises.agregar_fila)
+                valores = [convertir_valor(valor) for convertir_valor, valor in zip(convertir, fila)]
+                valores += [convertir_valor('') for convertir_valor in convertir[len(valores):]]
+                lote.append([filas] + valores + [clave_colacion(valores[i])[0] for i in de_orden])
+                textos.append((filas, SEPARADOR_TEXTO.join(normalizar(valores[i]) for i in de_busqueda)))
+                filas += 1
+                if len(lote) == filas_por_lote:
+                    conexion.executemany(insertar_pais, lote)
+                    conexion.executemany("INSERT INTO busqueda (rowid, texto) VALUES (?, ?)", textos)
+                    lote, textos = [], []
+                    yield filas, min(1.0, leidos / tamano)
+            conexion.executemany(insertar_pais, lote)
+            conexion.executemany("INSERT INTO busqueda (rowid, texto) VALUES (?, ?)", textos)
+
+        # --- 3. Índices (el de continente también sirve para ordenar por continente) ---
+        conexion.execute("CREATE INDEX idx_poblacion ON paises (poblacion_num)")
+        conexion.execute("CREATE INDEX idx_area ON paises (area_num)")
+        conexion.execute("CREATE INDEX idx_continente ON paises (clave_continente, continente)")
+        conexion.execute("CREATE INDEX idx_nombre ON paises (clave_nombre_comun_es, nombre_comun_es)")
+        conexion.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("version", str(VERSION_ESQUEMA)), ("cabecera", json.dumps(cabecera)), ("filas", str(filas)),
+            ("fts", "1" if fts else "0"), ("tamano_csv", str(info_csv.st_size)),
+            ("mtime_csv", str(info_csv.st_mtime_ns)), ("sha256_csv", huella.hex()),
+            ("celdas_invalidas", json.dumps(invalidas)),
+        ])
+        conexion.execute("COMMIT")
+        conexion.execute("ANALYZE")  # Estadísticas para que el planificador elija bien el índice
+    except BaseException:
+        conexion.close()
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(ruta_temporal + sufijo):
+                os.remove(ruta_temporal + sufijo)
+        raise
+    conexion.close()  # Al cerrar, el WAL se vuelca a la base y se borra
+    os.replace(ruta_temporal, ruta_salida)
+    rendimiento.registrar('importar_sqlite', time.perf_counter() - comienzo, filas)
+    yield filas, 1.0
+
+def importar_csv(ruta_csv, ruta_salida=None):
+    """Importa 'ruta_csv' a SQLite de una vez (ver 'importar_csv_por_lotes'). Devuelve la ruta de la base."""
+    ruta_salida = ruta_salida or ruta_base(ruta_csv)
+    for _ in importar_csv_por_lotes(ruta_csv, ruta_salida):
+        pass
+    return ruta_salida
+
+def _anotar_mtime_csv(ruta, mtime_ns):
+    """
+    Guarda en 'meta' la fecha nueva del CSV (el contenido es el mismo: sólo cambió la fecha),
+    así la próxima apertura no vuelve a calcular la huella. Las conexiones de TablaSqlite son
+    de sólo lectura, por eso se usa una aparte; si no se puede escribir, sólo se pierde ese atajo.
+    """
+    try:
+        conexion = sqlite3.connect(ruta, timeout=1)
+        try:
+            with conexion:
+                conexion.execute("UPDATE meta SET valor = ? WHERE clave = 'mtime_csv'", (str(mtime_ns),))
+        finally:
+            conexion.close()
+    except sqlite3.Error:
+        pass
+
+def abrir_base(ruta_csv, ruta=None):
+    """
+    Abre la base SQLite de 'ruta_csv' si existe y corresponde a ese CSV
+    (mismo tamaño y fecha, o si no, mismo sha256; en ese caso se anota la fecha nueva).
+    Devuelve la TablaSqlite, o None si falta, está dañada o quedó vieja.
+    """
+    ruta = ruta or ruta_base(ruta_csv)
+    if not os.path.exists(ruta) or not os.path.exists(ruta_csv):
+        return None
+    try:
+        tabla = TablaSqlite(ruta)
+    except (sqlite3.Error, ValueError, KeyError):
+        return None
+    meta = tabla.meta
+    info_csv = os.stat(ruta_csv)
+    if (info_csv.st_size, info_csv.st_mtime_ns) != (int(meta["tamano_csv"]), int(meta["mtime_csv"])):
+        if info_csv.st_size != int(meta["tamano_csv"]) or huella_archivo(ruta_csv).hex() != meta["sha256_csv"]:
+            tabla.cerrar()
+            return None
+        _anotar_mtime_csv(ruta, info_csv.st_mtime_ns)
+        meta["mtime_csv"] = str(info_csv.st_mtime_ns)
+    return tabla
+
+def cargar_base_por_lotes(ruta_csv, filas_por_lote=FILAS_POR_LOTE):
+    """
+    Deja lista la base de 'ruta_csv': si no existe o quedó vieja, la importa
+    (generando (filas_importadas, fraccion_leida) para mostrar el avance); si está al día, no genera nada.
+    Lanza FileNotFoundError si el CSV no existe.
+    """
+    if not os.path.exists(ruta_csv):
+        raise FileNotFoundError(ruta_csv)
+    tabla = abrir_base(ruta_csv)
+    if tabla is not None:
+        tabla.cerrar()
+        return
+    yield from importar_csv_por_lotes(ruta_csv, filas_por_lote=filas_por_lote)
+
+def cargar_base(ruta_csv):
+    """Como 'cargar_tabla' (motor.py), pero devuelve la TablaSqlite (importando el CSV si hace falta)."""
+    for _ in cargar_base_por_lotes(ruta_csv):
+        pass
+    tabla = abrir_base(ruta_csv)
+    if tabla is None:
+        raise ValueError(f"No se pudo abrir la base de '{ruta_csv}'")
+    return tabla
+
+# --- Tabla y Vistas ---
+
+class TablaSqlite:
+    """
+    La tabla maestra guardada en SQLite, con la misma interfaz de lectura que TablaPaises
+    ('cabecera', len, 'lector', 'valor', 'fila', 'todas').
+    Cada hilo usa su propia conexión (en modo WAL los lectores no se bloquean entre sí).
+    Las filas leídas se recuerdan (LRU): las vistas las dejan cargadas al pedir cada página.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._local = threading.local()
+        self._conexiones = []
+        self._candado = threading.Lock()
+        try:
+            self.meta = dict(self.consultar("SELECT clave, valor FROM meta"))
+            if int(self.meta["version"]) != VERSION_ESQUEMA:
+                raise ValueError("versión de la base no compatible")
+        except (sqlite3.Error, ValueError, KeyError):
+            self.cerrar()
+            raise
+        self.cabecera = json.loads(self.meta["cabecera"])
+        self.fts = self.meta["fts"] == "1"
+        self._filas = int(self.meta["filas"])
+        self.celdas_invalidas = json.loads(self.meta.get("celdas_invalidas", "{}"))
+        # Las filas se leen con todas las columnas del CSV (las numéricas, como enteros)
+        self.columnas_sql = [_columna_sql(columna) for columna in self.cabecera]
+        self.seleccion = ", ".join(_nombre(columna) for columna in self.columnas_sql)
+        self._guardadas = OrderedDict()  # fila -> tupla de valores (en el orden de 'columnas_sql')
+
+    # --- Conexiones ---
+
+    def conexion(self):
+        """La conexión del hilo actual (se abre la primera vez)."""
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+            conexion.execute("PRAGMA query_only=1")
+            self._local.conexion = conexion
+            with self._candado:
+                self._conexiones.append(conexion)
+        return conexion
+
+    def consultar(self, sql, parametros=()):
+        """Ejecuta una consulta y devuelve todas sus filas."""
+        return self.conexion().execute(sql, parametros).fetchall()
+
+    def recorrer(self, sql, parametros=(), tamano_lote=FILAS_POR_LOTE):
+        """Genera las filas de una consulta de a lotes (sin traerlas todas a memoria)."""
+        cursor = self.conexion().execute(sql, parametros)
+        while True:
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote:
+                break
+            yield from lote
+
+    def cerrar(self):
+        """Cierra todas las conexiones abiertas."""
+        with self._candado:
+            for conexion in self._conexiones:
+                conexion.close()
+            self._conexiones = []
+        self._local = threading.local()
+
+    # --- Filas ---
+
+    def recordar(self, filas):
+        """Guarda filas ya leídas: pares (fila, tupla de valores)."""
+        with self._candado:
+            for fila, valores in filas:
+                self._guardadas[fila] = valores
+                self._guardadas.move_to_end(fila)
+            while len(self._guardadas) > FILAS_GUARDADAS:
+                self._guardadas.popitem(last=False)
+
+    def olvidar(self):
+        """Descarta las filas recordadas."""
+        with self._candado:
+            self._guardadas.clear()
+
+    def _leer(self, fila):
+        with self._candado:
+            valores = self._guardadas.get(fila)
+        if valores is None:
+            resultado = self.consultar(f"SELECT {self.seleccion} FROM paises WHERE id = ?", (fila,))
+            valores = resultado[0] if resultado else ('',) * len(self.columnas_sql)
+            self.recordar([(fila, valores)])
+        return valores
+
+    # --- Acceso a los datos (como TablaPaises) ---
+
+    def __len__(self):
+        return self._filas
+
+    def todas(self):
+        """La vista con todas las filas, en orden de tabla."""
+        return VistaSqlite(self, cantidad=self._filas)
+
+    def columna_de_lectura(self, columna):
+        """
+        (posición en 'columnas_sql', como_texto) de una columna, o None si no existe.
+        Las numéricas del CSV (ej. 'poblacion') se leen como texto, igual que en TablaPaises.
+        """
+        if columna in COLUMNAS_NUMERICAS and COLUMNAS_NUMERICAS[columna] in self.columnas_sql:
+            return self.columnas_sql.index(COLUMNAS_NUMERICAS[columna]), True
+        if columna in self.columnas_sql:
+            return self.columnas_sql.index(columna), False
+        return None
+
+    def lector(self, columna):
+        """Devuelve una función fila -> valor (acepta las columnas del CSV y las numéricas)."""
+        ubicacion = self.columna_de_lectura(columna)
+        if ubicacion is None:
+            return lambda fila: ''
+        posicion, como_texto = ubicacion
+        if como_texto:
+            return lambda fila: str(self._leer(fila)[posicion])
+        return lambda fila: self._leer(fila)[posicion]
+
+    def valor(self, fila, columna):
+        """Devuelve un único valor."""
+        return self.lector(columna)(fila)
+
+    def fila(self, indice):
+        """Arma el diccionario de una fila (mismo formato que TablaPaises.fila)."""
+        resultado = {columna: self.valor(indice, columna) for columna in self.cabecera}
+        for columna, numerica in COLUMNAS_NUMERICAS.items():
+            if columna in self.cabecera:
+                resultado[numerica] = self.valor(indice, numerica)
+        return resultado
+
+class VistaSqlite:
+    """
+    Una vista (filtrada y ordenada) que NO trae sus filas a memoria: se comporta como
+    la lista de números de fila de las vistas en memoria (len, índices, tramos, iteración),
+    pero cada tramo se pide a SQLite por páginas (LIMIT/OFFSET) y las páginas se recuerdan.
+    - 'origen', 'condiciones' y 'parametros': de dónde salen las filas (FROM ... WHERE ...).
+    - 'orden': términos de ORDER BY (siempre terminan en 'id', así el orden es total).
+    - 'limite': se queda con las primeras N filas.
+    """
+
+    def __init__(self, tabla, origen="paises", condiciones="", parametros=(), orden=("id",), limite=None, cantidad=None):
+        self.tabla = tabla
+        self.origen = origen
+        self.condiciones = condiciones
+        self.parametros = tuple(parametros)
+        self.orden = tuple(orden)
+        self.limite = limite
+        self._cantidad = cantidad
+        self._paginas = OrderedDict()  # número de página -> lista de filas
+        self._candado = threading.Lock()
+
+    def _desde(self):
+        return f" FROM {self.origen}{' WHERE ' + self.condiciones if self.condiciones else ''}"
+
+    def _consulta(self, seleccion):
+        """SELECT de la vista completa (en su orden), sin paginar."""
+        sql = f"SELECT {seleccion}{self._desde()} ORDER BY {', '.join(self.orden)}"
+        return (sql + f" LIMIT {int(self.limite)}") if self.limite is not None else sql
+
+    # --- Variantes ---
+
+    def copiar(self, **cambios):
+        """Otra vista sobre las mismas filas, con los cambios indicados (ej. otro 'orden')."""
+        datos = dict(origen=self.origen, condiciones=self.condiciones, parametros=self.parametros,
+                     orden=self.orden, limite=self.limite, cantidad=self._cantidad)
+        datos.update(cambios)
+        return VistaSqlite(self.tabla, **datos)
+
+    def como_origen(self):
+        """(origen, condiciones, parametros) para calcular sobre EXACTAMENTE estas filas (ej. estadísticas)."""
+        if self.limite is None:
+            return self.origen, self.condiciones, self.parametros
+        return f"({self._consulta('*')})", "", self.parametros
+
+    # --- Cantidad ---
+
+    def contar(self, cancelado=None):
+        """
+        Cuenta las filas (una vez; después se recuerda). Si se pasa 'cancelado', SQLite
+        lo revisa mientras cuenta y, si devuelve True, se corta con ConsultaCancelada.
+        """
+        if self._cantidad is None:
+            conexion = self.tabla.conexion()
+            if cancelado is not None:
+                conexion.set_progress_handler(lambda: 1 if cancelado() else 0, PASOS_ENTRE_REVISIONES)
+            try:
+                cantidad = conexion.execute(f"SELECT COUNT(*){self._desde()}", self.parametros).fetchone()[0]
+            except sqlite3.OperationalError:
+                if cancelado is not None and cancelado():
+                    raise ConsultaCancelada()
+                raise
+            finally:
+                if cancelado is not None:
+                    conexion.set_progress_handler(None, 0)
+            self._cantidad = cantidad if self.limite is None else min(cantidad, self.limite)
+        return self._cantidad
+
+    def __len__(self):
+        return self.contar()
+
+    def __bool__(self):
+        return self.contar() > 0
+
+    # --- Filas ---
+
+    def _pagina(self, numero):
+        with self._candado:
+            filas = self._paginas.get(numero)
+            if filas is not None:
+                self._paginas.move_to_end(numero)
+                return filas
+        inicio = numero * FILAS_POR_PAGINA
+        cantidad = FILAS_POR_PAGINA if self.limite is None else max(0, min(FILAS_POR_PAGINA, self.limite - inicio))
+        sql = f"SELECT id, {self.tabla.seleccion}{self._desde()} ORDER BY {', '.join(self.orden)} LIMIT ? OFFSET ?"
+        resultado = self.tabla.consultar(sql, self.parametros + (cantidad, inicio))
+        # Las filas completas quedan en la tabla: mostrarlas no vuelve a consultar
+        self.tabla.recordar((fila[0], fila[1:]) for fila in resultado)
+        filas = [fila[0] for fila in resultado]
+        with self._candado:
+            self._paginas[numero] = filas
+            while len(self._paginas) > PAGINAS_GUARDADAS:
+                self._paginas.popitem(last=False)
+        return filas
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            inicio, fin, paso = indice.indices(len(self))
+            if paso != 1:
+                return [self[posicion] for posicion in range(inicio, fin, paso)]
+            resultado = []
+            for numero in range(inicio // FILAS_POR_PAGINA, (fin - 1) // FILAS_POR_PAGINA + 1 if fin > inicio else 0):
+                resultado.extend(self._pagina(numero))
+            desplazamiento = inicio - (inicio // FILAS_POR_PAGINA) * FILAS_POR_PAGINA
+            return resultado[desplazamiento:desplazamiento + max(0, fin - inicio)]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("índice fuera de la vista")
+        return self._pagina(indice // FILAS_POR_PAGINA)[indice % FILAS_POR_PAGINA]
+
+    def __setitem__(self, indice, otra):
+        """Sólo 'vista[:] = otra' (como con las vistas en memoria): pasa a ser una copia de 'otra'."""
+        if not (isinstance(indice, slice) and indice == slice(None) and isinstance(otra, VistaSqlite)):
+            raise TypeError("una VistaSqlite sólo se puede reemplazar completa por otra VistaSqlite")
+        self.__dict__.update(otra.copiar().__dict__)
+
+    def __iter__(self):
+        # Un único recorrido en orden (sin paginar): lo usan la exportación y la línea de comandos
+        for (fila,) in self.tabla.recorrer(self._consulta("id"), self.parametros):
+            yield fila
+
+    def filas_con(self, columnas):
+        """Genera, en el orden de la vista, las tuplas de valores de 'columnas' (columnas de 'paises')."""
+        return self.tabla.recorrer(self._consulta(", ".join(_nombre(columna) for columna in columnas)), self.parametros)
+
+def posiciones_necesarias(cantidad):
+    """Posiciones de los valores ordenados que lee 'resumir': extremos y vecinos de cada percentil."""
+    posiciones = {0, cantidad - 1}
+    for porcentaje in PERCENTILES + (50,):
+        abajo = int((cantidad - 1) * porcentaje / 100)
+        posiciones.update((abajo, min(abajo + 1, cantidad - 1)))
+    return sorted(posiciones)
+
+class _Posiciones:
+    """Secuencia de largo 'cantidad' de la que sólo se conocen algunas posiciones."""
+
+    def __init__(self, conocidas, cantidad):
+        self.conocidas = conocidas
+        self.cantidad = cantidad
+
+    def __len__(self):
+        return self.cantidad
+
+    def __getitem__(self, indice):
+        if indice < 0:
+            indice += self.cantidad
+        if not 0 <= indice < self.cantidad:
+            raise IndexError("índice fuera de la vista")
+        return self.conocidas[indice]
+
+class ValoresOrdenados(_Posiciones):
+    """
+    Los valores de una columna de una vista, ordenados de menor a mayor (empates por id).
+    'resumir' sólo lee unas pocas posiciones (mínimo, máximo, percentiles), así que se
+    traen todas juntas en UNA consulta con ROW_NUMBER(): la vista se ordena una sola
+    vez (con el índice de la columna o, si está filtrada, en el ordenador de SQLite,
+    que usa disco si no entra en memoria). 'filas' da los ids en esas mismas posiciones.
+    """
+
+    def __init__(self, tabla, columna, origen, condiciones, parametros, cantidad):
+        super().__init__({}, cantidad)
+        self.filas = _Posiciones({}, cantidad)
+        if not cantidad:
+            return
+        donde = f" WHERE {condiciones}" if condiciones else ""
+        posiciones = posiciones_necesarias(cantidad)
+        sql = (f"SELECT posicion, id, valor FROM (SELECT id, {_nombre(columna)} AS valor,"
+               f" ROW_NUMBER() OVER (ORDER BY {_nombre(columna)}, id) - 1 AS posicion FROM {origen}{donde})"
+               f" WHERE posicion IN ({', '.join('?' * len(posiciones))})")
+        for posicion, fila, valor in tabla.consultar(sql, tuple(parametros) + tuple(posiciones)):
+            self.conocidas[posicion] = valor
+            self.filas.conocidas[posicion] = fila
+
+class AgregadosSqlite:
+    """Los mismos campos que estadisticas.Agregados (para 'resumir'), calculados con SQL en una pasada."""
+
+    def __init__(self, tabla, origen, condiciones, parametros):
+        donde = f" WHERE {condiciones}" if condiciones else ""
+        # Los continentes, en el orden en que aparecen (igual que Agregados); los totales salen de sumarlos
+        grupos = tabla.consultar(
+            f"SELECT continente, COUNT(*), SUM(poblacion_num), SUM(area_num) FROM {origen}{donde}"
+            f" GROUP BY continente ORDER BY MIN(id)", parametros)
+        self.continentes = ColumnaCategorica(vocabulario=[grupo[0] for grupo in grupos])
+        self.por_continente = {codigo: list(grupo[1:]) for codigo, grupo in enumerate(grupos)}
+        self.cantidad = sum(grupo[1] for grupo in grupos)
+        self.suma_poblacion = sum(grupo[2] for grupo in grupos)
+        self.suma_area = sum(grupo[3] for grupo in grupos)
+
+# --- Motor de Consultas ---
+
+class MotorSqlite:
+    """
+    Motor de consultas sobre la base SQLite, con la misma interfaz que MotorConsultas
+    (filtrar, ordenar, primeros, ejecutar, resumen, sugerencias, valores): los filtros, el orden
+    y las estadísticas se traducen a SQL con parámetros, y las vistas se leen por
+    páginas. Los resultados son los mismos que los del motor en memoria.
+    """
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self._globales = None
+        self._vistas = OrderedDict()  # consulta (sin orden) -> resumen
+
+    @classmethod
+    def desde_csv(cls, ruta_csv):
+        """Abre la base de 'Todos.csv' (importándolo si hace falta) y arma el motor."""
+        return cls(cargar_base(ruta_csv))
+
+    def cerrar(self):
+        """Cierra las conexiones a la base."""
+        self.tabla.cerrar()
+
+    # --- Filtros ---
+
+    def _condiciones(self, consulta):
+        """WHERE (texto y parámetros) con los filtros de la consulta."""
+        condiciones, parametros = [], []
+        if consulta.continente is not None:
+            # La clave va primero: así se usa el índice (clave_continente, continente)
+            condiciones.append("clave_continente = ? AND continente = ?")
+            parametros += [clave_colacion(consulta.continente)[0], consulta.continente]
+        for columna, minimo, maximo in (("poblacion_num", consulta.min_pob, consulta.max_pob),
+                                        ("area_num", consulta.min_area, consulta.max_area)):
+            if minimo is not None:
+                condiciones.append(f"{columna} >= ?")
+                parametros.append(_recortar(minimo))
+            if maximo is not None:
+                condiciones.append(f"{columna} <= ?")
+                parametros.append(_recortar(maximo))
+        termino = normalizar(consulta.termino or '').strip()
+        if termino:
+            if self.tabla.fts and len(termino) >= 3:
+                # Frase entre comillas: con el tokenizador 'trigram' es una búsqueda de subcadena
+                condiciones.append("id IN (SELECT rowid FROM busqueda WHERE busqueda MATCH ?)")
+                parametros.append('"' + termino.replace('"', '""') + '"')
+            else:
+                # Menos de 3 letras no forman un trigrama: se recorre el texto de búsqueda
+                condiciones.append("id IN (SELECT rowid FROM busqueda WHERE instr(texto, ?) > 0)")
+                parametros.append(termino)
+        return " AND ".join(condiciones), parametros
+
+    def filtrar(self, consulta):
+        """La vista (en orden de tabla) con las filas que cumplen los filtros de 'consulta'."""
+        condiciones, parametros = self._condiciones(consulta)
+        return VistaSqlite(self.tabla, condiciones=condiciones, parametros=parametros,
+                           cantidad=None if condiciones else len(self.tabla))
+
+    # --- Orden ---
+
+    def ordenar(self, vista, claves, consulta=None):
+        """
+        La vista ordenada por 'claves' (lista de (columna, descendente)), con los mismos
+        empates que el motor en memoria:
+        - una columna: por número de fila (invertido si es descendente),
+        - varias: se conserva el orden que tenía la vista.
+        'consulta' se acepta por compatibilidad con MotorConsultas (no hay caché que llenar).
+        """
+        claves = validar_orden(claves)
+        if len(claves) == 1:
+            columna, descendente = claves[0]
+            orden = _terminos_orden(columna, descendente) + ["id DESC" if descendente else "id"]
+        else:
+            orden = [termino for columna, descendente in claves for termino in _terminos_orden(columna, descendente)]
+            orden += list(vista.orden)
+        with rendimiento.etapa('ordenar', len(vista)):
+            return vista.copiar(orden=orden)
+
+    # --- Primeras N ---
+
+    def _continentes(self):
+        """Los continentes de la tabla, en orden alfabético (el de la columna 'continente')."""
+        filas = self.tabla.consultar("SELECT DISTINCT continente FROM paises")
+        return sorted((continente for (continente,) in filas), key=clave_colacion)
+
+    def primeros(self, consulta, cantidad, claves=None, ultimos=False, por_continente=False):
+        """
+        Como MotorConsultas.primeros: ORDER BY ... LIMIT N (SQLite guarda sólo las N mejores
+        mientras recorre las filas, no ordena todas); con 'por_continente', un LIMIT por
+        continente unidos con UNION ALL. Las filas elegidas se buscan UNA vez y la vista
+        devuelta son sólo ellas (por 'id'): contarla, leerla u ordenarla después no vuelve a elegirlas.
+        """
+        claves = claves_de_primeros(consulta, claves, ultimos)
+        partes, parametros, orden = [], [], None
+        for continente in ([consulta.continente] if consulta.continente or not por_continente else self._continentes()):
+            elegidas = self.ordenar(self.filtrar(consulta._replace(continente=continente)), claves)
+            elegidas = elegidas.copiar(limite=cantidad, cantidad=None)
+            partes.append(f"SELECT * FROM ({elegidas._consulta('*')})")
+            parametros += elegidas.parametros
+            orden = list(elegidas.orden)
+        if por_continente:
+            orden = _terminos_orden('continente', False) + orden
+        with rendimiento.etapa('primeros') as medicion:
+            filas = self.tabla.consultar(f"SELECT id FROM ({' UNION ALL '.join(partes)}) ORDER BY {', '.join(orden)}",
+                                         parametros) if partes else []
+            medicion.filas = len(filas)
+        # Los id salen de la base (son enteros): se escriben directamente en el SQL
+        return VistaSqlite(self.tabla, condiciones=f"id IN ({','.join(str(fila) for (fila,) in filas)})",
+                           orden=orden or ("id",), cantidad=len(filas))
+
+    # --- Consultas completas ---
+
+    def ejecutar(self, consulta, limite=None, cancelado=None):
+        """
+        Filtra y, si la consulta tiene orden, ordena. 'limite' se queda con las primeras N filas.
+        Las filas se cuentan acá (es lo que cuesta); si 'cancelado' devuelve True mientras
+        tanto, se lanza ConsultaCancelada.
+        """
+        vista = self.filtrar(consulta)
+        if consulta.orden:
+            vista = self.ordenar(vista, consulta.orden)
+        if limite is not None:
+            vista = vista.copiar(limite=limite, cantidad=None)
+        with rendimiento.etapa('filtrar') as medicion:
+            medicion.filas = vista.contar(cancelado)
+        return vista
+
+    def _resumir(self, vista):
+        origen, condiciones, parametros = vista.como_origen()
+        agregados = AgregadosSqlite(self.tabla, origen, condiciones, parametros)
+        cantidad = agregados.cantidad
+        poblaciones = ValoresOrdenados(self.tabla, "poblacion_num", origen, condiciones, parametros, cantidad)
+        return resumir(self.tabla, poblaciones.filas, poblaciones,
+                       ValoresOrdenados(self.tabla, "area_num", origen, condiciones, parametros, cantidad), agregados)
+
+    def resumen(self, vista, consulta=None):
+        """Estadísticas de la vista (mismo formato que estadisticas.py); las de toda la tabla si 'vista' es None."""
+        if vista is None or (vista.limite is None and not vista.condiciones and vista.origen == "paises"):
+            if self._globales is None:
+                self._globales = self._resumir(self.tabla.todas())
+            return self._globales
+        clave = consulta._replace(orden=None) if consulta is not None and vista.limite is None else None
+        if clave is not None and clave in self._vistas:
+            self._vistas.move_to_end(clave)
+            return self._vistas[clave]
+        with rendimiento.etapa('estadisticas', len(vista)):
+            resumen = self._resumir(vista)
+        if clave is not None:
+            self._vistas[clave] = resumen
+            while len(self._vistas) > MAXIMO_VISTAS_GUARDADAS:
+                self._vistas.popitem(last=False)
+        return resumen
+
+    def sugerencias(self, termino, limite=3):
+        """Nombres parecidos a 'termino': las filas que comparten más trigramas (o bigramas) con él."""
+        termino = normalizar(termino).strip()
+        largo = 3 if len(termino) >= 3 else 2
+        votos = Counter()
+        for grama in ngramas(termino, largo):
+            if self.tabla.fts and largo == 3:
+                filas = self.tabla.consultar("SELECT rowid FROM busqueda WHERE busqueda MATCH ?",
+                                             ('"' + grama.replace('"', '""') + '"',))
+            else:
+                filas = self.tabla.consultar("SELECT rowid FROM busqueda WHERE instr(texto, ?) > 0", (grama,))
+            votos.update(fila for (fila,) in filas)
+        nombres = self.tabla.lector('nombre_comun_es')
+        return [nombres(fila) for fila, _ in votos.most_common(limite)]
+
+    def valores(self, vista, columnas):
+        """Genera, fila por fila y en una sola consulta, la lista de valores de 'columnas'."""
+        ubicaciones = [self.tabla.columna_de_lectura(columna) for columna in columnas]
+        seleccion = [self.tabla.columnas_sql[ubicacion[0]] for ubicacion in ubicaciones if ubicacion is not None]
+        formatos, posicion = [], 0
+        for ubicacion in ubicaciones:
+            formatos.append(None if ubicacion is None else (posicion, ubicacion[1]))
+            posicion += ubicacion is not None
+        for valores in vista.filas_con(seleccion or ["id"]):
+            yield [('' if formato is None else str(valores[formato[0]]) if formato[1] else valores[formato[0]])
+                   for formato in formatos]
+
+def crear_motor(ruta_csv, almacen=ALMACEN_MEMORIA):
+    """El motor de consultas de 'ruta_csv' con la tabla en memoria (MotorConsultas) o en SQLite (MotorSqlite)."""
+    if almacen == ALMACEN_SQLITE:
+        return MotorSqlite.desde_csv(ruta_csv)
+    return MotorConsultas.desde_csv(ruta_csv)
@@ -0,0 +1,749 @@
+# --- Importaciones ---
+import argparse     # Argumentos de la línea de comandos
+import csv          # Lectura de los CSV que escribe la ingesta
+import contextlib   # Para silenciar los print() de las funciones medidas
+import datetime     # Fecha de cada corrida
+import io           # Salida descartada
+import json         # Resultados en JSON lines
+import os           # Rutas y archivos temporales
+import platform     # Datos de la máquina
+import subprocess   # Cada tamaño se mide en un proceso aparte
+import sys          # Intérprete y salida estándar
+import tempfile     # Carpeta de trabajo por defecto
+import threading    # El servidor de la API local (--verificar)
+import time         # Tiempos de reloj (perf_counter)
+import tracemalloc  # Memoria reservada por Python en cada etapa
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler # API local para --verificar
+import datosSinteticos # Generador de datos sintéticos con la forma de la API
+import hashlib      # ETag de las respuestas de la API local
+from email.utils import formatdate, parsedate_to_datetime # Last-Modified / If-Modified-Since
+from generarPaises import escribir_filas_en_streaming, unir_csvs_en_uno, TAMANO_TROZO, CAMPOS
+from cacheDatos import ruta_fuentes, ESTADO_ACTUALIZADO
+from instantanea import ruta_instantanea
+from motor import MotorConsultas, armar_consulta, cargar_tabla
+from almacenSqlite import MotorSqlite, importar_csv, ruta_base
+from tablaPaises import TablaPaises, lotes, separar_lista
+from cargaParalela import leer_csv_en_paralelo, procesos_disponibles
+
+# --- Benchmark ---
+# Mide cada etapa de la aplicación con datos sintéticos de distintos tamaños:
+#   python benchmark.py --tamanos 1000,100000,1000000 --salida resultados.jsonl
+#   python benchmark.py --tamanos 1000,100000 --comparar resultados.jsonl
+#   python benchmark.py --tamanos 100000 --motor python --paridad
+#   python benchmark.py --tamanos 100000 --motor sqlite --paridad
+#   python benchmark.py --tamanos 1e7 --procesos 1,2,4,8 --sin-asignaciones
+#   python benchmark.py --verificar
+# Por cada (tamaño, etapa) escribe una línea JSON con el tiempo, la memoria residente
+# (RSS) y la memoria reservada por Python (tracemalloc). Los archivos generados se
+# guardan en --carpeta y se reutilizan entre corridas (mismos datos para la misma semilla).
+# Con --verificar no se mide: se prueba la descarga contra una API local (ver ApiDePrueba).
+
+TAMANOS_POR_DEFECTO = "1000,10000,100000"
+UMBRAL_REGRESION = 1.2  # Una etapa 20% más lenta que la corrida anterior se informa como regresión
+COLUMNAS_VISTA = ["nombre_comun_es", "poblacion", "area", "continente"]
+# --motor -> 'vectorizar' de MotorConsultas ("sqlite" usa MotorSqlite)
+MOTORES = {"auto": None, "python": False, "numpy": True, "sqlite": None}
+FILAS_PANTALLA = 50  # Filas que se leen de cada vista ordenada (las que muestra la tabla)
+TAMANO_VERIFICACION = 2000  # Países de la API local de --verificar
+DEMORA_API_PRUEBA = 0.2     # Segundos que tarda cada respuesta de la API local (para ver si se pide en paralelo)
+
+# --- Medición de memoria ---
+
+def _estado_proceso(campo):
+    """Lee un campo de /proc/self/status en bytes (Linux); None si no está disponible."""
+    try:
+        with open('/proc/self/status') as archivo:
+            for linea in archivo:
+                if linea.startswith(campo + ':'):
+                    return int(linea.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def rss_actual():
+    """Memoria residente del proceso, en bytes."""
+    valor = _estado_proceso('VmRSS')
+    if valor is None:
+        import resource  # No existe en Windows
+        valor = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return valor
+
+def reiniciar_pico_rss():
+    """Reinicia el pico de memoria residente (VmHWM) para medir sólo la etapa siguiente (Linux)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as archivo:
+            archivo.write('5')
+        return True
+    except OSError:
+        return False
+
+def pico_rss():
+    """Pico de memoria residente desde el último reinicio (o desde el inicio del proceso)."""
+    return _estado_proceso('VmHWM') or rss_actual()
+
+def medir(etapa, funcion, asignaciones=True):
+    """
+    Ejecuta 'funcion' y devuelve (resultado, medición).
+    El tiempo y la RSS se miden sin tracemalloc (que hace todo más lento); si se piden
+    las asignaciones, la función se ejecuta otra vez bajo tracemalloc (las etapas son repetibles).
+    """
+    reinicio = reiniciar_pico_rss()
+    rss_antes = rss_actual()
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        segundos = time.perf_counter() - inicio
+    medicion = {
+        "etapa": etapa,
+        "segundos": round(segundos, 6),
+        "rss_bytes": rss_actual(),
+        "rss_pico_bytes": pico_rss(),
+        "rss_pico_delta_bytes": pico_rss() - rss_antes if reinicio else None,
+    }
+    if asignaciones:
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            funcion()
+        netas, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        medicion["asignaciones_pico_bytes"] = pico
+        medicion["asignaciones_netas_bytes"] = netas
+    return resultado, medicion
+
+# --- Datos ---
+
+def preparar_datos(carpeta, tamano, semilla):
+    """Genera (si no existen ya) los archivos sintéticos de un tamaño. Devuelve sus rutas."""
+    base = os.path.join(carpeta, f"{tamano}_{semilla}")
+    rutas = {
+        "todos": os.path.join(base, "Todos.csv"),
+        "csvs": os.path.join(base, "continentes"),
+        "json": os.path.join(base, "json"),
+    }
+    # Marca: la generación terminó completa (con estas columnas; si cambian, se vuelve a generar)
+    marca, esquema = os.path.join(base, "listo"), ",".join(CAMPOS)
+    if not os.path.exists(marca) or open(marca, encoding="utf-8").read() != esquema:
+        os.makedirs(base, exist_ok=True)
+        datosSinteticos.escribir_todos_csv(rutas["todos"], tamano, semilla)
+        datosSinteticos.escribir_csvs_por_continente(rutas["csvs"], tamano, semilla)
+        datosSinteticos.escribir_respuestas_json(rutas["json"], tamano, semilla)
+        with open(marca, "w", encoding="utf-8") as archivo:
+            archivo.write(esquema)
+    return rutas
+
+class RespuestaDeArchivo:
+    """Imita una respuesta de 'requests' (sólo iter_content) leyendo un archivo local."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def iter_content(self, chunk_size=TAMANO_TROZO):
+        with open(self.ruta, 'rb') as archivo:
+            while True:
+                trozo = archivo.read(chunk_size)
+                if not trozo:
+                    break
+                yield trozo
+
+def consultas_de_prueba():
+    """Consultas fijas que cubren cada tipo de filtro (como las que arma 'actualizar_vista')."""
+    return [
+        armar_consulta(),
+        armar_consulta(continente='Asia'),
+        armar_consulta(continente='Europe', min_pob=1_000_000),
+        armar_consulta(min_pob=10_000_000, max_pob=100_000_000),
+        armar_consulta(min_area=1_000, max_area=50_000),
+        armar_consulta(termino='ma'),
+        armar_consulta(termino='ña'),
+        armar_consulta(termino='ano', continente='Africa'),
+        armar_consulta(termino='ка'),
+        armar_consulta(continente='Oceania', max_area=10_000, min_pob=1),
+    ]
+
+# --- Etapas ---
+
+def ordenes_de_prueba():
+    """Cada columna de la vista y un orden de dos columnas (como los que arma 'ordenar_columna')."""
+    return [[(columna, False)] for columna in COLUMNAS_VISTA] + [[("continente", False), ("poblacion", True)]]
+
+def comparar_motores(tabla, otro):
+    """
+    Resuelve las consultas, órdenes y estadísticas de prueba con el motor puro y con 'otro'
+    (el de NumPy o el de SQLite) y devuelve la lista de diferencias (vacía si los resultados son idénticos).
+    """
+    puro = MotorConsultas(tabla, vectorizar=False)
+    diferencias = []
+    for consulta in consultas_de_prueba():
+        vista, otra_vista = puro.filtrar(consulta), otro.filtrar(consulta)
+        if list(vista) != list(otra_vista):
+            diferencias.append(f"filtrar {consulta}")
+            continue
+        for claves in ordenes_de_prueba() + [[(columna, True)] for columna in COLUMNAS_VISTA]:
+            if list(puro.ordenar(vista, claves)) != list(otro.ordenar(otra_vista, claves)):
+                diferencias.append(f"ordenar {claves} {consulta}")
+            # Las primeras N tienen que ser las mismas que las de la vista ordenada entera
+            primeras = list(puro.primeros(consulta, FILAS_PANTALLA, claves))
+            if primeras != list(puro.ordenar(vista, claves))[:FILAS_PANTALLA] or \
+                    primeras != list(otro.primeros(consulta, FILAS_PANTALLA, claves)):
+                diferencias.append(f"primeros {claves} {consulta}")
+            if list(puro.primeros(consulta, 3, claves, por_continente=True)) != \
+                    list(otro.primeros(consulta, 3, claves, por_continente=True)):
+                diferencias.append(f"primeros por continente {claves} {consulta}")
+        if puro.resumen(vista) != otro.resumen(otra_vista):
+            diferencias.append(f"estadisticas {consulta}")
+    if puro.resumen(None) != otro.resumen(None):
+        diferencias.append("estadisticas globales")
+    return diferencias
+
+def valores_esperados(pais):
+    """Lo que deberían valer las columnas nuevas de un país, leído directamente del JSON de la API."""
+    latitud, longitud = (pais.get('latlng') or [None, None])[:2]
+    return {
+        "cca3": pais.get('cca3', ''),
+        "subregion": pais.get('subregion', ''),
+        "latitud": '' if latitud is None else str(latitud),
+        "longitud": '' if longitud is None else str(longitud),
+        "idiomas": list((pais.get('languages') or {}).values()),
+        "monedas": list(pais.get('currencies') or {}),
+        "fronteras": list(pais.get('borders') or []),
+        "zonas_horarias": list(pais.get('timezones') or []),
+    }
+
+def comparar_esquema(carpeta_json, carpeta_csv):
+    """
+    Compara, país por país, el JSON crudo de cada continente con el CSV que escribió la
+    ingesta, ya cargado en una TablaPaises (texto empaquetado, categorías y listas).
+    Devuelve la lista de diferencias (vacía si todo coincide).
+    """
+    diferencias = []
+    for nombre in sorted(os.listdir(carpeta_json)):
+        continente = nombre[:-len(".json")]
+        with open(os.path.join(carpeta_json, nombre), encoding="utf-8") as archivo:
+            paises = json.load(archivo)
+        # La ingesta escribe las filas sin cabecera (la agrega unir_csvs_en_uno)
+        tabla = TablaPaises(CAMPOS + ['continente'])
+        with open(os.path.join(carpeta_csv, f"{continente}.csv"), encoding="utf-8", newline="") as archivo:
+            for lote in lotes(csv.reader(archivo)):
+                tabla.agregar_filas(lote)
+        if len(tabla) != len(paises):
+            diferencias.append(f"{continente}: {len(tabla)} filas en lugar de {len(paises)}")
+            continue
+        for columna in valores_esperados(paises[0]) if paises else []:
+            leer = tabla.lector(columna)
+            lista = columna in tabla.listas
+            for indice, pais in enumerate(paises):
+                valor = separar_lista(leer(indice)) if lista else leer(indice)
+                if valor != valores_esperados(pais)[columna]:
+                    diferencias.append(f"{continente} fila {indice} '{columna}': {valor!r}")
+                    break
+        tabla.cerrar()
+    return diferencias
+
+# --- Verificación contra una API local (--verificar) ---
+
+class ApiDePrueba:
+    """
+    Servidor HTTP local con la forma de la API: '/region/Asia' responde 'Asia.json' de
+    'carpeta_json' (ver datosSinteticos.escribir_respuestas_json), tardando 'demora'
+    segundos. Registra cada petición y cuántas hubo a la vez como máximo; 'fallar'
+    ({continente: n}) hace que las primeras n peticiones de ese continente den 503.
+    Como la API real, manda ETag y Last-Modified y contesta 304 a las peticiones
+    condicionales si el contenido no cambió; 'cambiar(continente, cuerpo)' lo reemplaza.
+      with ApiDePrueba(carpeta_json) as api:
+          procesar_todos_los_continentes(url_base=api.url_base, ...)
+    """
+
+    def __init__(self, carpeta_json, demora=DEMORA_API_PRUEBA):
+        self.carpeta_json = carpeta_json
+        self.demora = demora
+        self.fallar = {}
+        self.peticiones = []   # (continente, código HTTP, ¿condicional?)
+        self._cambiados = {}   # continente -> (cuerpo, fecha de modificación)
+        self.max_simultaneas = 0
+        self._simultaneas = 0
+        self._candado = threading.Lock()
+        self._servidor = None
+
+    @property
+    def url_base(self):
+        return f"http://127.0.0.1:{self._servidor.server_port}/region"
+
+    def __enter__(self):
+        api = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def log_message(self, *argumentos):
+                pass  # Sin una línea por petición en la salida de error
+
+            def do_GET(self):
+                api._responder(self)
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+        threading.Thread(target=self._servidor.serve_forever, name="api-de-prueba", daemon=True).start()
+        return self
+
+    def __exit__(self, *error):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def cambiar(self, continente, cuerpo):
+        """A partir de ahora, '/region/continente' responde 'cuerpo' (bytes), modificado recién."""
+        self._cambiados[continente] = (cuerpo, time.time())
+
+    def _contenido(self, continente):
+        """(cuerpo, fecha de modificación) de un continente, o None si no existe."""
+        if continente in self._cambiados:
+            return self._cambiados[continente]
+        ruta = os.path.join(self.carpeta_json, f"{continente}.json")
+        if not os.path.exists(ruta):
+            return None
+        with open(ruta, "rb") as archivo:
+            return archivo.read(), os.path.getmtime(ruta)
+
+    def olvidar_peticiones(self):
+        with self._candado:
+            self.peticiones = []
+            self.max_simultaneas = 0
+
+    def _responder(self, manejador):
+        continente = manejador.path.rstrip("/").rsplit("/", 1)[-1]
+        with self._candado:
+            self._simultaneas += 1
+            self.max_simultaneas = max(self.max_simultaneas, self._simultaneas)
+        try:
+            time.sleep(self.demora)
+            contenido = self._contenido(continente)
+            etag_cliente = manejador.headers.get("If-None-Match")
+            fecha_cliente = manejador.headers.get("If-Modified-Since")
+            validadores = {}
+            if contenido is None:
+                codigo, cuerpo = 404, b""
+            elif self.fallar.get(continente, 0) > 0:
+                self.fallar[continente] -= 1
+                codigo, cuerpo = 503, b""
+            else:
+                cuerpo, modificado = contenido
+                validadores = {"ETag": '"' + hashlib.sha1(cuerpo).hexdigest() + '"',
+                               "Last-Modified": formatdate(modificado, usegmt=True)}
+                # Como en HTTP: If-None-Match manda; If-Modified-Since sólo si no vino un ETag
+                if etag_cliente is not None:
+                    sin_cambios = etag_cliente == validadores["ETag"]
+                else:
+                    sin_cambios = (fecha_cliente is not None
+                                   and parsedate_to_datetime(fecha_cliente).timestamp() >= int(modificado))
+                codigo = 304 if sin_cambios else 200
+                if sin_cambios:
+                    cuerpo = b""
+            with self._candado:
+                self.peticiones.append((continente, codigo, etag_cliente is not None or fecha_cliente is not None))
+            manejador.send_response(codigo)
+            for nombre, valor in validadores.items():
+                manejador.send_header(nombre, valor)
+            if codigo != 304:
+                manejador.send_header("Content-Type", "application/json")
+                manejador.send_header("Content-Length", str(len(cuerpo)))
+            manejador.end_headers()
+            manejador.wfile.write(cuerpo)
+        finally:
+            with self._candado:
+                self._simultaneas -= 1
+
+def filas_esperadas(carpeta_json):
+    """{continente: filas CSV (listas de texto)} que debería dejar la ingesta de cada JSON de 'carpeta_json'."""
+    esperadas = {}
+    for nombre in sorted(os.listdir(carpeta_json)):
+        continente = nombre[:-len(".json")]
+        salida = io.BytesIO()
+        escribir_filas_en_streaming(RespuestaDeArchivo(os.path.join(carpeta_json, nombre)), salida, continente)
+        esperadas[continente] = list(csv.reader(io.StringIO(salida.getvalue().decode("utf-8"), newline="")))
+    return esperadas
+
+def comparar_maestro(ruta_maestro, esperadas):
+    """Compara 'Todos.csv' con las filas esperadas de cada continente (en su orden). Devuelve las diferencias."""
+    with open(ruta_maestro, encoding="utf-8", newline="") as archivo:
+        lector = csv.reader(archivo)
+        cabecera = next(lector, None)
+        por_continente = {}
+        for fila in lector:
+            por_continente.setdefault(fila[-1], []).append(fila)
+    diferencias = [] if cabecera == CAMPOS + ['continente'] else [f"cabecera {cabecera}"]
+    for continente, filas in esperadas.items():
+        obtenidas = por_continente.pop(continente, [])
+        if obtenidas != filas:
+            diferencias.append(f"{continente}: {len(obtenidas)} filas (se esperaban {len(filas)})"
+                               if len(obtenidas) != len(filas) else f"{continente}: filas distintas")
+    diferencias += [f"continente inesperado '{continente}'" for continente in por_continente]
+    return diferencias
+
+def verificar_descarga(api, carpeta, esperadas):
+    """
+    'procesar_todos_los_continentes' contra la API local: pide las seis regiones a la vez,
+    reintenta las que fallan (503) y 'unir_csvs_en_uno' las une en 'Todos.csv' sin perder filas.
+    """
+    import main  # Sólo aquí: importa la interfaz (Tkinter), que el resto del benchmark no necesita
+    carpeta_csvs, ruta_maestro = os.path.join(carpeta, "continentes"), os.path.join(carpeta, "Todos.csv")
+    api.olvidar_peticiones()
+    api.fallar = {"Asia": 1, "Oceania": 2}
+    resultados = main.procesar_todos_los_continentes(max_hilos=len(main.CONTINENTES), url_base=api.url_base,
+                                                     carpeta_salida=carpeta_csvs)
+    unir_csvs_en_uno(carpeta_csvs, ruta_maestro)
+    diferencias = [f"{continente}: {estado}" for continente, estado in resultados.items() if estado != ESTADO_ACTUALIZADO]
+    pedidas = {peticion[0] for peticion in api.peticiones}
+    if pedidas != set(main.CONTINENTES):
+        diferencias.append(f"regiones pedidas: {sorted(pedidas)}")
+    if api.max_simultaneas < len(main.CONTINENTES):
+        diferencias.append(f"como máximo {api.max_simultaneas} peticiones a la vez (se esperaban {len(main.CONTINENTES)})")
+    for continente, veces in (("Asia", 2), ("Oceania", 3)):
+        hechas = sum(1 for peticion in api.peticiones if peticion[0] == continente)
+        if hechas != veces:
+            diferencias.append(f"{continente}: {hechas} peticiones (con reintentos se esperaban {veces})")
+    return diferencias + comparar_maestro(ruta_maestro, esperadas)
+
+def verificar_cache(api, carpeta, esperadas):
+    """
+    'actualizar_datos' (la caché con TTL y peticiones condicionales) contra la API local:
+    con la caché fresca no pide nada; vencida, recibe 304 y 'Todos.csv' queda idéntico byte
+    a byte; si cambia una región, sólo esa se vuelve a descargar y los tramos de las demás
+    se conservan tal cual.
+    """
+    import main  # Sólo aquí (ver verificar_descarga)
+    from cacheDatos import cargar_manifiesto
+    ruta_maestro = os.path.join(carpeta, "Todos.csv")
+    diferencias = []
+
+    def actualizar(ttl):
+        api.olvidar_peticiones()
+        regenerado = main.actualizar_datos(carpeta, ruta_maestro, ttl=ttl, url_base=api.url_base)
+        return regenerado, sorted(api.peticiones)
+
+    def leer():
+        with open(ruta_maestro, "rb") as archivo:
+            return archivo.read()
+
+    # 1. Primera vez: se descarga todo
+    regenerado, peticiones = actualizar(main.TTL_POR_DEFECTO)
+    if not regenerado or [codigo for _, codigo, _ in peticiones] != [200] * len(main.CONTINENTES):
+        diferencias.append(f"primera descarga: regenerado={regenerado}, peticiones={peticiones}")
+    diferencias += comparar_maestro(ruta_maestro, esperadas)
+    antes = leer()
+
+    # 2. Caché fresca: ninguna petición
+    regenerado, peticiones = actualizar(main.TTL_POR_DEFECTO)
+    if regenerado or peticiones:
+        diferencias.append(f"caché fresca: regenerado={regenerado}, peticiones={peticiones}")
+
+    # 3. Caché vencida sin cambios en la API: todo 304 y el maestro no se toca
+    regenerado, peticiones = actualizar(0)
+    if regenerado or peticiones != [(c, 304, True) for c in sorted(main.CONTINENTES)]:
+        diferencias.append(f"caché vencida: regenerado={regenerado}, peticiones={peticiones}")
+    if leer() != antes:
+        diferencias.append("caché vencida: 'Todos.csv' cambió")
+
+    # 4. Cambia una región (se quita su último país): sólo esa se descarga
+    rangos = {c: (e["inicio"], e["fin"]) for c, e in cargar_manifiesto(carpeta)["regiones"].items()}
+    with open(os.path.join(api.carpeta_json, "Europe.json"), encoding="utf-8") as archivo:
+        europa = json.load(archivo)
+    api.cambiar("Europe", json.dumps(europa[:-1], ensure_ascii=False).encode("utf-8"))
+    regenerado, peticiones = actualizar(0)
+    codigos = {continente: codigo for continente, codigo, _ in peticiones}
+    if not regenerado or codigos != {c: 200 if c == "Europe" else 304 for c in main.CONTINENTES}:
+        diferencias.append(f"región cambiada: regenerado={regenerado}, peticiones={peticiones}")
+    despues = leer()
+    for continente, entrada in cargar_manifiesto(carpeta)["regiones"].items():
+        inicio, fin = rangos[continente]
+        if continente != "Europe" and antes[inicio:fin] != despues[entrada["inicio"]:entrada["fin"]]:
+            diferencias.append(f"región cambiada: el tramo de {continente} no se conservó")
+    diferencias += comparar_maestro(ruta_maestro, {**esperadas, "Europe": esperadas["Europe"][:-1]})
+    return diferencias
+
+def verificar(carpeta, semilla):
+    """Corre las verificaciones contra la API local. Devuelve una medición por verificación (con sus diferencias)."""
+    rutas = preparar_datos(carpeta, TAMANO_VERIFICACION, semilla)
+    esperadas = filas_esperadas(rutas["json"])
+    verificaciones = [("descarga", verificar_descarga), ("cache", verificar_cache)]
+    mediciones = []
+    for nombre, funcion in verificaciones:
+        with ApiDePrueba(rutas["json"]) as api:  # Una API nueva por verificación (sin cambios de la anterior)
+            trabajo = tempfile.mkdtemp(prefix=f"verificar_{nombre}_", dir=carpeta)
+            diferencias, medicion = medir(f"verificar_{nombre}", lambda: funcion(api, trabajo, esperadas), asignaciones=False)
+            medicion["diferencias"] = diferencias
+            mediciones.append(medicion)
+    return mediciones
+
+def olvidar_resultados(motor):
+    """Vacía las cachés de resultados del motor (cada etapa se mide en frío)."""
+    if isinstance(motor, MotorSqlite):
+        motor.tabla.olvidar()
+        motor._vistas.clear()
+        motor._globales = None
+    else:
+        motor.cache.invalidar()
+        motor.estadisticas._vistas.clear()
+
+def medir_tamano(tamano, semilla, carpeta, asignaciones, motor_elegido="auto", paridad=False, procesos=None):
+    """
+    Mide todas las etapas para un tamaño con el motor elegido (una clave de MOTORES).
+    Con 'paridad', además compara el motor puro con el de NumPy o el de SQLite (etapa "paridad_motores")
+    y el JSON crudo con lo que quedó de él después de la ingesta (etapa "paridad_esquema").
+    'procesos' es la lista de cantidades de procesos con que se mide la lectura en paralelo
+    (por defecto, una con todos los núcleos).
+    Devuelve la lista de mediciones.
+    """
+    mediciones = []
+    rutas, medicion = medir("generar_datos", lambda: preparar_datos(carpeta, tamano, semilla), asignaciones=False)
+    mediciones.append(medicion)
+    salida = os.path.join(carpeta, f"{tamano}_{semilla}", "salida")
+    os.makedirs(salida, exist_ok=True)
+
+    # Ingesta: del JSON crudo de la API a CSV (parser en streaming, sin red)
+    def ingesta():
+        total = 0
+        for nombre in sorted(os.listdir(rutas["json"])):
+            continente = nombre[:-len(".json")]
+            with open(os.path.join(salida, f"{continente}.csv"), 'wb') as archivo:
+                cantidad, _ = escribir_filas_en_streaming(RespuestaDeArchivo(os.path.join(rutas["json"], nombre)), archivo, continente)
+                total += cantidad
+        return total
+    _, medicion = medir("ingesta_json", ingesta, asignaciones)
+    mediciones.append(medicion)
+
+    # Unión de los CSV por continente (unir_csvs_en_uno): desde cero y, después, con un solo continente cambiado
+    unido = os.path.join(salida, "Todos.csv")
+    if os.path.exists(ruta_fuentes(unido)):
+        os.remove(ruta_fuentes(unido))
+    _, medicion = medir("unir_csvs", lambda: unir_csvs_en_uno(rutas["csvs"], unido), asignaciones)
+    mediciones.append(medicion)
+    def unir_con_un_cambio():
+        # Se agrega una fila al último continente y, al terminar, se deja el archivo como estaba
+        ruta = os.path.join(rutas["csvs"], sorted(f for f in os.listdir(rutas["csvs"]) if f.endswith(".csv"))[-1])
+        info = os.stat(ruta)
+        with open(ruta, 'ab') as archivo:
+            archivo.write(",".join("1" if campo in ("poblacion", "area") else "Cambio" for campo in CAMPOS).encode() + b"\r\n")
+        try:
+            return unir_csvs_en_uno(rutas["csvs"], unido)
+        finally:
+            os.truncate(ruta, info.st_size)
+            os.utime(ruta, ns=(info.st_atime_ns, info.st_mtime_ns))
+    _, medicion = medir("unir_csvs_incremental", unir_con_un_cambio, asignaciones)
+    mediciones.append(medicion)
+
+    # Carga (cargar_datos_en_memoria): sin instantánea (parsea el CSV y la escribe) y con instantánea
+    def cargar_sin_instantanea():
+        if os.path.exists(ruta_instantanea(rutas["todos"])):
+            os.remove(ruta_instantanea(rutas["todos"]))
+        return cargar_tabla(rutas["todos"])
+    tabla, medicion = medir("cargar_csv", cargar_sin_instantanea, asignaciones)
+    mediciones.append(medicion)
+
+    # Lectura del CSV sola (sin instantánea): en un proceso y repartida en varios (ver cargaParalela.py)
+    _, medicion = medir("leer_csv", lambda: TablaPaises.desde_csv(rutas["todos"]), asignaciones)
+    mediciones.append(medicion)
+    for cantidad in procesos or [procesos_disponibles()]:
+        _, medicion = medir("leer_csv_paralelo", lambda: leer_csv_en_paralelo(rutas["todos"], cantidad), asignaciones)
+        medicion["procesos"] = cantidad
+        mediciones.append(medicion)
+    _, medicion = medir("cargar_instantanea", lambda: cargar_tabla(rutas["todos"]), asignaciones)
+    mediciones.append(medicion)
+
+    if motor_elegido == "sqlite":
+        # Importación a SQLite (una vez por CSV) y apertura de la base ya importada
+        def importar():
+            for sufijo in ("", "-wal", "-shm"):
+                if os.path.exists(ruta_base(rutas["todos"]) + sufijo):
+                    os.remove(ruta_base(rutas["todos"]) + sufijo)
+            return importar_csv(rutas["todos"])
+        _, medicion = medir("importar_sqlite", importar, asignaciones)
+        mediciones.append(medicion)
+        motor, medicion = medir("abrir_sqlite", lambda: MotorSqlite.desde_csv(rutas["todos"]), asignaciones)
+        medicion["motor"] = "sqlite"
+    else:
+        # Índices, búsqueda y agregados (se construyen una vez por carga)
+        motor, medicion = medir("construir_indices", lambda: MotorConsultas(tabla, MOTORES[motor_elegido]), asignaciones)
+        medicion["motor"] = "numpy" if motor.vectorizado else "python"
+    mediciones.append(medicion)
+
+    # Filtros (actualizar_vista), siempre con la caché vacía (con SQLite, contar las filas es lo que cuesta)
+    consultas = consultas_de_prueba()
+    def filtrar():
+        olvidar_resultados(motor)
+        return [motor.ejecutar(consulta) for consulta in consultas]
+    vistas, medicion = medir("filtrar", filtrar, asignaciones)
+    mediciones.append(medicion)
+
+    # Orden (ordenar_columna): cada columna y un orden de dos columnas, sobre todas las filas y sobre una vista filtrada
+    # (se leen las filas que mostraría la tabla)
+    ordenes = ordenes_de_prueba()
+    def ordenar():
+        olvidar_resultados(motor)
+        return [motor.ordenar(vista, claves)[:FILAS_PANTALLA] for vista in (vistas[0], vistas[2]) for claves in ordenes]
+    _, medicion = medir("ordenar", ordenar, asignaciones)
+    mediciones.append(medicion)
+
+    # Primeras N ("Mostrar primeros N"): las mismas vistas y órdenes, sin ordenar las vistas enteras
+    # (con los filtros ya resueltos, como en "ordenar"); después, las primeras N de cada continente
+    olvidar_resultados(motor)
+    for consulta in (consultas[0], consultas[2]):
+        motor.filtrar(consulta)
+    def primeros():
+        return [list(motor.primeros(consulta, FILAS_PANTALLA, claves)) for consulta in (consultas[0], consultas[2])
+                for claves in ordenes]
+    _, medicion = medir("primeros", primeros, asignaciones)
+    mediciones.append(medicion)
+    def primeros_por_continente():
+        olvidar_resultados(motor)
+        return [list(motor.primeros(consultas[0], FILAS_PANTALLA, claves, por_continente=True)) for claves in ordenes]
+    _, medicion = medir("primeros_por_continente", primeros_por_continente, asignaciones)
+    mediciones.append(medicion)
+
+    # Estadísticas (mostrar_ventana_estadisticas): globales y de cada vista filtrada
+    def estadisticas():
+        olvidar_resultados(motor)
+        return [motor.resumen(None)] + [motor.resumen(vista, consulta) for vista, consulta in zip(vistas, consultas)]
+    _, medicion = medir("estadisticas", estadisticas, asignaciones)
+    mediciones.append(medicion)
+
+    # Lectura de las filas de una vista (lo que hacen la tabla virtual y la exportación)
+    def leer_filas():
+        return sum(1 for _ in motor.valores(vistas[0], COLUMNAS_VISTA))
+    _, medicion = medir("leer_filas", leer_filas, asignaciones)
+    mediciones.append(medicion)
+
+    # Paridad: los dos motores tienen que dar exactamente lo mismo
+    if paridad:
+        otro = motor if motor_elegido == "sqlite" else MotorConsultas(tabla, vectorizar=True)
+        diferencias, medicion = medir("paridad_motores", lambda: comparar_motores(tabla, otro), asignaciones=False)
+        medicion["diferencias"] = diferencias
+        mediciones.append(medicion)
+        # Y la ingesta tiene que conservar cada campo del JSON (incluidas las listas)
+        diferencias, medicion = medir("paridad_esquema", lambda: comparar_esquema(rutas["json"], salida), asignaciones=False)
+        medicion["diferencias"] = diferencias
+        mediciones.append(medicion)
+
+    if motor_elegido == "sqlite":
+        motor.cerrar()
+    tabla.cerrar()
+    return mediciones
+
+# --- Corrida completa ---
+
+def version_del_codigo():
+    """Commit actual (si el proyecto está en un repositorio git)."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _clave(registro):
+    """Identifica una medición entre corridas (la lectura en paralelo, también por cantidad de procesos)."""
+    return registro["tamano"], registro["etapa"], registro.get("procesos")
+
+def comparar(resultados, ruta_anterior, umbral):
+    """
+    Compara los tiempos con la última corrida guardada en 'ruta_anterior'
+    e informa (en stderr) las etapas que se pusieron más lentas. Devuelve la cantidad de regresiones.
+    """
+    anteriores = {}
+    with open(ruta_anterior, encoding='utf-8') as archivo:
+        for linea in archivo:
+            if linea.strip():
+                registro = json.loads(linea)
+                anteriores[_clave(registro)] = registro  # Gana la más reciente
+    regresiones = 0
+    for registro in resultados:
+        anterior = anteriores.get(_clave(registro))
+        if anterior is None or registro["etapa"] == "generar_datos" or not anterior["segundos"]:
+            continue
+        razon = registro["segundos"] / anterior["segundos"]
+        marca = ""
+        if razon >= umbral:
+            marca = "  <-- REGRESIÓN"
+            regresiones += 1
+        etapa = registro["etapa"] + (f" x{registro['procesos']}" if "procesos" in registro else "")
+        print(f"{registro['tamano']:>10} {etapa:<20} {anterior['segundos']:>10.4f}s -> "
+              f"{registro['segundos']:>10.4f}s  (x{razon:.2f}){marca}", file=sys.stderr)
+    return regresiones
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la aplicación con datos sintéticos.")
+    parser.add_argument("--tamanos", default=TAMANOS_POR_DEFECTO,
+                        help=f"Cantidades de filas separadas por coma (por defecto {TAMANOS_POR_DEFECTO}; admite 1e6)")
+    parser.add_argument("--semilla", type=int, default=datosSinteticos.SEMILLA_POR_DEFECTO)
+    parser.add_argument("--carpeta", default=os.path.join(tempfile.gettempdir(), "benchmark_paises"),
+                        help="Carpeta para los datos generados (se reutilizan entre corridas)")
+    parser.add_argument("--salida", help="Agrega los resultados (JSON lines) a este archivo en lugar de la salida estándar")
+    parser.add_argument("--comparar", help="Archivo de resultados anterior contra el que comparar los tiempos")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION, help="Razón de tiempo que cuenta como regresión")
+    parser.add_argument("--sin-asignaciones", action="store_true", help="No medir con tracemalloc (más rápido)")
+    parser.add_argument("--motor", choices=list(MOTORES), default="auto",
+                        help="Motor de consultas: con NumPy si está instalado (auto), puro, con NumPy o sobre SQLite")
+    parser.add_argument("--paridad", action="store_true",
+                        help="Compara el motor puro con el de NumPy (o el de SQLite con --motor sqlite) y el JSON"
+                             " crudo con lo ingerido; sale con error si difieren")
+    parser.add_argument("--procesos", help="Cantidades de procesos para medir la lectura en paralelo, separadas por coma"
+                                           " (por defecto, todos los núcleos)")
+    parser.add_argument("--verificar", action="store_true",
+                        help="No mide: prueba la descarga contra una API local (sale con error si algo falla)")
+    parser.add_argument("--interno", type=int, help=argparse.SUPPRESS)  # Un solo tamaño, en el proceso hijo
+    argumentos = parser.parse_args(argv)
+
+    # --- Verificación contra la API local ---
+    if argumentos.verificar:
+        diferencias = 0
+        for medicion in verificar(argumentos.carpeta, argumentos.semilla):
+            print(json.dumps(medicion, ensure_ascii=False))
+            for diferencia in medicion["diferencias"]:
+                print(f"Diferencia ({medicion['etapa']}): {diferencia}", file=sys.stderr)
+                diferencias += 1
+        return 1 if diferencias else 0
+
+    # --- Proceso hijo: mide un tamaño y escribe las mediciones ---
+    if argumentos.interno is not None:
+        diferencias = 0
+        for medicion in medir_tamano(argumentos.interno, argumentos.semilla, argumentos.carpeta,
+                                     not argumentos.sin_asignaciones, argumentos.motor, argumentos.paridad,
+                                     [int(texto) for texto in argumentos.procesos.split(",")] if argumentos.procesos else None):
+            print(json.dumps(medicion, ensure_ascii=False))
+            for diferencia in medicion.get("diferencias", []):
+                print(f"Diferencia ({medicion['etapa']}): {diferencia}", file=sys.stderr)
+                diferencias += 1
+        return 1 if diferencias else 0
+
+    # --- Proceso principal: un proceso nuevo por tamaño (la memoria de uno no afecta al otro) ---
+    contexto = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": version_del_codigo(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "semilla": argumentos.semilla,
+    }
+    resultados = []
+    for tamano in (int(float(texto)) for texto in argumentos.tamanos.split(",")):
+        comando = [sys.executable, os.path.abspath(__file__), "--interno", str(tamano),
+                   "--semilla", str(argumentos.semilla), "--carpeta", argumentos.carpeta]
+        if argumentos.sin_asignaciones:
+            comando.append("--sin-asignaciones")
+        comando += ["--motor", argumentos.motor] + (["--paridad"] if argumentos.paridad else [])
+        if argumentos.procesos:
+            comando += ["--procesos", argumentos.procesos]
+        proceso = subprocess.run(comando, capture_output=True, text=True)
+        if proceso.returncode != 0:
+            print(proceso.stderr, file=sys.stderr)
+            return proceso.returncode
+        for linea in proceso.stdout.splitlines():
+            resultados.append({**contexto, "tamano": tamano, **json.loads(linea)})
+
+    if argumentos.comparar:
+        regresiones = comparar(resultados, argumentos.comparar, argumentos.umbral)
+    archivo = open(argumentos.salida, "a", encoding="utf-8") if argumentos.salida else sys.stdout
+    try:
+        for registro in resultados:
+            archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    finally:
+        if archivo is not sys.stdout:
+            archivo.close()
+    return 1 if argumentos.comparar and regresiones else 0
+
+# --- Punto de Entrada del Script ---
+if __name__ == "__main__":
+    sys.exit(main())
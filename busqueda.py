@@ -0,0 +1,352 @@
+# --- Importaciones de Módulos ---
+import re                    # Para buscar un término largo de corrido en todos los textos
+import unicodedata           # Para quitar tildes ("Japón" -> "japon")
+from array import array      # Listas compactas de números de fila
+from bisect import bisect_left  # Para intersecar listas ordenadas y buscar prefijos
+from collections import Counter # Para el ranking de sugerencias (tolerante a errores)
+from tablaPaises import ColumnaTexto
+
+# NumPy es OPCIONAL: arma el índice por trozos y cruza las listas de filas mucho más rápido
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Columnas sobre las que se busca
+COLUMNAS_BUSQUEDA = ('nombre_comun_es', 'nombre_oficial_es', 'capital')
+SEPARADOR = '\x00'  # Separa las columnas dentro del texto normalizado de una fila (nunca aparece en una búsqueda)
+LARGOS_GRAMAS = (1, 2, 3)  # Se indexan letras, bigramas y trigramas: un término de hasta 3 letras es UN n-grama
+BITS_CARACTER = 21         # Todo carácter Unicode entra en 21 bits: un trigrama entra en un entero de 63
+FILAS_POR_TROZO = 50_000   # Filas que se procesan juntas al armar el índice con NumPy (acota la memoria)
+RECORRER_DESDE = 1 / 8     # Con candidatos en más de esta fracción de las filas, conviene recorrer los textos (con NumPy)
+
+class _SinDiacriticos(dict):
+    """
+    Tabla para str.translate que borra los caracteres combinantes (tildes, diéresis...).
+    Se completa sola: cada carácter se consulta en 'unicodedata' sólo la primera vez que aparece.
+    """
+
+    def __missing__(self, codigo):
+        valor = None if unicodedata.combining(chr(codigo)) else codigo
+        self[codigo] = valor
+        return valor
+
+_SIN_DIACRITICOS = _SinDiacriticos()
+
+def normalizar(texto):
+    """Pasa a minúsculas (casefold) y quita tildes/diacríticos: 'Japón' -> 'japon'."""
+    if texto.isascii():
+        return texto.lower()  # Sin tildes que quitar (y en ASCII casefold es lower)
+    return unicodedata.normalize('NFKD', texto.casefold()).translate(_SIN_DIACRITICOS)
+
+def clave_colacion(texto):
+    """
+    Clave para ordenar textos en español sin depender del 'locale' del sistema:
+    ignora mayúsculas y tildes ("Árbol" junto a "arbol") pero deja la ñ como
+    letra propia entre la n y la o ("Nueva" < "Ñandú" < "Omán").
+    El texto original desempata, así el orden es siempre el mismo.
+    """
+    base = unicodedata.normalize('NFC', texto.casefold()).replace('ñ', '\x00')
+    return normalizar(base).replace('\x00', 'n{'), texto  # '{' va justo después de la 'z'
+
+def ngramas(texto, largo):
+    """Devuelve el conjunto de n-gramas (subcadenas de 'largo' caracteres) de un texto."""
+    return {texto[i:i + largo] for i in range(len(texto) - largo + 1)}
+
+def codigo_grama(grama):
+    """
+    Número que identifica un n-grama de 1 a 3 caracteres: sus caracteres uno tras otro, 21 bits
+    cada uno. Ningún carácter indexado vale 0 (el separador no se indexa), así que los n-gramas
+    de cada largo caen en rangos distintos y, dentro de un largo, el orden es el de los caracteres.
+    """
+    codigo = 0
+    for caracter in grama:
+        codigo = codigo << BITS_CARACTER | ord(caracter)
+    return codigo
+
+def _a_array(filas):
+    """Copia una lista de filas (array, memoryview de la instantánea o arreglo de NumPy) a un array('I')."""
+    resultado = array('I')
+    resultado.frombytes(memoryview(filas).cast('B'))
+    return resultado
+
+def intersecar(listas):
+    """
+    Interseca listas de filas ORDENADAS empezando por la más corta: cada fila de la
+    más corta se busca en las demás con búsqueda binaria (con NumPy, todas a la vez).
+    """
+    listas = sorted(listas, key=len)
+    if np is not None:
+        resultado = np.frombuffer(listas[0], dtype=np.uint32)
+        for otra in listas[1:]:
+            otra = np.frombuffer(otra, dtype=np.uint32)
+            if not len(resultado) or not len(otra):
+                return array('I')
+            posiciones = np.minimum(np.searchsorted(otra, resultado), len(otra) - 1)
+            resultado = resultado[otra[posiciones] == resultado]
+        return _a_array(resultado)
+    resultado = _a_array(listas[0])
+    for otra in listas[1:]:
+        if not resultado:
+            break
+        filtrado = array('I')
+        posicion = 0
+        for fila in resultado:
+            posicion = bisect_left(otra, fila, posicion)  # Las dos están ordenadas: no hace falta volver atrás
+            if posicion < len(otra) and otra[posicion] == fila:
+                filtrado.append(fila)
+        resultado = filtrado
+    return resultado
+
+def _unir_columna(tabla, columna, cantidad):
+    """Todos los valores de una columna en un único texto, separados por SEPARADOR."""
+    texto = tabla.texto.get(columna) if np is not None else None
+    if texto is None:
+        leer = tabla.lector(columna)
+        return SEPARADOR.join([leer(fila) for fila in range(cantidad)])
+    # Con NumPy, los separadores se insertan directo en los bytes de la columna (se decodifica una vez)
+    offsets = np.frombuffer(texto.offsets, dtype=np.uint64)
+    heap = np.frombuffer(texto.heap, dtype=np.uint8)[:int(offsets[cantidad])]
+    return np.insert(heap, offsets[1:cantidad].astype(np.intp), ord(SEPARADOR)).tobytes().decode('utf-8')
+
+def _normalizar_columna(tabla, columna, cantidad):
+    """Los valores normalizados de una columna: todos juntos en un único texto (salvo que alguno traiga el separador)."""
+    junto = _unir_columna(tabla, columna, cantidad)
+    if junto.count(SEPARADOR) != max(cantidad - 1, 0):
+        leer = tabla.lector(columna)
+        return [normalizar(leer(fila)) for fila in range(cantidad)]
+    return normalizar(junto).split(SEPARADOR) if cantidad else []
+
+def _listas(por_fila):
+    """
+    Lista de filas de cada n-grama, recorriendo fila por fila (sin NumPy).
+    Devuelve (gramas, inicios, filas), como los guarda IndiceBusqueda.
+    """
+    listas = {}
+    for fila, texto in enumerate(por_fila):
+        # Los n-gramas se toman de cada columna por separado (no cruzan el separador)
+        gramas = set()
+        for valor in texto.split(SEPARADOR):
+            for largo in LARGOS_GRAMAS:
+                gramas.update(valor[i:i + largo] for i in range(len(valor) - largo + 1))
+        for grama in gramas:
+            lista = listas.get(grama)
+            if lista is None:
+                lista = listas[grama] = array('I')
+            lista.append(fila)
+    gramas, inicios, filas = array('Q'), array('Q', [0]), array('I')
+    for codigo, grama in sorted((codigo_grama(grama), grama) for grama in listas):
+        gramas.append(codigo)
+        filas += listas.pop(grama)
+        inicios.append(len(filas))
+    return gramas, inicios, filas
+
+def _distintos(valores):
+    """Los valores distintos y ordenados: ordenar y saltear los repetidos (con enteros es mucho más rápido que unique)."""
+    valores = np.sort(valores)
+    return valores[np.concatenate(([True], valores[1:] != valores[:-1]))] if len(valores) else valores
+
+def _grupos(ordenados):
+    """Dónde empieza y cuánto mide cada grupo de valores iguales de un arreglo ordenado."""
+    primeras = np.flatnonzero(np.concatenate(([True], ordenados[1:] != ordenados[:-1])))
+    return primeras, np.diff(np.append(primeras, len(ordenados)))
+
+def _caracteres(por_fila):
+    """Los caracteres de un trozo de filas (cada una termina en el separador) como arreglo de códigos Unicode."""
+    return np.frombuffer((SEPARADOR.join(por_fila) + SEPARADOR).encode('utf-32-le'), dtype=np.uint32)
+
+def _gramas_de_trozo(por_fila, primera, letra, bits, bits_fila):
+    """
+    Pares (n-grama, fila) sin repetir de un trozo de filas, ordenados por n-grama y fila.
+    Cada carácter se reemplaza por su posición en el alfabeto ('letra[código Unicode]', de
+    'bits' bits; el separador es el 0), así cada n-grama junto con la fila dentro del trozo
+    entra en una única clave de 64 bits:
+    ordenar esas claves (sin repetidas) ya agrupa las filas de cada n-grama.
+    """
+    letras = letra[_caracteres(por_fila)]
+    largos = np.fromiter(map(len, por_fila), dtype=np.int64, count=len(por_fila)) + 1
+    fila_de = np.repeat(np.arange(len(por_fila), dtype=np.uint64), largos)
+    indexable = letras != 0
+    claves = []
+    codigo, vale = letras, indexable
+    for largo in LARGOS_GRAMAS:
+        if largo > 1:
+            # El n-grama de 'largo' caracteres es el anterior más el carácter siguiente
+            codigo = (codigo[:-1] << np.uint64(bits)) | letras[largo - 1:]
+            vale = vale[:-1] & indexable[largo - 1:]
+        claves.append((codigo[vale] << np.uint64(bits_fila)) | fila_de[:len(vale)][vale])
+    claves = _distintos(np.concatenate(claves))
+    filas = (claves & np.uint64((1 << bits_fila) - 1)).astype(np.uint32) + np.uint32(primera)
+    return claves >> np.uint64(bits_fila), filas
+
+def _listas_vectorizadas(por_fila):
+    """
+    Como '_listas', con NumPy y por trozos de filas (las claves de 64 bits y su orden son
+    sólo de un trozo a la vez), en tres pasadas: los caracteres que aparecen, los n-gramas
+    de cada trozo (y de ahí cuántas filas tiene cada uno) y, por último, cada trozo copia
+    sus filas al final de cada lista.
+    """
+    # --- 1. El alfabeto: los caracteres que aparecen (el separador, 0, queda primero) ---
+    alfabeto = _distintos(np.concatenate([_distintos(_caracteres(por_fila[inicio:inicio + FILAS_POR_TROZO]))
+                                         for inicio in range(0, len(por_fila), FILAS_POR_TROZO)] or [np.zeros(1, np.uint32)]))
+    bits = max(1, (len(alfabeto) - 1).bit_length())
+    letra = np.zeros(int(alfabeto[-1]) + 1, dtype=np.uint64)  # Código Unicode -> posición en el alfabeto
+    letra[alfabeto] = np.arange(len(alfabeto), dtype=np.uint64)
+    filas_por_trozo = min(FILAS_POR_TROZO, 1 << (64 - 3 * bits))  # Con alfabetos enormes, trozos más chicos
+    bits_fila = max(1, (filas_por_trozo - 1).bit_length())
+    # --- 2. Los n-gramas de cada trozo (se guardan sus filas y, de cada n-grama distinto, cuántas son) ---
+    distintos, cantidades, de_trozos = [np.zeros(0, dtype=np.uint64)], [np.zeros(0, dtype=np.int64)], []
+    for inicio in range(0, len(por_fila), filas_por_trozo):
+        codigos, filas_trozo = _gramas_de_trozo(por_fila[inicio:inicio + filas_por_trozo], inicio, letra, bits, bits_fila)
+        primeras, largos = _grupos(codigos)
+        distintos.append(codigos[primeras])
+        cantidades.append(largos)
+        de_trozos.append((primeras, filas_trozo))
+    distintos, cantidades = np.concatenate(distintos), np.concatenate(cantidades)
+    gramas = _distintos(distintos)
+    posiciones = np.searchsorted(gramas, distintos)  # Posición en 'gramas' de cada n-grama de cada trozo
+    por_grama = np.zeros(len(gramas), dtype=np.int64)
+    np.add.at(por_grama, posiciones, cantidades)
+    inicios = np.zeros(len(gramas) + 1, dtype=np.int64)
+    np.cumsum(por_grama, out=inicios[1:])
+    # --- 3. Cada trozo agrega sus filas a las listas (los trozos van en orden: las listas quedan ordenadas) ---
+    filas = np.empty(int(inicios[-1]), dtype=np.uint32)
+    siguiente = inicios[:-1].copy()
+    desde = 0
+    for primeras, filas_trozo in de_trozos:
+        grama, largos = posiciones[desde:desde + len(primeras)], cantidades[desde:desde + len(primeras)]
+        desde += len(primeras)
+        filas[np.repeat(siguiente[grama] - primeras, largos) + np.arange(len(filas_trozo))] = filas_trozo
+        siguiente[grama] += largos
+    # Los n-gramas se guardan con su código de siempre (ver 'codigo_grama'): mismo orden, otro alfabeto
+    unicode = alfabeto.astype(np.uint64)
+    mascara = np.uint64((1 << bits) - 1)
+    gramas = ((unicode[(gramas >> np.uint64(2 * bits)) & mascara] << np.uint64(2 * BITS_CARACTER))
+              | (unicode[(gramas >> np.uint64(bits)) & mascara] << np.uint64(BITS_CARACTER))
+              | unicode[gramas & mascara])
+    resultado = array('Q'), array('Q'), array('I')
+    for destino, valores in zip(resultado, (gramas, inicios.astype(np.uint64), filas)):
+        destino.frombytes(memoryview(valores).cast('B'))
+    return resultado
+
+class IndiceBusqueda:
+    """
+    Índice de búsqueda por texto sobre nombres (común y oficial) y capitales.
+    - Guarda letras, bigramas y trigramas de los textos normalizados (sin tildes ni mayúsculas),
+      cada uno con la lista ordenada de filas que lo contienen. Todo va en arreglos (los códigos
+      de los n-gramas, dónde empieza la lista de cada uno y las listas una tras otra), así la
+      instantánea lo guarda como las columnas y lo abre sin volver a armarlo (ver instantanea.py).
+    - Un término de hasta 3 letras ES un n-grama: su lista es el resultado, sin revisar nada.
+      Uno más largo interseca las listas de sus trigramas y confirma esos candidatos contra
+      el texto normalizado (los trigramas podrían estar separados en el texto); si son muchos,
+      busca el término de corrido en todos los textos, sin decodificar fila por fila.
+    - Las búsquedas por prefijo usan los nombres comunes ordenados (búsqueda binaria).
+    Sin las partes ya armadas (ej. las de la instantánea), se arma recorriendo la tabla.
+    """
+
+    def __init__(self, tabla, columnas=COLUMNAS_BUSQUEDA, textos=None, orden_nombres=None, gramas=None,
+                 inicios=None, filas=None):
+        self.tabla = tabla
+        self.columnas = [columna for columna in columnas if columna in tabla.cabecera]
+        if textos is None:
+            textos, orden_nombres, gramas, inicios, filas = self._armar()
+        self.textos = textos                # Texto normalizado de cada fila: "nombre\x00oficial\x00capital\x00"
+        self.orden_nombres = orden_nombres  # Filas ordenadas por nombre común normalizado (para prefijos)
+        self.gramas = gramas                # Código de cada n-grama (ver 'codigo_grama'), en orden creciente
+        self.inicios = inicios              # Las filas del n-grama i son filas[inicios[i]:inicios[i + 1]]
+        self.filas = filas                  # Las listas de filas de todos los n-gramas, una tras otra
+
+    def _armar(self):
+        cantidad = len(self.tabla)
+        normalizadas = [_normalizar_columna(self.tabla, columna, cantidad) for columna in self.columnas]
+        por_fila = list(map(SEPARADOR.join, zip(*normalizadas))) if normalizadas else [''] * cantidad
+        # Cada texto termina en el separador: buscando en todos de corrido, nada cruza de una fila a otra
+        textos = ColumnaTexto()
+        textos.extender([texto + SEPARADOR for texto in por_fila])
+        nombres = normalizadas[0] if normalizadas else por_fila
+        orden_nombres = array('I', sorted(range(cantidad), key=nombres.__getitem__))
+        armar_listas = _listas_vectorizadas if np is not None else _listas
+        return (textos, orden_nombres) + tuple(armar_listas(por_fila))
+
+    def _lista(self, grama):
+        """Las filas (en orden) que contienen el n-grama, o None si no está en ninguna."""
+        codigo = codigo_grama(grama)
+        posicion = bisect_left(self.gramas, codigo)
+        if posicion == len(self.gramas) or self.gramas[posicion] != codigo:
+            return None
+        return self.filas[self.inicios[posicion]:self.inicios[posicion + 1]]
+
+    def buscar(self, termino, candidatos=None):
+        """
+        Devuelve (en orden de tabla) las filas cuyo nombre, nombre oficial o capital
+        contienen 'termino', sin importar mayúsculas ni tildes.
+        'candidatos' (filas ordenadas) permite restringir la búsqueda a un subconjunto.
+        """
+        termino = normalizar(termino).strip()
+        if not termino:
+            return array('I', candidatos) if candidatos is not None else self.tabla.todas()
+        if candidatos is not None and not isinstance(candidatos, array):
+            candidatos = array('I', candidatos)
+
+        # --- Término corto: es un n-grama y su lista ya es el resultado ---
+        if len(termino) <= LARGOS_GRAMAS[-1]:
+            lista = self._lista(termino)
+            if lista is None:
+                return array('I')
+            return intersecar([lista, candidatos]) if candidatos is not None else _a_array(lista)
+
+        # --- 1. Candidatos: las filas que tienen todos los trigramas del término ---
+        listas = []
+        for grama in ngramas(termino, LARGOS_GRAMAS[-1]):
+            lista = self._lista(grama)
+            if lista is None:
+                return array('I')  # Un trigrama que no existe: no hay resultados
+            listas.append(lista)
+        if candidatos is not None:
+            listas.append(candidatos)
+
+        # --- 2. Confirmación contra el texto normalizado ---
+        filas = intersecar(listas)
+        textos = self.textos
+        if np is not None and len(filas) > RECORRER_DESDE * len(textos):
+            return intersecar([self._recorrer(termino), filas])
+        return array('I', (fila for fila in filas if termino in textos[fila]))
+
+    def _recorrer(self, termino):
+        """Las filas cuyo texto contiene 'termino', buscándolo de corrido en los bytes de todos los textos."""
+        encontrados = re.finditer(re.escape(termino.encode('utf-8')), self.textos.heap)
+        posiciones = np.fromiter((encontrado.start() for encontrado in encontrados), dtype=np.uint64)
+        filas = np.searchsorted(np.frombuffer(self.textos.offsets, dtype=np.uint64), posiciones, 'right') - 1
+        return _a_array(_distintos(filas.astype(np.uint32)))
+
+    def coincide(self, fila, termino_normalizado):
+        """Indica si la fila contiene el término (que ya debe venir normalizado)."""
+        return termino_normalizado in self.textos[fila]
+
+    def _nombre(self, fila):
+        """Nombre común normalizado de una fila (la primera columna de su texto)."""
+        return self.textos[fila].split(SEPARADOR, 1)[0]
+
+    def prefijo(self, termino, limite=None):
+        """Devuelve las filas cuyo nombre común empieza con 'termino' (en orden alfabético)."""
+        termino = normalizar(termino)
+        inicio = bisect_left(self.orden_nombres, termino, key=self._nombre)
+        resultado = array('I')
+        for posicion in range(inicio, len(self.orden_nombres)):
+            fila = self.orden_nombres[posicion]
+            if not self._nombre(fila).startswith(termino) or (limite is not None and len(resultado) >= limite):
+                break
+            resultado.append(fila)
+        return resultado
+
+    def sugerencias(self, termino, limite=5):
+        """
+        Búsqueda tolerante a errores de tipeo: ordena las filas por cantidad de
+        trigramas compartidos con 'termino' (ej. "argentna" -> "Argentina").
+        """
+        termino = normalizar(termino).strip()
+        gramas = ngramas(termino, 3) if len(termino) >= 3 else ngramas(termino, 2)
+        votos = Counter()
+        for grama in gramas:
+            votos.update(self._lista(grama) or ())
+        return [fila for fila, _ in votos.most_common(limite)]
@@ -0,0 +1,119 @@
+# --- Importaciones de Módulos ---
+import threading  # La caché se usa desde la interfaz y desde el hilo de consultas
+from collections import OrderedDict, namedtuple  # OrderedDict recuerda el orden de uso (para LRU)
+
+PRESUPUESTO_POR_DEFECTO = 64 * 1024 * 1024  # Bytes máximos de resultados guardados (64 MB)
+COSTO_FIJO_ENTRADA = 200                    # Bytes aproximados de la clave y la estructura de cada entrada
+MAXIMO_ENTRADAS = 256                       # Resultados guardados como máximo ('mas_amplia' los recorre todos)
+
+# Una consulta normalizada. Los límites vacíos son None (sin límite).
+# 'termino' ya viene normalizado (minúsculas, sin tildes); 'orden' es None o una tupla de (columna, descendente), de la más importante a la menos.
+Consulta = namedtuple('Consulta', ['continente', 'termino', 'min_pob', 'max_pob', 'min_area', 'max_area', 'orden'])
+
+def _cubre_minimo(amplio, estrecho):
+    """El mínimo 'amplio' deja pasar todo lo que deja pasar 'estrecho'."""
+    return amplio is None or (estrecho is not None and amplio <= estrecho)
+
+def _cubre_maximo(amplio, estrecho):
+    """El máximo 'amplio' deja pasar todo lo que deja pasar 'estrecho'."""
+    return amplio is None or (estrecho is not None and amplio >= estrecho)
+
+def es_mas_amplia(amplia, estrecha):
+    """
+    Indica si el resultado de 'amplia' contiene al de 'estrecha' (mismo orden),
+    es decir, si 'estrecha' se puede calcular filtrando el resultado de 'amplia'.
+    """
+    return (
+        amplia.orden == estrecha.orden
+        and (amplia.continente is None or amplia.continente == estrecha.continente)
+        # Si el término nuevo contiene al anterior, todo lo que coincide con el nuevo coincidía con el anterior
+        and amplia.termino in estrecha.termino
+        and _cubre_minimo(amplia.min_pob, estrecha.min_pob) and _cubre_maximo(amplia.max_pob, estrecha.max_pob)
+        and _cubre_minimo(amplia.min_area, estrecha.min_area) and _cubre_maximo(amplia.max_area, estrecha.max_area)
+    )
+
+class CacheConsultas:
+    """
+    Caché LRU de resultados de consultas (filtros + orden) -> números de fila.
+    - Cuando se pasa el presupuesto de memoria (o la cantidad máxima de entradas),
+      se descartan los resultados usados hace más tiempo.
+    - 'mas_amplia' busca un resultado guardado que contenga al pedido, para refinarlo
+      en lugar de filtrar toda la tabla.
+    - Los resultados se copian al guardar y al entregar: quien los recibe puede modificarlos.
+    - Hay que llamar a 'invalidar' cada vez que se recarga la tabla maestra.
+    - Se puede usar desde varios hilos (cada operación toma un candado).
+    """
+
+    def __init__(self, presupuesto_bytes=PRESUPUESTO_POR_DEFECTO, maximo_entradas=MAXIMO_ENTRADAS):
+        self.presupuesto_bytes = presupuesto_bytes
+        self.maximo_entradas = maximo_entradas
+        self._entradas = OrderedDict()  # Consulta -> array('I') de filas
+        self.bytes_usados = 0
+        self.aciertos = 0      # Consultas respondidas tal cual desde la caché
+        self.refinados = 0     # Consultas calculadas a partir de un resultado más amplio
+        self.fallos = 0        # Consultas que no estaban en la caché (incluye las refinadas)
+        self._candado = threading.RLock()
+
+    def _costo(self, filas):
+        return COSTO_FIJO_ENTRADA + len(filas) * filas.itemsize
+
+    def obtener(self, consulta):
+        """Devuelve una copia del resultado guardado, o None si no está."""
+        with self._candado:
+            filas = self._entradas.get(consulta)
+            if filas is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(consulta)  # Recién usado: pasa al final de la cola LRU
+            self.aciertos += 1
+            return filas[:]
+
+    def mas_amplia(self, consulta):
+        """
+        Busca, entre lo guardado, el resultado MÁS CHICO que contenga al de 'consulta'.
+        Devuelve (consulta_guardada, copia_de_filas) o (None, None).
+        """
+        with self._candado:
+            mejor = None
+            for guardada, filas in self._entradas.items():
+                if es_mas_amplia(guardada, consulta) and (mejor is None or len(filas) < len(self._entradas[mejor])):
+                    mejor = guardada
+            if mejor is None:
+                return None, None
+            self._entradas.move_to_end(mejor)
+            self.refinados += 1
+            return mejor, self._entradas[mejor][:]
+
+    def guardar(self, consulta, filas):
+        """Guarda (una copia de) el resultado y descarta los más viejos si se pasa del presupuesto."""
+        costo = self._costo(filas)
+        if costo > self.presupuesto_bytes:
+            return  # Un resultado más grande que todo el presupuesto no se guarda
+        copia = filas[:]
+        with self._candado:
+            anterior = self._entradas.pop(consulta, None)
+            if anterior is not None:
+                self.bytes_usados -= self._costo(anterior)
+            self._entradas[consulta] = copia
+            self.bytes_usados += costo
+            while self.bytes_usados > self.presupuesto_bytes or len(self._entradas) > self.maximo_entradas:
+                _, descartada = self._entradas.popitem(last=False)  # El usado hace más tiempo
+                self.bytes_usados -= self._costo(descartada)
+
+    def invalidar(self):
+        """Vacía la caché (los números de fila dejan de ser válidos al recargar la tabla)."""
+        with self._candado:
+            self._entradas.clear()
+            self.bytes_usados = 0
+
+    def estadisticas(self):
+        """Contadores de uso de la caché."""
+        with self._candado:
+            return {
+                "entradas": len(self._entradas),
+                "bytes_usados": self.bytes_usados,
+                "presupuesto_bytes": self.presupuesto_bytes,
+                "aciertos": self.aciertos,
+                "refinados": self.refinados,
+                "fallos": self.fallos,
+            }
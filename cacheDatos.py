@@ -0,0 +1,136 @@
+# --- Importaciones de Módulos ---
+import json  # Para leer y escribir el manifiesto de caché
+import os    # Para comprobar archivos y reemplazarlos de forma atómica
+import time  # Para registrar cuándo se descargó/verificó cada región
+
+# --- Configuración de la Caché ---
+NOMBRE_MANIFIESTO = "manifiesto.json"  # Se guarda junto a los CSV (ej. "Continentes/manifiesto.json")
+TTL_POR_DEFECTO = 24 * 60 * 60         # Segundos que los datos se consideran "frescos" (1 día)
+
+# Posibles resultados de la descarga de una región
+ESTADO_ACTUALIZADO = "actualizado"  # Se descargaron datos nuevos y se reescribió el CSV
+ESTADO_SIN_CAMBIOS = "sin_cambios"  # El servidor respondió 304 o el contenido es idéntico
+ESTADO_ERROR = "error"              # No se pudo descargar (se conservan los datos anteriores)
+ESTADO_ELIMINADO = "eliminado"      # La región ya no está entre las fuentes (sale del archivo maestro)
+
+EXTENSION_FUENTES = ".fuentes.json"  # "Todos.csv" -> "Todos.csv.fuentes.json" (ver unir_csvs_en_uno)
+
+def ruta_manifiesto(carpeta):
+    """Devuelve la ruta del manifiesto dentro de la carpeta de datos."""
+    return os.path.join(carpeta, NOMBRE_MANIFIESTO)
+
+def cargar_manifiesto(carpeta, ttl=TTL_POR_DEFECTO):
+    """
+    Lee el manifiesto de caché de la carpeta. Si no existe o está dañado,
+    devuelve uno vacío (lo que obliga a descargar todo de nuevo).
+    """
+    manifiesto = {"version": 1, "ttl_segundos": ttl, "regiones": {}}
+    try:
+        with open(ruta_manifiesto(carpeta), 'r', encoding='utf-8') as archivo:
+            leido = json.load(archivo)
+        # Sólo aceptamos manifiestos con la estructura esperada
+        if isinstance(leido, dict) and isinstance(leido.get("regiones"), dict):
+            manifiesto["regiones"] = leido["regiones"]
+            if isinstance(leido.get("maestro"), dict):
+                manifiesto["maestro"] = leido["maestro"]
+    except (FileNotFoundError, ValueError):
+        pass
+    return manifiesto
+
+def guardar_manifiesto(manifiesto, carpeta):
+    """
+    Guarda el manifiesto de forma atómica: primero en un archivo temporal
+    y luego lo renombra, así nunca queda un manifiesto a medio escribir.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = ruta_manifiesto(carpeta)
+    ruta_temporal = ruta + ".tmp"
+    with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, ensure_ascii=False, indent=2)
+    os.replace(ruta_temporal, ruta)
+
+def entrada_region(manifiesto, region):
+    """Devuelve (creándola si hace falta) la entrada del manifiesto para una región."""
+    return manifiesto["regiones"].setdefault(region, {})
+
+def region_esta_fresca(entrada, ttl, ahora=None):
+    """Indica si la región fue verificada contra la API hace menos de 'ttl' segundos."""
+    ahora = time.time() if ahora is None else ahora
+    verificado = entrada.get("verificado_en")
+    return verificado is not None and (ahora - verificado) < ttl
+
+def regiones_vencidas(manifiesto, regiones, ahora=None):
+    """Devuelve la lista de regiones que hay que volver a consultar (vencidas o nunca descargadas)."""
+    ttl = manifiesto.get("ttl_segundos", TTL_POR_DEFECTO)
+    return [
+        region for region in regiones
+        if not region_esta_fresca(manifiesto["regiones"].get(region, {}), ttl, ahora)
+    ]
+
+def cabeceras_condicionales(entrada):
+    """
+    Arma las cabeceras HTTP para una petición condicional a partir de
+    los validadores (ETag / Last-Modified) guardados de la descarga anterior.
+    """
+    cabeceras = {}
+    if entrada.get("etag"):
+        cabeceras["If-None-Match"] = entrada["etag"]
+    if entrada.get("last_modified"):
+        cabeceras["If-Modified-Since"] = entrada["last_modified"]
+    return cabeceras
+
+def registrar_maestro(manifiesto, ruta_maestro):
+    """
+    Guarda en el manifiesto el tamaño y la fecha de modificación del archivo maestro
+    ('Todos.csv'). Sirve para saber si los rangos de bytes de cada continente
+    registrados en el manifiesto siguen siendo válidos.
+    """
+    info = os.stat(ruta_maestro)
+    manifiesto["maestro"] = {"tamano": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+def maestro_coincide(manifiesto, ruta_maestro, cabecera=None):
+    """
+    Indica si 'Todos.csv' es exactamente el que se generó y registró en el manifiesto.
+    Si se pasa 'cabecera' (la primera línea esperada, en bytes), además debe empezar con
+    ella: un maestro con otras columnas no se puede completar con filas nuevas.
+    """
+    registrado = manifiesto.get("maestro")
+    if not registrado or not os.path.exists(ruta_maestro):
+        return False
+    info = os.stat(ruta_maestro)
+    if registrado.get("tamano") != info.st_size or registrado.get("mtime_ns") != info.st_mtime_ns:
+        return False
+    if cabecera is not None:
+        with open(ruta_maestro, 'rb') as archivo:
+            return archivo.readline() == cabecera
+    return True
+
+# --- Registro de Fuentes del Maestro (unir_csvs_en_uno) ---
+
+def ruta_fuentes(ruta_maestro):
+    """Devuelve la ruta del registro de fuentes de un archivo maestro ('Todos.csv.fuentes.json')."""
+    return ruta_maestro + EXTENSION_FUENTES
+
+def cargar_fuentes(ruta_maestro):
+    """
+    Lee el registro de los CSV que se unieron en 'ruta_maestro' (tamaño, fecha, hash y
+    rangos de bytes y de filas de cada uno). Si no existe o está dañado devuelve uno
+    vacío (lo que obliga a unir todo de nuevo).
+    """
+    registro = {"version": 1, "fuentes": {}}
+    try:
+        with open(ruta_fuentes(ruta_maestro), 'r', encoding='utf-8') as archivo:
+            leido = json.load(archivo)
+        if isinstance(leido, dict) and isinstance(leido.get("fuentes"), dict):
+            registro.update(leido)
+    except (FileNotFoundError, ValueError):
+        pass
+    return registro
+
+def guardar_fuentes(registro, ruta_maestro):
+    """Guarda el registro de fuentes de forma atómica (igual que guardar_manifiesto)."""
+    ruta = ruta_fuentes(ruta_maestro)
+    ruta_temporal = ruta + ".tmp"
+    with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(registro, archivo, ensure_ascii=False, indent=2)
+    os.replace(ruta_temporal, ruta)
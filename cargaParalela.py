@@ -0,0 +1,119 @@
+# --- Importaciones de Módulos ---
+import csv               # Para leer cada trozo de 'Todos.csv'
+import io                # Para leer un trozo ya decodificado como si fuera un archivo
+import multiprocessing   # Contexto 'spawn' para los procesos de lectura
+import os                # Tamaño del archivo y cantidad de núcleos
+from concurrent.futures import ProcessPoolExecutor # Un trozo del CSV por tarea
+from tablaPaises import TablaPaises, lotes, FILAS_POR_LOTE # La tabla maestra (y su carga por lotes)
+import rendimiento       # Medición de la lectura
+
+# --- Carga en Paralelo ---
+# Un CSV grande se divide en trozos de bytes que empiezan y terminan en un salto de
+# línea; cada proceso lee un trozo en su propia TablaPaises (con la conversión numérica
+# hecha en la misma pasada) y el proceso principal las une EN ORDEN, así que la tabla
+# queda idéntica a la de TablaPaises.desde_csv.
+
+VARIABLE_PROCESOS = "PAISES_PROCESOS"     # Cantidad de procesos (ej. PAISES_PROCESOS=1 lee en un solo proceso)
+BYTES_POR_TROZO = 16 * 1024 * 1024        # Tamaño aproximado de cada trozo
+TROZOS_POR_PROCESO = 4                    # Al menos tantos trozos por proceso (reparte mejor y muestra el avance)
+TAMANO_MINIMO_PARALELO = 64 * 1024 * 1024 # Con archivos más chicos, arrancar los procesos cuesta más de lo que se gana
+
+def procesos_disponibles(procesos=None):
+    """Cantidad de procesos a usar: 'procesos', la variable PAISES_PROCESOS o la cantidad de núcleos."""
+    if procesos is None:
+        valor = os.environ.get(VARIABLE_PROCESOS, "")
+        procesos = int(valor) if valor.isdigit() else os.cpu_count() or 1
+    return max(1, procesos)
+
+def conviene_paralelo(ruta_csv, procesos=None):
+    """True si el archivo es lo bastante grande y hay más de un proceso disponible."""
+    return procesos_disponibles(procesos) > 1 and os.path.getsize(ruta_csv) >= TAMANO_MINIMO_PARALELO
+
+def dividir_en_rangos(ruta_csv, cantidad):
+    """
+    Lee la cabecera y divide el resto del archivo en hasta 'cantidad' rangos de bytes
+    (inicio, fin) alineados con los saltos de línea. Devuelve (cabecera, rangos).
+    """
+    tamano = os.path.getsize(ruta_csv)
+    with open(ruta_csv, 'rb') as archivo:
+        cabecera = next(csv.reader(io.StringIO(archivo.readline().decode('utf-8'), newline='')), [])
+        inicio = archivo.tell()
+        paso = max(1, (tamano - inicio) // max(1, cantidad))
+        rangos = []
+        while inicio < tamano:
+            fin = inicio + paso
+            if fin >= tamano:
+                fin = tamano
+            else:
+                # Avanza hasta el próximo salto de línea (si 'fin' ya empieza una línea, se queda ahí)
+                archivo.seek(fin - 1)
+                archivo.readline()
+                fin = archivo.tell()
+            rangos.append((inicio, fin))
+            inicio = fin
+    return cabecera, rangos
+
+def leer_rango(ruta_csv, cabecera, inicio, fin, revisar_comillas=True):
+    """
+    Lee las filas entre los bytes 'inicio' y 'fin' del CSV en una TablaPaises nueva
+    (es la tarea de cada proceso). Devuelve None si el rango termina en medio de un
+    valor entre comillas (un salto de línea dentro de un campo): con un número impar
+    de comillas el corte no es un fin de fila y el rango no se puede leer por separado.
+    """
+    with open(ruta_csv, 'rb') as archivo:
+        archivo.seek(inicio)
+        datos = archivo.read(fin - inicio)
+    if revisar_comillas and datos.count(b'"') % 2:
+        return None
+    tabla = TablaPaises(cabecera)
+    for lote in lotes(csv.reader(io.StringIO(datos.decode('utf-8'), newline=''))):
+        tabla.agregar_filas(lote)
+    return tabla
+
+def leer_csv_en_paralelo_por_lotes(ruta_csv, procesos=None):
+    """
+    Como TablaPaises.desde_csv_por_lotes, pero los trozos se leen en 'procesos' procesos:
+    generador de (tabla, fraccion_leida), con un paso por trozo unido. Es SIEMPRE la misma
+    tabla, que va creciendo en el orden del archivo.
+    """
+    procesos = procesos_disponibles(procesos)
+    tamano = os.path.getsize(ruta_csv)
+    cabecera, rangos = dividir_en_rangos(ruta_csv, max(procesos * TROZOS_POR_PROCESO, tamano // BYTES_POR_TROZO))
+    tabla = TablaPaises(cabecera)
+    # 'spawn' (y no 'fork'): la carga puede correr en un hilo mientras la interfaz usa Tk
+    grupo = ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        pendientes = [grupo.submit(leer_rango, ruta_csv, cabecera, inicio, fin) for inicio, fin in rangos]
+        for (inicio, fin), pendiente in zip(rangos, pendientes):
+            trozo = pendiente.result()
+            if trozo is None:
+                # Un valor con saltos de línea cruza el corte: desde acá se lee todo en este proceso
+                for otro in pendientes:
+                    otro.cancel()
+                tabla.unir(leer_rango(ruta_csv, cabecera, inicio, tamano, revisar_comillas=False))
+                break
+            tabla.unir(trozo)
+            yield tabla, fin / tamano
+    finally:
+        grupo.shutdown(cancel_futures=True)
+    yield tabla, 1.0
+
+def leer_csv_en_paralelo(ruta_csv, procesos=None):
+    """Lee todo el CSV con 'leer_csv_en_paralelo_por_lotes' y devuelve la tabla."""
+    with rendimiento.etapa('leer_csv') as medicion:
+        for tabla, _ in leer_csv_en_paralelo_por_lotes(ruta_csv, procesos):
+            pass
+        medicion.filas = len(tabla)
+    return tabla
+
+def leer_csv(ruta_csv, procesos=None):
+    """Lee el CSV en una TablaPaises: en paralelo si conviene, si no con TablaPaises.desde_csv."""
+    if conviene_paralelo(ruta_csv, procesos):
+        return leer_csv_en_paralelo(ruta_csv, procesos)
+    return TablaPaises.desde_csv(ruta_csv)
+
+def leer_csv_por_lotes(ruta_csv, filas_por_lote=FILAS_POR_LOTE, procesos=None):
+    """Como 'leer_csv', pero como generador de (tabla, fraccion_leida) para mostrar el avance."""
+    if conviene_paralelo(ruta_csv, procesos):
+        return leer_csv_en_paralelo_por_lotes(ruta_csv, procesos)
+    return TablaPaises.desde_csv_por_lotes(ruta_csv, filas_por_lote)
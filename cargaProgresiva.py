@@ -0,0 +1,88 @@
+# --- Importaciones de Módulos ---
+import queue      # Cola segura entre hilos (el hilo de carga escribe, la ventana lee)
+import threading  # El hilo que carga los datos
+from motor import MotorConsultas, cargar_tabla_por_lotes # Carga por lotes e índices
+from almacenSqlite import MotorSqlite, cargar_base_por_lotes, ALMACEN_MEMORIA, ALMACEN_SQLITE # Tabla en SQLite
+from tablaPaises import FILAS_POR_LOTE
+
+INTERVALO_MS = 50  # Cada cuánto la ventana revisa si llegaron lotes nuevos
+
+class CargaEnSegundoPlano:
+    """
+    Carga 'Todos.csv' (o su instantánea) y construye los índices en un hilo aparte,
+    para que la ventana aparezca y responda mientras tanto.
+    Tkinter sólo se puede usar desde el hilo principal: el hilo de carga deja
+    mensajes en una cola y la ventana los revisa cada INTERVALO_MS con after(),
+    llamando (siempre en el hilo principal) a:
+    - al_avanzar(tabla, filas, fraccion): las filas 0..filas-1 ya se pueden leer
+      (con almacen=ALMACEN_SQLITE, 'tabla' es None: las filas se están importando a la base).
+    - al_indexar(): la tabla está completa, se están construyendo los índices.
+    - al_terminar(motor): el motor (tabla + índices) está listo para filtrar.
+    - al_fallar(error): la carga falló (ej. FileNotFoundError).
+    La primera fila aparece después de leer un lote, sin importar el tamaño del archivo.
+    """
+
+    def __init__(self, ventana, ruta_csv, al_avanzar, al_terminar, al_fallar, al_indexar=None,
+                 filas_por_lote=FILAS_POR_LOTE, intervalo_ms=INTERVALO_MS, almacen=ALMACEN_MEMORIA):
+        self.ventana = ventana
+        self.ruta_csv = ruta_csv
+        self.almacen = almacen
+        self.al_avanzar = al_avanzar
+        self.al_terminar = al_terminar
+        self.al_fallar = al_fallar
+        self.al_indexar = al_indexar
+        self.filas_por_lote = filas_por_lote
+        self.intervalo_ms = intervalo_ms
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._cargar, name="carga-datos", daemon=True)
+
+    def iniciar(self):
+        """Arranca el hilo de carga y la revisión periódica de la cola."""
+        self._hilo.start()
+        self.ventana.after(self.intervalo_ms, self._revisar)
+
+    # --- Hilo de carga (NO toca la interfaz) ---
+
+    def _cargar(self):
+        try:
+            if self.almacen == ALMACEN_SQLITE:
+                # La primera vez se importa el CSV; después la base se abre al instante
+                for filas, fraccion in cargar_base_por_lotes(self.ruta_csv, self.filas_por_lote):
+                    self._cola.put(("lote", None, filas, fraccion))
+                self._cola.put(("listo", MotorSqlite.desde_csv(self.ruta_csv)))
+                return
+            tabla = None
+            for tabla, fraccion in cargar_tabla_por_lotes(self.ruta_csv, self.filas_por_lote):
+                self._cola.put(("lote", tabla, len(tabla), fraccion))
+            self._cola.put(("indexando",))
+            self._cola.put(("listo", MotorConsultas(tabla)))
+        except Exception as error:
+            self._cola.put(("error", error))
+
+    # --- Hilo principal (revisión con after) ---
+
+    def _revisar(self):
+        ultimo_lote = None
+        while True:
+            try:
+                mensaje = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if mensaje[0] == "lote":
+                ultimo_lote = mensaje  # Si se juntaron varios lotes, alcanza con mostrar el último
+                continue
+            if ultimo_lote is not None:
+                self.al_avanzar(*ultimo_lote[1:])
+                ultimo_lote = None
+            if mensaje[0] == "indexando":
+                if self.al_indexar is not None:
+                    self.al_indexar()
+            elif mensaje[0] == "listo":
+                self.al_terminar(mensaje[1])
+                return  # Terminó: no se vuelve a programar la revisión
+            elif mensaje[0] == "error":
+                self.al_fallar(mensaje[1])
+                return
+        if ultimo_lote is not None:
+            self.al_avanzar(*ultimo_lote[1:])
+        self.ventana.after(self.intervalo_ms, self._revisar)
@@ -0,0 +1,215 @@
+# --- Importaciones ---
+import argparse  # Para leer los argumentos de la línea de comandos
+import csv       # Salida en CSV
+import json      # Salida en JSON lines
+import os        # Para armar la ruta por defecto de 'Todos.csv'
+import shlex     # Para separar los argumentos de cada línea del archivo de consultas
+import sys       # Salida estándar / errores
+from motor import armar_consulta # Consultas normalizadas
+from almacenSqlite import crear_motor, ALMACENES, ALMACEN_MEMORIA # Motor en memoria o sobre SQLite
+from tablaPaises import aviso_celdas_invalidas # Aviso de celdas numéricas inválidas en el CSV
+
+# --- Uso ---
+# Consultas sobre 'Todos.csv' sin abrir la interfaz gráfica, por ejemplo:
+#   python consultarPaises.py --continente Asia --min-poblacion 1000000 --ordenar poblacion:desc --limite 10
+#   python consultarPaises.py --buscar japon --formato jsonl
+#   python consultarPaises.py --continente Europe --estadisticas
+#   python consultarPaises.py --consultas consultas.txt --formato jsonl > resultados.jsonl
+#   python consultarPaises.py --almacen sqlite --buscar san --ordenar nombre --limite 20
+#   python consultarPaises.py --ordenar poblacion:desc --limite 3 --por-continente
+#   python consultarPaises.py --max-poblacion 1000000 --ordenar area:desc --limite 20 --ultimos
+# En el archivo de consultas, cada línea lleva los mismos argumentos de filtro, orden,
+# límite y estadísticas (ej. "--continente Africa --ordenar area:desc --limite 5");
+# las líneas vacías o que empiezan con '#' se ignoran. Los datos se cargan UNA sola vez.
+
+RUTA_POR_DEFECTO = os.path.join("Continentes", "Todos.csv")
+COLUMNAS_POR_DEFECTO = ["nombre_comun_es", "poblacion", "area", "continente"]
+# Nombres cortos aceptados en --ordenar (además de los nombres de columna)
+ALIAS_ORDEN = {"nombre": "nombre_comun_es", "superficie": "area"}
+
+def entero_no_negativo(texto):
+    """Tipo de argparse: entero >= 0 (acepta puntos o comas de miles, como la interfaz)."""
+    try:
+        valor = int(texto.replace('.', '').replace(',', ''))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{texto}' no es un número entero válido")
+    if valor < 0:
+        raise argparse.ArgumentTypeError("no se permiten números negativos")
+    return valor
+
+def claves_de_orden(texto):
+    """Tipo de argparse: 'continente,poblacion:desc' -> [('continente', False), ('poblacion', True)]."""
+    claves = []
+    for parte in texto.split(','):
+        columna, _, sentido = parte.strip().partition(':')
+        if sentido not in ('', 'asc', 'desc'):
+            raise argparse.ArgumentTypeError(f"sentido inválido '{sentido}' (usar asc o desc)")
+        claves.append((ALIAS_ORDEN.get(columna, columna), sentido == 'desc'))
+    return claves
+
+def crear_parser_consulta():
+    """Argumentos de UNA consulta (se usan en la línea de comandos y en cada línea del archivo)."""
+    parser = argparse.ArgumentParser(add_help=False)
+    grupo = parser.add_argument_group("consulta")
+    grupo.add_argument("--continente", help="Filtra por continente (ej. Asia)")
+    grupo.add_argument("--buscar", default="", help="Texto a buscar en nombre, nombre oficial o capital")
+    grupo.add_argument("--min-poblacion", type=entero_no_negativo)
+    grupo.add_argument("--max-poblacion", type=entero_no_negativo)
+    grupo.add_argument("--min-area", type=entero_no_negativo)
+    grupo.add_argument("--max-area", type=entero_no_negativo)
+    grupo.add_argument("--ordenar", type=claves_de_orden,
+                       help="Columnas de orden separadas por coma, con :asc o :desc (ej. continente,poblacion:desc)")
+    grupo.add_argument("--limite", type=entero_no_negativo, help="Devuelve sólo las primeras N filas")
+    grupo.add_argument("--ultimos", action="store_true",
+                       help="Con --limite: las N del otro extremo del orden (ej. con poblacion:desc, las menos pobladas)")
+    grupo.add_argument("--por-continente", action="store_true", help="Con --limite: las primeras N de cada continente")
+    grupo.add_argument("--estadisticas", action="store_true", help="Devuelve estadísticas en lugar de filas")
+    return parser
+
+def crear_parser():
+    """Parser de la línea de comandos completa."""
+    parser = argparse.ArgumentParser(
+        description="Consultas sobre los datos de países sin interfaz gráfica.",
+        parents=[crear_parser_consulta()])
+    parser.add_argument("--csv", default=RUTA_POR_DEFECTO, help=f"Archivo de datos (por defecto {RUTA_POR_DEFECTO})")
+    parser.add_argument("--consultas", help="Archivo con una consulta por línea ('-' para la entrada estándar)")
+    parser.add_argument("--formato", choices=("csv", "jsonl"), default="csv", help="Formato de salida")
+    parser.add_argument("--columnas", default=",".join(COLUMNAS_POR_DEFECTO),
+                        help="Columnas a mostrar, separadas por coma")
+    parser.add_argument("--salida", help="Archivo de salida (por defecto, la salida estándar)")
+    parser.add_argument("--almacen", choices=ALMACENES, default=ALMACEN_MEMORIA,
+                        help="Tabla en memoria (por defecto) o en una base SQLite junto al CSV (se importa la primera vez)")
+    return parser
+
+def aplanar(resumen, prefijo=""):
+    """Convierte el diccionario de estadísticas en pares ('poblacion.mediana', valor)."""
+    for clave, valor in resumen.items():
+        nombre = f"{prefijo}{clave}"
+        if isinstance(valor, dict):
+            yield from aplanar(valor, nombre + ".")
+        elif isinstance(valor, tuple):
+            yield nombre, " ".join(str(parte) for parte in valor)
+        else:
+            yield nombre, valor
+
+class Salida:
+    """
+    Escribe los resultados a medida que se calculan (no se arma toda la respuesta en memoria).
+    En CSV, la cabecera se repite sólo cuando cambia la forma de las filas
+    (ej. una consulta de estadísticas después de una de países).
+    """
+
+    def __init__(self, archivo, formato, columnas, varias):
+        self.archivo = archivo
+        self.formato = formato
+        self.columnas = columnas
+        self.varias = varias  # Con varias consultas, cada fila lleva el número de consulta
+        self.escritor = csv.writer(archivo) if formato == "csv" else None
+        self._cabecera = None
+
+    def _escribir_csv(self, cabecera, filas):
+        if cabecera != self._cabecera:
+            self.escritor.writerow(cabecera)
+            self._cabecera = cabecera
+        self.escritor.writerows(filas)
+
+    def filas(self, numero, valores):
+        prefijo = [numero] if self.varias else []
+        if self.formato == "csv":
+            cabecera = (["consulta"] if self.varias else []) + self.columnas
+            self._escribir_csv(cabecera, (prefijo + fila for fila in valores))
+        else:
+            for fila in valores:
+                objeto = dict(zip(self.columnas, fila))
+                if self.varias:
+                    objeto = {"consulta": numero, **objeto}
+                self.archivo.write(json.dumps(objeto, ensure_ascii=False) + "\n")
+
+    def estadisticas(self, numero, resumen):
+        if self.formato == "csv":
+            cabecera = (["consulta"] if self.varias else []) + ["metrica", "valor"]
+            prefijo = [numero] if self.varias else []
+            self._escribir_csv(cabecera, (prefijo + [nombre, valor] for nombre, valor in aplanar(resumen)))
+        else:
+            objeto = {"estadisticas": resumen}
+            if self.varias:
+                objeto = {"consulta": numero, **objeto}
+            self.archivo.write(json.dumps(objeto, ensure_ascii=False) + "\n")
+
+def ejecutar_consulta(motor, argumentos, numero, salida):
+    """Resuelve una consulta (ya parseada) y escribe su resultado."""
+    consulta = armar_consulta(
+        continente=argumentos.continente, termino=argumentos.buscar,
+        min_pob=argumentos.min_poblacion, max_pob=argumentos.max_poblacion,
+        min_area=argumentos.min_area, max_area=argumentos.max_area,
+        orden=argumentos.ordenar,
+    )
+    if argumentos.ultimos or argumentos.por_continente:
+        if argumentos.limite is None or not argumentos.ordenar:
+            raise ValueError("--ultimos y --por-continente necesitan --limite y --ordenar.")
+        # Las N primeras se eligen sin ordenar toda la vista (ver 'primeros' en motor.py)
+        filas = motor.primeros(consulta, argumentos.limite, ultimos=argumentos.ultimos,
+                               por_continente=argumentos.por_continente)
+    else:
+        filas = motor.ejecutar(consulta, limite=argumentos.limite)
+    if argumentos.estadisticas:
+        salida.estadisticas(numero, motor.resumen(filas, consulta if argumentos.limite is None else None))
+    else:
+        salida.filas(numero, motor.valores(filas, salida.columnas))
+
+def leer_consultas(ruta, parser):
+    """Genera (numero_de_linea, argumentos) por cada consulta del archivo."""
+    archivo = sys.stdin if ruta == "-" else open(ruta, encoding="utf-8")
+    try:
+        for numero, linea in enumerate(archivo, start=1):
+            linea = linea.strip()
+            if not linea or linea.startswith("#"):
+                continue
+            try:
+                yield numero, parser.parse_args(shlex.split(linea))
+            except SystemExit:
+                # argparse ya mostró el error en stderr: se informa la línea y se sigue con las demás
+                print(f"Consulta inválida en la línea {numero}: {linea}", file=sys.stderr)
+    finally:
+        if archivo is not sys.stdin:
+            archivo.close()
+
+def main(argv=None):
+    parser = crear_parser()
+    argumentos = parser.parse_args(argv)
+    columnas = [columna.strip() for columna in argumentos.columnas.split(",") if columna.strip()]
+
+    try:
+        motor = crear_motor(argumentos.csv, argumentos.almacen)
+    except FileNotFoundError:
+        parser.exit(1, f"No se encontró el archivo de datos: {argumentos.csv}\n")
+    aviso = aviso_celdas_invalidas(motor.tabla.celdas_invalidas)
+    if aviso:
+        print(aviso, file=sys.stderr)
+    desconocidas = [columna for columna in columnas if columna not in motor.tabla.cabecera]
+    if desconocidas:
+        parser.exit(2, f"Columnas desconocidas: {', '.join(desconocidas)} (opciones: {', '.join(motor.tabla.cabecera)})\n")
+
+    archivo = open(argumentos.salida, "w", encoding="utf-8", newline="") if argumentos.salida else sys.stdout
+    try:
+        salida = Salida(archivo, argumentos.formato, columnas, varias=bool(argumentos.consultas))
+        if argumentos.consultas:
+            parser_consulta = argparse.ArgumentParser(parents=[crear_parser_consulta()], prog="consulta")
+            consultas = leer_consultas(argumentos.consultas, parser_consulta)
+        else:
+            consultas = [(1, argumentos)]
+        for numero, argumentos_consulta in consultas:
+            try:
+                ejecutar_consulta(motor, argumentos_consulta, numero, salida)
+            except ValueError as e:
+                print(f"Error en la consulta {numero}: {e}", file=sys.stderr)
+    except BrokenPipeError:
+        # Ej. '| head': el lector cerró la salida, no es un error
+        sys.stderr.close()
+    finally:
+        if archivo is not sys.stdout:
+            archivo.close()
+
+# --- Punto de Entrada del Script ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# --- Importaciones de Módulos ---
+import queue      # Resultados del hilo de consultas hacia la ventana
+import threading  # El hilo que resuelve las consultas
+from motor import ConsultaCancelada
+
+INTERVALO_MS = 10  # Cada cuánto la ventana revisa si hay un resultado (sólo mientras hay una consulta pendiente)
+
+class EjecutorConsultas:
+    """
+    Resuelve tareas (ej. filtrar) en un hilo aparte para que la ventana no se trabe.
+    Sólo importa la ÚLTIMA tarea pedida:
+    - Una tarea nueva reemplaza a la que todavía no empezó.
+    - La que está en curso queda vieja: su función 'cancelado' empieza a devolver True
+      (para que corte en el próximo paso) y, si igual termina, su resultado se descarta.
+    Los resultados se entregan en el hilo de Tkinter (con after()), llamando a
+    'al_terminar(resultado)' o 'al_fallar(error)'.
+    """
+
+    def __init__(self, ventana, intervalo_ms=INTERVALO_MS):
+        self.ventana = ventana
+        self.intervalo_ms = intervalo_ms
+        self._condicion = threading.Condition()
+        self._generacion = 0        # Aumenta con cada pedido o cancelación
+        self._pedido = None         # (generacion, tarea, al_terminar, al_fallar) que todavía no empezó
+        self._en_curso = None       # Generación de la tarea que se está calculando
+        self._por_entregar = None   # Generación del último resultado que todavía no se entregó
+        self._resultados = queue.Queue()
+        self._revisando = False
+        self._hilo = threading.Thread(target=self._trabajar, name="consultas", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, tarea, al_terminar, al_fallar=None):
+        """
+        Pide resolver 'tarea(cancelado)' en el hilo de consultas; 'cancelado' es una
+        función que devuelve True cuando la tarea ya no interesa.
+        """
+        with self._condicion:
+            self._generacion += 1
+            self._pedido = (self._generacion, tarea, al_terminar, al_fallar)
+            self._condicion.notify()
+        self._programar_revision()
+
+    def cancelar(self):
+        """Descarta la tarea pendiente y la que esté en curso."""
+        with self._condicion:
+            self._generacion += 1
+            self._pedido = None
+
+    def ocupado(self):
+        """Indica si hay una tarea vigente pendiente, en curso o con el resultado sin entregar."""
+        with self._condicion:
+            return (self._pedido is not None or self._en_curso == self._generacion
+                    or self._por_entregar == self._generacion)
+
+    def inactivo(self):
+        """Indica si no hay ninguna tarea pendiente ni en curso (tampoco una vieja que todavía no cortó)."""
+        with self._condicion:
+            return self._pedido is None and self._en_curso is None
+
+    # --- Hilo de consultas (NO toca la interfaz) ---
+
+    def _trabajar(self):
+        while True:
+            with self._condicion:
+                while self._pedido is None:
+                    self._condicion.wait()
+                generacion, tarea, al_terminar, al_fallar = self._pedido
+                self._pedido = None
+                self._en_curso = generacion
+            cancelado = lambda: generacion != self._generacion
+            try:
+                entrega = (generacion, al_terminar, tarea(cancelado))
+            except ConsultaCancelada:
+                entrega = None
+            except Exception as error:
+                entrega = (generacion, al_fallar, error)
+            # Al dejar el resultado en la cola pasa de "en curso" a "por entregar" (así ni la
+            # ventana deja de revisar ni la tarea deja de figurar ocupada antes de recibirlo)
+            with self._condicion:
+                if entrega is not None:
+                    self._por_entregar = generacion
+                    self._resultados.put(entrega)
+                self._en_curso = None
+
+    # --- Hilo principal ---
+
+    def _programar_revision(self):
+        if not self._revisando:
+            self._revisando = True
+            self.ventana.after(self.intervalo_ms, self._revisar)
+
+    def _revisar(self):
+        while True:
+            try:
+                generacion, funcion, valor = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            with self._condicion:
+                if self._por_entregar == generacion:
+                    self._por_entregar = None
+            # Sólo se entrega el resultado de la última tarea pedida
+            if generacion == self._generacion and funcion is not None:
+                funcion(valor)
+        if self.ocupado() or not self._resultados.empty():
+            self.ventana.after(self.intervalo_ms, self._revisar)
+        else:
+            self._revisando = False
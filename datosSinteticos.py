@@ -0,0 +1,157 @@
+# --- Importaciones de Módulos ---
+import csv               # Para escribir los CSV sintéticos
+import json              # Para escribir las respuestas sintéticas de la API
+import math              # Distribuciones log-normales de población y superficie
+import os                # Para armar rutas y crear carpetas
+import random            # Generador pseudoaleatorio con semilla (siempre los mismos datos)
+from generarPaises import CAMPOS, extraer_campos, linea_cabecera # Mismo formato que la descarga real
+
+# --- Generador de Datos Sintéticos ---
+# Genera países "falsos" con la forma de la API de restcountries (v3.1), en cualquier
+# cantidad (de 1.000 a 10 millones), para medir la aplicación con más datos que los
+# ~250 países reales. Con la misma semilla y cantidad, los datos son SIEMPRE los mismos.
+
+SEMILLA_POR_DEFECTO = 42
+
+# Proporción de países por continente (como en los datos reales)
+PESOS_CONTINENTES = {'Africa': 59, 'Americas': 56, 'Asia': 50, 'Europe': 53, 'Oceania': 27, 'Antarctic': 5}
+SUBREGIONES = {
+    'Africa': ['Northern Africa', 'Western Africa', 'Eastern Africa', 'Middle Africa', 'Southern Africa'],
+    'Americas': ['North America', 'Central America', 'Caribbean', 'South America'],
+    'Asia': ['Eastern Asia', 'South-Eastern Asia', 'Southern Asia', 'Central Asia', 'Western Asia'],
+    'Europe': ['Northern Europe', 'Western Europe', 'Southern Europe', 'Eastern Europe', 'Central Europe'],
+    'Oceania': ['Australia and New Zealand', 'Melanesia', 'Micronesia', 'Polynesia'],
+    'Antarctic': [''],
+}
+
+# Sílabas de varios alfabetos, para que los nombres ejerciten tildes, ñ y texto no latino
+SILABAS = {
+    'latino': ['an', 'bo', 'ca', 'da', 'el', 'fi', 'go', 'ha', 'is', 'ja', 'ka', 'lo', 'ma', 'ne', 'or', 'pa',
+               'qui', 're', 'sa', 'to', 'u', 'va', 'we', 'xi', 'ya', 'zu'],
+    'acentos': ['á', 'é', 'í', 'ó', 'ú', 'ña', 'ño', 'ü', 'ça', 'ão', 'ö', 'ß', 'ø', 'å', 'ł', 'ž'],
+    'cirilico': ['ка', 'ро', 'ми', 'ст', 'ан', 'ов', 'ия', 'ль'],
+    'griego': ['ελ', 'λά', 'δα', 'κύ', 'προ', 'ση'],
+    'japones': ['にっ', 'ぽん', 'とう', 'きょう', 'やま', 'かわ'],
+    'chino': ['中', '华', '国', '北', '京', '台', '湾'],
+    'arabe': ['عر', 'بي', 'مص', 'ر', 'قط'],
+}
+PESOS_ALFABETOS = {'latino': 70, 'acentos': 15, 'cirilico': 5, 'griego': 3, 'japones': 3, 'chino': 2, 'arabe': 2}
+PREFIJOS_OFICIALES = ['República de', 'Reino de', 'Estado de', 'República Federal de', 'Principado de',
+                      'República Democrática de', 'Mancomunidad de', 'Emirato de']
+IDIOMAS = {'spa': 'Spanish', 'eng': 'English', 'fra': 'French', 'ara': 'Arabic', 'rus': 'Russian',
+           'zho': 'Chinese', 'por': 'Portuguese', 'deu': 'German', 'jpn': 'Japanese', 'swa': 'Swahili'}
+MONEDAS = {'EUR': 'Euro', 'USD': 'United States dollar', 'ARS': 'Argentine peso', 'JPY': 'Japanese yen',
+           'XOF': 'West African CFA franc', 'INR': 'Indian rupee', 'CNY': 'Chinese yuan'}
+LETRAS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+def _palabra(azar, alfabetos, pesos):
+    """Arma una palabra de 2 a 4 sílabas de un mismo alfabeto (ej. 'Kañoma', 'Ростов')."""
+    alfabeto = azar.choices(alfabetos, weights=pesos)[0]
+    silabas = SILABAS['latino'] + SILABAS['acentos'] if alfabeto == 'acentos' else SILABAS[alfabeto]
+    palabra = ''.join(azar.choice(silabas) for _ in range(azar.randint(2, 4)))
+    return palabra[:1].upper() + palabra[1:]
+
+def _cca3(numero):
+    """Código de 3 letras único para cada número (AAA, AAB, ...) y luego con dígitos."""
+    codigo = ''
+    for _ in range(3):
+        numero, resto = divmod(numero, 26)
+        codigo = LETRAS[resto] + codigo
+    return codigo if numero == 0 else f"{codigo}{numero}"
+
+def generar_paises(cantidad, semilla=SEMILLA_POR_DEFECTO):
+    """
+    Genera 'cantidad' países con la forma de la API de restcountries (diccionarios anidados).
+    - Población: log-normal (muchos países chicos, pocos enormes), con ~2% deshabitados.
+    - Superficie: log-normal independiente (de islas de 1 km² a países continentales).
+    - Nombres en varios alfabetos, con tildes y ñ.
+    Es un generador: no guarda todos los países en memoria.
+    """
+    azar = random.Random(semilla)
+    continentes, pesos_continentes = list(PESOS_CONTINENTES), list(PESOS_CONTINENTES.values())
+    alfabetos, pesos_alfabetos = list(PESOS_ALFABETOS), list(PESOS_ALFABETOS.values())
+    codigos_idiomas, codigos_monedas = list(IDIOMAS), list(MONEDAS)
+    for numero in range(cantidad):
+        continente = azar.choices(continentes, weights=pesos_continentes)[0]
+        nombre = _palabra(azar, alfabetos, pesos_alfabetos)
+        if azar.random() < 0.2:
+            nombre += ' ' + _palabra(azar, alfabetos, pesos_alfabetos)  # Nombres compuestos (ej. "Nueva Zelanda")
+        oficial = f"{azar.choice(PREFIJOS_OFICIALES)} {nombre}"
+        capitales = [_palabra(azar, alfabetos, pesos_alfabetos) for _ in range(1 if azar.random() < 0.97 else 2)]
+        if continente == 'Antarctic' or azar.random() < 0.02:
+            poblacion = 0
+        else:
+            poblacion = min(int(math.exp(azar.gauss(math.log(5_000_000), 2.0))), 1_500_000_000)
+        area = round(min(math.exp(azar.gauss(math.log(100_000), 2.2)), 17_500_000.0), 1)
+        idiomas = azar.sample(codigos_idiomas, azar.randint(1, 3))
+        moneda = azar.choice(codigos_monedas)
+        cca3 = _cca3(numero)
+        yield {
+            'name': {'common': nombre, 'official': oficial},
+            'cca3': cca3,
+            'capital': capitales,
+            'region': continente,
+            'subregion': azar.choice(SUBREGIONES[continente]),
+            'languages': {codigo: IDIOMAS[codigo] for codigo in idiomas},
+            'currencies': {moneda: {'name': MONEDAS[moneda]}},
+            'latlng': [round(azar.uniform(-90, 90), 2), round(azar.uniform(-180, 180), 2)],
+            'borders': [_cca3(azar.randrange(max(1, cantidad))) for _ in range(azar.randint(0, 4))],
+            'timezones': [f"UTC{azar.randint(-12, 14):+03d}:00"],
+            'population': poblacion,
+            'area': area,
+            'translations': {'spa': {'common': nombre, 'official': oficial}},
+        }
+
+def escribir_todos_csv(ruta, cantidad, semilla=SEMILLA_POR_DEFECTO):
+    """Escribe un 'Todos.csv' sintético (mismas columnas que el real, con 'continente')."""
+    with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(CAMPOS + ['continente'])
+        for pais in generar_paises(cantidad, semilla):
+            escritor.writerow(extraer_campos(pais) + [pais['region']])
+    return ruta
+
+def escribir_csvs_por_continente(carpeta, cantidad, semilla=SEMILLA_POR_DEFECTO):
+    """
+    Escribe un CSV por continente (ej. 'Asia.csv', sin la columna 'continente'),
+    como los que une 'unir_csvs_en_uno'. Devuelve la lista de rutas.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    archivos, escritores = {}, {}
+    try:
+        for continente in PESOS_CONTINENTES:
+            archivos[continente] = open(os.path.join(carpeta, f"{continente}.csv"), 'w', newline='', encoding='utf-8')
+            archivos[continente].write(linea_cabecera(CAMPOS).decode('utf-8'))
+            escritores[continente] = csv.writer(archivos[continente])
+        for pais in generar_paises(cantidad, semilla):
+            escritores[pais['region']].writerow(extraer_campos(pais))
+    finally:
+        for archivo in archivos.values():
+            archivo.close()
+    return [archivo.name for archivo in archivos.values()]
+
+def escribir_respuestas_json(carpeta, cantidad, semilla=SEMILLA_POR_DEFECTO):
+    """
+    Escribe, por continente, el JSON crudo que devolvería la API
+    ('Asia.json' = respuesta de /v3.1/region/Asia). Sirve para medir la ingesta
+    (parser en streaming) sin red. Devuelve la lista de rutas.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    archivos, primeros = {}, {}
+    try:
+        for continente in PESOS_CONTINENTES:
+            archivos[continente] = open(os.path.join(carpeta, f"{continente}.json"), 'w', encoding='utf-8')
+            archivos[continente].write('[')
+            primeros[continente] = True
+        for pais in generar_paises(cantidad, semilla):
+            archivo = archivos[pais['region']]
+            if not primeros[pais['region']]:
+                archivo.write(',')
+            primeros[pais['region']] = False
+            json.dump(pais, archivo, ensure_ascii=False)
+        for archivo in archivos.values():
+            archivo.write(']')
+    finally:
+        for archivo in archivos.values():
+            archivo.close()
+    return [archivo.name for archivo in archivos.values()]
@@ -0,0 +1,176 @@
+# --- Importaciones de Módulos ---
+from array import array                 # Valores ordenados de una vista
+from collections import OrderedDict     # Memoria LRU de las estadísticas por consulta
+
+PERCENTILES = (10, 25, 50, 75, 90)      # Percentiles que se informan (el 50 es la mediana)
+MAXIMO_VISTAS_GUARDADAS = 32            # Estadísticas de vistas filtradas que se recuerdan
+
+def percentil(valores_ordenados, porcentaje):
+    """
+    Percentil de una secuencia YA ORDENADA, con interpolación lineal entre
+    los dos valores más cercanos (mismo criterio que statistics.quantiles 'inclusive').
+    Cuesta O(1): sólo lee una o dos posiciones.
+    """
+    if not valores_ordenados:
+        return None
+    posicion = (len(valores_ordenados) - 1) * porcentaje / 100
+    abajo = int(posicion)
+    arriba = min(abajo + 1, len(valores_ordenados) - 1)
+    fraccion = posicion - abajo
+    return valores_ordenados[abajo] + (valores_ordenados[arriba] - valores_ordenados[abajo]) * fraccion
+
+def densidad(poblacion, area):
+    """Habitantes por km² (None si el área es cero)."""
+    return poblacion / area if area else None
+
+class Agregados:
+    """
+    Conteos y sumas (globales y por continente) que se pueden mantener de forma
+    incremental: 'agregar' y 'quitar' sólo recorren las filas que cambian.
+    Los mínimos, máximos y percentiles NO van acá: salen de los valores ordenados.
+    """
+
+    def __init__(self, tabla):
+        self.poblaciones = tabla.numericas['poblacion_num']
+        self.areas = tabla.numericas['area_num']
+        self.continentes = tabla.categoricas['continente']
+        self.cantidad = 0
+        self.suma_poblacion = 0
+        self.suma_area = 0
+        self.por_continente = {}  # código de continente -> [cantidad, suma_poblacion, suma_area]
+
+    def _acumular(self, filas, signo):
+        poblaciones, areas, codigos = self.poblaciones, self.areas, self.continentes.codigos
+        por_continente = self.por_continente
+        # Una sola pasada: todas las sumas y conteos a la vez
+        for fila in filas:
+            poblacion, area = poblaciones[fila], areas[fila]
+            self.cantidad += signo
+            self.suma_poblacion += signo * poblacion
+            self.suma_area += signo * area
+            grupo = por_continente.get(codigos[fila])
+            if grupo is None:
+                grupo = por_continente[codigos[fila]] = [0, 0, 0]
+            grupo[0] += signo
+            grupo[1] += signo * poblacion
+            grupo[2] += signo * area
+        return self
+
+    def agregar(self, filas):
+        """Suma las filas dadas a los agregados."""
+        return self._acumular(filas, 1)
+
+    def quitar(self, filas):
+        """Resta las filas dadas (ej. las de una región que se volvió a descargar)."""
+        self._acumular(filas, -1)
+        self.por_continente = {codigo: grupo for codigo, grupo in self.por_continente.items() if grupo[0]}
+        return self
+
+def _resumen_columna(valores_ordenados, suma):
+    """Mínimo, máximo, suma, promedio, mediana y percentiles de una columna."""
+    if not valores_ordenados:
+        return None
+    return {
+        "minimo": valores_ordenados[0],
+        "maximo": valores_ordenados[-1],
+        "suma": suma,
+        "promedio": suma / len(valores_ordenados),
+        "mediana": percentil(valores_ordenados, 50),
+        "percentiles": {porcentaje: percentil(valores_ordenados, porcentaje) for porcentaje in PERCENTILES},
+    }
+
+def resumir(tabla, filas_por_poblacion, poblaciones_ordenadas, areas_ordenadas, agregados):
+    """
+    Arma el diccionario de estadísticas a partir de:
+    - las filas ordenadas por población (para el país más y menos poblado),
+    - los valores de población y área ya ordenados (para mínimos, máximos y percentiles),
+    - los 'Agregados' (sumas y conteos).
+    Sin recorrer las filas: el costo no depende de su cantidad.
+    """
+    nombres = tabla.lector('nombre_comun_es')
+    resumen = {
+        "cantidad": agregados.cantidad,
+        "poblacion": _resumen_columna(poblaciones_ordenadas, agregados.suma_poblacion),
+        "area": _resumen_columna(areas_ordenadas, agregados.suma_area),
+        "densidad": densidad(agregados.suma_poblacion, agregados.suma_area),
+        "pais_mas_poblado": None,
+        "pais_menos_poblado": None,
+        "por_continente": {},
+    }
+    if filas_por_poblacion:
+        resumen["pais_mas_poblado"] = (nombres(filas_por_poblacion[-1]), poblaciones_ordenadas[-1])
+        resumen["pais_menos_poblado"] = (nombres(filas_por_poblacion[0]), poblaciones_ordenadas[0])
+    for codigo, (cantidad, suma_poblacion, suma_area) in agregados.por_continente.items():
+        resumen["por_continente"][agregados.continentes.vocabulario[codigo]] = {
+            "cantidad": cantidad,
+            "poblacion": suma_poblacion,
+            "area": suma_area,
+            "densidad": densidad(suma_poblacion, suma_area),
+        }
+    return resumen
+
+class EstadisticasTabla:
+    """
+    Estadísticas de la tabla maestra y de las vistas filtradas.
+    - Globales: los agregados se calculan en UNA pasada al cargar y los valores
+      ordenados ya existen en los índices (IndicesTabla), así que abrir la
+      ventana de estadísticas cuesta lo mismo con 250 países que con millones.
+    - De una vista: una pasada sobre sus números de fila (no sobre la tabla);
+      el resultado se recuerda por consulta, para no recalcularlo al reabrir.
+    """
+
+    def __init__(self, tabla, indices):
+        self.tabla = tabla
+        self.indices = indices
+        self.agregados = self._agregar(range(len(tabla)))
+        self._globales = None
+        self._vistas = OrderedDict()  # clave de la consulta -> resumen
+
+    def globales(self):
+        """Estadísticas de toda la tabla."""
+        if self._globales is None:
+            self._globales = resumir(self.tabla, self.indices.poblacion.filas, self.indices.poblacion.valores,
+                                     self.indices.area.valores, self.agregados)
+        return self._globales
+
+    def de_vista(self, vista, clave=None):
+        """
+        Estadísticas de las filas de 'vista'. 'clave' (ej. la consulta que la produjo,
+        sin el orden) permite reutilizar el resultado si se vuelve a pedir.
+        """
+        if len(vista) == len(self.tabla):
+            return self.globales()  # La vista tiene todas las filas
+        if clave is not None and clave in self._vistas:
+            self._vistas.move_to_end(clave)
+            return self._vistas[clave]
+
+        resumen = self._resumir_vista(vista)
+        if clave is not None:
+            self._vistas[clave] = resumen
+            while len(self._vistas) > MAXIMO_VISTAS_GUARDADAS:
+                self._vistas.popitem(last=False)
+        return resumen
+
+    def _agregar(self, filas):
+        """Agregados (sumas y conteos) de las filas dadas."""
+        return Agregados(self.tabla).agregar(filas)
+
+    def _resumir_vista(self, vista):
+        poblaciones, areas = self.tabla.numericas['poblacion_num'], self.tabla.numericas['area_num']
+        # Las filas se ordenan con la permutación precalculada (sin comparar valores)
+        filas_por_poblacion = self.indices.orden['poblacion'].ordenar(vista)
+        poblaciones_ordenadas = array('q', (poblaciones[fila] for fila in filas_por_poblacion))
+        areas_ordenadas = array('q', (areas[fila] for fila in self.indices.orden['area'].ordenar(vista)))
+        return resumir(self.tabla, filas_por_poblacion, poblaciones_ordenadas, areas_ordenadas, self._agregar(vista))
+
+    def agregar_filas(self, filas):
+        """Actualiza los agregados globales con filas nuevas (los índices deben estar al día)."""
+        self.agregados.agregar(filas)
+        self._globales = None
+        self._vistas.clear()
+
+    def quitar_filas(self, filas):
+        """Descuenta filas de los agregados globales."""
+        self.agregados.quitar(filas)
+        self._globales = None
+        self._vistas.clear()
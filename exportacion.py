@@ -0,0 +1,169 @@
+# --- Importaciones de Módulos ---
+import csv        # Salida en CSV
+import gzip       # Salida comprimida (.gz)
+import json       # Salida en JSON lines
+import os         # Archivo temporal y reemplazo al terminar
+import queue      # Avance del hilo de exportación hacia la ventana
+import threading  # El hilo que escribe el archivo
+from array import array # Copia de las vistas en memoria
+from itertools import islice # Lectura de las filas por bloques
+from motor import ConsultaCancelada
+import rendimiento # Medición de la exportación
+
+# --- Exportación de Vistas ---
+# Escribe las filas de una vista (filtrada y ordenada) en CSV o JSON lines, con o
+# sin gzip, leyéndolas y escribiéndolas por bloques: la memoria no depende de la
+# cantidad de filas. La usan la interfaz ("Exportar vista") y cualquier script:
+#   exportar_vista(motor, vista, "asia.csv.gz", ["nombre_comun_es", "poblacion"])
+
+FORMATOS = ("csv", "jsonl")
+FILAS_POR_BLOQUE = 5000  # Filas que se leen y escriben de una vez (y cada cuánto se informa el avance)
+NIVEL_COMPRESION = 6     # Nivel de gzip (el de 'gzip' en la línea de comandos: buen equilibrio)
+INTERVALO_MS = 100       # Cada cuánto la ventana revisa el avance de la exportación
+
+def formato_de_ruta(ruta):
+    """Deduce (formato, comprimido) de la extensión: 'vista.jsonl.gz' -> ('jsonl', True); lo demás es CSV."""
+    nombre = ruta.lower()
+    comprimido = nombre.endswith(".gz")
+    if comprimido:
+        nombre = nombre[:-len(".gz")]
+    return ("jsonl" if nombre.endswith((".jsonl", ".json")) else "csv"), comprimido
+
+def copiar_vista(vista):
+    """
+    Copia de 'vista' para exportarla desde otro hilo: la ventana reordena su vista en el
+    lugar ('vista[:] = ...') y el archivo mezclaría filas de un orden y del otro.
+    Una VistaSqlite se copia con 'copiar()' (sin traer sus filas a memoria).
+    """
+    return vista.copiar() if hasattr(vista, "copiar") else array('I', vista)
+
+def abrir_salida(ruta, comprimido=False):
+    """Abre 'ruta' para escribir texto UTF-8 (comprimido con gzip si se pide)."""
+    if comprimido:
+        return gzip.open(ruta, "wt", encoding="utf-8", newline="", compresslevel=NIVEL_COMPRESION)
+    return open(ruta, "w", encoding="utf-8", newline="")
+
+def _escritor(archivo, formato, columnas):
+    """Devuelve la función que escribe un bloque de filas (listas de valores) en el formato pedido."""
+    if formato == "csv":
+        escritor = csv.writer(archivo)
+        escritor.writerow(columnas)
+        return escritor.writerows
+    codificar = json.JSONEncoder(ensure_ascii=False).encode  # Un solo codificador (json.dumps arma uno por llamada)
+    def escribir_jsonl(bloque):
+        archivo.write("".join(codificar(dict(zip(columnas, fila))) + "\n" for fila in bloque))
+    return escribir_jsonl
+
+def exportar_vista(motor, vista, ruta, columnas, formato=None, comprimido=None, al_avanzar=None, cancelado=None,
+                   filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Escribe las filas de 'vista' (en su orden) con las 'columnas' pedidas en 'ruta'.
+    - 'formato' ("csv" o "jsonl") y 'comprimido' se deducen de la extensión si no se indican.
+    - Después de cada bloque se llama a 'al_avanzar(escritas, total)' y se revisa
+      'cancelado()': si devuelve True, se lanza ConsultaCancelada.
+    - Se escribe en 'ruta.tmp' y recién al terminar se reemplaza 'ruta': si se cancela
+      o falla, no queda un archivo a medias.
+    Devuelve la cantidad de filas escritas.
+    """
+    formato_ruta, comprimido_ruta = formato_de_ruta(ruta)
+    formato = formato or formato_ruta
+    comprimido = comprimido_ruta if comprimido is None else comprimido
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido '{formato}' (opciones: {', '.join(FORMATOS)}).")
+    total = len(vista)
+    ruta_temporal = ruta + ".tmp"
+    escritas = 0
+    valores = motor.valores(vista, columnas)
+    try:
+        with rendimiento.etapa('exportar', total), abrir_salida(ruta_temporal, comprimido) as archivo:
+            escribir = _escritor(archivo, formato, columnas)
+            while True:
+                bloque = list(islice(valores, filas_por_bloque))
+                if not bloque:
+                    break
+                escribir(bloque)
+                escritas += len(bloque)
+                if al_avanzar is not None:
+                    al_avanzar(escritas, total)
+                if cancelado is not None and cancelado():
+                    raise ConsultaCancelada()
+        os.replace(ruta_temporal, ruta)
+    except BaseException:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        raise
+    finally:
+        valores.close()
+    return escritas
+
+class ExportacionEnSegundoPlano:
+    """
+    Ejecuta 'exportar_vista' en un hilo aparte para que la ventana siga respondiendo.
+    Igual que CargaEnSegundoPlano, el hilo deja mensajes en una cola que la ventana
+    revisa con after(), y llama (siempre en el hilo principal) a:
+    - al_avanzar(escritas, total): después de cada bloque (si se juntaron varios, sólo el último),
+    - al_terminar(escritas), al_cancelar() o al_fallar(error), una sola vez al final.
+    """
+
+    def __init__(self, ventana, motor, vista, ruta, columnas, formato=None, comprimido=None,
+                 al_avanzar=None, al_terminar=None, al_cancelar=None, al_fallar=None, intervalo_ms=INTERVALO_MS):
+        self.ventana = ventana
+        self.al_avanzar = al_avanzar
+        self.al_terminar = al_terminar
+        self.al_cancelar = al_cancelar
+        self.al_fallar = al_fallar
+        self.intervalo_ms = intervalo_ms
+        self._cancelada = threading.Event()
+        self._cola = queue.Queue()
+        self._argumentos = (motor, vista, ruta, columnas, formato, comprimido)
+        self._hilo = threading.Thread(target=self._exportar, name="exportacion", daemon=True)
+
+    def iniciar(self):
+        """Arranca el hilo de exportación y la revisión periódica de la cola."""
+        self._hilo.start()
+        self.ventana.after(self.intervalo_ms, self._revisar)
+
+    def cancelar(self):
+        """Pide cortar la exportación (se nota al terminar el bloque en curso)."""
+        self._cancelada.set()
+
+    # --- Hilo de exportación (NO toca la interfaz) ---
+
+    def _exportar(self):
+        motor, vista, ruta, columnas, formato, comprimido = self._argumentos
+        try:
+            escritas = exportar_vista(motor, vista, ruta, columnas, formato, comprimido,
+                                      al_avanzar=lambda escritas, total: self._cola.put(("avance", escritas, total)),
+                                      cancelado=self._cancelada.is_set)
+            self._cola.put(("listo", escritas))
+        except ConsultaCancelada:
+            self._cola.put(("cancelada",))
+        except Exception as error:
+            self._cola.put(("error", error))
+
+    # --- Hilo principal (revisión con after) ---
+
+    def _revisar(self):
+        avance = None
+        while True:
+            try:
+                mensaje = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if mensaje[0] == "avance":
+                avance = mensaje
+                continue
+            if avance is not None and self.al_avanzar is not None:
+                self.al_avanzar(*avance[1:])
+            if mensaje[0] == "listo":
+                if self.al_terminar is not None:
+                    self.al_terminar(mensaje[1])
+            elif mensaje[0] == "cancelada":
+                if self.al_cancelar is not None:
+                    self.al_cancelar()
+            elif self.al_fallar is not None:
+                self.al_fallar(mensaje[1])
+            return  # Terminó: no se vuelve a programar la revisión
+        if avance is not None and self.al_avanzar is not None:
+            self.al_avanzar(*avance[1:])
+        self.ventana.after(self.intervalo_ms, self._revisar)
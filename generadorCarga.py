@@ -0,0 +1,114 @@
+# --- Importaciones de Módulos ---
+import argparse      # Opciones de línea de comandos
+import http.client   # Conexiones keep-alive al servicio
+import json          # Resultado en JSON
+import multiprocessing # Varios procesos cliente (un solo proceso no alcanza a saturar el servidor)
+import threading     # Varias conexiones por proceso
+import time          # Duración de la prueba y latencias
+from collections import Counter # Respuestas por código HTTP
+from estadisticas import percentil # Percentiles de latencia
+
+# --- Generador de Carga para servicioPaises.py ---
+# Abre 'procesos' x 'conexiones' conexiones keep-alive y, durante 'segundos', cada una
+# repite en ronda las consultas de prueba. Informa peticiones por segundo, latencias
+# (p50/p95/p99) y respuestas por código. Con --etag, cada conexión reenvía el ETag
+# recibido (If-None-Match) y el servidor contesta 304 mientras los datos no cambien.
+#   python servicioPaises.py &
+#   python generadorCarga.py --segundos 10 --procesos 4 --conexiones 8
+
+CONSULTAS_DE_PRUEBA = [
+    "/paises?limite=50",
+    "/paises?continente=Asia&ordenar=poblacion:desc&limite=20",
+    "/paises?continente=Europe&min_poblacion=1000000&ordenar=nombre",
+    "/paises?buscar=san&ordenar=area:desc",
+    "/paises?min_area=100000&max_area=1000000&desde=20&limite=20",
+    "/primeros?n=10&por=poblacion:desc",
+    "/primeros?n=5&por=area&continente=Africa",
+    "/primeros?n=3&por=poblacion:desc&por_continente=1",
+    "/estadisticas",
+    "/estadisticas?continente=Americas",
+]
+
+def trabajar_conexion(host, puerto, rutas, hasta, usar_etag, latencias, codigos):
+    """Una conexión keep-alive: pide 'rutas' en ronda hasta el instante 'hasta' (perf_counter)."""
+    conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+    etags = {}
+    reloj = time.perf_counter
+    indice = 0
+    try:
+        while reloj() < hasta:
+            ruta = rutas[indice % len(rutas)]
+            indice += 1
+            cabeceras = {"If-None-Match": etags[ruta]} if usar_etag and ruta in etags else {}
+            inicio = reloj()
+            try:
+                conexion.request("GET", ruta, headers=cabeceras)
+                respuesta = conexion.getresponse()
+                respuesta.read()
+            except (OSError, http.client.HTTPException):
+                codigos["error"] += 1
+                conexion.close()  # Se vuelve a conectar en la próxima petición
+                continue
+            latencias.append(reloj() - inicio)
+            codigos[respuesta.status] += 1
+            if respuesta.getheader("ETag"):
+                etags[ruta] = respuesta.getheader("ETag")
+    finally:
+        conexion.close()
+
+def trabajar_proceso(host, puerto, rutas, segundos, conexiones, usar_etag):
+    """Tarea de cada proceso: 'conexiones' hilos durante 'segundos'. Devuelve (latencias, codigos)."""
+    hasta = time.perf_counter() + segundos
+    latencias, codigos = [], Counter()
+    hilos = [threading.Thread(target=trabajar_conexion, args=(host, puerto, rutas, hasta, usar_etag, latencias, codigos))
+             for _ in range(conexiones)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return latencias, dict(codigos)
+
+def generar_carga(host, puerto, rutas=CONSULTAS_DE_PRUEBA, segundos=10, procesos=1, conexiones=8, usar_etag=False):
+    """Corre la prueba y devuelve un diccionario con el resumen."""
+    argumentos = [(host, puerto, rutas, segundos, conexiones, usar_etag)] * procesos
+    inicio = time.perf_counter()
+    if procesos == 1:
+        resultados = [trabajar_proceso(*argumentos[0])]
+    else:
+        with multiprocessing.get_context("spawn").Pool(procesos) as pool:
+            resultados = pool.starmap(trabajar_proceso, argumentos)
+    duracion = time.perf_counter() - inicio
+    latencias = sorted(latencia for parcial, _ in resultados for latencia in parcial)
+    codigos = Counter()
+    for _, parcial in resultados:
+        codigos.update(parcial)
+    return {
+        "peticiones": len(latencias),
+        "segundos": round(duracion, 3),
+        "peticiones_por_segundo": round(len(latencias) / duracion, 1),
+        "conexiones": procesos * conexiones,
+        "latencia_ms": {f"p{p}": round(percentil(latencias, p) * 1000, 3) for p in (50, 95, 99)} if latencias else {},
+        "codigos": {str(codigo): cantidad for codigo, cantidad in sorted(codigos.items(), key=str)},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generador de carga para servicioPaises.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--procesos", type=int, default=1, help="Procesos cliente")
+    parser.add_argument("--conexiones", type=int, default=8, help="Conexiones keep-alive por proceso")
+    parser.add_argument("--etag", action="store_true", help="Reenvía el ETag recibido (respuestas 304)")
+    parser.add_argument("--rutas", help="Archivo con una ruta por línea (por defecto, las consultas de prueba)")
+    argumentos = parser.parse_args(argv)
+    rutas = CONSULTAS_DE_PRUEBA
+    if argumentos.rutas:
+        with open(argumentos.rutas, encoding="utf-8") as archivo:
+            rutas = [linea.strip() for linea in archivo if linea.strip() and not linea.startswith("#")]
+    resumen = generar_carga(argumentos.host, argumentos.puerto, rutas, argumentos.segundos,
+                            argumentos.procesos, argumentos.conexiones, argumentos.etag)
+    print(json.dumps(resumen, ensure_ascii=False))
+
+# --- Punto de Entrada del Script ---
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,228 @@
 import requests  # Para realizar peticiones HTTP a la API
 import csv       # Para leer y escribir archivos CSV
 import os        # Para interactuar con el sistema operativo (crear carpetas, revisar archivos)
+import hashlib   # Para calcular la huella (hash) del contenido descargado
+import time      # Para registrar cuándo se verificó cada región
+import io        # Para escribir texto CSV sobre archivos binarios
+import json      # Para decodificar la respuesta de la API de a un objeto por vez
+import codecs    # Para decodificar UTF-8 por trozos (un carácter puede quedar partido entre trozos)
+import shutil    # Para copiar bloques de bytes entre archivos
+import tempfile  # Para los segmentos temporales de cada continente
+import itertools # Para contar las filas mientras se escriben
+from concurrent.futures import ThreadPoolExecutor  # Para descargar varios continentes a la vez
+from requests.adapters import HTTPAdapter  # Para configurar el pool de conexiones de la sesión
+from urllib3.util.retry import Retry       # Para reintentar peticiones fallidas con espera creciente
+import rendimiento  # Medición de las etapas (descarga, JSON, CSV, unión)
+from tablaPaises import SEPARADOR_LISTA  # Separador de los elementos de las columnas de listas
+from cacheDatos import (cabeceras_condicionales, entrada_region, maestro_coincide, registrar_maestro,
+                        cargar_fuentes, guardar_fuentes, ESTADO_ACTUALIZADO, ESTADO_SIN_CAMBIOS, ESTADO_ERROR, ESTADO_ELIMINADO)
 
-def obtener_y_guardar_paises(url, nombre_archivo, carpeta_salida):
+# --- Configuración de Red por Defecto ---
+TIMEOUT_POR_DEFECTO = 10     # Segundos máximos de espera por cada petición
+REINTENTOS_POR_DEFECTO = 3   # Cantidad de reintentos ante errores de red o 5xx
+FACTOR_ESPERA_POR_DEFECTO = 0.5  # Espera entre reintentos: 0.5s, 1s, 2s, ...
+TAMANO_TROZO = 64 * 1024     # Bytes que se leen de la red en cada paso del streaming
+
+# Columnas que extraemos de cada país (en este orden se escriben en los CSV).
+# Las de listas (idiomas, monedas, fronteras, zonas horarias) llevan sus elementos
+# separados por SEPARADOR_LISTA; al cargarlas, TablaPaises las guarda codificadas (ver tablaPaises.py).
+CAMPOS = ['nombre_comun_es', 'nombre_oficial_es', 'capital', 'region', 'poblacion', 'area',
+          'cca3', 'subregion', 'latitud', 'longitud', 'idiomas', 'monedas', 'fronteras', 'zonas_horarias']
+
+def crear_sesion(max_conexiones=6, reintentos=REINTENTOS_POR_DEFECTO, factor_espera=FACTOR_ESPERA_POR_DEFECTO):
+    """
+    Crea una sesión HTTP compartida (keep-alive) con un pool de conexiones
+    y reintentos automáticos con espera exponencial (backoff).
+    La sesión se puede usar desde varios hilos a la vez.
+    """
+    # Define la política de reintentos: sólo para errores transitorios
+    politica_reintentos = Retry(
+        total=reintentos,
+        backoff_factor=factor_espera,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+    )
+    # El adaptador mantiene abiertas hasta 'max_conexiones' conexiones por host
+    adaptador = HTTPAdapter(pool_connections=max_conexiones, pool_maxsize=max_conexiones, max_retries=politica_reintentos)
+
+    sesion = requests.Session()
+    sesion.mount('http://', adaptador)
+    sesion.mount('https://', adaptador)
+    return sesion
+
+
+def iterar_objetos_json(trozos):
+    """
+    Recorre una lista JSON ('[{...}, {...}, ...]') que llega en trozos de bytes
+    y devuelve (yield) cada elemento apenas está completo.
+    Así nunca se tiene en memoria toda la respuesta: sólo el elemento actual
+    y, como mucho, un trozo de red.
+    """
+    decodificador_texto = codecs.getincrementaldecoder('utf-8')()
+    decodificador_json = json.JSONDecoder()
+    trozos = iter(trozos)
+    buffer = ''
+    fin_de_datos = False
+    se_abrio_lista = False
+
+    def leer_mas():
+        """Agrega al buffer el siguiente trozo (o marca el fin de los datos)."""
+        nonlocal buffer, fin_de_datos
+        try:
+            buffer += decodificador_texto.decode(next(trozos))
+        except StopIteration:
+            buffer += decodificador_texto.decode(b'', final=True)
+            fin_de_datos = True
+
+    while True:
+        # --- 1. Saltar espacios (y las comas entre elementos) ---
+        posicion = 0
+        while True:
+            while posicion < len(buffer) and buffer[posicion] in ' \t\r\n\ufeff' + (',' if se_abrio_lista else ''):
+                posicion += 1
+            if posicion < len(buffer) or fin_de_datos:
+                break
+            buffer, posicion = '', 0
+            leer_mas()
+        buffer = buffer[posicion:]
+
+        if not buffer:
+            raise ValueError("La respuesta JSON terminó antes de cerrar la lista.")
+
+        # --- 2. Apertura y cierre de la lista ---
+        if not se_abrio_lista:
+            if buffer[0] != '[':
+                raise ValueError("Se esperaba una lista JSON de países.")
+            se_abrio_lista = True
+            buffer = buffer[1:]
+            continue
+        if buffer[0] == ']':
+            return
+
+        # --- 3. Decodificar UN elemento (pidiendo más datos si está incompleto) ---
+        while True:
+            try:
+                objeto, fin = decodificador_json.raw_decode(buffer)
+                # Si el valor llega justo al final del buffer podría estar cortado (ej. un número)
+                if fin < len(buffer) or fin_de_datos:
+                    break
+            except json.JSONDecodeError:
+                if fin_de_datos:
+                    raise
+            leer_mas()
+        yield objeto
+        buffer = buffer[fin:]
+
+def extraer_campos(pais):
+    """
+    Convierte un país de la API (diccionario anidado) en la lista de valores
+    de CAMPOS, en el mismo orden.
+    """
+    # --- Extracción Segura de Datos ---
+    # pais.get('translations', {}) -> Obtiene 'translations' o un dict vacío {} si no existe.
+    # .get('spa', {}) -> Obtiene 'spa' o un dict vacío {} si no existe.
+    # .get('common', 'N/A') -> Obtiene 'common' o 'N/A' si no existe.
+    traduccion = pais.get('translations', {}).get('spa', {})
+    # 'latlng' es [latitud, longitud] (puede faltar o venir vacío)
+    coordenadas = (pais.get('latlng') or []) + [None, None]
+    return [
+        traduccion.get('common', 'N/A'),
+        traduccion.get('official', 'N/A'),
+        # La capital puede ser una lista (ej. Sudáfrica). .join() la convierte en un string.
+        # Si no hay capital, .get() devuelve ['N/A'] y .join() convierte eso en 'N/A'.
+        ', '.join(pais.get('capital', ['N/A'])),
+        pais.get('region', 'N/A'),
+        int(pais.get('population', 0)), # Convierte la población en int
+        int(pais.get('area', 0.0)),     # Convierte el área a entero
+        pais.get('cca3', ''),
+        pais.get('subregion', ''),
+        '' if coordenadas[0] is None else coordenadas[0],
+        '' if coordenadas[1] is None else coordenadas[1],
+        # Idiomas: {'spa': 'Spanish', 'grn': 'Guaraní'} -> "Spanish|Guaraní"
+        SEPARADOR_LISTA.join((pais.get('languages') or {}).values()),
+        # Monedas: {'ARS': {'name': ..., 'symbol': ...}} -> "ARS" (el código ISO)
+        SEPARADOR_LISTA.join(pais.get('currencies') or {}),
+        SEPARADOR_LISTA.join(pais.get('borders') or []),
+        SEPARADOR_LISTA.join(pais.get('timezones') or []),
+    ]
+
+def escribir_filas_en_streaming(response, archivo_binario, continente=None):
+    """
+    Lee la respuesta de la API por trozos, extrae los campos de cada país y
+    escribe las filas CSV directamente en 'archivo_binario' (abierto en modo 'b').
+    Si se pasa 'continente', se agrega como última columna.
+    Devuelve (cantidad_de_filas, hash_sha256_del_contenido_recibido).
+    Con la instrumentación encendida (ver rendimiento.py) separa el tiempo de
+    red ('descarga'), el de decodificar el JSON y el de escribir el CSV.
+    """
+    huella = hashlib.sha256()
+    medir = rendimiento.activo()
+    reloj = time.perf_counter
+    tiempos = {'descarga': 0.0, 'decodificar_json': 0.0, 'escribir_csv': 0.0}
+    recibidos = 0
+
+    def trozos():
+        """Pasa los trozos de la red al parser, calculando el hash de paso."""
+        nonlocal recibidos
+        inicio = reloj()
+        for trozo in response.iter_content(chunk_size=TAMANO_TROZO):
+            if medir:
+                tiempos['descarga'] += reloj() - inicio
+                recibidos += len(trozo)
+            huella.update(trozo)
+            yield trozo
+            inicio = reloj()
+        if medir:
+            tiempos['descarga'] += reloj() - inicio
+
+    # TextIOWrapper permite usar csv.writer sobre el archivo binario
+    texto = io.TextIOWrapper(archivo_binario, encoding='utf-8', newline='', write_through=True)
+    escritor = csv.writer(texto)
+    cantidad = 0
+    inicio = reloj()
+    for pais in iterar_objetos_json(trozos()):
+        if medir:
+            # Lo que tardó en llegar este país (red + JSON); la red se descuenta al final
+            ahora = reloj()
+            tiempos['decodificar_json'] += ahora - inicio
+        fila = extraer_campos(pais)
+        if continente is not None:
+            fila.append(continente)
+        escritor.writerow(fila)
+        cantidad += 1
+        if medir:
+            inicio = reloj()
+            tiempos['escribir_csv'] += inicio - ahora
+    # detach() vacía el buffer de texto y devuelve el archivo SIN cerrarlo
+    texto.detach()
+    if medir:
+        tiempos['decodificar_json'] = max(0.0, tiempos['decodificar_json'] + reloj() - inicio - tiempos['descarga'])
+        rendimiento.registrar('descarga', tiempos['descarga'], recibidos)  # Aquí "filas" son bytes recibidos
+        rendimiento.registrar('decodificar_json', tiempos['decodificar_json'], cantidad)
+        rendimiento.registrar('escribir_csv', tiempos['escribir_csv'], cantidad)
+    return cantidad, huella.hexdigest()
+
+def linea_cabecera(campos):
+    """Devuelve la cabecera CSV (en bytes UTF-8) para los campos dados."""
+    texto = io.StringIO()
+    csv.writer(texto).writerow(campos)
+    return texto.getvalue().encode('utf-8')
+
+def obtener_y_guardar_paises(url, nombre_archivo, carpeta_salida, sesion=None, timeout=TIMEOUT_POR_DEFECTO, entrada_cache=None):
     """
     Obtiene datos de la API y los guarda en un CSV dentro de una carpeta específica.
+    Si se pasa una 'sesion', reutiliza sus conexiones; si no, usa una petición simple.
+    Si se pasa 'entrada_cache' (la entrada del manifiesto para esta región), hace una
+    petición condicional y NO reescribe el CSV cuando los datos no cambiaron.
+    La entrada se actualiza con los nuevos validadores, hash y fechas.
+    Devuelve ESTADO_ACTUALIZADO, ESTADO_SIN_CAMBIOS o ESTADO_ERROR.
     """
     # --- 1. Preparación del Directorio ---
     
     # Comprueba si la carpeta de salida (ej. "Continentes") no existe
+    # (exist_ok evita un error si otro hilo la crea al mismo tiempo)
     if not os.path.exists(carpeta_salida):
-        os.makedirs(carpeta_salida) # Si no existe, la crea
+        os.makedirs(carpeta_salida, exist_ok=True) # Si no existe, la crea
         print(f"Carpeta '{carpeta_salida}' creada exitosamente.")
 
     # Une la ruta de la carpeta y el nombre del archivo (ej. "Continentes/Africa.csv")
@@ -21,51 +233,62 @@ def obtener_y_guardar_paises(url, nombre_archivo, carpeta_salida):
     
     # --- 2. Petición a la API y Manejo de Errores ---
     try:
-        # Realiza la petición GET a la URL
-        response = requests.get(url) 
-        # Si la respuesta es un error (ej. 404, 500), lanza una excepción
-        response.raise_for_status()
-        
-        # Convierte la respuesta JSON (texto) en una lista de diccionarios de Python
-        paises = response.json()
-        print(f"Se encontraron {len(paises)} territorios. Procesando...")
-
-        # --- 3. Escritura del Archivo CSV ---
+        # Si ya tenemos el CSV y sus validadores, preguntamos "¿cambió algo?"
+        cache = entrada_cache if entrada_cache is not None else {}
+        # Un CSV escrito con otras columnas (ej. antes de agregar idiomas y monedas) no sirve
+        hay_archivo_previo = os.path.exists(ruta_completa_archivo) and cache.get("campos") == CAMPOS
+        cabeceras = cabeceras_condicionales(cache) if hay_archivo_previo else {}
         
-        # Abre el archivo en modo escritura ('w').
-        # newline='' y encoding='utf-8' son buenas prácticas para CSV.
-        with open(ruta_completa_archivo, 'w', newline='', encoding='utf-8') as archivo_csv:
+        # Realiza la petición GET a la URL (siempre con un tiempo límite).
+        # stream=True: el cuerpo se lee por trozos en lugar de cargarlo entero en memoria.
+        # El 'with' devuelve la conexión al pool aunque haya un error.
+        cliente = sesion if sesion is not None else requests
+        with rendimiento.etapa('peticion_http'):
+            response = cliente.get(url, timeout=timeout, headers=cabeceras, stream=True)
+        with response:
             
-            # Define los nombres de las columnas que queremos en nuestro CSV
-            campos = ['nombre_comun_es', 'nombre_oficial_es', 'capital', 'region', 'poblacion', 'area']
+            # 304 = "Not Modified": el CSV que ya tenemos sigue vigente
+            if response.status_code == 304:
+                cache["verificado_en"] = time.time()
+                print(f"Sin cambios en {url} (304). Se conserva '{ruta_completa_archivo}'.")
+                return ESTADO_SIN_CAMBIOS
             
-            # Crea un "escritor" que entiende de diccionarios
-            escritor = csv.DictWriter(archivo_csv, fieldnames=campos)
+            # Si la respuesta es un error (ej. 404, 500), lanza una excepción
+            response.raise_for_status()
             
-            # Escribe la primera fila (la cabecera) con los nombres de los campos
-            escritor.writeheader()
+            # Guarda los validadores que nos dio el servidor para la próxima vez
+            cache["url"] = url
+            cache["etag"] = response.headers.get("ETag")
+            cache["last_modified"] = response.headers.get("Last-Modified")
+            cache["verificado_en"] = time.time()
             
-            # Itera sobre cada país (que es un diccionario) en la lista obtenida de la API
-            for pais in paises:
-                # Escribe una fila en el CSV
-                escritor.writerow({
-                    # --- 4. Extracción Segura de Datos ---
-                    # Esta es una forma muy segura de acceder a datos anidados.
-                    # pais.get('translations', {}) -> Obtiene 'translations' o un dict vacío {} si no existe.
-                    # .get('spa', {}) -> Obtiene 'spa' o un dict vacío {} si no existe.
-                    # .get('common', 'N/A') -> Obtiene 'common' o 'N/A' si no existe.
-                    'nombre_comun_es': pais.get('translations', {}).get('spa', {}).get('common', 'N/A'),
-                    'nombre_oficial_es': pais.get('translations', {}).get('spa', {}).get('official', 'N/A'),
-                    
-                    # La capital puede ser una lista (ej. Sudáfrica). .join() la convierte en un string.
-                    # Si no hay capital, .get() devuelve ['N/A'] y .join() convierte eso en 'N/A'.
-                    'capital': ', '.join(pais.get('capital', ['N/A'])),
-                    
-                    'region': pais.get('region', 'N/A'),
-                    'poblacion': int(pais.get('population', 0)), #onvierte una población en int
-                    'area': int(pais.get('area', 0.0)) # Convierte el área a entero
-                })
+            # --- 3. Escritura del Archivo CSV (en streaming) ---
+            # Los países se procesan a medida que llegan por la red y se escriben
+            # en un archivo temporal; al final se renombra de forma atómica.
+            ruta_temporal = ruta_completa_archivo + ".tmp"
+            try:
+                with open(ruta_temporal, 'wb') as archivo_csv:
+                    archivo_csv.write(linea_cabecera(CAMPOS))
+                    cantidad, huella = escribir_filas_en_streaming(response, archivo_csv)
+                print(f"Se encontraron {cantidad} territorios.")
+                
+                # Si el servidor no soporta validadores, comparamos la huella del contenido
+                if hay_archivo_previo and cache.get("hash") == huella:
+                    print(f"Contenido idéntico en {url}. Se conserva '{ruta_completa_archivo}'.")
+                    return ESTADO_SIN_CAMBIOS
+                os.replace(ruta_temporal, ruta_completa_archivo)
+            finally:
+                # Si algo falló (o no hubo cambios) el temporal no debe quedar en la carpeta
+                if os.path.exists(ruta_temporal):
+                    os.remove(ruta_temporal)
+        
+        # Sólo registramos la huella cuando el CSV quedó escrito por completo
+        cache["hash"] = huella
+        cache["descargado_en"] = cache["verificado_en"]
+        cache["filas"] = cantidad
+        cache["campos"] = CAMPOS
         print(f"¡Éxito! Los datos han sido guardados en el archivo '{ruta_completa_archivo}'.")
+        return ESTADO_ACTUALIZADO
     
     # Maneja errores específicos de la librería 'requests' (ej. no hay internet)
     except requests.exceptions.RequestException as e:
@@ -73,77 +296,325 @@ def obtener_y_guardar_paises(url, nombre_archivo, carpeta_salida):
     # Captura cualquier otro error inesperado
     except Exception as e:
         print(f"Ocurrió un error inesperado: {e}")
+    return ESTADO_ERROR
+
 
+def huella_de_archivo(ruta):
+    """Devuelve el hash SHA-256 (en hexadecimal) del contenido de 'ruta', leído por trozos."""
+    huella = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for trozo in iter(lambda: archivo.read(TAMANO_TROZO), b''):
+            huella.update(trozo)
+    return huella.hexdigest()
 
 def unir_csvs_en_uno(carpeta_entrada, archivo_salida):
     """
-    Busca todos los archivos .csv en una carpeta, les añade una columna 'continente',
-    y los une en un único archivo.
+    Busca todos los archivos .csv en una carpeta, les añade una columna 'continente'
+    (el nombre del archivo: "Europe.csv" -> "Europe") y los une en un único archivo,
+    siempre en orden alfabético de continente.
+    
+    La unión es incremental: el registro 'Todos.csv.fuentes.json' (ver cacheDatos.py)
+    guarda de cada CSV su tamaño, fecha de modificación y hash, y sus rangos de bytes
+    y de filas dentro del maestro. Sólo se vuelven a convertir los CSV que cambiaron;
+    el resto se copia byte a byte del maestro anterior. El maestro se escribe en un
+    temporal que se renombra de forma atómica, y si nada cambió no se reescribe.
+    
+    Devuelve un diccionario {continente: {"estado", "filas", "filas_anteriores"}} con
+    el estado (ESTADO_ACTUALIZADO, ESTADO_SIN_CAMBIOS o ESTADO_ELIMINADO) y los rangos
+    [inicio, fin) de números de fila en el maestro nuevo y en el anterior (None si no
+    estaba). 'filas_cambiadas' lo resume en los rangos de filas que hay que refrescar.
     """
     
     # Obtiene solo el nombre del archivo de salida (ej. "Todos.csv")
     nombre_archivo_salida = os.path.basename(archivo_salida)
     
     # --- 1. Encontrar los archivos a unir ---
-    # Crea una lista de todos los archivos en la 'carpeta_entrada'
-    # que cumplan DOS condiciones:
-    # 1. Terminan en '.csv'
-    # 2. NO son el archivo de salida (para no unir "Todos.csv" consigo mismo)
-    archivos_csv_a_unir = [
+    # Los .csv de la carpeta, salvo el de salida (para no unir "Todos.csv" consigo mismo).
+    # sorted(): os.listdir no garantiza ningún orden y el maestro debe salir siempre igual.
+    archivos_csv_a_unir = sorted(
         f for f in os.listdir(carpeta_entrada)
         if f.endswith('.csv') and f != nombre_archivo_salida
-    ]
+    )
 
     if not archivos_csv_a_unir:
         print("No se encontraron archivos de continentes para unir.")
-        return # Termina la función si no hay nada que hacer
+        return {} # Termina la función si no hay nada que hacer
+
+    inicio_union = time.perf_counter()
+    registro = cargar_fuentes(archivo_salida)
+    anteriores = registro["fuentes"]
+    
+    # La cabecera sale del PRIMER archivo (ej. "Africa.csv"), con la columna "continente" al final
+    with open(os.path.join(carpeta_entrada, archivos_csv_a_unir[0]), 'r', newline='', encoding='utf-8') as f_entrada:
+        cabecera = next(csv.reader(f_entrada), []) + ['continente']
+    
+    # Los rangos de bytes del registro sólo sirven si 'Todos.csv' es el que se registró
+    maestro_valido = maestro_coincide(registro, archivo_salida) and registro.get("cabecera") == cabecera
+    
+    # --- 2. ¿Qué archivos cambiaron? ---
+    fuentes = {}  # continente -> (entrada nueva del registro, entrada anterior si se puede copiar tal cual)
+    for nombre_archivo in archivos_csv_a_unir:
+        continente = nombre_archivo[:-len('.csv')]
+        ruta_completa = os.path.join(carpeta_entrada, nombre_archivo)
+        info = os.stat(ruta_completa)
+        anterior = anteriores.get(continente) if maestro_valido else None
+        entrada = {"archivo": nombre_archivo, "tamano": info.st_size, "mtime_ns": info.st_mtime_ns}
+        if anterior and (anterior.get("tamano"), anterior.get("mtime_ns")) == (info.st_size, info.st_mtime_ns):
+            entrada["hash"] = anterior.get("hash")  # Mismo tamaño y fecha: no hace falta leerlo
+        else:
+            entrada["hash"] = huella_de_archivo(ruta_completa)
+        reutilizable = anterior is not None and anterior.get("hash") == entrada["hash"] and "inicio" in anterior
+        fuentes[continente] = (entrada, anterior if reutilizable else None)
+    
+    reporte = {}
+    if maestro_valido and list(fuentes) == list(anteriores) and all(a is not None for _, a in fuentes.values()):
+        # Nada cambió (a lo sumo la fecha de algún archivo): se conserva el maestro
+        for continente, (entrada, anterior) in fuentes.items():
+            anteriores[continente] = dict(anterior, **entrada)
+            filas = [anterior["fila_inicio"], anterior["fila_fin"]]
+            reporte[continente] = {"estado": ESTADO_SIN_CAMBIOS, "filas": filas, "filas_anteriores": filas}
+        registro["cambios"] = []
+        guardar_fuentes(registro, archivo_salida)
+        print(f"Ningún archivo cambió; se conserva '{archivo_salida}'.")
+        return reporte
 
     print(f"\nUniendo {len(archivos_csv_a_unir)} archivos en '{archivo_salida}'...")
     
-    # --- 2. Escribir el archivo CSV unificado ---
+    # --- 3. Escribir el archivo unificado (en un temporal) ---
+    ruta_temporal = archivo_salida + ".tmp"
+    maestro_anterior = open(archivo_salida, 'rb') if maestro_valido else None
+    filas_unidas = 0
+    try:
+        with open(ruta_temporal, 'wb') as f_salida:
+            f_salida.write(linea_cabecera(cabecera))
+            for continente, (entrada, anterior) in fuentes.items():
+                inicio = f_salida.tell()
+                if anterior is not None:
+                    # Sin cambios: se copian los bytes que ya tenía en el maestro anterior
+                    copiar_rango_de_bytes(maestro_anterior, f_salida, anterior["inicio"], anterior["fin"])
+                    cantidad = anterior["fila_fin"] - anterior["fila_inicio"]
+                else:
+                    print(f"  - Procesando y añadiendo: {entrada['archivo']}")
+                    # TextIOWrapper permite usar csv.writer sobre el archivo binario
+                    texto = io.TextIOWrapper(f_salida, encoding='utf-8', newline='', write_through=True)
+                    with open(os.path.join(carpeta_entrada, entrada["archivo"]), 'r', newline='', encoding='utf-8') as f_entrada:
+                        lector = csv.reader(f_entrada)
+                        next(lector, None) # ¡Importante! Salta la cabecera de este archivo
+                        # Cada fila con el continente al final; 'contador' avanza una vez por fila escrita
+                        contador = itertools.count()
+                        csv.writer(texto).writerows(fila + [continente] for fila, _ in zip(lector, contador))
+                        cantidad = next(contador)
+                    # detach() vacía el buffer de texto y devuelve el archivo SIN cerrarlo
+                    texto.detach()
+                entrada.update(inicio=inicio, fin=f_salida.tell(), fila_inicio=filas_unidas, fila_fin=filas_unidas + cantidad)
+                previa = anteriores.get(continente) if maestro_valido else None
+                reporte[continente] = {
+                    "estado": ESTADO_SIN_CAMBIOS if anterior is not None else ESTADO_ACTUALIZADO,
+                    "filas": [filas_unidas, filas_unidas + cantidad],
+                    "filas_anteriores": [previa["fila_inicio"], previa["fila_fin"]] if previa and "fila_inicio" in previa else None,
+                }
+                filas_unidas += cantidad
+            f_salida.flush()
+            os.fsync(f_salida.fileno())
+    except BaseException:
+        # Si algo falló a mitad de camino, el maestro anterior queda intacto
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        raise
+    finally:
+        if maestro_anterior is not None:
+            maestro_anterior.close()
+    os.replace(ruta_temporal, archivo_salida)
     
-    # Abre el archivo de salida (ej. "Continentes/Todos.csv") en modo escritura
-    with open(archivo_salida, 'w', newline='', encoding='utf-8') as f_salida:
-        # Usamos csv.writer (simple) porque vamos a manejar filas como listas
-        escritor = csv.writer(f_salida)
-        
-        # --- 3. Escribir la Cabecera ---
-        # Solo necesitamos leer la cabecera del PRIMER archivo (ej. "Africa.csv")
-        primer_archivo = os.path.join(carpeta_entrada, archivos_csv_a_unir[0])
-        
-        with open(primer_archivo, 'r', encoding='utf-8') as f_entrada:
-            lector = csv.reader(f_entrada) # Lector simple
-            cabecera = next(lector) # Lee la primera línea (la cabecera)
-            
-            # --- ENRIQUECIMIENTO DE DATOS 1 ---
-            # Añade la nueva columna "continente" a la lista de cabeceras
-            cabecera.append('continente')
-            
-            # Escribe la cabecera modificada en el archivo de salida
-            escritor.writerow(cabecera)
-        
-        # --- 4. Procesar y unir todos los archivos ---
-        
-        # Ahora iteramos sobre TODOS los archivos (incluido el primero)
-        for nombre_archivo in archivos_csv_a_unir:
-            print(f"  - Procesando y añadiendo: {nombre_archivo}")
-            
-            # --- ENRIQUECIMIENTO DE DATOS 2 (La parte inteligente) ---
-            # Extrae el nombre del continente a partir del nombre del archivo
-            # ej. "Europe.csv" -> "Europe"
-            continente = nombre_archivo.replace('.csv', '')
+    # --- 4. Registrar las fuentes (y qué filas cambiaron) para la próxima unión ---
+    if maestro_valido:
+        for continente, previa in anteriores.items():
+            if continente not in fuentes and "fila_inicio" in previa:
+                reporte[continente] = {"estado": ESTADO_ELIMINADO, "filas": None,
+                                       "filas_anteriores": [previa["fila_inicio"], previa["fila_fin"]]}
+    registro["cabecera"] = cabecera
+    registro["filas"] = filas_unidas
+    registro["fuentes"] = {continente: entrada for continente, (entrada, _) in fuentes.items()}
+    registro["cambios"] = filas_cambiadas(reporte)
+    registrar_maestro(registro, archivo_salida)
+    guardar_fuentes(registro, archivo_salida)
+    
+    rendimiento.registrar('unir_csvs', time.perf_counter() - inicio_union, filas_unidas)
+    print(f"¡Éxito! Archivo '{archivo_salida}' creado correctamente con la columna 'continente'.")
+    return reporte
+
+def filas_cambiadas(reporte):
+    """
+    A partir del resultado de 'unir_csvs_en_uno', devuelve los rangos [inicio, fin) de
+    filas del maestro nuevo que no son iguales a las de la misma posición en el anterior
+    (continentes actualizados y los que se corrieron de lugar), unidos si son contiguos.
+    Las filas fuera de esos rangos se pueden conservar tal cual; si el maestro se achicó,
+    además sobran las del final.
+    """
+    rangos = []
+    for cambio in reporte.values():
+        if cambio["filas"] is None or cambio["filas"][0] == cambio["filas"][1]:
+            continue
+        if cambio["estado"] == ESTADO_SIN_CAMBIOS and cambio["filas"] == cambio["filas_anteriores"]:
+            continue
+        inicio, fin = cambio["filas"]
+        if rangos and rangos[-1][1] == inicio:
+            rangos[-1][1] = fin
+        else:
+            rangos.append([inicio, fin])
+    return rangos
+
+def copiar_rango_de_bytes(origen, destino, inicio, fin):
+    """Copia los bytes [inicio, fin) del archivo 'origen' al final de 'destino'."""
+    origen.seek(inicio)
+    restantes = fin - inicio
+    while restantes > 0:
+        bloque = origen.read(min(TAMANO_TROZO, restantes))
+        if not bloque:
+            break
+        destino.write(bloque)
+        restantes -= len(bloque)
+
+def generar_archivo_maestro(continentes, archivo_salida, manifiesto, url_base, a_revisar=None,
+                            sesion=None, max_hilos=6, timeout=TIMEOUT_POR_DEFECTO):
+    """
+    Genera 'Todos.csv' en UNA sola pasada, sin CSV intermedios por continente:
+    cada respuesta de la API se lee en streaming, se extraen los campos y las
+    filas (ya con la columna 'continente') se escriben en un segmento temporal.
+    Los segmentos se concatenan en el orden de 'continentes' en un archivo
+    temporal que luego se renombra de forma atómica sobre 'archivo_salida'.
+    
+    Sólo se descargan los continentes de 'a_revisar' (por defecto, todos); el resto,
+    y los que respondan 304 o traigan contenido idéntico, se copian tal cual
+    (byte a byte) desde el 'Todos.csv' anterior usando los rangos del manifiesto.
+    Si nada cambió, el archivo no se reescribe.
+    En manifiesto["maestro"]["cambios"] quedan los rangos [inicio, fin) de filas que
+    cambiaron respecto del maestro anterior (ver 'filas_cambiadas'; None si no se saben).
+    Devuelve un diccionario {continente: estado} (ver ESTADO_* en cacheDatos.py).
+    """
+    carpeta_salida = os.path.dirname(archivo_salida) or "."
+    os.makedirs(carpeta_salida, exist_ok=True)
+    a_revisar = list(continentes) if a_revisar is None else list(a_revisar)
+    
+    # ¿Podemos reutilizar rangos de bytes del 'Todos.csv' actual? (sólo si tiene estas mismas columnas)
+    maestro_valido = maestro_coincide(manifiesto, archivo_salida, linea_cabecera(CAMPOS + ['continente']))
+    for continente in continentes:
+        entrada_region(manifiesto, continente)
+    
+    def reutilizable(continente):
+        """Un continente se puede copiar del maestro anterior si tenemos su rango de bytes."""
+        return maestro_valido and "inicio" in manifiesto["regiones"][continente]
+    
+    def descargar(continente):
+        """Descarga un continente en streaming a un segmento temporal (se ejecuta en un hilo)."""
+        entrada = manifiesto["regiones"][continente]
+        url = f"{url_base}/{continente}"
+        # Sólo preguntamos "¿cambió?" si tenemos con qué reemplazar una respuesta 304
+        cabeceras = cabeceras_condicionales(entrada) if reutilizable(continente) else {}
+        print(f"Obteniendo datos desde {url}...")
+        segmento = tempfile.TemporaryFile(dir=carpeta_salida)
+        try:
+            with rendimiento.etapa('peticion_http'):
+                response = cliente.get(url, timeout=timeout, headers=cabeceras, stream=True)
+            with response:
+                if response.status_code == 304:
+                    entrada["verificado_en"] = time.time()
+                    segmento.close()
+                    return ESTADO_SIN_CAMBIOS, None
+                response.raise_for_status()
+                cantidad, huella = escribir_filas_en_streaming(response, segmento, continente)
             
-            ruta_completa = os.path.join(carpeta_entrada, nombre_archivo)
+            entrada["url"] = url
+            entrada["etag"] = response.headers.get("ETag")
+            entrada["last_modified"] = response.headers.get("Last-Modified")
+            entrada["verificado_en"] = time.time()
+            if reutilizable(continente) and entrada.get("hash") == huella:
+                segmento.close()
+                return ESTADO_SIN_CAMBIOS, None
             
-            with open(ruta_completa, 'r', encoding='utf-8') as f_entrada:
-                lector = csv.reader(f_entrada)
-                next(lector) # ¡Importante! Salta la cabecera de este archivo
-                
-                # Itera sobre cada fila de datos
-                for fila in lector:
-                    # Añade el nombre del continente al final de la fila
-                    fila.append(continente)
-                    # Escribe la fila completa en el archivo de salida
-                    escritor.writerow(fila)
-                    
-    print(f"¡Éxito! Archivo '{archivo_salida}' creado correctamente con la columna 'continente'.")
\ No newline at end of file
+            entrada["hash"] = huella
+            entrada["descargado_en"] = entrada["verificado_en"]
+            entrada["filas"] = cantidad
+            print(f"  - {continente}: {cantidad} territorios.")
+            return ESTADO_ACTUALIZADO, segmento
+        except requests.exceptions.RequestException as e:
+            print(f"Error al conectar con la API ({continente}): {e}")
+        except Exception as e:
+            print(f"Ocurrió un error inesperado ({continente}): {e}")
+        segmento.close()
+        return ESTADO_ERROR, None
+    
+    # --- 1. Descargas (en paralelo, con una sesión compartida) ---
+    cliente = sesion if sesion is not None else requests
+    with ThreadPoolExecutor(max_workers=max(1, max_hilos)) as pool:
+        descargas = dict(zip(a_revisar, pool.map(descargar, a_revisar)))
+    resultados = {c: descargas.get(c, (ESTADO_SIN_CAMBIOS, None))[0] for c in continentes}
+    
+    # --- 2. ¿Hace falta reescribir el maestro? ---
+    hubo_cambios = any(estado == ESTADO_ACTUALIZADO for estado in resultados.values())
+    if maestro_valido and not hubo_cambios:
+        print("Ningún continente cambió; se conserva el archivo maestro.")
+        manifiesto["maestro"]["cambios"] = []
+        return resultados
+    if not hubo_cambios and not any(reutilizable(c) for c in continentes):
+        print("No se pudo descargar ningún continente; no se generó el archivo maestro.")
+        return resultados
+    
+    # --- 3. Ensamblar el maestro (en orden fijo) y renombrarlo de forma atómica ---
+    ruta_temporal = archivo_salida + ".tmp"
+    comienzo = time.perf_counter()
+    anterior = open(archivo_salida, 'rb') if maestro_valido else None
+    filas_anteriores = {c: (e["fila_inicio"], e["fila_fin"])
+                        for c, e in manifiesto["regiones"].items() if maestro_valido and "fila_inicio" in e}
+    reporte = {}
+    fila = 0
+    try:
+        with open(ruta_temporal, 'wb') as salida:
+            salida.write(linea_cabecera(CAMPOS + ['continente']))
+            for continente in continentes:
+                entrada = manifiesto["regiones"][continente]
+                segmento = descargas.get(continente, (None, None))[1]
+                inicio = salida.tell()
+                if segmento is not None:
+                    # Datos nuevos: se copian los bytes ya formateados del segmento
+                    segmento.seek(0)
+                    shutil.copyfileobj(segmento, salida)
+                    segmento.close()
+                elif reutilizable(continente):
+                    # Sin cambios (o falló la descarga): se conserva el tramo anterior
+                    copiar_rango_de_bytes(anterior, salida, entrada["inicio"], entrada["fin"])
+                else:
+                    print(f"Atención: '{continente}' no tiene datos y queda fuera del archivo maestro.")
+                entrada["inicio"], entrada["fin"] = inicio, salida.tell()
+                # Rango de filas del continente (para saber qué filas cambiaron)
+                cantidad = entrada.get("filas") if entrada["fin"] > inicio else 0
+                if cantidad is None:
+                    fila = None  # Maestro de una versión anterior: no se puede seguir la cuenta
+                if fila is not None:
+                    entrada["fila_inicio"], entrada["fila_fin"] = fila, fila + cantidad
+                    reporte[continente] = {
+                        "estado": ESTADO_ACTUALIZADO if segmento is not None else ESTADO_SIN_CAMBIOS,
+                        "filas": (fila, fila + cantidad),
+                        "filas_anteriores": filas_anteriores.get(continente),
+                    }
+                    fila += cantidad
+            salida.flush()
+            os.fsync(salida.fileno())
+    except BaseException:
+        # Si algo falló a mitad de camino, el maestro anterior queda intacto
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        raise
+    finally:
+        if anterior is not None:
+            anterior.close()
+        for _, segmento in descargas.values():
+            if segmento is not None and not segmento.closed:
+                segmento.close()
+    os.replace(ruta_temporal, archivo_salida)
+    registrar_maestro(manifiesto, archivo_salida)
+    manifiesto["maestro"]["cambios"] = filas_cambiadas(reporte) if fila is not None else None
+    rendimiento.registrar('ensamblar_maestro', time.perf_counter() - comienzo,
+                          sum(manifiesto["regiones"][c].get("filas", 0) for c in continentes))
+    print(f"¡Éxito! Archivo '{archivo_salida}' generado en una sola pasada.")
+    return resultados
@@ -0,0 +1,258 @@
+# --- Importaciones de Módulos ---
+from array import array      # Arreglos compactos para los índices
+from bisect import bisect_left, bisect_right  # Búsqueda binaria sobre valores ordenados
+import heapq                 # Las primeras N filas de un orden sin ordenar la vista entera
+from itertools import islice # Cortar el recorrido de una permutación al juntar las primeras N
+from busqueda import clave_colacion  # Orden alfabético en español (tildes, ñ)
+
+# Columnas por las que se puede ordenar (columna de la vista -> columna de la tabla con el valor a comparar)
+COLUMNAS_ORDENABLES = {
+    'nombre_comun_es': 'nombre_comun_es',
+    'poblacion': 'poblacion_num',
+    'area': 'area_num',
+    'continente': 'continente',
+}
+COLUMNAS_TEXTO_ORDEN = ('nombre_comun_es', 'continente')  # Se comparan con 'clave_colacion'
+
+class IndiceOrdenado:
+    """
+    Índice secundario sobre una columna numérica de la tabla.
+    Guarda los números de fila ordenados por valor ('filas') y, en paralelo,
+    los valores ya ordenados ('valores'). Un filtro de rango se resuelve con
+    dos búsquedas binarias y devuelve un tramo contiguo de 'filas'.
+    Si ya se calcularon ('filas' y 'valores', ej. con NumPy), se pasan directamente.
+    """
+
+    def __init__(self, columna=None, filas=None, valores=None):
+        if filas is None:
+            filas = array('I', sorted(range(len(columna)), key=columna.__getitem__))
+            valores = array('q', (columna[fila] for fila in filas))
+        self.filas = filas
+        self.valores = valores
+
+    def __len__(self):
+        return len(self.filas)
+
+    def limites(self, minimo=None, maximo=None):
+        """Devuelve (inicio, fin) del tramo de 'filas' con minimo <= valor <= maximo."""
+        inicio = 0 if minimo is None else bisect_left(self.valores, minimo)
+        fin = len(self.valores) if maximo is None else bisect_right(self.valores, maximo)
+        return inicio, max(inicio, fin)
+
+    def restringe(self, minimo=None, maximo=None):
+        """Indica si el rango deja afuera alguna fila (un rango que cubre todo no filtra nada)."""
+        if not self.valores:
+            return False
+        return (minimo is not None and minimo > self.valores[0]) or (maximo is not None and maximo < self.valores[-1])
+
+    def rango(self, minimo=None, maximo=None):
+        """Devuelve las filas (ordenadas por valor) cuyo valor está en [minimo, maximo]."""
+        inicio, fin = self.limites(minimo, maximo)
+        return self.filas[inicio:fin]
+
+class IndiceCategorico:
+    """
+    Índice de igualdad sobre una columna categórica: para cada código,
+    la lista (ordenada) de filas que lo tienen.
+    """
+
+    def __init__(self, columna, filas_por_codigo=None):
+        self.columna = columna
+        if filas_por_codigo is None:
+            filas_por_codigo = [array('I') for _ in columna.vocabulario]
+            for fila, codigo in enumerate(columna.codigos):
+                filas_por_codigo[codigo].append(fila)
+        self.filas_por_codigo = filas_por_codigo
+
+    def filas(self, valor):
+        """Devuelve las filas cuyo valor es 'valor' (vacío si no existe)."""
+        codigo = self.columna.codigo(valor)
+        return self.filas_por_codigo[codigo] if codigo is not None else array('I')
+
+class PermutacionOrden:
+    """
+    Orden ascendente de TODA la tabla por una columna, calculado una sola vez.
+    - 'filas': números de fila en orden ascendente (los empates, por número de fila).
+    - 'posiciones': para cada fila, su lugar en 'filas' (la permutación inversa).
+    - 'rangos': para cada fila, un número que respeta el orden y es IGUAL para
+      valores iguales (sirve para combinar varias columnas: los empates de la
+      primera se resuelven con la segunda).
+    Ordenar una vista ya no compara valores: sólo recorre 'filas' o compara enteros.
+    Si ya se calcularon (ej. con NumPy), se pasan 'filas', 'posiciones' y 'rangos' en lugar de 'clave'.
+    """
+
+    def __init__(self, cantidad, clave=None, filas=None, posiciones=None, rangos=None):
+        if filas is not None:
+            self.filas, self.posiciones, self.rangos = filas, posiciones, rangos
+            return
+        claves = [clave(fila) for fila in range(cantidad)]
+        self.filas = array('I', sorted(range(cantidad), key=claves.__getitem__))
+        self.posiciones = array('I', bytes(4 * cantidad))
+        self.rangos = array('I', bytes(4 * cantidad))
+        rango = 0
+        for posicion, fila in enumerate(self.filas):
+            if posicion and claves[fila] != claves[self.filas[posicion - 1]]:
+                rango += 1
+            self.posiciones[fila] = posicion
+            self.rangos[fila] = rango
+
+    def ordenar(self, vista, descendente=False):
+        """
+        Devuelve la vista ordenada por esta columna (un arreglo nuevo).
+        - Vista grande: recorre la permutación completa y se queda con las filas de la vista (O(n)).
+        - Vista chica: ordena sus filas comparando sólo enteros ('posiciones').
+        El descendente es el ascendente invertido (no se vuelve a ordenar).
+        """
+        cantidad = len(self.filas)
+        if len(vista) * max(1, len(vista).bit_length()) >= cantidad:
+            marcadas = bytearray(cantidad)
+            for fila in vista:
+                marcadas[fila] = 1
+            resultado = array('I', (fila for fila in self.filas if marcadas[fila]))
+        else:
+            resultado = array('I', sorted(vista, key=self.posiciones.__getitem__))
+        if descendente:
+            resultado.reverse()
+        return resultado
+
+class IndicesTabla:
+    """
+    Índices de la tabla maestra, construidos UNA vez al cargar los datos:
+    - 'poblacion_num' y 'area_num': IndiceOrdenado (filtros de rango).
+    - 'continente': IndiceCategorico (filtro de igualdad).
+    - 'orden': una PermutacionOrden por cada columna ordenable.
+    """
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.poblacion = IndiceOrdenado(tabla.numericas['poblacion_num'])
+        self.area = IndiceOrdenado(tabla.numericas['area_num'])
+        self.continente = IndiceCategorico(tabla.categoricas['continente'])
+        self.orden = {}
+        for columna, origen in COLUMNAS_ORDENABLES.items():
+            leer = tabla.lector(origen)
+            if columna in COLUMNAS_TEXTO_ORDEN:
+                # El texto de cada valor se compara con la colación española (una vez por fila, al cargar)
+                self.orden[columna] = PermutacionOrden(len(tabla), lambda fila, leer=leer: clave_colacion(leer(fila)))
+            else:
+                self.orden[columna] = PermutacionOrden(len(tabla), leer)
+
+    def ordenar(self, vista, claves):
+        """
+        Ordena la vista por una o varias columnas.
+        'claves' es una lista de (columna, descendente), de la más importante a la menos,
+        ej. [('continente', False), ('poblacion', True)]: por continente y, dentro de
+        cada continente, de mayor a menor población. Los empates en todas las columnas
+        conservan el orden que tenían en la vista.
+        """
+        if len(claves) == 1:
+            columna, descendente = claves[0]
+            return self.orden[columna].ordenar(vista, descendente)
+        # Varias columnas: se compara una tupla de rangos (negados si la columna va descendente)
+        rangos = [(self.orden[columna].rangos, -1 if descendente else 1) for columna, descendente in claves]
+        return array('I', sorted(vista, key=lambda fila: tuple(signo * valores[fila] for valores, signo in rangos)))
+
+    def primeros(self, vista, claves, cantidad):
+        """
+        Las 'cantidad' primeras filas de la vista ordenada por 'claves' (lo mismo que
+        ordenar(vista, claves)[:cantidad], con los mismos empates), sin ordenarla entera:
+        - una columna: heapq recorre la vista guardando sólo las 'cantidad' mejores (O(m log k));
+          si la vista es grande, se recorre la permutación desde el extremo hasta juntarlas.
+        - varias: primero se eligen por la primera columna y sólo esas (más sus empates)
+          se comparan por todas las columnas.
+        """
+        if cantidad >= len(vista):
+            return self.ordenar(vista, claves)
+        columna, descendente = claves[0]
+        permutacion = self.orden[columna]
+        if len(claves) == 1:
+            if len(vista) * max(1, len(vista).bit_length()) >= len(permutacion.filas):
+                marcadas = bytearray(len(permutacion.filas))
+                for fila in vista:
+                    marcadas[fila] = 1
+                recorrido = reversed(permutacion.filas) if descendente else permutacion.filas
+                return array('I', islice((fila for fila in recorrido if marcadas[fila]), cantidad))
+            # 'posiciones' no tiene empates: el descendente es exactamente el ascendente invertido
+            elegir = heapq.nlargest if descendente else heapq.nsmallest
+            return array('I', elegir(cantidad, vista, key=permutacion.posiciones.__getitem__))
+        # El rango (por la primera columna) de la última de las 'cantidad' primeras es el umbral:
+        # ninguna fila peor que él puede estar entre las elegidas
+        rangos_primera = permutacion.rangos
+        umbral = rangos_primera[self.primeros(vista, claves[:1], cantidad)[-1]] if cantidad else None
+        if umbral is None:
+            return array('I')
+        if descendente:
+            candidatas = [fila for fila in vista if rangos_primera[fila] >= umbral]
+        else:
+            candidatas = [fila for fila in vista if rangos_primera[fila] <= umbral]
+        # nsmallest es estable (como sorted): los empates conservan el orden de la vista
+        rangos = [(self.orden[columna].rangos, -1 if descendente else 1) for columna, descendente in claves]
+        return array('I', heapq.nsmallest(cantidad, candidatas, key=lambda fila: tuple(signo * valores[fila] for valores, signo in rangos)))
+
+    def filtrar(self, continente=None, min_pob=None, max_pob=None, min_area=None, max_area=None, candidatos=None):
+        """
+        Devuelve los números de fila (en el orden de la tabla) que cumplen TODOS los filtros.
+        'candidatos' (filas ordenadas, ej. el resultado de una búsqueda por nombre)
+        se trata como un filtro más.
+        Los filtros vacíos (None, o un rango que cubre toda la columna) no cuestan nada.
+        Se parte del filtro más selectivo (el que deja menos filas) y sobre esas
+        filas candidatas se verifican los demás directamente en las columnas,
+        así el costo depende del tamaño del resultado y no del de la tabla.
+        """
+        # --- 1. Cada filtro activo: (cantidad, obtener_filas, verificar_fila) ---
+        filtros = []
+        if candidatos is not None:
+            conjunto = set(candidatos)
+            filtros.append((len(candidatos), lambda: candidatos, conjunto.__contains__))
+        if continente is not None:
+            filas_continente = self.continente.filas(continente)
+            codigo = self.tabla.categoricas['continente'].codigo(continente)
+            codigos = self.tabla.categoricas['continente'].codigos
+            filtros.append((len(filas_continente), lambda: filas_continente,
+                            lambda fila: codigos[fila] == codigo))
+        for indice, columna, minimo, maximo in (
+            (self.poblacion, 'poblacion_num', min_pob, max_pob),
+            (self.area, 'area_num', min_area, max_area),
+        ):
+            if not indice.restringe(minimo, maximo):
+                continue
+            inicio, fin = indice.limites(minimo, maximo)
+            valores = self.tabla.numericas[columna]
+            bajo = float('-inf') if minimo is None else minimo
+            alto = float('inf') if maximo is None else maximo
+            filtros.append((fin - inicio, lambda indice=indice, inicio=inicio, fin=fin: sorted(indice.filas[inicio:fin]),
+                            lambda fila, valores=valores, bajo=bajo, alto=alto: bajo <= valores[fila] <= alto))
+
+        # --- 2. Sin filtros activos: todas las filas ---
+        if not filtros:
+            return self.tabla.todas()
+
+        # --- 3. Intersección empezando por el más selectivo ---
+        filtros.sort(key=lambda filtro: filtro[0])
+        _, obtener_filas, _ = filtros[0]
+        verificaciones = [verificar for _, _, verificar in filtros[1:]]
+        resultado = array('I')
+        for fila in obtener_filas():
+            if all(verificar(fila) for verificar in verificaciones):
+                resultado.append(fila)
+        return resultado
+
+    def refinar(self, filas, continente=None, min_pob=None, max_pob=None, min_area=None, max_area=None, verificar=None):
+        """
+        Aplica los filtros sobre un resultado más amplio ya calculado (conserva su orden).
+        'verificar' (fila -> bool) es un filtro más, ej. la búsqueda por nombre.
+        """
+        verificaciones = []
+        if continente is not None:
+            continentes = self.tabla.categoricas['continente']
+            codigo, codigos = continentes.codigo(continente), continentes.codigos
+            verificaciones.append(lambda fila: codigos[fila] == codigo)
+        if verificar is not None:
+            verificaciones.append(verificar)
+        for columna, minimo, maximo in (('poblacion_num', min_pob, max_pob), ('area_num', min_area, max_area)):
+            if minimo is not None or maximo is not None:
+                valores = self.tabla.numericas[columna]
+                bajo = float('-inf') if minimo is None else minimo
+                alto = float('inf') if maximo is None else maximo
+                verificaciones.append(lambda fila, valores=valores, bajo=bajo, alto=alto: bajo <= valores[fila] <= alto)
+        return array('I', (fila for fila in filas if all(verificar(fila) for verificar in verificaciones)))
@@ -0,0 +1,233 @@
+# --- Importaciones de Módulos ---
+import hashlib   # Para la huella del CSV de origen (invalida la instantánea si cambia)
+import json      # Para los metadatos (nombres de columnas y posiciones) dentro del archivo
+import mmap      # Para mapear el archivo binario en memoria sin leerlo entero
+import os        # Para rutas, tamaños y reemplazo atómico del archivo
+import struct    # Para empaquetar/desempaquetar la cabecera binaria
+import sys       # Para conocer el orden de bytes de la máquina
+from tablaPaises import TablaPaises, ColumnaTexto, ColumnaCategorica, ColumnaLista  # La tabla que se guarda/recupera
+from busqueda import IndiceBusqueda  # El índice de búsqueda también se guarda (así no se rearma al abrir)
+
+# --- Formato del Archivo ---
+# [cabecera fija][secciones de columnas][metadatos JSON]
+# - Columnas numéricas: int64.
+# - Columnas categóricas: códigos uint16, o uint32 si no entran (el tipo y el vocabulario van en los metadatos).
+# - Columnas de texto: offsets uint64 + heap UTF-8.
+# - Columnas de listas: inicios uint64 + sus elementos (como una columna categórica o de texto).
+# - Índice de búsqueda: textos normalizados (como una columna de texto), filas ordenadas por nombre
+#   uint32, códigos de los n-gramas uint64, inicios de sus listas uint64 y las listas de filas uint32.
+# Cada sección empieza alineada a 8 bytes, así se pueden "ver" como arreglos sin copiarlas.
+MAGICO = b"PAISBIN1"
+VERSION = 5
+EXTENSION = ".bin"  # "Todos.csv" -> "Todos.csv.bin"
+# magico, versión, orden de bytes (0 = little, 1 = big), filas, tamaño CSV, mtime CSV, sha256 CSV, largo metadatos
+FORMATO_CABECERA = "<8sIIQQq32sI"
+TAMANO_CABECERA = struct.calcsize(FORMATO_CABECERA)
+POSICION_MTIME = struct.calcsize("<8sIIQQ")  # Dónde está el mtime del CSV dentro de la cabecera
+
+def ruta_instantanea(ruta_csv):
+    """Devuelve la ruta de la instantánea que corresponde a un CSV."""
+    return ruta_csv + EXTENSION
+
+def huella_archivo(ruta):
+    """Calcula el sha256 de un archivo leyéndolo por bloques."""
+    huella = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b''):
+            huella.update(bloque)
+    return huella.digest()
+
+def version_del_archivo(ruta_csv):
+    """Identifica el contenido actual del CSV por su tamaño y fecha de modificación."""
+    info = os.stat(ruta_csv)
+    return f"{info.st_size:x}-{info.st_mtime_ns:x}"
+
+def _anotar_mtime(ruta, mtime_ns):
+    """
+    Reescribe en el lugar el mtime del CSV en la cabecera de la instantánea 'ruta' (el
+    contenido es el mismo: sólo cambió la fecha). Así la próxima apertura no vuelve a
+    calcular la huella. Si no se puede escribir, no pasa nada: sólo se pierde ese atajo.
+    """
+    try:
+        with open(ruta, 'r+b') as archivo:
+            archivo.seek(POSICION_MTIME)
+            archivo.write(struct.pack("<q", mtime_ns))
+    except OSError:
+        pass
+
+def _alinear(archivo):
+    """Rellena con ceros hasta la próxima posición múltiplo de 8."""
+    resto = archivo.tell() % 8
+    if resto:
+        archivo.write(b"\0" * (8 - resto))
+
+def _escribir_seccion(archivo, datos):
+    """Escribe un bloque alineado y devuelve la posición donde empieza."""
+    _alinear(archivo)
+    inicio = archivo.tell()
+    archivo.write(datos)
+    return inicio
+
+def _escribir_categorica(archivo, columna):
+    """Escribe los códigos de una ColumnaCategorica; devuelve [inicio, vocabulario, tipo] para los metadatos."""
+    return [_escribir_seccion(archivo, bytes(columna.codigos)), columna.vocabulario, columna.formato]
+
+def _escribir_texto(archivo, columna):
+    """Escribe offsets y heap de una ColumnaTexto; devuelve [inicio_offsets, inicio_heap, largo_heap]."""
+    inicio_offsets = _escribir_seccion(archivo, bytes(columna.offsets))
+    inicio_heap = _escribir_seccion(archivo, bytes(columna.heap))
+    return [inicio_offsets, inicio_heap, len(columna.heap)]
+
+def _escribir_busqueda(archivo, indice):
+    """Escribe las partes de un IndiceBusqueda; devuelve sus posiciones para los metadatos."""
+    return {"columnas": indice.columnas,
+            "textos": _escribir_texto(archivo, indice.textos),
+            "orden_nombres": _escribir_seccion(archivo, indice.orden_nombres),
+            "gramas": [_escribir_seccion(archivo, indice.gramas), len(indice.gramas)],
+            "inicios": _escribir_seccion(archivo, indice.inicios),
+            "filas": [_escribir_seccion(archivo, indice.filas), len(indice.filas)]}
+
+def escribir_instantanea(tabla, ruta_csv, ruta_salida=None):
+    """
+    Guarda 'tabla' (una TablaPaises leída de 'ruta_csv') como instantánea binaria
+    junto al CSV, con la huella del CSV en la cabecera (y su índice de búsqueda: si
+    todavía no lo tiene, se arma).
+    Se escribe en un archivo temporal y se renombra (nunca queda a medias).
+    Devuelve la ruta del archivo generado.
+    """
+    ruta_salida = ruta_salida or ruta_instantanea(ruta_csv)
+    info_csv = os.stat(ruta_csv)
+    huella = huella_archivo(ruta_csv)
+
+    ruta_temporal = ruta_salida + ".tmp"
+    secciones = {"numericas": {}, "categoricas": {}, "texto": {}, "listas": {}}
+    with open(ruta_temporal, 'wb') as salida:
+        salida.write(b"\0" * TAMANO_CABECERA)  # Lugar para la cabecera (se completa al final)
+        # --- 1. Secciones de datos (anotando dónde quedó cada una) ---
+        for nombre, valores in tabla.numericas.items():
+            secciones["numericas"][nombre] = _escribir_seccion(salida, bytes(valores))
+        for nombre, columna in tabla.categoricas.items():
+            secciones["categoricas"][nombre] = _escribir_categorica(salida, columna)
+        for nombre, columna in tabla.texto.items():
+            secciones["texto"][nombre] = _escribir_texto(salida, columna)
+        for nombre, columna in tabla.listas.items():
+            inicio = _escribir_seccion(salida, bytes(columna.inicios))
+            elementos = columna.elementos
+            if isinstance(elementos, ColumnaCategorica):
+                secciones["listas"][nombre] = [inicio, len(elementos), "categorica", _escribir_categorica(salida, elementos)]
+            else:
+                secciones["listas"][nombre] = [inicio, len(elementos), "texto", _escribir_texto(salida, elementos)]
+        if tabla.busqueda is None:
+            tabla.busqueda = IndiceBusqueda(tabla)
+        secciones["busqueda"] = _escribir_busqueda(salida, tabla.busqueda)
+        # --- 2. Metadatos al final (ya se conocen todas las posiciones) ---
+        metadatos = json.dumps({"columnas": tabla.cabecera, "secciones": secciones,
+                                "celdas_invalidas": tabla.celdas_invalidas}).encode('utf-8')
+        salida.write(metadatos)
+        # --- 3. La cabecera con la huella del CSV de origen ---
+        salida.seek(0)
+        salida.write(struct.pack(FORMATO_CABECERA, MAGICO, VERSION, 0 if sys.byteorder == 'little' else 1,
+                                 len(tabla), info_csv.st_size, info_csv.st_mtime_ns, huella, len(metadatos)))
+    os.replace(ruta_temporal, ruta_salida)
+    return ruta_salida
+
+class Instantanea:
+    """
+    Instantánea binaria mapeada en memoria (mmap).
+    Nada se decodifica al abrirla: las columnas son vistas (memoryview) sobre
+    el archivo y el sistema operativo carga cada página recién cuando se lee,
+    por eso el tiempo de apertura no depende de la cantidad de filas.
+    """
+
+    def __init__(self, ruta, metadatos, filas, archivo, mapa):
+        self.ruta = ruta
+        self._archivo = archivo
+        self._mapa = mapa
+        self._vistas = []  # Todas las vistas creadas (hay que liberarlas antes de cerrar el mmap)
+        vista = self._vista = memoryview(mapa)
+        secciones = metadatos["secciones"]
+
+        numericas = {}
+        for nombre, inicio in secciones["numericas"].items():
+            numericas[nombre] = self._ver(vista[inicio:inicio + 8 * filas], 'q')
+        categoricas = {nombre: self._categorica(datos, filas) for nombre, datos in secciones["categoricas"].items()}
+        texto = {nombre: self._texto(datos, filas) for nombre, datos in secciones["texto"].items()}
+        listas = {}
+        for nombre, (inicio, cantidad, tipo, datos) in secciones["listas"].items():
+            elementos = self._categorica(datos, cantidad) if tipo == "categorica" else self._texto(datos, cantidad)
+            listas[nombre] = ColumnaLista(elementos, self._ver(vista[inicio:inicio + 8 * (filas + 1)], 'Q'))
+        self.tabla = TablaPaises(metadatos["columnas"], texto, numericas, categoricas, origen=self, listas=listas)
+        self.tabla.celdas_invalidas = metadatos.get("celdas_invalidas", {})
+        self.tabla.busqueda = self._busqueda(secciones["busqueda"], filas)
+
+    def _categorica(self, datos, cantidad):
+        inicio, vocabulario, formato = datos
+        largo = struct.calcsize(formato) * cantidad
+        return ColumnaCategorica(self._ver(self._vista[inicio:inicio + largo], formato), vocabulario)
+
+    def _texto(self, datos, cantidad):
+        inicio_offsets, inicio_heap, largo_heap = datos
+        offsets = self._ver(self._vista[inicio_offsets:inicio_offsets + 8 * (cantidad + 1)], 'Q')
+        return ColumnaTexto(self._ver(self._vista[inicio_heap:inicio_heap + largo_heap], 'B'), offsets)
+
+    def _busqueda(self, datos, filas):
+        inicio_gramas, cantidad_gramas = datos["gramas"]
+        inicio_filas, cantidad_filas = datos["filas"]
+        vista = self._vista
+        return IndiceBusqueda(
+            self.tabla, datos["columnas"],
+            textos=self._texto(datos["textos"], filas),
+            orden_nombres=self._ver(vista[datos["orden_nombres"]:datos["orden_nombres"] + 4 * filas], 'I'),
+            gramas=self._ver(vista[inicio_gramas:inicio_gramas + 8 * cantidad_gramas], 'Q'),
+            inicios=self._ver(vista[datos["inicios"]:datos["inicios"] + 8 * (cantidad_gramas + 1)], 'Q'),
+            filas=self._ver(vista[inicio_filas:inicio_filas + 4 * cantidad_filas], 'I'))
+
+    def _ver(self, tramo, formato):
+        """Interpreta un tramo del archivo como arreglo del tipo dado (sin copiar)."""
+        self._vistas.append(tramo)
+        resultado = tramo.cast(formato)
+        self._vistas.append(resultado)
+        return resultado
+
+    def cerrar(self):
+        """Libera el mapeo de memoria (las columnas de la tabla dejan de ser válidas)."""
+        for vista in reversed(self._vistas):
+            vista.release()
+        self._vista.release()
+        self._mapa.close()
+        self._archivo.close()
+
+def abrir_instantanea(ruta_csv):
+    """
+    Abre la instantánea de 'ruta_csv' si existe y corresponde a ese CSV.
+    - Si el tamaño y la fecha del CSV coinciden con los registrados: se usa directo.
+    - Si no coinciden, se compara el sha256 del CSV (ej. el archivo sólo fue "tocado");
+      si es el mismo, se anota la fecha nueva en la cabecera para no volver a compararlo.
+    Devuelve la TablaPaises (respaldada por el mmap), o None si falta, está dañada o quedó vieja.
+    """
+    ruta = ruta_instantanea(ruta_csv)
+    if not os.path.exists(ruta) or not os.path.exists(ruta_csv):
+        return None
+    archivo = open(ruta, 'rb')
+    mapa = None
+    try:
+        if os.fstat(archivo.fileno()).st_size < TAMANO_CABECERA:
+            raise ValueError("instantánea truncada")
+        mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magico, version, orden, filas, tamano, mtime_ns, huella, largo_meta = struct.unpack_from(FORMATO_CABECERA, mapa, 0)
+        orden_local = 0 if sys.byteorder == 'little' else 1
+        if magico != MAGICO or version != VERSION or orden != orden_local:
+            raise ValueError("formato de instantánea no compatible")
+        info_csv = os.stat(ruta_csv)
+        if (info_csv.st_size, info_csv.st_mtime_ns) != (tamano, mtime_ns):
+            if info_csv.st_size != tamano or huella_archivo(ruta_csv) != huella:
+                raise ValueError("la instantánea no corresponde al CSV actual")
+            _anotar_mtime(ruta, info_csv.st_mtime_ns)
+        # Los metadatos están al final; su posición se deduce del tamaño del archivo
+        metadatos = json.loads(bytes(mapa[len(mapa) - largo_meta:]).decode('utf-8'))
+        return Instantanea(ruta, metadatos, filas, archivo, mapa).tabla
+    except (ValueError, struct.error, OSError, KeyError):
+        if mapa is not None:
+            mapa.close()
+        archivo.close()
+        return None
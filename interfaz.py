@@ -1,24 +1,65 @@
 # --- Importaciones de Módulos ---
 import tkinter as tk
-from tkinter import ttk, messagebox # ttk para widgets modernos, messagebox para pop-ups
-import csv
+from tkinter import ttk, messagebox, filedialog # ttk para widgets modernos, messagebox para pop-ups, filedialog para guardar
 import os
-from collections import Counter # Para contar países por continente en estadísticas
+import time # Hora de la última actualización de los datos
+from array import array # Para las vistas: arreglos compactos de números de fila
+from tablaPaises import aviso_celdas_invalidas # Aviso de celdas numéricas inválidas de la tabla maestra
+from motor import MotorConsultas, armar_consulta, cargar_tabla, MAXIMO_SIN_LIMITE # Filtros, orden y estadísticas (sin Tkinter)
+from tablaVirtual import TreeviewVirtual # Treeview que sólo crea las filas visibles
+from cargaProgresiva import CargaEnSegundoPlano # Carga de los datos en un hilo aparte (por lotes)
+from consultasEnSegundoPlano import EjecutorConsultas # Filtros en un hilo aparte (sólo vale la última consulta)
+from almacenSqlite import ALMACEN_MEMORIA # La tabla puede estar en memoria o en SQLite (ver almacenSqlite.py)
+import rendimiento # Medición de etapas e interacciones (panel "Rendimiento")
+from exportacion import ExportacionEnSegundoPlano, formato_de_ruta, copiar_vista # Exportación de la vista en un hilo aparte
+from actualizacionPeriodica import ActualizacionPeriodica # Datos nuevos cada cierto tiempo, sin reiniciar
 
 # --- Variables Globales ---
 # Estas variables deben ser globales para ser accesibles desde diferentes funciones
 
 estado_orden = {}     # Un diccionario para recordar el estado de orden (asc/desc) de cada columna
-dataset_paises = []     # La "Lista Maestra". Se carga 1 vez desde el CSV y NUNCA se modifica.
-dataset_mostrado = [] # La "Lista de Vista". Es la que se muestra en la tabla y se modifica (filtra, ordena).
+motor_paises = MotorConsultas()  # Tabla maestra + índices + estadísticas + caché (ver motor.py)
+dataset_paises = motor_paises.tabla  # La "Tabla Maestra" (por columnas). Se carga 1 vez desde el CSV y NUNCA se modifica.
+dataset_mostrado = array('I')     # La "Vista": números de fila (row ids) de la tabla maestra que se muestran (filtrados, ordenados).
+consulta_actual = None              # La consulta (filtros + orden) que produjo 'dataset_mostrado'
+orden_pedido = None                 # Orden pedido al hilo de consultas que todavía no se ve (None: el de 'consulta_actual')
+RETARDO_FILTRO_MS = 250             # Filtrado en vivo: espera desde la última tecla antes de filtrar
+retardo_filtro_ms = RETARDO_FILTRO_MS
+ejecutor_consultas = None           # Resuelve los filtros fuera del hilo de Tkinter (ver consultasEnSegundoPlano.py)
+filtro_programado = None            # 'after' pendiente del filtrado en vivo
+primeros_actuales = None            # (consulta, cantidad, claves, por_continente) si se muestran "los primeros N"
+primeros_en_curso = None            # El "primeros N" (como 'primeros_actuales') pedido al hilo de consultas, si no llegó
+actualizacion_periodica = None      # ActualizacionPeriodica en marcha (si se pidió)
+motor_pendiente = None              # Motor con datos nuevos que todavía no se mostró (ver '_adoptar_motor')
+rangos_pendientes = None            # Filas [inicio, fin) que cambiaron en 'motor_pendiente' (None: todas)
+motores_retirados = []              # Motores reemplazados que todavía no se cerraron (ver '_retirar_motor')
+motores_exportando = []             # Motor de cada ventana de exportación abierta (o exportando)
+cierre_programado = None            # 'after' pendiente de '_cerrar_retirados'
+INTERVALO_CIERRE_MS = 200           # Cada cuánto se reintenta cerrar los motores retirados
 
 # --- Widgets Globales ---
 # Se definen como None y se asignan en 'iniciar_interfaz'
 campo_busqueda = None
 tree = None             # El widget de la tabla (Treeview)
+tabla_virtual = None    # Maneja qué filas de la vista se crean en el Treeview (ver tablaVirtual.py)
 combo_ordenar = None
+combo_ordenar_luego = None   # Criterio secundario de orden ("Luego por")
+combo_sentido_luego = None   # Sentido del criterio secundario (Ascendente/Descendente)
 combo_filtrar = None 
+campo_primeros = None        # "Mostrar primeros N": cantidad de filas
+combo_extremo = None         # "Mayores" (descendente) o "Menores" (ascendente) según "Ordenar por"
+var_por_continente = None    # N por cada continente (BooleanVar)
 ventana = None          # La ventana principal de la aplicación
+etiqueta_estado = None  # Texto de estado de la carga (ej. "Cargando... 45%")
+etiqueta_actualizacion = None  # Resultado de la última actualización periódica (ej. "Datos actualizados a las 10:30")
+barra_progreso = None   # Barra de progreso de la carga
+controles_filtro = []   # Controles que se habilitan recién cuando los índices están listos
+etiquetas_error = {}    # Entry -> Label donde se muestra su error de validación
+errores_entrada = {}    # Entry -> mensaje de error actual (None si el valor es válido)
+COLUMNAS_VISIBLES = ["nombre_comun_es", "poblacion", "area", "continente"]
+# Texto de los Combobox de orden -> nombre real de la columna
+COLUMNAS_DE_CONTROLES = {"Nombre": "nombre_comun_es", "Población": "poblacion", "Superficie": "area", "Continente": "continente"}
+PRIMEROS_POR_DEFECTO = 10    # N de "Mostrar primeros N" si el campo está vacío
 
 # Variables para los widgets de filtro por rango
 campo_min_poblacion = None 
@@ -30,34 +71,13 @@ campo_max_superficie = None
 
 def cargar_datos_en_memoria(archivo_csv):
     """
-    Lee el archivo CSV especificado y lo carga en una lista de diccionarios.
-    También convierte los campos de población y área a números para eficiencia.
+    Lee el archivo CSV especificado y lo carga en una TablaPaises (por columnas).
+    Los campos de población y área se convierten a números durante la misma lectura.
+    Si existe una instantánea binaria vigente ('Todos.csv.bin'), la usa en su lugar
+    (ver 'cargar_tabla' en motor.py). Los errores se muestran en un messagebox.
     """
-    dataset = []
     try:
-        if not os.path.exists(archivo_csv): raise FileNotFoundError
-        
-        with open(archivo_csv, mode='r', encoding='utf-8') as archivo:
-            lector_csv = csv.DictReader(archivo)
-            for fila in lector_csv:
-                dataset.append(fila)
-        
-        # --- Conversión de eficiencia ---
-        # Convertimos los campos numéricos UNA SOLA VEZ al cargar.
-        # Esto evita tener que convertirlos en CADA ordenamiento o CADA cálculo de estadísticas.
-        # Los guardamos en nuevas claves (ej. 'poblacion_num') para no perder el original (texto).
-        for pais in dataset:
-            try: 
-                pais['poblacion_num'] = int(pais.get('poblacion', 0))
-            except: 
-                pais['poblacion_num'] = 0 # Valor por defecto si falla
-            try: 
-                pais['area_num'] = int(pais.get('area', 0))
-            except: 
-                pais['area_num'] = 0 # Valor por defecto si falla
-
-        return dataset
-    
+        return cargar_tabla(archivo_csv)
     except FileNotFoundError: 
         messagebox.showerror("Error", f"No se encontró el archivo de datos:\n{archivo_csv}")
         return None
@@ -65,61 +85,85 @@ def cargar_datos_en_memoria(archivo_csv):
         messagebox.showerror("Error", f"Ocurrió un error al leer el archivo: {e}")
         return None
 
-def mostrar_datos_en_treeview(dataset, columnas):
+def mostrar_datos_en_treeview(vista, columnas, conservar_posicion=False):
     """
-    Limpia el Treeview (la tabla) y lo rellena con los datos del 'dataset' proporcionado.
+    Muestra en el Treeview (la tabla) las filas de la 'vista'
+    (números de fila de la tabla maestra).
+    La tabla es virtual (ver tablaVirtual.py): sólo se crean los items de las
+    filas visibles y, al filtrar u ordenar, se reutilizan los que ya existían.
+    'conservar_posicion' mantiene el desplazamiento (ej. mientras llegan filas de la carga).
     """
-    # Borra todos los elementos actuales de la tabla
-    tree.delete(*tree.get_children()) 
-    if not dataset: return # Si no hay datos, no hagas nada
-    
-    # Itera sobre el dataset (que es una lista de diccionarios)
-    for fila_dict in dataset:
-        # Crea una lista de valores en el orden correcto de las columnas
-        valores = [fila_dict.get(col, '') for col in columnas]
-        # Inserta la fila en la tabla
-        tree.insert("", "end", values=valores)
+    # Un "lector" por columna (se arman una vez, no en cada fila)
+    lectores = [dataset_paises.lector(col) for col in columnas]
+    # Crea una lista de valores en el orden correcto de las columnas (sólo para las filas que se ven)
+    tabla_virtual.obtener_valores = lambda fila: [leer(fila) for leer in lectores]
+    with rendimiento.etapa('treeview', len(vista)):
+        tabla_virtual.mostrar(vista, conservar_posicion)
 
-def ordenar_columna(col, dataset_local, columnas):
+def ordenar_columna(col, vista, columnas, claves_secundarias=()):
     """
-    Ordena la lista 'dataset_local' (que es 'dataset_mostrado') por la columna 'col'.
-    Alterna entre ascendente y descendente.
+    Ordena la vista 'vista' (que es 'dataset_mostrado') por la columna 'col', en el
+    hilo de consultas (como un filtro: la ventana sigue respondiendo y una consulta
+    más nueva lo reemplaza). Alterna entre ascendente y descendente.
+    'claves_secundarias' (lista de (columna, descendente)) desempata en ese orden,
+    ej. por continente y luego por población descendente.
     """
-    global estado_orden
+    global estado_orden, orden_pedido
     
     # Revisa el estado de orden actual para esa columna (default: False = ascendente)
     es_descendente = estado_orden.get(col, False)
     # Invierte el estado para el próximo clic y lo guarda
     estado_orden = {col: not es_descendente}
-    
-    def clave_orden(item):
-        """Función interna para decirle a .sort() CÓMO ordenar."""
-        
-        # --- Ordenamiento eficiente ---
-        # Si la columna es población o área, usa los campos numéricos
-        # que ya convertimos en 'cargar_datos_en_memoria'.
-        if col == 'poblacion': 
-            return item.get('poblacion_num', 0)
-        elif col == 'area': 
-            return item.get('area_num', 0)
-        
-        # Para texto (Nombre, Continente), ordena alfabéticamente en minúsculas
-        valor = item.get(col, '')
-        return str(valor).lower()
-        
-    # Ordena la lista 'dataset_mostrado' "in-place" (la modifica directamente)
-    dataset_local.sort(key=clave_orden, reverse=es_descendente) 
-    
-    # Actualiza la tabla con la lista ya ordenada
-    mostrar_datos_en_treeview(dataset_local, columnas)
+    claves = ((col, es_descendente),) + tuple(claves_secundarias)
+
+    # Si había un filtro en camino, se vuelve a pedir con el orden nuevo
+    # (un "primeros N" en camino tiene su propio orden: se vuelve a pedir tal cual)
+    if filtro_programado is not None or ejecutor_consultas.ocupado():
+        if filtro_programado is None and primeros_en_curso is not None:
+            _pedir_primeros(_motor_de_consultas(), primeros_en_curso)
+        else:
+            orden_pedido = claves
+            lanzar_filtro()
+        return
+
+    # --- Ordenamiento eficiente (ver 'ordenar' en motor.py) ---
+    # Las permutaciones de cada columna se calcularon una vez al cargar: ordenar la vista
+    # es recorrerlas quedándose con sus filas. Si esta misma vista ya se ordenó así
+    # (o al revés), se reutiliza el resultado de la caché.
+    orden_pedido = claves
+    motor, consulta = motor_paises, consulta_actual  # Las filas de la vista son las de los datos vigentes
+    ejecutor_consultas.enviar(lambda cancelado: _resolver_orden(motor, vista, claves, consulta),
+                              lambda resultado: _mostrar_orden(resultado, columnas), _al_fallar_orden)
+
+def _resolver_orden(motor, vista, claves, consulta):
+    """La parte pesada de ordenar la vista (se ejecuta en el hilo de consultas)."""
+    with rendimiento.interaccion('ordenar', len(vista)):
+        filas = motor.ordenar(vista, claves, consulta)
+    return motor, consulta._replace(orden=claves) if consulta else None, filas
+
+def _mostrar_orden(resultado, columnas=COLUMNAS_VISIBLES):
+    """Muestra la vista ordenada por '_resolver_orden' (en el hilo de Tkinter); sigue siendo la misma vista."""
+    global dataset_mostrado, consulta_actual, orden_pedido
+    motor, consulta, filas = resultado
+    orden_pedido = None
+    if not _adoptar_motor(motor):
+        return  # Los datos se recargaron mientras tanto: el resultado ya no sirve
+    consulta_actual = consulta
+    dataset_mostrado = filas
+    mostrar_datos_en_treeview(dataset_mostrado, columnas)
+
+def _al_fallar_orden(error):
+    global orden_pedido
+    orden_pedido = None
+    etiqueta_estado.config(text=f"No se pudo ordenar: {error}")
 
 def ordenar_desde_controles():
     """
     Función que se llama al presionar el botón "Ordenar".
-    Lee el valor del Combobox y llama a 'ordenar_columna'.
+    Lee los Combobox ("Ordenar por" y, opcionalmente, "Luego por") y llama a 'ordenar_columna'.
     """
     # Mapea el texto del Combobox (ej. "Nombre") al nombre real de la columna (ej. "nombre_comun_es")
-    mapa_columnas = {"Nombre": "nombre_comun_es", "Población": "poblacion", "Superficie": "area", "Continente": "continente"}
+    mapa_columnas = COLUMNAS_DE_CONTROLES
     
     opcion_elegida = combo_ordenar.get()
     if not opcion_elegida: 
@@ -128,203 +172,749 @@ def ordenar_desde_controles():
         
     columna_a_ordenar = mapa_columnas[opcion_elegida]
     columnas_visibles = list(mapa_columnas.values())
+
+    # Criterio secundario (para los empates del primero)
+    claves_secundarias = []
+    opcion_secundaria = combo_ordenar_luego.get()
+    if opcion_secundaria in mapa_columnas and mapa_columnas[opcion_secundaria] != columna_a_ordenar:
+        claves_secundarias.append((mapa_columnas[opcion_secundaria], combo_sentido_luego.get() == "Descendente"))
     
     # Llama a la función de ordenamiento, pasándole la lista que se está mostrando
-    ordenar_columna(columna_a_ordenar, dataset_mostrado, columnas_visibles)
+    ordenar_columna(columna_a_ordenar, dataset_mostrado, columnas_visibles, claves_secundarias)
+
+def _formatear_numero(valor, decimales=0):
+    """Formatea un número con puntos de miles (ej. 1234567 -> '1.234.567')."""
+    if valor is None:
+        return "-"
+    return f"{valor:,.{decimales}f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+def _llenar_estadisticas(frame_stats, resumen):
+    """Muestra en 'frame_stats' un resumen calculado por 'estadisticas.py'."""
+    # Función interna para no repetir código al crear líneas de texto
+    def crear_linea_stat(parent, etiqueta, valor):
+        ttk.Label(parent, text=etiqueta, font=("Helvetica", 10, "bold")).grid(row=parent.grid_size()[1], column=0, sticky="w", pady=2)
+        ttk.Label(parent, text=valor).grid(row=parent.grid_size()[1]-1, column=1, sticky="w", padx=5)
+
+    if not resumen["cantidad"]:
+        ttk.Label(frame_stats, text="No hay países en esta vista.").pack(pady=10)
+        return
+
+    frame_resultados = ttk.Frame(frame_stats); frame_resultados.pack(fill="x")
+    poblacion, area = resumen["poblacion"], resumen["area"]
+    nombre_max, valor_max = resumen["pais_mas_poblado"]
+    nombre_min, valor_min = resumen["pais_menos_poblado"]
+    crear_linea_stat(frame_resultados, "Países:", _formatear_numero(resumen["cantidad"]))
+    crear_linea_stat(frame_resultados, "País más poblado:", f"{nombre_max} ({_formatear_numero(valor_max)})")
+    crear_linea_stat(frame_resultados, "País menos poblado:", f"{nombre_min} ({_formatear_numero(valor_min)})")
+    crear_linea_stat(frame_resultados, "Población total:", _formatear_numero(poblacion["suma"]))
+    crear_linea_stat(frame_resultados, "Promedio de población:", _formatear_numero(poblacion["promedio"]))
+    crear_linea_stat(frame_resultados, "Mediana de población:", _formatear_numero(poblacion["mediana"]))
+    crear_linea_stat(frame_resultados, "Percentiles de población:",
+                     " / ".join(f"P{p}: {_formatear_numero(v)}" for p, v in poblacion["percentiles"].items()))
+    crear_linea_stat(frame_resultados, "Superficie (mín. / máx.):", f"{_formatear_numero(area['minimo'])} / {_formatear_numero(area['maximo'])} km²")
+    crear_linea_stat(frame_resultados, "Promedio de superficie:", f"{_formatear_numero(area['promedio'], 2)} km²")
+    crear_linea_stat(frame_resultados, "Mediana de superficie:", f"{_formatear_numero(area['mediana'], 2)} km²")
+    crear_linea_stat(frame_resultados, "Densidad:", f"{_formatear_numero(resumen['densidad'], 2)} hab/km²")
+
+    ttk.Separator(frame_stats, orient='horizontal').pack(fill='x', pady=10)
+
+    ttk.Label(frame_stats, text="Por Continente", font=("Helvetica", 12, "bold")).pack()
+    frame_continentes = ttk.Frame(frame_stats); frame_continentes.pack(fill="x", pady=5)
+    for continente, grupo in sorted(resumen["por_continente"].items()):
+        crear_linea_stat(frame_continentes, f"{continente}:",
+                         f"{grupo['cantidad']} países, {_formatear_numero(grupo['poblacion'])} hab., "
+                         f"{_formatear_numero(grupo['densidad'], 2)} hab/km²")
 
 def mostrar_ventana_estadisticas():
     """
-    Calcula estadísticas a partir de la "Lista Maestra" (dataset_paises)
-    y las muestra en una nueva ventana emergente (Toplevel).
+    Muestra, en una nueva ventana emergente (Toplevel), las estadísticas de la
+    vista actual (lo que está filtrado) y las de la "Tabla Maestra" (dataset_paises).
+    Las globales ya están calculadas desde la carga; las de la vista se
+    calculan sobre sus números de fila y se recuerdan por consulta.
     """
     if not dataset_paises: 
         messagebox.showinfo("Estadísticas", "No hay datos cargados.")
         return
         
     try:
-        # Usamos los campos _num (que son enteros) para todos los cálculos.
-        # Se usa 'dataset_paises' para que las estadísticas sean SIEMPRE globales.
-        pais_max_pob = max(dataset_paises, key=lambda p: p['poblacion_num']); 
-        pais_min_pob = min(dataset_paises, key=lambda p: p['poblacion_num'])
-        total_paises = len(dataset_paises)
-        promedio_poblacion = sum(p['poblacion_num'] for p in dataset_paises) / total_paises
-        promedio_superficie = sum(p['area_num'] for p in dataset_paises) / total_paises
-        # Counter crea un diccionario contando cuántas veces aparece cada continente
-        conteo_continentes = Counter(p['continente'] for p in dataset_paises)
-
-    except (ValueError, TypeError) as e: 
+        with rendimiento.interaccion('estadisticas', len(dataset_mostrado)):
+            resumen_global = motor_paises.resumen(None)
+            resumen_vista = motor_paises.resumen(dataset_mostrado, consulta_actual)
+
+    except (ValueError, TypeError, KeyError) as e: 
         messagebox.showerror("Error de Datos", f"No se pudieron calcular las estadísticas.\nError: {e}")
         return
     
     # --- Creación de la Ventana Emergente ---
     ventana_stats = tk.Toplevel(ventana) # 'Toplevel' es una ventana hija
-    ventana_stats.title("Estadísticas Globales")
-    ventana_stats.geometry("525x400")
+    ventana_stats.title("Estadísticas")
+    ventana_stats.geometry("600x560")
     ventana_stats.resizable(False, False)
     
-    frame_stats = ttk.Frame(ventana_stats, padding="10")
-    frame_stats.pack(fill="both", expand=True)
-    
-    ttk.Label(frame_stats, text="Estadísticas de Países", font=("Helvetica", 14, "bold")).pack(pady=(0,10))
-    frame_resultados = ttk.Frame(frame_stats); frame_resultados.pack(fill="x")
-    
-    # Función interna para no repetir código al crear líneas de texto
-    def crear_linea_stat(parent, etiqueta, valor):
-        ttk.Label(parent, text=etiqueta, font=("Helvetica", 10, "bold")).grid(row=parent.grid_size()[1], column=0, sticky="w", pady=2)
-        ttk.Label(parent, text=valor).grid(row=parent.grid_size()[1]-1, column=1, sticky="w", padx=5)
-    
-    # Se añaden las estadísticas al frame (usando .format() para los números)
-    crear_linea_stat(frame_resultados, "País más poblado:", f"{pais_max_pob['nombre_comun_es']} ({pais_max_pob['poblacion_num']:,.0f})".replace(',', '.'))
-    crear_linea_stat(frame_resultados, "País menos poblado:", f"{pais_min_pob['nombre_comun_es']} ({pais_min_pob['poblacion_num']:,.0f})".replace(',', '.'))
-    crear_linea_stat(frame_resultados, "Promedio de población:", f"{promedio_poblacion:,.0f}".replace(',', '.'))
-    crear_linea_stat(frame_resultados, "Promedio de superficie:", f"{promedio_superficie:,.2f} km²".replace(',', '.'))
-    
-    ttk.Separator(frame_stats, orient='horizontal').pack(fill='x', pady=10)
-    
-    ttk.Label(frame_stats, text="Países por Continente", font=("Helvetica", 12, "bold")).pack()
-    frame_continentes = ttk.Frame(frame_stats); frame_continentes.pack(fill="x", pady=5)
-    for continente, cantidad in sorted(conteo_continentes.items()): 
-        crear_linea_stat(frame_continentes, f"{continente}:", str(cantidad))
+    ttk.Label(ventana_stats, text="Estadísticas de Países", font=("Helvetica", 14, "bold")).pack(pady=(10,5))
+    # Una pestaña para la vista filtrada y otra para todos los países
+    pestanas = ttk.Notebook(ventana_stats); pestanas.pack(fill="both", expand=True, padx=10)
+    for titulo, resumen in (("Vista actual", resumen_vista), ("Todos los países", resumen_global)):
+        frame_stats = ttk.Frame(pestanas, padding="10")
+        pestanas.add(frame_stats, text=titulo)
+        _llenar_estadisticas(frame_stats, resumen)
         
-    ttk.Button(frame_stats, text="Cerrar", command=ventana_stats.destroy).pack(side="bottom", pady=10)
+    ttk.Button(ventana_stats, text="Cerrar", command=ventana_stats.destroy).pack(side="bottom", pady=10)
 
-def actualizar_vista():
+# --- Panel de Rendimiento ---
+
+def _llenar_rendimiento(tabla_etapas, texto_perfil):
+    """Vuelca el resumen de rendimiento.py en el panel (tabla de etapas y último perfil)."""
+    resumen = rendimiento.resumen()
+    tabla_etapas.delete(*tabla_etapas.get_children())
+    for nombre, etapa in resumen["etapas"].items():
+        tabla_etapas.insert("", "end", values=(
+            nombre, etapa["llamadas"], etapa["promedio_ms"], etapa["p50_ms"], etapa["p95_ms"], etapa["maximo_ms"],
+            _formatear_numero(etapa["filas"]), _formatear_numero(etapa["filas_por_s"])))
+    texto_perfil.delete("1.0", "end")
+    if resumen["perfiles"]:
+        perfil = resumen["perfiles"][-1]
+        texto_perfil.insert("end", f"{perfil['interaccion']}: {perfil['segundos'] * 1000:.1f} ms\n\n")
+        if "tracemalloc" in perfil:
+            memoria = perfil["tracemalloc"]
+            texto_perfil.insert("end", f"Pico de memoria: {_formatear_numero(memoria['pico_bytes'])} bytes\n")
+            for linea in memoria["lineas"]:
+                texto_perfil.insert("end", f"  {_formatear_numero(linea['bytes'])} B  {linea['lugar']}\n")
+            texto_perfil.insert("end", "\n")
+        texto_perfil.insert("end", perfil.get("cprofile", ""))
+    elif not resumen["activo"]:
+        texto_perfil.insert("end", f"La medición está apagada. Actívala aquí o inicia con {rendimiento.VARIABLE_ACTIVAR}=1.")
+
+def mostrar_ventana_rendimiento():
     """
-    Función unificada que filtra y busca desde la lista maestra.
-    Actualiza 'dataset_mostrado' con el resultado.
+    Muestra, en una ventana emergente, cuánto tarda cada etapa (carga, filtros, orden,
+    tabla, estadísticas...) y el perfil de la última interacción, si se pidió.
+    Se actualiza sola cada segundo mientras está abierta.
     """
-    global dataset_mostrado
+    ventana_rendimiento = tk.Toplevel(ventana)
+    ventana_rendimiento.title("Rendimiento")
+    ventana_rendimiento.geometry("900x600")
+
+    # --- Opciones ---
+    frame_opciones = ttk.Frame(ventana_rendimiento, padding="5"); frame_opciones.pack(fill="x")
+    medir = tk.BooleanVar(value=rendimiento.activo())
+    con_cprofile = tk.BooleanVar(value="cprofile" in rendimiento.perfiles_activos())
+    con_tracemalloc = tk.BooleanVar(value="tracemalloc" in rendimiento.perfiles_activos())
+
+    def aplicar_opciones():
+        perfiles = [nombre for nombre, variable in (("cprofile", con_cprofile), ("tracemalloc", con_tracemalloc)) if variable.get()]
+        if medir.get():
+            rendimiento.activar(rendimiento.archivo_volcado() or rendimiento.ARCHIVO_POR_DEFECTO, perfiles)
+        else:
+            rendimiento.desactivar()
+            rendimiento.elegir_perfiles(perfiles)
+
+    ttk.Checkbutton(frame_opciones, text="Medir etapas", variable=medir, command=aplicar_opciones).pack(side="left")
+    ttk.Checkbutton(frame_opciones, text="Perfilar cada acción (cProfile)", variable=con_cprofile, command=aplicar_opciones).pack(side="left", padx=10)
+    ttk.Checkbutton(frame_opciones, text="Memoria por acción (tracemalloc)", variable=con_tracemalloc, command=aplicar_opciones).pack(side="left")
+
+    # --- Tabla de etapas ---
+    columnas = {"etapa": "Etapa", "llamadas": "Llamadas", "promedio": "Prom. ms", "p50": "p50 ms",
+                "p95": "p95 ms", "maximo": "Máx. ms", "filas": "Filas", "filas_por_s": "Filas/s"}
+    tabla_etapas = ttk.Treeview(ventana_rendimiento, columns=list(columnas), show="headings", height=12)
+    for nombre, titulo in columnas.items():
+        tabla_etapas.heading(nombre, text=titulo)
+        tabla_etapas.column(nombre, width=180 if nombre == "etapa" else 85, anchor="w" if nombre == "etapa" else "e")
+    tabla_etapas.pack(fill="x", padx=10, pady=5)
+
+    # --- Perfil de la última interacción ---
+    ttk.Label(ventana_rendimiento, text="Última interacción perfilada", font=("Helvetica", 10, "bold")).pack(anchor="w", padx=10)
+    texto_perfil = tk.Text(ventana_rendimiento, height=14, font=("Courier", 9), wrap="none")
+    texto_perfil.pack(fill="both", expand=True, padx=10, pady=5)
+
+    def guardar():
+        ruta = filedialog.asksaveasfilename(parent=ventana_rendimiento, defaultextension=".json",
+                                            initialfile=rendimiento.ARCHIVO_POR_DEFECTO, filetypes=[("JSON", "*.json")])
+        if ruta:
+            try:
+                rendimiento.volcar(ruta)
+            except OSError as e:
+                messagebox.showerror("Error", f"No se pudo guardar el archivo: {e}", parent=ventana_rendimiento)
+
+    def reiniciar():
+        rendimiento.reiniciar()
+        _llenar_rendimiento(tabla_etapas, texto_perfil)
+
+    frame_botones = ttk.Frame(ventana_rendimiento, padding="5"); frame_botones.pack(fill="x")
+    ttk.Button(frame_botones, text="Reiniciar", command=reiniciar).pack(side="left")
+    ttk.Button(frame_botones, text="Guardar JSON...", command=guardar).pack(side="left", padx=5)
+    ttk.Button(frame_botones, text="Cerrar", command=ventana_rendimiento.destroy).pack(side="right")
+
+    def refrescar():
+        if ventana_rendimiento.winfo_exists():
+            _llenar_rendimiento(tabla_etapas, texto_perfil)
+            ventana.after(1000, refrescar)
+    refrescar()
 
+# --- Exportación de la Vista ---
+
+def mostrar_ventana_exportar():
+    """
+    Exporta la vista actual (filtrada y ordenada) a CSV o JSON lines, con o sin gzip,
+    con las columnas elegidas. El archivo se escribe en un hilo aparte y por bloques
+    (ver exportacion.py): la ventana sigue respondiendo y la exportación se puede cancelar.
+    """
+    if not dataset_mostrado:
+        messagebox.showinfo("Exportar vista", "La vista actual no tiene países.")
+        return
+    vista, motor = copiar_vista(dataset_mostrado), motor_paises  # La vista de este momento (aunque después se filtre u ordene)
+    motores_exportando.append(motor)  # Si llegan datos nuevos, este motor no se cierra hasta soltarlo
+    ventana_exportar = tk.Toplevel(ventana)
+    ventana_exportar.title("Exportar vista")
+    ventana_exportar.resizable(False, False)
+    ttk.Label(ventana_exportar, text=f"Exportar {len(vista):,} países".replace(',', '.'),
+              font=("Helvetica", 12, "bold")).pack(pady=(10, 5), padx=10, anchor="w")
+
+    # --- Columnas ---
+    frame_columnas = ttk.LabelFrame(ventana_exportar, text="Columnas", padding="5"); frame_columnas.pack(fill="x", padx=10)
+    elegidas = {columna: tk.BooleanVar(value=columna in COLUMNAS_VISIBLES) for columna in dataset_paises.cabecera}
+    for columna, variable in elegidas.items():
+        ttk.Checkbutton(frame_columnas, text=columna, variable=variable).pack(anchor="w")
+
+    # --- Formato ---
+    frame_formato = ttk.LabelFrame(ventana_exportar, text="Formato", padding="5"); frame_formato.pack(fill="x", padx=10, pady=5)
+    formato = tk.StringVar(value="csv")
+    comprimir = tk.BooleanVar(value=False)
+    ttk.Radiobutton(frame_formato, text="CSV", variable=formato, value="csv").pack(side="left")
+    ttk.Radiobutton(frame_formato, text="JSON lines", variable=formato, value="jsonl").pack(side="left", padx=10)
+    ttk.Checkbutton(frame_formato, text="Comprimir (gzip)", variable=comprimir).pack(side="left")
+
+    # --- Avance ---
+    barra = ttk.Progressbar(ventana_exportar, mode="determinate", maximum=100, length=360); barra.pack(fill="x", padx=10, pady=5)
+    etiqueta = ttk.Label(ventana_exportar, text=""); etiqueta.pack(anchor="w", padx=10)
+    frame_botones = ttk.Frame(ventana_exportar, padding="5"); frame_botones.pack(fill="x")
+    exportacion = None
+
+    def al_avanzar(escritas, total):
+        if not ventana_exportar.winfo_exists():
+            return  # Se cerró la ventana: la exportación ya se está cancelando
+        barra["value"] = 100 * escritas / total if total else 100
+        etiqueta.config(text=f"{escritas:,} de {total:,} filas".replace(',', '.'))
+
+    def al_finalizar(texto):
+        nonlocal exportacion
+        exportacion = None
+        if ventana_exportar.winfo_exists():
+            etiqueta.config(text=texto)
+            boton_exportar.state(["!disabled"])
+            boton_cancelar.state(["disabled"])
+        else:
+            _soltar_motor_exportacion(motor)  # La ventana se cerró mientras exportaba
+
+    def al_fallar(error):
+        al_finalizar("La exportación falló.")
+        messagebox.showerror("Error", f"No se pudo exportar la vista: {error}",
+                             parent=ventana_exportar if ventana_exportar.winfo_exists() else ventana)
+
+    def exportar():
+        nonlocal exportacion
+        columnas = [columna for columna, variable in elegidas.items() if variable.get()]
+        if not columnas:
+            messagebox.showwarning("Exportar vista", "Elige al menos una columna.", parent=ventana_exportar)
+            return
+        extension = "." + formato.get() + (".gz" if comprimir.get() else "")
+        ruta = filedialog.asksaveasfilename(parent=ventana_exportar, defaultextension=extension,
+                                            initialfile="vista" + extension, filetypes=[("Exportación", "*" + extension)])
+        if not ruta:
+            return
+        barra["value"] = 0
+        boton_exportar.state(["disabled"])
+        boton_cancelar.state(["!disabled"])
+        exportacion = ExportacionEnSegundoPlano(
+            ventana, motor, vista, ruta, columnas, formato.get(), comprimir.get() or formato_de_ruta(ruta)[1], al_avanzar=al_avanzar,
+            al_terminar=lambda escritas: al_finalizar(f"Se exportaron {escritas:,} filas.".replace(',', '.')),
+            al_cancelar=lambda: al_finalizar("Exportación cancelada."), al_fallar=al_fallar)
+        exportacion.iniciar()
+
+    def cancelar():
+        if exportacion is not None:
+            exportacion.cancelar()
+
+    def cerrar():
+        cancelar()  # Cerrar la ventana corta la exportación en curso
+        ventana_exportar.destroy()
+        if exportacion is None:
+            _soltar_motor_exportacion(motor)  # Si no, lo suelta 'al_finalizar' cuando la exportación termine
+
+    boton_exportar = ttk.Button(frame_botones, text="Exportar...", command=exportar); boton_exportar.pack(side="left")
+    boton_cancelar = ttk.Button(frame_botones, text="Cancelar", command=cancelar, state="disabled"); boton_cancelar.pack(side="left", padx=5)
+    ttk.Button(frame_botones, text="Cerrar", command=cerrar).pack(side="right")
+    ventana_exportar.protocol("WM_DELETE_WINDOW", cerrar)
+
+def _leer_consulta_de_controles():
+    """
+    Lee los controles de filtro y arma la consulta, conservando el orden elegido.
+    Devuelve None si algún campo numérico es inválido (el error se muestra junto al campo).
+    """
     # 1. Obtener valores de los controles
     filtro_continente = combo_filtrar.get()
     termino_busqueda = campo_busqueda.get().lower()
 
     # 2. Obtener valores numéricos
     min_pob = _obtener_valor_numerico(campo_min_poblacion, default_val=0)
-    max_pob = _obtener_valor_numerico(campo_max_poblacion, default_val=999999999999999) 
+    max_pob = _obtener_valor_numerico(campo_max_poblacion, default_val=MAXIMO_SIN_LIMITE) 
     min_area = _obtener_valor_numerico(campo_min_superficie, default_val=0)
-    max_area = _obtener_valor_numerico(campo_max_superficie, default_val=999999999999999)
+    max_area = _obtener_valor_numerico(campo_max_superficie, default_val=MAXIMO_SIN_LIMITE)
 
     # --- VALIDACIÓN ---
     # Si CUALQUIERA de los campos numéricos tuvo un error (y devolvió None),
-    # detenemos el filtrado. El usuario ya vio el messagebox.
+    # no se filtra. El error ya se ve al lado del campo.
     if min_pob is None or max_pob is None or min_area is None or max_area is None:
+        return None
+
+    # 3. Armar la consulta normalizada (los límites vacíos quedan en None)
+    return armar_consulta(
+        continente=None if filtro_continente == "Todos" else filtro_continente,
+        termino=termino_busqueda,
+        min_pob=min_pob, max_pob=max_pob, min_area=min_area, max_area=max_area,
+        orden=orden_pedido if orden_pedido is not None else consulta_actual.orden if consulta_actual else None,
+    )
+
+def _resolver_consulta(motor, consulta, cancelado=None):
+    """
+    La parte pesada de un filtro (se ejecuta en el hilo de consultas):
+    filtrar (y ordenar), y buscar sugerencias si no hubo resultados.
+    """
+    with rendimiento.interaccion('filtrar') as medicion:
+        filas = motor.ejecutar(consulta, cancelado=cancelado)
+        medicion.filas = len(filas)
+    sugerencias = motor.sugerencias(consulta.termino, 3) if not filas and consulta.termino else []
+    return motor, consulta, filas, sugerencias
+
+def _mostrar_resultado(resultado, conservar_posicion=False):
+    """Muestra el resultado de '_resolver_consulta' (en el hilo de Tkinter)."""
+    global dataset_mostrado, consulta_actual, primeros_actuales, primeros_en_curso, orden_pedido
+    motor, consulta, filas, sugerencias = resultado
+    primeros_en_curso = orden_pedido = None
+    if not _adoptar_motor(motor):
+        return  # Los datos se recargaron mientras tanto: el resultado ya no sirve
+
+    # Actualizar la vista (sólo números de fila, no copias de los datos)
+    consulta_actual = consulta
+    primeros_actuales = None
+    dataset_mostrado = filas
+    mostrar_datos_en_treeview(dataset_mostrado, COLUMNAS_VISIBLES, conservar_posicion)
+    _mostrar_cantidad(sugerencias)
+
+def _mostrar_cantidad(sugerencias=()):
+    """
+    Pone en 'etiqueta_estado' lo que se está viendo: la cantidad de países (o de "los primeros N"),
+    o que no hubo resultados, con las 'sugerencias' si las hay (sin ventanas emergentes).
+    """
+    filas = dataset_mostrado
+    if primeros_actuales is not None:
+        _, cantidad, _, por_continente = primeros_actuales
+        detalle = f" ({cantidad:,} por continente)".replace(',', '.') if por_continente else ""
+        mensaje = f"Primeros {len(filas):,} países{detalle}".replace(',', '.')
+    elif not filas and consulta_actual is not None and consulta_actual.termino:
+        mensaje = f"No se encontraron países con el término '{consulta_actual.termino}'."
+        # Búsqueda tolerante a errores: sugiere los nombres más parecidos
+        if sugerencias:
+            mensaje += f" ¿Quisiste decir: {', '.join(sugerencias)}?"
+    else:
+        mensaje = f"{len(filas):,} países".replace(',', '.')
+    etiqueta_estado.config(text=mensaje)
+
+def _al_fallar_filtro(error):
+    global primeros_en_curso, orden_pedido
+    primeros_en_curso = orden_pedido = None
+    etiqueta_estado.config(text=f"No se pudo filtrar: {error}")
+
+def actualizar_vista():
+    """
+    Función unificada que filtra y busca desde la lista maestra.
+    Manda la consulta de los controles al hilo de consultas (como 'lanzar_filtro', pero aunque
+    sea la que ya se muestra) y actualiza 'dataset_mostrado' cuando llega el resultado.
+    """
+    global filtro_programado, primeros_en_curso
+    consulta = _leer_consulta_de_controles()
+    if consulta is None:
         return # Detener la función aquí, no hacer nada.
+    # Lo que estuviera pendiente o en curso queda viejo
+    if filtro_programado is not None:
+        ventana.after_cancel(filtro_programado)
+        filtro_programado = None
+    primeros_en_curso = None
+    etiqueta_estado.config(text="Filtrando...")
+    # Resolver la consulta en el motor: caché -> refinar un resultado más amplio -> índices
+    motor = _motor_de_consultas()
+    ejecutor_consultas.enviar(lambda cancelado: _resolver_consulta(motor, consulta, cancelado),
+                              _mostrar_resultado, _al_fallar_filtro)
 
-    # 3. Empezar SIEMPRE desde la lista maestra
-    lista_temporal = dataset_paises[:]
-
-    # 4. Aplicar filtro de continente (si no es "Todos")
-    if filtro_continente != "Todos":
-        lista_temporal = [
-            pais for pais in lista_temporal 
-            if pais['continente'] == filtro_continente
-        ]
-
-    # 5. Aplicar filtro de búsqueda (si hay término)
-    if termino_busqueda:
-        lista_temporal = [
-            pais for pais in lista_temporal 
-            if termino_busqueda in pais['nombre_comun_es'].lower()
-        ]
-
-    # 6. Aplicar filtro de POBLACIÓN
-    lista_temporal = [
-        pais for pais in lista_temporal 
-        if min_pob <= pais['poblacion_num'] <= max_pob 
-    ]
-
-    # 7. Aplicar filtro de SUPERFICIE
-    lista_temporal = [
-        pais for pais in lista_temporal 
-        if min_area <= pais['area_num'] <= max_area
-    ]
-
-    # 8. Actualizar la lista de vista
-    dataset_mostrado = lista_temporal
-
-    # 9. Mostrar en la GUI (sin re-ordenar)
-    columnas_visibles = ["nombre_comun_es", "poblacion", "area", "continente"]
-    mostrar_datos_en_treeview(dataset_mostrado, columnas_visibles)
+def programar_filtro(evento=None):
+    """
+    Filtrado en vivo: cada tecla (o cambio de continente) vuelve a programar el
+    filtro para dentro de 'retardo_filtro_ms'; así se filtra una vez cuando se deja de escribir.
+    """
+    global filtro_programado
+    if filtro_programado is not None:
+        ventana.after_cancel(filtro_programado)
+    filtro_programado = ventana.after(retardo_filtro_ms, lanzar_filtro)
 
-    # 10. (Opcional) Mostrar "no hay resultados"
-    if not dataset_mostrado and termino_busqueda:
-        messagebox.showinfo("Búsqueda", f"No se encontraron países con el término '{termino_busqueda}'.")
+def lanzar_filtro():
+    """
+    Manda la consulta de los controles al hilo de consultas. Si había otra en
+    curso, queda descartada; la ventana sigue respondiendo mientras se calcula.
+    """
+    global filtro_programado, primeros_en_curso, orden_pedido
+    if filtro_programado is not None:
+        ventana.after_cancel(filtro_programado)
+        filtro_programado = None
+    primeros_en_curso = None  # Lo que estuviera en curso queda cancelado o reemplazado
+    consulta = _leer_consulta_de_controles()
+    if consulta is None or consulta == consulta_actual:
+        # Valor inválido, o se volvió a lo que ya se muestra (ej. escribir y borrar): nada que calcular
+        ejecutor_consultas.cancelar()
+        orden_pedido = None
+        _mostrar_cantidad()  # Quita el "Filtrando..." (o "Buscando los primeros...") de lo cancelado
+        if motor_pendiente is not None:
+            _recalcular_vista()  # ...salvo la vista con los datos nuevos, que se acaba de cancelar
+        return
+    etiqueta_estado.config(text="Filtrando...")
+    motor = _motor_de_consultas()
+    ejecutor_consultas.enviar(lambda cancelado: _resolver_consulta(motor, consulta, cancelado),
+                              _mostrar_resultado, _al_fallar_filtro)
+
+def mostrar_primeros():
+    """
+    Función que se llama al presionar "Mostrar primeros N": con los filtros actuales,
+    las N primeras filas según "Ordenar por" ("Mayores": de mayor a menor; "Menores":
+    al revés) y "Luego por". Se eligen sin ordenar toda la vista (ver 'primeros' en
+    motor.py) y la tabla muestra sólo esas N (o N por continente).
+    """
+    global filtro_programado
+    consulta = _leer_consulta_de_controles()
+    cantidad = _obtener_valor_numerico(campo_primeros, default_val=PRIMEROS_POR_DEFECTO)
+    if consulta is None or cantidad is None:
+        return
+    columna = COLUMNAS_DE_CONTROLES[combo_ordenar.get() or "Nombre"]
+    claves = [(columna, combo_extremo.get() == "Mayores")]
+    opcion_secundaria = combo_ordenar_luego.get()
+    if opcion_secundaria in COLUMNAS_DE_CONTROLES and COLUMNAS_DE_CONTROLES[opcion_secundaria] != columna:
+        claves.append((COLUMNAS_DE_CONTROLES[opcion_secundaria], combo_sentido_luego.get() == "Descendente"))
+    por_continente = var_por_continente.get()
+    # Un filtro pendiente quedaría viejo: se reemplaza por éste
+    if filtro_programado is not None:
+        ventana.after_cancel(filtro_programado)
+        filtro_programado = None
+    etiqueta_estado.config(text="Buscando los primeros...")
+    _pedir_primeros(_motor_de_consultas(), (consulta, cantidad, claves, por_continente))
+
+def _resolver_primeros(motor, consulta, cantidad, claves, por_continente):
+    """La parte pesada de "Mostrar primeros N" (se ejecuta en el hilo de consultas)."""
+    with rendimiento.interaccion('primeros') as medicion:
+        filas = motor.primeros(consulta, cantidad, claves, por_continente=por_continente)
+        medicion.filas = len(filas)
+    return motor, filas, (consulta, cantidad, claves, por_continente)
+
+def _mostrar_primeros(resultado, conservar_posicion=False):
+    """Muestra el resultado de '_resolver_primeros' (en el hilo de Tkinter)."""
+    global dataset_mostrado, consulta_actual, primeros_actuales, primeros_en_curso, orden_pedido
+    motor, filas, pedido = resultado
+    primeros_en_curso = orden_pedido = None
+    if not _adoptar_motor(motor):
+        return  # Los datos se recargaron mientras tanto: el resultado ya no sirve
+    # La vista son sólo las N elegidas: no es el resultado de ninguna consulta
+    # (así ni la caché ni las estadísticas la confunden con la vista completa)
+    consulta_actual = None
+    primeros_actuales = pedido  # Para volver a elegirlas si llegan datos nuevos
+    dataset_mostrado = filas
+    mostrar_datos_en_treeview(dataset_mostrado, COLUMNAS_VISIBLES, conservar_posicion)
+    _mostrar_cantidad()
+
+def _pedir_primeros(motor, pedido, al_terminar=_mostrar_primeros, al_fallar=_al_fallar_filtro):
+    """
+    Manda un "primeros N" ('pedido', como 'primeros_actuales') al hilo de consultas y lo
+    anota en 'primeros_en_curso': si hay que volver a pedir lo que está en camino (ej. llegaron
+    datos nuevos), se pide otra vez éste y no un filtro.
+    """
+    global primeros_en_curso
+    consulta, cantidad, claves, por_continente = pedido
+    primeros_en_curso = pedido
+    ejecutor_consultas.enviar(lambda cancelado: _resolver_primeros(motor, consulta, cantidad, claves, por_continente),
+                              al_terminar, al_fallar)
 
 def resetear_vista():
     """
     Limpia TODOS los controles de filtro y resetea la vista
     para mostrar todos los países, ordenados por nombre.
     """
-    global dataset_mostrado 
+    global consulta_actual, orden_pedido
     
     # 1. Limpia todos los widgets de entrada
     campo_busqueda.delete(0, tk.END)
     combo_ordenar.set("Nombre")
+    combo_ordenar_luego.set("(ninguno)")
+    combo_sentido_luego.set("Ascendente")
     combo_filtrar.set("Todos") 
+    campo_primeros.delete(0, tk.END)
+    campo_primeros.insert(0, str(PRIMEROS_POR_DEFECTO))
+    combo_extremo.set("Mayores")
+    var_por_continente.set(False)
     campo_min_poblacion.delete(0, tk.END)
     campo_max_poblacion.delete(0, tk.END)
     campo_min_superficie.delete(0, tk.END)
     campo_max_superficie.delete(0, tk.END)
     
     # 2. Llama a la función unificada.
-    # Como todos los campos están vacíos/en "Todos", mostrará la lista completa.
+    # Como todos los campos están vacíos/en "Todos", pide la lista completa
+    # (sin orden: el de por defecto se aplica en el paso 3).
+    consulta_actual = orden_pedido = None
     actualizar_vista()
     
-    # 3. Aplica el orden por defecto (Nombre) a la vista reseteada.
+    # 3. Aplica el orden por defecto (Nombre) a la vista reseteada: como el pedido
+    # anterior todavía está en camino, se vuelve a pedir ya ordenado.
     columnas_visibles = ["nombre_comun_es", "poblacion", "area", "continente"]
     ordenar_columna("nombre_comun_es", dataset_mostrado, columnas_visibles)
 
+def _marcar_error(entrada_widget, mensaje):
+    """Muestra (o borra, si 'mensaje' es None) el error de un campo al lado del campo, sin ventanas emergentes."""
+    errores_entrada[entrada_widget] = mensaje
+    entrada_widget.configure(style="Error.TEntry" if mensaje else "TEntry")
+    etiqueta = etiquetas_error.get(entrada_widget)
+    if etiqueta is not None:
+        # Una etiqueta sirve a los dos campos (mínimo y máximo): muestra el primer error
+        mensajes = [errores_entrada.get(campo) for campo, otra in etiquetas_error.items() if otra is etiqueta]
+        etiqueta.config(text=next((texto for texto in mensajes if texto), ""))
+
 def _obtener_valor_numerico(entrada_widget, default_val=None):
     """
     Intenta obtener un valor ENTERO POSITIVO de un Entry.
     Devuelve 'default_val' si está vacío.
     Devuelve el número si es válido.
-    Devuelve 'None' si hay un error (texto o negativo).
+    Devuelve 'None' si hay un error (texto o negativo); el error se muestra junto al campo.
     """
     try:
         valor_str = entrada_widget.get().strip().replace('.', '').replace(',', '')
-        if not valor_str: 
-            return default_val # Campo vacío, usa el default (0 o infinito)
-        
+    except AttributeError: 
+        return None 
+    if not valor_str: 
+        _marcar_error(entrada_widget, None)
+        return default_val # Campo vacío, usa el default (0 o infinito)
+
+    try:
         valor_int = int(valor_str)
-        
-        if valor_int < 0:
-            messagebox.showwarning("Valor Inválido", "No se permiten números negativos en los filtros de rango.")
-            return None 
-            
-        return valor_int # Número válido
-        
     except ValueError:
-        messagebox.showwarning("Entrada Inválida", "Por favor, introduce solo números ENTEROS válidos para los filtros.")
+        _marcar_error(entrada_widget, "Sólo números enteros (ej. 1.000.000).")
         return None 
-    except AttributeError: 
+
+    if valor_int < 0:
+        _marcar_error(entrada_widget, "No se permiten números negativos.")
         return None 
 
+    _marcar_error(entrada_widget, None)
+    return valor_int # Número válido
+
+# --- Carga en Segundo Plano ---
+# Estas funciones las llama CargaEnSegundoPlano (ver cargaProgresiva.py), siempre en el hilo de Tkinter.
+
+def _habilitar_controles(habilitar):
+    """Habilita o deshabilita los controles que necesitan los índices (filtros, orden, estadísticas)."""
+    for control in controles_filtro:
+        control.state(["!disabled"] if habilitar else ["disabled"])
+
+def _al_avanzar_carga(tabla, filas, fraccion):
+    """Llegó un lote: se muestran las filas ya leídas (en el orden del archivo) y el avance."""
+    global dataset_paises, dataset_mostrado
+    barra_progreso["value"] = fraccion * 100
+    if tabla is None:
+        # Importación a SQLite: las filas se podrán ver cuando la base esté lista
+        etiqueta_estado.config(text=f"Importando a SQLite... {filas:,} países ({fraccion:.0%})".replace(',', '.'))
+        return
+    dataset_paises = tabla
+    dataset_mostrado = array('I', range(filas))
+    mostrar_datos_en_treeview(dataset_mostrado, COLUMNAS_VISIBLES, conservar_posicion=True)
+    etiqueta_estado.config(text=f"Cargando... {filas:,} países ({fraccion:.0%})".replace(',', '.'))
+
+def _al_indexar_carga():
+    """La tabla está completa; falta construir los índices."""
+    barra_progreso.config(mode="indeterminate")
+    barra_progreso.start(15)
+    etiqueta_estado.config(text="Preparando índices para los filtros...")
+
+def _al_terminar_carga(motor):
+    """El motor está listo: se habilitan los filtros y se ordena la vista por nombre."""
+    global motor_paises, dataset_paises, dataset_mostrado, consulta_actual
+    motor_paises = motor
+    dataset_paises = motor.tabla
+    dataset_mostrado = dataset_paises.todas()
+    consulta_actual = armar_consulta()  # Sin filtros (así el orden inicial también queda en la caché)
+    barra_progreso.stop()
+    barra_progreso.pack_forget()
+    estado = f"{len(dataset_paises):,} países".replace(',', '.')
+    aviso = aviso_celdas_invalidas(dataset_paises.celdas_invalidas)
+    etiqueta_estado.config(text=f"{estado}. {aviso}" if aviso else estado)
+    _habilitar_controles(True)
+    if dataset_mostrado:
+        # Ordena la vista inicial por nombre
+        ordenar_columna("nombre_comun_es", dataset_mostrado, COLUMNAS_VISIBLES)
+    if actualizacion_periodica is not None:
+        actualizacion_periodica.iniciar()  # Desde ahora, los datos se revisan cada cierto tiempo
+
+def _al_fallar_carga(error):
+    """La carga falló: se informa y la aplicación queda con la tabla vacía."""
+    barra_progreso.stop()
+    barra_progreso.pack_forget()
+    etiqueta_estado.config(text="Sin datos")
+    if isinstance(error, FileNotFoundError):
+        messagebox.showerror("Error", f"No se encontró el archivo de datos:\n{error.args[0] if error.args else ''}")
+    else:
+        messagebox.showerror("Error", f"Ocurrió un error al leer el archivo: {error}")
+    _habilitar_controles(True)
+
+# --- Actualización Periódica ---
+# Estas funciones las llama ActualizacionPeriodica (ver actualizacionPeriodica.py), siempre en el hilo de Tkinter.
+# El motor nuevo llega completo (tabla + índices); se vuelve a pedir lo que se está viendo
+# y recién con ese resultado pasa a ser el vigente (ver '_adoptar_motor').
+
+def _motor_de_consultas():
+    """Motor con el que se resuelven las consultas nuevas: el de los datos nuevos, si llegaron."""
+    return motor_pendiente if motor_pendiente is not None else motor_paises
+
+def _adoptar_motor(motor):
+    """
+    Indica si un resultado calculado con 'motor' se puede mostrar: sí si es el motor vigente
+    o el de los datos nuevos. En ese caso el nuevo pasa a ser el vigente justo antes de
+    mostrar su primer resultado, así la tabla nunca mezcla filas de unos datos y de otros.
+    """
+    global motor_paises, dataset_paises, motor_pendiente, rangos_pendientes
+    if motor is motor_paises:
+        return True
+    if motor is not motor_pendiente:
+        return False
+    _retirar_motor(motor_paises)
+    motor_paises = motor
+    dataset_paises = motor.tabla
+    # Los items de las filas que cambiaron tienen los valores viejos; los demás se reutilizan
+    if rangos_pendientes is None:
+        tabla_virtual.invalidar()
+    else:
+        tabla_virtual.olvidar_filas(rangos_pendientes)
+    motor_pendiente = rangos_pendientes = None
+    return True
+
+def _recalcular_vista():
+    """Vuelve a pedir lo que se está viendo (filtros y orden, o "primeros N") al motor con los datos nuevos."""
+    global primeros_en_curso
+    motor = motor_pendiente
+    if primeros_actuales is not None:
+        _pedir_primeros(motor, primeros_actuales, lambda resultado: _mostrar_primeros(resultado, conservar_posicion=True),
+                        _al_fallar_recalculo)
+        return
+    primeros_en_curso = None
+    consulta = consulta_actual or armar_consulta()
+    ejecutor_consultas.enviar(lambda cancelado: _resolver_consulta(motor, consulta, cancelado),
+                              lambda resultado: _mostrar_resultado(resultado, conservar_posicion=True),
+                              _al_fallar_recalculo)
+
+def _retirar_motor(motor):
+    """'motor' ya no es el vigente ni el de los datos nuevos: se cierra cuando nadie lo use."""
+    motores_retirados.append(motor)
+    _cerrar_retirados()
+
+def _cerrar_retirados():
+    """
+    Cierra los motores retirados que ya no usa nadie. Mientras el hilo de consultas tenga
+    una tarea (aunque sea vieja, con un motor anterior) se vuelve a intentar con after();
+    los que usa una ventana de exportación se cierran cuando ésta los suelta.
+    """
+    global cierre_programado
+    if cierre_programado is not None:
+        ventana.after_cancel(cierre_programado)
+        cierre_programado = None
+    if not ejecutor_consultas.inactivo():
+        cierre_programado = ventana.after(INTERVALO_CIERRE_MS, _cerrar_retirados)
+        return
+    for motor in [motor for motor in motores_retirados if motor not in motores_exportando]:
+        motores_retirados.remove(motor)
+        motor.cerrar()
+
+def _soltar_motor_exportacion(motor):
+    """Una ventana de exportación se cerró (y no exporta): su motor, si se retiró, ya se puede cerrar."""
+    motores_exportando.remove(motor)
+    _cerrar_retirados()
+
+def _al_revisar_actualizacion():
+    etiqueta_actualizacion.config(text="Buscando datos nuevos...", foreground="gray")
+
+def _al_sin_cambios_actualizacion():
+    etiqueta_actualizacion.config(text=f"Sin datos nuevos ({time.strftime('%H:%M')})", foreground="gray")
+
+def _al_actualizar_datos(motor, rangos):
+    """Llegaron datos nuevos: se recalcula la vista con ellos (la que se ve sigue hasta tener el resultado)."""
+    global motor_pendiente, rangos_pendientes
+    if motor_pendiente is not None:
+        # La actualización anterior todavía no se mostró: también cuentan sus filas
+        rangos = None if rangos is None or rangos_pendientes is None else rangos_pendientes + rangos
+        _retirar_motor(motor_pendiente)
+    motor_pendiente, rangos_pendientes = motor, rangos
+    texto = f"Datos actualizados a las {time.strftime('%H:%M')} ({len(motor.tabla):,} países)".replace(',', '.')
+    etiqueta_actualizacion.config(text=texto, foreground="gray")
+    if filtro_programado is not None:
+        lanzar_filtro()  # Había un filtro en camino: se resuelve directamente con los datos nuevos
+    elif ejecutor_consultas.ocupado():
+        if primeros_en_curso is not None:
+            _pedir_primeros(motor, primeros_en_curso)  # Lo mismo con un "primeros N" en camino
+        else:
+            lanzar_filtro()
+    else:
+        _recalcular_vista()
+
+def _al_fallar_recalculo(error):
+    """No se pudo calcular la vista con los datos nuevos: se descartan (se vuelven a armar en la próxima vuelta)."""
+    global motor_pendiente, rangos_pendientes, primeros_en_curso
+    primeros_en_curso = None
+    _retirar_motor(motor_pendiente)
+    motor_pendiente = rangos_pendientes = None
+    actualizacion_periodica.descartar()
+    _al_fallar_actualizacion(error)
+
+def _al_fallar_actualizacion(error):
+    """Se informa sin ventanas emergentes; se siguen mostrando (y filtrando) los datos anteriores."""
+    etiqueta_actualizacion.config(text=f"No se pudieron actualizar los datos ({time.strftime('%H:%M')}): {error}. "
+                                       "Se siguen mostrando los anteriores.", foreground="red")
+
 # --- FUNCIÓN PRINCIPAL DE LA INTERFAZ ---
 
-def iniciar_interfaz():
+def iniciar_interfaz(retardo_ms=RETARDO_FILTRO_MS, almacen=ALMACEN_MEMORIA, actualizar=None, intervalo_actualizacion=None):
     """
     Crea, configura y ejecuta la interfaz gráfica principal (GUI).
+    'retardo_ms' es la espera del filtrado en vivo desde la última tecla.
+    'almacen' indica dónde se guarda la tabla: en memoria o en SQLite (para datos que no entran en la RAM).
+    Con 'intervalo_actualizacion' (segundos), cada ese tiempo se llama a 'actualizar' en segundo
+    plano (ej. 'refrescar_datos' de main.py; sin ella, sólo se vigila 'Todos.csv') y los datos
+    nuevos se muestran sin reiniciar (ver actualizacionPeriodica.py).
     """
     # Declara qué variables globales se van a asignar/modificar dentro de esta función
-    global dataset_paises, dataset_mostrado, combo_ordenar, tree, ventana, campo_busqueda, combo_filtrar
+    global motor_paises, dataset_paises, dataset_mostrado, combo_ordenar, combo_ordenar_luego, combo_sentido_luego, tree, tabla_virtual, ventana, campo_busqueda, combo_filtrar
     global campo_min_poblacion, campo_max_poblacion
     global campo_min_superficie, campo_max_superficie
+    global etiqueta_estado, barra_progreso, controles_filtro
+    global ejecutor_consultas, retardo_filtro_ms, etiquetas_error
+    global campo_primeros, combo_extremo, var_por_continente
+    global etiqueta_actualizacion, actualizacion_periodica
 
     # 1. Crear la ventana principal
     ventana = tk.Tk()
     ventana.title("Visor de Datos de Países")
     ventana.geometry("1000x800") # Aumentado para los nuevos filtros
+    ttk.Style().configure("Error.TEntry", foreground="red") # Campos con un valor inválido
+    retardo_filtro_ms = retardo_ms
+    ejecutor_consultas = EjecutorConsultas(ventana)
 
-    # 2. Cargar los datos
+    # 2. Los datos se cargan en segundo plano (paso 7): la ventana aparece enseguida
+    # y, mientras tanto, se trabaja con una tabla vacía.
     ruta_csv = os.path.join("Continentes", "Todos.csv")
-    dataset_paises = cargar_datos_en_memoria(ruta_csv)
-    if dataset_paises is None: 
-        dataset_paises = []
+    motor_paises = MotorConsultas()
+    dataset_paises = motor_paises.tabla
     
-    # 3. Inicializar la lista de vista (al inicio, es una copia de la maestra)
-    dataset_mostrado = dataset_paises[:] 
+    # 3. Inicializar la vista (vacía hasta que lleguen las primeras filas)
+    dataset_mostrado = array('I')
 
     # --- 4. Configurar Paneles de Layout ---
     # Un panel a la izquierda para controles, y uno a la derecha para la tabla
@@ -339,7 +929,7 @@ def iniciar_interfaz():
     # --- 5. Panel Izquierdo (Controles) ---
     ttk.Label(frame_izquierda, text="Menú", font=("Helvetica", 12, "bold")).pack(pady=10)
     
-    ttk.Button(frame_izquierda, text="Resetear Vista", command=resetear_vista).pack(fill="x", pady=5)
+    boton_resetear = ttk.Button(frame_izquierda, text="Resetear Vista", command=resetear_vista); boton_resetear.pack(fill="x", pady=5)
     ttk.Separator(frame_izquierda, orient='horizontal').pack(fill='x', pady=10)
     
     # --- Bloque de Filtros (Unificado) ---
@@ -364,6 +954,7 @@ def iniciar_interfaz():
     campo_min_poblacion = ttk.Entry(frame_poblacion, width=10); campo_min_poblacion.pack(side="left", fill="x", expand=True)
     ttk.Label(frame_poblacion, text=" / ").pack(side="left")
     campo_max_poblacion = ttk.Entry(frame_poblacion, width=10); campo_max_poblacion.pack(side="left", fill="x", expand=True)
+    etiqueta_error_poblacion = ttk.Label(frame_izquierda, text="", foreground="red"); etiqueta_error_poblacion.pack(anchor="w", padx=5)
     
     # Filtro por Rango de Superficie
     ttk.Label(frame_izquierda, text="Por Rango de Superficie", font=("Helvetica", 10, "bold")).pack(pady=(5,0))
@@ -372,23 +963,62 @@ def iniciar_interfaz():
     campo_min_superficie = ttk.Entry(frame_superficie, width=10); campo_min_superficie.pack(side="left", fill="x", expand=True)
     ttk.Label(frame_superficie, text=" / ").pack(side="left")
     campo_max_superficie = ttk.Entry(frame_superficie, width=10); campo_max_superficie.pack(side="left", fill="x", expand=True)
+    etiqueta_error_superficie = ttk.Label(frame_izquierda, text="", foreground="red"); etiqueta_error_superficie.pack(anchor="w", padx=5)
+    etiquetas_error = {campo_min_poblacion: etiqueta_error_poblacion, campo_max_poblacion: etiqueta_error_poblacion,
+                       campo_min_superficie: etiqueta_error_superficie, campo_max_superficie: etiqueta_error_superficie}
+
+    # Filtrado en vivo: al escribir o elegir un continente (con una pequeña espera)
+    for campo in (campo_busqueda, campo_min_poblacion, campo_max_poblacion, campo_min_superficie, campo_max_superficie):
+        campo.bind("<KeyRelease>", programar_filtro)
+    combo_filtrar.bind("<<ComboboxSelected>>", programar_filtro)
     
-    # Botón Único para aplicar TODOS los filtros
-    ttk.Button(frame_izquierda, text="Aplicar Filtros", command=actualizar_vista).pack(pady=5)
+    # Botón Único para aplicar TODOS los filtros (sin esperar)
+    boton_filtrar = ttk.Button(frame_izquierda, text="Aplicar Filtros", command=lanzar_filtro); boton_filtrar.pack(pady=5)
     ttk.Separator(frame_izquierda, orient='horizontal').pack(fill='x', pady=10)
 
     # --- Bloque de Ordenamiento ---
     ttk.Label(frame_izquierda, text="Ordenar por:").pack(pady=(5,0))
-    opciones_orden = ["Nombre", "Población", "Superficie"]
+    opciones_orden = ["Nombre", "Población", "Superficie", "Continente"]
     combo_ordenar = ttk.Combobox(frame_izquierda, values=opciones_orden, state="readonly"); combo_ordenar.pack(fill="x", padx=5); combo_ordenar.set(opciones_orden[0])
-    ttk.Button(frame_izquierda, text="Ordenar (Asc/Desc)", command=ordenar_desde_controles).pack(pady=5)
+    ttk.Label(frame_izquierda, text="Luego por:").pack(pady=(5,0))
+    frame_luego = ttk.Frame(frame_izquierda); frame_luego.pack(fill="x", padx=5)
+    combo_ordenar_luego = ttk.Combobox(frame_luego, values=["(ninguno)"] + opciones_orden, state="readonly", width=10); combo_ordenar_luego.pack(side="left", fill="x", expand=True); combo_ordenar_luego.set("(ninguno)")
+    combo_sentido_luego = ttk.Combobox(frame_luego, values=["Ascendente", "Descendente"], state="readonly", width=11); combo_sentido_luego.pack(side="left"); combo_sentido_luego.set("Ascendente")
+    boton_ordenar = ttk.Button(frame_izquierda, text="Ordenar (Asc/Desc)", command=ordenar_desde_controles); boton_ordenar.pack(pady=5)
+
+    # Primeros N según "Ordenar por" (sin ordenar ni mostrar toda la vista)
+    ttk.Label(frame_izquierda, text="Mostrar primeros:").pack(pady=(5,0))
+    frame_primeros = ttk.Frame(frame_izquierda); frame_primeros.pack(fill="x", padx=5)
+    campo_primeros = ttk.Entry(frame_primeros, width=6); campo_primeros.pack(side="left"); campo_primeros.insert(0, str(PRIMEROS_POR_DEFECTO))
+    combo_extremo = ttk.Combobox(frame_primeros, values=["Mayores", "Menores"], state="readonly", width=9); combo_extremo.pack(side="left", fill="x", expand=True); combo_extremo.set("Mayores")
+    etiqueta_error_primeros = ttk.Label(frame_izquierda, text="", foreground="red"); etiqueta_error_primeros.pack(anchor="w", padx=5)
+    var_por_continente = tk.BooleanVar(value=False)
+    check_por_continente = ttk.Checkbutton(frame_izquierda, text="Por continente", variable=var_por_continente); check_por_continente.pack(anchor="w", padx=5)
+    boton_primeros = ttk.Button(frame_izquierda, text="Mostrar primeros N", command=mostrar_primeros); boton_primeros.pack(pady=5)
+    etiquetas_error[campo_primeros] = etiqueta_error_primeros
     ttk.Separator(frame_izquierda, orient='horizontal').pack(fill='x', pady=10)
     
     # --- Bloque de Estadísticas ---
-    ttk.Button(frame_izquierda, text="Mostrar Estadísticas", command=mostrar_ventana_estadisticas).pack(fill="x", pady=5)
+    boton_estadisticas = ttk.Button(frame_izquierda, text="Mostrar Estadísticas", command=mostrar_ventana_estadisticas); boton_estadisticas.pack(fill="x", pady=5)
+    boton_exportar = ttk.Button(frame_izquierda, text="Exportar vista", command=mostrar_ventana_exportar); boton_exportar.pack(fill="x", pady=5)
+    ttk.Button(frame_izquierda, text="Rendimiento", command=mostrar_ventana_rendimiento).pack(fill="x", pady=5)
+
+    # Hasta que los índices estén listos, los filtros no se pueden usar
+    controles_filtro = [boton_resetear, campo_busqueda, combo_filtrar, campo_min_poblacion, campo_max_poblacion,
+                        campo_min_superficie, campo_max_superficie, boton_filtrar, combo_ordenar,
+                        combo_ordenar_luego, combo_sentido_luego, boton_ordenar, campo_primeros, combo_extremo,
+                        check_por_continente, boton_primeros, boton_estadisticas, boton_exportar]
+    _habilitar_controles(False)
     
     # --- 6. Panel Derecho (Tabla de datos) ---
     ttk.Label(frame_derecha, text="Países", font=("Helvetica", 12, "bold")).pack(pady=(0, 5))
+    # Estado y progreso de la carga
+    etiqueta_estado = ttk.Label(frame_derecha, text="Cargando...")
+    etiqueta_estado.pack(anchor="w")
+    etiqueta_actualizacion = ttk.Label(frame_derecha, text="", foreground="gray")
+    etiqueta_actualizacion.pack(anchor="w")
+    barra_progreso = ttk.Progressbar(frame_derecha, mode="determinate", maximum=100)
+    barra_progreso.pack(fill="x", pady=(0, 5))
     
     # Define las columnas que se mostrarán y sus títulos
     columnas_a_mostrar = {"nombre_comun_es": "Nombre", "poblacion": "Población", "area": "Superficie", "continente": "Continente"}
@@ -403,21 +1033,29 @@ def iniciar_interfaz():
         tree.column(internal_name, width=150, anchor='center')
         
     # Añade barras de scroll
-    vsb = ttk.Scrollbar(frame_derecha, orient="vertical", command=tree.yview)
+    # El scroll vertical lo maneja la tabla virtual (sólo existen las filas visibles)
+    vsb = ttk.Scrollbar(frame_derecha, orient="vertical")
     hsb = ttk.Scrollbar(frame_derecha, orient="horizontal", command=tree.xview)
-    tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+    tree.configure(xscrollcommand=hsb.set)
+    tabla_virtual = TreeviewVirtual(tree, vsb, obtener_valores=lambda fila: [])
     
     # Empaqueta los scrollbars y la tabla
     vsb.pack(side='right', fill='y')
     hsb.pack(side='bottom', fill='x')
     tree.pack(side='left', fill='both', expand=True)
     
-    # --- 7. Carga Inicial de Datos ---
-    if dataset_mostrado:
-        # Muestra todos los datos al inicio
-        mostrar_datos_en_treeview(dataset_mostrado, nombres_internos_columnas)
-        # Ordena la vista inicial por nombre
-        ordenar_columna("nombre_comun_es", dataset_mostrado, nombres_internos_columnas)
+    # Actualización periódica (arranca cuando termina la carga inicial)
+    if intervalo_actualizacion:
+        actualizacion_periodica = ActualizacionPeriodica(
+            ventana, ruta_csv, intervalo_actualizacion, al_actualizar=_al_actualizar_datos,
+            al_fallar=_al_fallar_actualizacion, actualizar=actualizar, al_revisar=_al_revisar_actualizacion,
+            al_sin_cambios=_al_sin_cambios_actualizacion, almacen=almacen)
+    
+    # --- 7. Carga Inicial de Datos (en segundo plano) ---
+    # Las filas se muestran a medida que se leen; al terminar se construyen los
+    # índices, se habilitan los filtros y la vista se ordena por nombre.
+    CargaEnSegundoPlano(ventana, ruta_csv, al_avanzar=_al_avanzar_carga, al_indexar=_al_indexar_carga,
+                        al_terminar=_al_terminar_carga, al_fallar=_al_fallar_carga, almacen=almacen).iniciar()
 
     # --- 8. Iniciar el bucle de la aplicación ---
     # Esta línea mantiene la ventana abierta y escuchando eventos (clics, etc.)
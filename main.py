@@ -1,37 +1,175 @@
 # --- Importaciones ---
+import argparse  # Para las opciones de línea de comandos (ej. --rendimiento)
 import os  # Para interactuar con el sistema operativo (comprobar si existen archivos, unir rutas)
+import time  # Para medir cuánto tarda la descarga
+from concurrent.futures import ThreadPoolExecutor  # Para descargar varios continentes a la vez
 import interfaz  # Importa el archivo de la interfaz gráfica (interfaz.py)
+import rendimiento  # Medición de las etapas (ver rendimiento.py)
+from almacenSqlite import ALMACENES, ALMACEN_MEMORIA  # Tabla en memoria o en SQLite
 
-# Importa SÓLO las dos funciones que necesitamos del archivo 'generarPaises.py'
-from generarPaises import obtener_y_guardar_paises, unir_csvs_en_uno
+# Importa las funciones que necesitamos del archivo 'generarPaises.py'
+from generarPaises import (obtener_y_guardar_paises, generar_archivo_maestro, crear_sesion, linea_cabecera,
+                           CAMPOS, TIMEOUT_POR_DEFECTO, REINTENTOS_POR_DEFECTO)
+from cacheDatos import (cargar_manifiesto, guardar_manifiesto, entrada_region, regiones_vencidas, maestro_coincide,
+                        TTL_POR_DEFECTO, ESTADO_ACTUALIZADO, ESTADO_ERROR)
 
-def procesar_todos_los_continentes():
+# Lista de regiones a descargar desde la API
+CONTINENTES = ['Africa', 'Americas', 'Asia', 'Europe', 'Oceania', 'Antarctic']
+URL_BASE_API = "https://restcountries.com/v3.1/region"
+HILOS_ACTUALIZACION = 2  # Descargas a la vez en la actualización periódica (la interfaz sigue en uso)
+
+def procesar_todos_los_continentes(max_hilos=6, timeout=TIMEOUT_POR_DEFECTO, reintentos=REINTENTOS_POR_DEFECTO,
+                                   url_base=URL_BASE_API, carpeta_salida="Continentes", manifiesto=None, continentes=None):
     """
     Esta función se encarga de descargar los datos de la API para CADA continente
     y guardarlos en archivos CSV separados (ej. Africa.csv, Europe.csv).
+    Las descargas se hacen en paralelo ('max_hilos' a la vez) compartiendo una
+    única sesión HTTP, así el tiempo total se acerca al de la región más lenta.
+    Con max_hilos=1 se comporta como la versión secuencial original.
+    Si se pasa un 'manifiesto', las peticiones son condicionales y sólo se
+    reescriben los continentes que cambiaron. 'continentes' permite limitar
+    la descarga a un subconjunto (por defecto, todos).
+    (El inicio de la app no necesita estos CSV: usa 'actualizar_datos', que escribe
+    directamente 'Todos.csv'.)
+    Devuelve un diccionario {continente: estado} (ver ESTADO_* en cacheDatos.py).
     """
-    # Lista de regiones a descargar desde la API
-    continentes = ['Africa', 'Americas', 'Asia', 'Europe', 'Oceania', 'Antarctic']
-    carpeta_salida = "Continentes" # Dónde se guardarán los CSVs
-    
+    continentes = CONTINENTES if continentes is None else continentes
     print("--- INICIANDO PROCESO DE DESCARGA DE DATOS ---")
+    inicio = time.perf_counter()
+    
+    # Una sola sesión (keep-alive + reintentos) para todas las peticiones
+    sesion = crear_sesion(max_conexiones=max_hilos, reintentos=reintentos)
     
-    # Itera sobre cada continente de la lista
-    for continente in continentes:
+    def descargar(continente):
+        """Descarga y guarda un único continente (se ejecuta en un hilo del pool)."""
         print(f"\nProcesando {continente}...")
-        # Define la URL de la API para ese continente
-        url = f"https://restcountries.com/v3.1/region/{continente}"
+        # Define la URL de la API para ese continente (ej. ".../region/Africa")
+        url = f"{url_base}/{continente}"
         # Define el nombre del archivo (ej. "Africa.csv")
         nombre_archivo = f"{continente}.csv"
+        # Cada hilo trabaja sobre SU entrada del manifiesto (no hay escrituras cruzadas)
+        entrada = entrada_region(manifiesto, continente) if manifiesto is not None else None
         # Llama a la función importada para hacer la descarga y guardado
-        obtener_y_guardar_paises(url, nombre_archivo, carpeta_salida)
-        
-    print("\n--- ¡PROCESO DE DESCARGA COMPLETADO! ---")
+        return obtener_y_guardar_paises(url, nombre_archivo, carpeta_salida, sesion=sesion, timeout=timeout, entrada_cache=entrada)
+    
+    if manifiesto is not None:
+        # Se crean las entradas ANTES de lanzar los hilos (el dict compartido no se modifica en paralelo)
+        for continente in continentes:
+            entrada_region(manifiesto, continente)
+    
+    try:
+        # El pool reparte los continentes entre los hilos; map() conserva el orden
+        with ThreadPoolExecutor(max_workers=max(1, max_hilos)) as pool:
+            resultados = dict(zip(continentes, pool.map(descargar, continentes)))
+    finally:
+        sesion.close()
+    
+    duracion = time.perf_counter() - inicio
+    rendimiento.registrar('descargar_continentes', duracion)
+    fallidos = [c for c, estado in resultados.items() if estado == ESTADO_ERROR]
+    if fallidos:
+        print(f"\nAtención: no se pudieron descargar: {', '.join(fallidos)}")
+    print(f"\n--- ¡PROCESO DE DESCARGA COMPLETADO! ({duracion:.2f} s) ---")
+    return resultados
+
+def actualizar_datos(carpeta_continentes, ruta_archivo_final, ttl=TTL_POR_DEFECTO, forzar=False,
+                     max_hilos=6, timeout=TIMEOUT_POR_DEFECTO, reintentos=REINTENTOS_POR_DEFECTO, url_base=URL_BASE_API):
+    """
+    Aplica la política de caché: consulta a la API sólo las regiones cuyo TTL venció
+    (o todas si 'Todos.csv' no es el registrado en el manifiesto o si 'forzar' es True),
+    con peticiones condicionales.
+    Las respuestas se procesan en streaming directamente hacia 'Todos.csv'
+    (ver generar_archivo_maestro), que sólo se reescribe si algún continente cambió.
+    Devuelve True si 'Todos.csv' fue regenerado.
+    """
+    manifiesto = cargar_manifiesto(carpeta_continentes, ttl)
+    manifiesto["ttl_segundos"] = ttl
+    
+    # ¿Qué regiones hay que revisar?
+    # Si 'Todos.csv' no coincide con el manifiesto no podemos reutilizar nada: se revisa todo.
+    if forzar or not maestro_coincide(manifiesto, ruta_archivo_final, linea_cabecera(CAMPOS + ['continente'])):
+        a_revisar = list(CONTINENTES)
+    else:
+        a_revisar = regiones_vencidas(manifiesto, CONTINENTES)
+    
+    if not a_revisar:
+        print(f"Datos frescos (TTL {ttl} s). Cargando '{ruta_archivo_final}'...")
+        return False
+    
+    resultados = verificar_regiones(carpeta_continentes, ruta_archivo_final, manifiesto, a_revisar,
+                                    max_hilos, timeout, reintentos, url_base)
+    return any(estado == ESTADO_ACTUALIZADO for estado in resultados.values())
+
+def verificar_regiones(carpeta_continentes, ruta_archivo_final, manifiesto, a_revisar, max_hilos=6,
+                       timeout=TIMEOUT_POR_DEFECTO, reintentos=REINTENTOS_POR_DEFECTO, url_base=URL_BASE_API):
+    """
+    Consulta a la API las regiones de 'a_revisar' (peticiones condicionales), regenera
+    'Todos.csv' si alguna cambió y guarda el manifiesto.
+    Devuelve un diccionario {continente: estado} (ver ESTADO_* en cacheDatos.py).
+    """
+    print(f"Verificando cambios en: {', '.join(a_revisar)}")
+    inicio = time.perf_counter()
+    sesion = crear_sesion(max_conexiones=max_hilos, reintentos=reintentos)
+    try:
+        resultados = generar_archivo_maestro(CONTINENTES, ruta_archivo_final, manifiesto, url_base,
+                                             a_revisar=a_revisar, sesion=sesion, max_hilos=max_hilos, timeout=timeout)
+    finally:
+        sesion.close()
+    # El manifiesto se guarda siempre (registra las verificaciones aunque no haya cambios)
+    guardar_manifiesto(manifiesto, carpeta_continentes)
+    duracion = time.perf_counter() - inicio
+    rendimiento.registrar('actualizar_datos', duracion)
+    print(f"Verificación terminada en {duracion:.2f} s.")
+    return resultados
+
+def refrescar_datos(carpeta_continentes, ruta_archivo_final, max_hilos=HILOS_ACTUALIZACION,
+                    timeout=TIMEOUT_POR_DEFECTO, reintentos=REINTENTOS_POR_DEFECTO, url_base=URL_BASE_API):
+    """
+    La ingesta de la actualización periódica de la interfaz (ver actualizacionPeriodica.py):
+    revisa TODAS las regiones sin importar el TTL (con peticiones condicionales, lo que
+    no cambió no se vuelve a descargar), con pocos hilos para no competir con la interfaz.
+    Devuelve los rangos [inicio, fin) de filas de 'Todos.csv' que cambiaron ([] si no se
+    reescribió; None si no se saben). Si no hubo datos nuevos y alguna región no se pudo
+    verificar, lanza ConnectionError.
+    """
+    manifiesto = cargar_manifiesto(carpeta_continentes)
+    resultados = verificar_regiones(carpeta_continentes, ruta_archivo_final, manifiesto, CONTINENTES,
+                                    max_hilos, timeout, reintentos, url_base)
+    if not any(estado == ESTADO_ACTUALIZADO for estado in resultados.values()):
+        fallidos = [c for c, estado in resultados.items() if estado == ESTADO_ERROR]
+        if fallidos:
+            raise ConnectionError(f"no se pudieron verificar: {', '.join(fallidos)}")
+        return []
+    return manifiesto.get("maestro", {}).get("cambios")
 
 # --- Punto de Entrada Principal ---
 # Este bloque de código se ejecuta SÓLO cuando corres 'python main.py'
 if __name__ == "__main__":
     
+    # --- Opciones ---
+    # La medición de rendimiento también se puede encender con PAISES_RENDIMIENTO=1
+    parser = argparse.ArgumentParser(description="Actualiza los datos de países (si hace falta) y abre la interfaz.")
+    parser.add_argument("--rendimiento", nargs="?", const=rendimiento.ARCHIVO_POR_DEFECTO, metavar="ARCHIVO",
+                        help=f"Mide cada etapa y guarda el resumen al salir (por defecto en '{rendimiento.ARCHIVO_POR_DEFECTO}').")
+    parser.add_argument("--perfil", default="", metavar="TIPOS",
+                        help="Perfila cada interacción: 'cprofile', 'tracemalloc' o ambos separados por coma (requiere --rendimiento).")
+    parser.add_argument("--almacen", choices=ALMACENES, default=ALMACEN_MEMORIA,
+                        help="Dónde se guarda la tabla: en memoria (por defecto) o en una base SQLite junto al CSV (para datos que no entran en la RAM).")
+    parser.add_argument("--actualizar-cada", type=float, default=0, metavar="MINUTOS",
+                        help="Con la interfaz abierta, vuelve a revisar la API cada MINUTOS (en segundo plano) y muestra los datos nuevos sin reiniciar (0: nunca, por defecto).")
+    argumentos = parser.parse_args()
+    if argumentos.actualizar_cada < 0:
+        parser.error("--actualizar-cada no puede ser negativo.")
+    try:
+        if argumentos.rendimiento:
+            rendimiento.activar(argumentos.rendimiento, argumentos.perfil.split(","))
+        elif argumentos.perfil:
+            if not rendimiento.activo():
+                parser.error(f"--perfil requiere --rendimiento (o {rendimiento.VARIABLE_ACTIVAR}=1).")
+            rendimiento.elegir_perfiles(argumentos.perfil.split(","))
+    except ValueError as error:
+        parser.error(str(error))
+    
     # --- Definición de Rutas ---
     carpeta_continentes = "Continentes"
     nombre_archivo_final = "Todos.csv"
@@ -40,25 +178,21 @@ if __name__ == "__main__":
     
     # --- LÓGICA DE CACHÉ (Modificación Clave) ---
     
-    # Comprueba si el archivo 'Todos.csv' NO existe en la carpeta 'Continentes'
-    if not os.path.exists(ruta_archivo_final):
-        # Si no existe, ejecuta el proceso de descarga y unión
-        print(f"No se encontró el archivo '{ruta_archivo_final}'.")
-        
-        # PASO 1: Llama a la función para descargar todos los CSV individuales
-        procesar_todos_los_continentes()
-        
-        # PASO 2: Llama a la función para unirlos en 'Todos.csv'
-        unir_csvs_en_uno(carpeta_continentes, ruta_archivo_final)
-        
+    # En lugar de "si existe 'Todos.csv', nunca actualizar", se usa un manifiesto
+    # (Continentes/manifiesto.json) con TTL, ETag/Last-Modified y hash de cada continente.
+    # - Si 'Todos.csv' no existe: se descarga todo y se une.
+    # - Si existe y los datos están frescos: se usa directamente (inicio instantáneo).
+    # - Si el TTL venció: peticiones condicionales; sólo se re-descarga lo que cambió.
+    # Si la API no responde, se conserva el 'Todos.csv' anterior.
+    if actualizar_datos(carpeta_continentes, ruta_archivo_final):
         print("\n--- ¡Archivos de datos generados! ---")
-    else:
-        # Si el archivo 'Todos.csv' YA existe, se salta los pasos 1 y 2.
-        # Esto hace que la app inicie instantáneamente en usos futuros.
-        print(f"Cargando datos existentes desde '{ruta_archivo_final}'...")
     
     # --- PASO FINAL (Se ejecuta siempre) ---
     
     # Lanza la aplicación gráfica llamando a la función principal de 'interfaz.py'
     print("Iniciando interfaz gráfica...")
-    interfaz.iniciar_interfaz()
\ No newline at end of file
+    actualizar = None
+    if argumentos.actualizar_cada:
+        actualizar = lambda: refrescar_datos(carpeta_continentes, ruta_archivo_final)
+    interfaz.iniciar_interfaz(almacen=argumentos.almacen, actualizar=actualizar,
+                              intervalo_actualizacion=argumentos.actualizar_cada * 60)
\ No newline at end of file
@@ -0,0 +1,280 @@
+# --- Importaciones de Módulos ---
+import os                # Para comprobar que exista el CSV
+from array import array  # Las N primeras de cada continente, juntas en una vista
+from instantanea import abrir_instantanea, escribir_instantanea # Copia binaria de Todos.csv para inicio rápido
+from tablaPaises import TablaPaises, FILAS_POR_LOTE # La tabla maestra, guardada por columnas
+from cargaParalela import leer_csv, leer_csv_por_lotes # Lectura del CSV (en paralelo si es grande)
+from indices import IndicesTabla, COLUMNAS_ORDENABLES # Índices de filtros y permutaciones de orden
+from busqueda import IndiceBusqueda, normalizar, clave_colacion # Índice de n-gramas para la búsqueda por nombre
+from cacheConsultas import CacheConsultas, Consulta # Caché LRU de resultados de filtros/orden
+from estadisticas import EstadisticasTabla # Estadísticas precalculadas (globales y de la vista)
+import rendimiento # Medición de las etapas (carga, índices, filtros, orden, estadísticas)
+from vectorizado import usar_vectorizado, IndicesVectorizados, EstadisticasVectorizadas # Motor con NumPy (opcional)
+
+MAXIMO_SIN_LIMITE = 999999999999999 # Valor "infinito" de los máximos (equivale a no poner máximo)
+
+class ConsultaCancelada(Exception):
+    """Se lanza cuando una consulta deja de interesar a mitad de camino (ej. llegó una más nueva)."""
+
+def cargar_tabla(ruta_csv):
+    """
+    Carga 'Todos.csv' en una TablaPaises.
+    Si existe una instantánea binaria vigente ('Todos.csv.bin'), la usa en su lugar;
+    si no, lee el CSV y deja escrita la instantánea para la próxima vez.
+    Lanza FileNotFoundError si el CSV no existe.
+    """
+    if not os.path.exists(ruta_csv):
+        raise FileNotFoundError(ruta_csv)
+
+    # --- Inicio rápido ---
+    # Si la instantánea corresponde a este CSV (misma huella), no hace falta parsearlo.
+    with rendimiento.etapa('cargar_instantanea') as medicion:
+        tabla = abrir_instantanea(ruta_csv)
+        medicion.filas = len(tabla) if tabla is not None else None
+    if tabla is not None:
+        return tabla
+
+    # Los campos numéricos se convierten UNA SOLA VEZ al cargar (a 'poblacion_num' y 'area_num');
+    # un CSV grande se lee en varios procesos (ver cargaParalela.py)
+    tabla = leer_csv(ruta_csv)
+    # El índice de búsqueda se arma ahora y viaja en la instantánea (el próximo inicio no lo rearma)
+    with rendimiento.etapa('construir_busqueda', len(tabla)):
+        tabla.busqueda = IndiceBusqueda(tabla)
+    # Deja lista la instantánea para el próximo inicio (si no se puede escribir, no pasa nada)
+    try:
+        with rendimiento.etapa('escribir_instantanea', len(tabla)):
+            escribir_instantanea(tabla, ruta_csv)
+    except OSError:
+        pass
+    return tabla
+
+def cargar_tabla_por_lotes(ruta_csv, filas_por_lote=FILAS_POR_LOTE):
+    """
+    Como 'cargar_tabla', pero como generador de (tabla, fraccion_leida) para mostrar
+    el avance: con la instantánea vigente hay un único paso; si no, uno por cada
+    'filas_por_lote' filas del CSV, o por trozo si se lee en paralelo (y al final se
+    escribe la instantánea).
+    """
+    if not os.path.exists(ruta_csv):
+        raise FileNotFoundError(ruta_csv)
+    with rendimiento.etapa('cargar_instantanea') as medicion:
+        tabla = abrir_instantanea(ruta_csv)
+        medicion.filas = len(tabla) if tabla is not None else None
+    if tabla is not None:
+        yield tabla, 1.0
+        return
+    for tabla, fraccion in leer_csv_por_lotes(ruta_csv, filas_por_lote):
+        yield tabla, fraccion
+    with rendimiento.etapa('construir_busqueda', len(tabla)):
+        tabla.busqueda = IndiceBusqueda(tabla)
+    try:
+        with rendimiento.etapa('escribir_instantanea', len(tabla)):
+            escribir_instantanea(tabla, ruta_csv)
+    except OSError:
+        pass
+
+def armar_consulta(continente=None, termino='', min_pob=None, max_pob=None, min_area=None, max_area=None, orden=None):
+    """
+    Normaliza los parámetros de una consulta:
+    - los límites que no filtran nada (0 como mínimo, MAXIMO_SIN_LIMITE como máximo) quedan en None,
+    - el término se normaliza (minúsculas, sin tildes),
+    - 'orden' es una lista de (columna, descendente), o None.
+    Dos consultas equivalentes dan la misma Consulta (y comparten la caché).
+    """
+    def limite_maximo(valor):
+        return None if valor is None or valor >= MAXIMO_SIN_LIMITE else valor
+    return Consulta(
+        continente=continente or None,
+        termino=normalizar(termino or '').strip(),
+        min_pob=min_pob or None, max_pob=limite_maximo(max_pob),
+        min_area=min_area or None, max_area=limite_maximo(max_area),
+        orden=tuple(orden) if orden else None,
+    )
+
+def validar_orden(claves):
+    """Devuelve 'claves' (lista de (columna, descendente)) como tupla; ValueError si alguna columna no se puede ordenar."""
+    claves = tuple((columna, bool(descendente)) for columna, descendente in claves or ())
+    for columna, _ in claves:
+        if columna not in COLUMNAS_ORDENABLES:
+            raise ValueError(f"No se puede ordenar por '{columna}' (opciones: {', '.join(COLUMNAS_ORDENABLES)}).")
+    return claves
+
+def invertir_orden(claves):
+    """Las mismas claves en el sentido contrario: las primeras del orden invertido son las del otro extremo."""
+    return tuple((columna, not descendente) for columna, descendente in claves)
+
+def claves_de_primeros(consulta, claves=None, ultimos=False):
+    """Las claves con que se eligen las primeras N filas (por defecto, el orden de la consulta)."""
+    claves = validar_orden(claves or consulta.orden)
+    if not claves:
+        raise ValueError("Falta el orden con que se eligen las primeras filas (ej. [('poblacion', True)]).")
+    return invertir_orden(claves) if ultimos else claves
+
+class MotorConsultas:
+    """
+    Motor de consultas sin interfaz gráfica: la tabla maestra y todo lo que se
+    construye sobre ella (índices, búsqueda, estadísticas, caché de resultados).
+    Lo usan la interfaz (interfaz.py) y la línea de comandos (consultarPaises.py);
+    los datos se cargan UNA vez y después se pueden resolver miles de consultas.
+    Si NumPy está instalado, filtros, orden y estadísticas se vectorizan (ver vectorizado.py);
+    'vectorizar' (True/False) fuerza uno u otro motor. Los resultados son idénticos.
+    """
+
+    def __init__(self, tabla=None, vectorizar=None):
+        self.tabla = TablaPaises() if tabla is None else tabla
+        self.vectorizado = usar_vectorizado(vectorizar)
+        clase_indices, clase_estadisticas = ((IndicesVectorizados, EstadisticasVectorizadas) if self.vectorizado
+                                             else (IndicesTabla, EstadisticasTabla))
+        # Los índices se construyen UNA vez, junto con la carga
+        with rendimiento.etapa('construir_indices', len(self.tabla)):
+            self.indices = clase_indices(self.tabla)
+            # El de la instantánea (o el armado al leer el CSV) ya está listo
+            self.busqueda = self.tabla.busqueda if self.tabla.busqueda is not None else IndiceBusqueda(self.tabla)
+            self.estadisticas = clase_estadisticas(self.tabla, self.indices)
+        self.cache = CacheConsultas()
+
+    @classmethod
+    def desde_csv(cls, ruta_csv, vectorizar=None):
+        """Carga 'Todos.csv' (o su instantánea) y arma el motor."""
+        return cls(cargar_tabla(ruta_csv), vectorizar)
+
+    def cerrar(self):
+        """Libera la tabla (ej. el mmap de la instantánea): el motor ya no se puede usar."""
+        self.tabla.cerrar()
+
+    # --- Filtros ---
+
+    def _filtrar_con_indices(self, consulta):
+        """Resuelve una consulta (sin orden) sobre toda la tabla usando los índices."""
+        # Búsqueda (si hay término) con el índice de n-gramas:
+        # busca en nombre común, nombre oficial y capital, sin importar tildes ("japon" -> "Japón")
+        coincidencias = self.busqueda.buscar(consulta.termino) if consulta.termino else None
+
+        # Filtros de continente, POBLACIÓN y SUPERFICIE con los índices
+        # Cada rango se resuelve con búsqueda binaria sobre los índices ordenados y
+        # los filtros (incluida la búsqueda) se combinan empezando por el más selectivo
+        # (ver indices.py).
+        return self.indices.filtrar(
+            continente=consulta.continente,
+            min_pob=consulta.min_pob, max_pob=consulta.max_pob,
+            min_area=consulta.min_area, max_area=consulta.max_area,
+            candidatos=coincidencias,
+        )
+
+    def _refinar(self, filas, consulta):
+        """Aplica los filtros de 'consulta' sobre un resultado más amplio ya calculado (conserva su orden)."""
+        verificar = (lambda fila: self.busqueda.coincide(fila, consulta.termino)) if consulta.termino else None
+        return self.indices.refinar(filas, continente=consulta.continente,
+                                    min_pob=consulta.min_pob, max_pob=consulta.max_pob,
+                                    min_area=consulta.min_area, max_area=consulta.max_area, verificar=verificar)
+
+    def filtrar(self, consulta):
+        """
+        Devuelve las filas (en orden de tabla) que cumplen los filtros de 'consulta' (se ignora su orden).
+        Se resuelve: caché -> refinar un resultado más amplio -> índices.
+        """
+        consulta = consulta._replace(orden=None)
+        filas = self.cache.obtener(consulta)
+        if filas is None:
+            with rendimiento.etapa('filtrar') as medicion:
+                amplia, filas_amplias = self.cache.mas_amplia(consulta)
+                if amplia is not None:
+                    # Ej. antes "Asia", ahora "Asia con más de 1 millón": se filtra sólo lo de Asia
+                    filas = self._refinar(filas_amplias, consulta)
+                else:
+                    filas = self._filtrar_con_indices(consulta)
+                medicion.filas = len(filas)
+            self.cache.guardar(consulta, filas)
+        return filas
+
+    # --- Orden ---
+
+    def ordenar(self, vista, claves, consulta=None):
+        """
+        Devuelve la vista ordenada por 'claves' (lista de (columna, descendente)).
+        Si se indica la 'consulta' que produjo la vista, el resultado se guarda
+        (y se busca) en la caché; si estaba guardado en el sentido contrario, se invierte.
+        """
+        claves = validar_orden(claves)
+        consulta = consulta._replace(orden=claves) if consulta is not None else None
+        ordenadas = self.cache.obtener(consulta) if consulta else None
+        if ordenadas is None and consulta and len(claves) == 1:
+            # Si está guardada en el sentido contrario, alcanza con invertirla
+            columna, descendente = claves[0]
+            ordenadas = self.cache.obtener(consulta._replace(orden=((columna, not descendente),)))
+            if ordenadas is not None:
+                ordenadas.reverse()
+                self.cache.guardar(consulta, ordenadas)
+        if ordenadas is None:
+            # Las permutaciones de cada columna se calcularon una vez al cargar (ver indices.py)
+            with rendimiento.etapa('ordenar', len(vista)):
+                ordenadas = self.indices.ordenar(vista, list(claves))
+            if consulta:
+                self.cache.guardar(consulta, ordenadas)
+        return ordenadas
+
+    # --- Primeras N ---
+
+    def _continentes(self):
+        """Los continentes de la tabla, en orden alfabético (el de la columna 'continente')."""
+        return sorted(self.tabla.categoricas['continente'].vocabulario, key=clave_colacion)
+
+    def primeros(self, consulta, cantidad, claves=None, ultimos=False, por_continente=False):
+        """
+        Las 'cantidad' primeras filas de la consulta según 'claves' (por defecto, el orden de
+        la consulta), sin ordenar toda la vista: se eligen con un heap (o argpartition con
+        NumPy) en O(m log k). El resultado es el mismo que ordenar(...)[:cantidad].
+        - 'ultimos': las del otro extremo (ej. con ('poblacion', True), las menos pobladas).
+        - 'por_continente': las 'cantidad' primeras de CADA continente, uno tras otro (en orden alfabético).
+        """
+        claves = claves_de_primeros(consulta, claves, ultimos)
+        if por_continente:
+            resultado = array('I')
+            for continente in [consulta.continente] if consulta.continente else self._continentes():
+                resultado += self.primeros(consulta._replace(continente=continente), cantidad, claves)
+            return resultado
+        consulta = consulta._replace(orden=claves)
+        vista = self.filtrar(consulta)
+        ordenadas = self.cache.obtener(consulta)
+        if ordenadas is not None:
+            return ordenadas[:cantidad]  # La vista ya estaba ordenada entera: alcanza con cortarla
+        with rendimiento.etapa('primeros', len(vista)):
+            return self.indices.primeros(vista, list(claves), cantidad)
+
+    # --- Consultas completas ---
+
+    def ejecutar(self, consulta, limite=None, cancelado=None):
+        """
+        Filtra y, si la consulta tiene orden, ordena. 'limite' se queda con las primeras N filas
+        (con orden, se eligen sin ordenar toda la vista: ver 'primeros').
+        'cancelado' (función sin argumentos) se revisa entre un paso y otro: si devuelve True,
+        se lanza ConsultaCancelada en lugar de seguir calculando.
+        """
+        filas = self.filtrar(consulta)
+        if consulta.orden:
+            if cancelado is not None and cancelado():
+                raise ConsultaCancelada()
+            if limite is not None:
+                return self.primeros(consulta, limite)
+            filas = self.ordenar(filas, consulta.orden, consulta)
+        if limite is not None:
+            filas = filas[:limite]
+        return filas
+
+    def resumen(self, vista, consulta=None):
+        """Estadísticas de la vista (ver estadisticas.py); las de toda la tabla si 'vista' es None."""
+        if vista is None:
+            return self.estadisticas.globales()
+        with rendimiento.etapa('estadisticas', len(vista)):
+            return self.estadisticas.de_vista(vista, consulta._replace(orden=None) if consulta else None)
+
+    def sugerencias(self, termino, limite=3):
+        """Nombres parecidos a 'termino' (para cuando una búsqueda no encuentra nada)."""
+        nombres = self.tabla.lector('nombre_comun_es')
+        return [nombres(fila) for fila in self.busqueda.sugerencias(termino, limite)]
+
+    def valores(self, vista, columnas):
+        """Genera, fila por fila, la lista de valores de 'columnas' (sin armar todo en memoria)."""
+        lectores = [self.tabla.lector(columna) for columna in columnas]
+        for fila in vista:
+            yield [leer(fila) for leer in lectores]
@@ -0,0 +1,315 @@
+# --- Importaciones de Módulos ---
+import atexit       # Para guardar el resumen al cerrar el programa
+import cProfile     # Perfil de funciones de una interacción (opcional)
+import io           # Texto del perfil
+import json         # Resumen en JSON
+import os           # Variables de entorno
+import pstats       # Para resumir el perfil
+import threading    # Las etapas se registran desde varios hilos (descargas, consultas)
+import time         # Reloj de alta resolución
+import tracemalloc  # Memoria asignada durante una interacción (opcional)
+from collections import deque           # Últimas muestras y últimos perfiles
+from estadisticas import percentil      # Percentiles de las últimas muestras
+
+# --- Instrumentación de Etapas ---
+# Mide cuánto tarda cada etapa (descarga, decodificación JSON, escritura del CSV,
+# carga, conversión numérica, filtros, orden, tabla, estadísticas...) y cuántas
+# filas procesó. Está APAGADA por defecto: 'etapa()' devuelve un objeto que no
+# hace nada, así que el costo es una llamada a función por etapa (no por fila).
+# Se activa con la variable de entorno PAISES_RENDIMIENTO=1 (o 'python main.py --rendimiento');
+# al salir se guarda el resumen en PAISES_RENDIMIENTO_ARCHIVO (por defecto 'rendimiento.json').
+# Con PAISES_PERFIL=cprofile,tracemalloc además se perfila cada interacción.
+
+VARIABLE_ACTIVAR = "PAISES_RENDIMIENTO"
+VARIABLE_ARCHIVO = "PAISES_RENDIMIENTO_ARCHIVO"
+VARIABLE_PERFIL = "PAISES_PERFIL"
+ARCHIVO_POR_DEFECTO = "rendimiento.json"
+PERFILES_VALIDOS = ("cprofile", "tracemalloc")
+# Límites (en ms) de los cubos del histograma; 16 ms es lo que dura un cuadro a 60 fps
+LIMITES_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 16, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+MUESTRAS_RECIENTES = 1024  # Muestras por etapa que se guardan para calcular percentiles
+PERFILES_GUARDADOS = 10    # Perfiles de interacciones que se recuerdan
+FUNCIONES_POR_PERFIL = 20  # Funciones que se listan en cada perfil de cProfile
+LINEAS_POR_PERFIL = 10     # Líneas que más memoria asignaron, en cada perfil de tracemalloc
+
+class EstadisticaEtapa:
+    """Histograma de duraciones, totales y las últimas muestras de UNA etapa."""
+
+    def __init__(self):
+        self.llamadas = 0
+        self.segundos = 0.0
+        self.minimo = None
+        self.maximo = 0.0
+        self.filas = 0
+        self.cubos = [0] * (len(LIMITES_MS) + 1)  # El último cubo: más de LIMITES_MS[-1]
+        self.recientes = deque(maxlen=MUESTRAS_RECIENTES)
+
+    def agregar(self, segundos, filas):
+        milisegundos = segundos * 1000
+        self.llamadas += 1
+        self.segundos += segundos
+        self.minimo = segundos if self.minimo is None else min(self.minimo, segundos)
+        self.maximo = max(self.maximo, segundos)
+        self.filas += filas or 0
+        cubo = 0
+        while cubo < len(LIMITES_MS) and milisegundos > LIMITES_MS[cubo]:
+            cubo += 1
+        self.cubos[cubo] += 1
+        self.recientes.append(milisegundos)
+
+    def resumen(self):
+        ordenadas = sorted(self.recientes)
+        return {
+            "llamadas": self.llamadas,
+            "total_s": round(self.segundos, 6),
+            "promedio_ms": round(self.segundos * 1000 / self.llamadas, 3),
+            "minimo_ms": round(self.minimo * 1000, 3),
+            "maximo_ms": round(self.maximo * 1000, 3),
+            "p50_ms": round(percentil(ordenadas, 50), 3),
+            "p95_ms": round(percentil(ordenadas, 95), 3),
+            "p99_ms": round(percentil(ordenadas, 99), 3),
+            "filas": self.filas,
+            "filas_por_s": round(self.filas / self.segundos) if self.filas and self.segundos else None,
+            "histograma_ms": {f"<={limite}" if i < len(LIMITES_MS) else f">{LIMITES_MS[-1]}": cantidad
+                              for i, (limite, cantidad) in enumerate(zip(LIMITES_MS + (None,), self.cubos))
+                              if cantidad},
+        }
+
+# --- Estado Global (un único registro por proceso) ---
+_activo = False
+_perfiles_activos = ()         # Subconjunto de PERFILES_VALIDOS
+_archivo = None                # Dónde se guarda el resumen al salir (None = no se guarda)
+_etapas = {}                   # nombre -> EstadisticaEtapa
+_perfiles = deque(maxlen=PERFILES_GUARDADOS)
+_candado = threading.Lock()
+_candado_perfil = threading.Lock()  # Sólo se perfila una interacción a la vez
+_volcado_registrado = False
+
+def activo():
+    """Indica si la instrumentación está encendida."""
+    return _activo
+
+def archivo_volcado():
+    """Dónde se guarda el resumen al salir (None si no se guarda)."""
+    return _archivo
+
+def perfiles_activos():
+    """Perfiles que se toman en cada interacción (ej. ('cprofile',))."""
+    return _perfiles_activos
+
+def activar(archivo=ARCHIVO_POR_DEFECTO, perfiles=None):
+    """
+    Enciende la instrumentación. Si se indica 'archivo', el resumen se guarda ahí al salir.
+    'perfiles' es una lista con 'cprofile' y/o 'tracemalloc' (o None para no perfilar).
+    """
+    global _activo, _archivo, _volcado_registrado
+    _activo = True
+    _archivo = archivo
+    elegir_perfiles(perfiles or ())
+    if archivo and not _volcado_registrado:
+        atexit.register(_volcar_al_salir)
+        _volcado_registrado = True
+
+def desactivar():
+    """Apaga la instrumentación (lo ya medido se conserva)."""
+    global _activo
+    _activo = False
+
+def elegir_perfiles(perfiles):
+    """Elige qué perfiles se toman en cada interacción. Lanza ValueError si alguno no existe."""
+    global _perfiles_activos
+    perfiles = tuple(p.strip().lower() for p in perfiles if p.strip())
+    desconocidos = [p for p in perfiles if p not in PERFILES_VALIDOS]
+    if desconocidos:
+        raise ValueError(f"Perfil desconocido: {', '.join(desconocidos)} (opciones: {', '.join(PERFILES_VALIDOS)}).")
+    _perfiles_activos = perfiles
+
+def activar_desde_entorno():
+    """Enciende la instrumentación si PAISES_RENDIMIENTO está definida (y no es '0')."""
+    if os.environ.get(VARIABLE_ACTIVAR, "0") not in ("", "0"):
+        activar(os.environ.get(VARIABLE_ARCHIVO, ARCHIVO_POR_DEFECTO),
+                os.environ.get(VARIABLE_PERFIL, "").split(","))
+
+def reiniciar():
+    """Borra lo medido hasta ahora."""
+    with _candado:
+        _etapas.clear()
+        _perfiles.clear()
+
+# --- Registro de Mediciones ---
+
+def registrar(nombre, segundos, filas=None):
+    """Registra una duración (en segundos) de la etapa 'nombre', con las filas que procesó."""
+    if not _activo:
+        return
+    with _candado:
+        estadistica = _etapas.get(nombre)
+        if estadistica is None:
+            estadistica = _etapas[nombre] = EstadisticaEtapa()
+        estadistica.agregar(segundos, filas)
+
+class _Medicion:
+    """Lo que devuelve 'etapa()' cuando está encendida: mide el bloque 'with'."""
+
+    def __init__(self, nombre, filas):
+        self.nombre = nombre
+        self.filas = filas  # Se puede cambiar dentro del bloque (ej. cuando se conoce el resultado)
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *error):
+        registrar(self.nombre, time.perf_counter() - self._inicio, self.filas)
+        return False
+
+class _SinMedicion:
+    """Lo que devuelve 'etapa()' cuando está apagada: no hace nada."""
+    filas = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *error):
+        return False
+
+    def __setattr__(self, nombre, valor):
+        pass  # 'medicion.filas = n' no tiene efecto
+
+_SIN_MEDICION = _SinMedicion()
+
+def etapa(nombre, filas=None):
+    """
+    Mide un bloque de código:
+        with rendimiento.etapa("filtrar") as medicion:
+            resultado = ...
+            medicion.filas = len(resultado)
+    """
+    if not _activo:
+        return _SIN_MEDICION
+    return _Medicion(nombre, filas)
+
+class Acumulador:
+    """
+    Suma el tiempo de muchas llamadas cortas (ej. una por fila) y lo registra
+    como UNA muestra al llamar a 'registrar()' (así no se toma el candado por fila).
+    """
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.segundos = 0.0
+        self.llamadas = 0
+
+    def envolver(self, funcion):
+        """Devuelve 'funcion' con su tiempo sumado a este acumulador."""
+        reloj = time.perf_counter
+        def medida(*argumentos):
+            inicio = reloj()
+            try:
+                return funcion(*argumentos)
+            finally:
+                self.segundos += reloj() - inicio
+                self.llamadas += 1
+        return medida
+
+    def sumar(self, segundos, llamadas=1):
+        """Suma una duración medida por fuera (ej. la de un lote de 'llamadas' filas)."""
+        self.segundos += segundos
+        self.llamadas += llamadas
+
+    def registrar(self):
+        if self.llamadas:
+            registrar(self.nombre, self.segundos, self.llamadas)
+        self.segundos, self.llamadas = 0.0, 0
+
+# --- Perfiles por Interacción ---
+
+class _Interaccion(_Medicion):
+    """Mide una interacción y, si se pidió, la perfila con cProfile y/o tracemalloc."""
+
+    def __enter__(self):
+        self._perfil = self._memoria = None
+        self._inicio_tracemalloc = False
+        if _perfiles_activos and _candado_perfil.acquire(blocking=False):
+            if "tracemalloc" in _perfiles_activos:
+                self._inicio_tracemalloc = not tracemalloc.is_tracing()
+                if self._inicio_tracemalloc:
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+                self._memoria = tracemalloc.take_snapshot()
+            if "cprofile" in _perfiles_activos:
+                self._perfil = cProfile.Profile()
+                try:
+                    self._perfil.enable()
+                except ValueError:
+                    self._perfil = None  # Ya hay otro perfilador activo (ej. uno externo)
+            self._perfilando = True
+        else:
+            self._perfilando = False
+        return super().__enter__()
+
+    def __exit__(self, *error):
+        super().__exit__(*error)
+        if not self._perfilando:
+            return False
+        try:
+            perfil = {"interaccion": self.nombre, "en": time.time(),
+                      "segundos": round(time.perf_counter() - self._inicio, 6), "filas": self.filas}
+            if self._perfil is not None:
+                self._perfil.disable()
+                texto = io.StringIO()
+                pstats.Stats(self._perfil, stream=texto).sort_stats("cumulative").print_stats(FUNCIONES_POR_PERFIL)
+                perfil["cprofile"] = texto.getvalue()
+            if self._memoria is not None:
+                actual, pico = tracemalloc.get_traced_memory()
+                diferencias = tracemalloc.take_snapshot().compare_to(self._memoria, "lineno")
+                perfil["tracemalloc"] = {
+                    "pico_bytes": pico,
+                    "lineas": [{"lugar": str(d.traceback), "bytes": d.size_diff, "bloques": d.count_diff}
+                               for d in diferencias[:LINEAS_POR_PERFIL]],
+                }
+                if self._inicio_tracemalloc:
+                    tracemalloc.stop()
+            with _candado:
+                _perfiles.append(perfil)
+        finally:
+            _candado_perfil.release()
+        return False
+
+def interaccion(nombre, filas=None):
+    """
+    Como 'etapa', para una acción completa del usuario (ej. filtrar, ordenar).
+    Además de medirla, la perfila si hay perfiles activos (ver 'elegir_perfiles').
+    """
+    if not _activo:
+        return _SIN_MEDICION
+    return _Interaccion(f"interaccion:{nombre}", filas)
+
+# --- Resumen ---
+
+def resumen():
+    """Diccionario con el resumen de cada etapa y los últimos perfiles."""
+    with _candado:
+        return {
+            "activo": _activo,
+            "perfiles_activos": list(_perfiles_activos),
+            "etapas": {nombre: estadistica.resumen() for nombre, estadistica in sorted(_etapas.items())},
+            "perfiles": list(_perfiles),
+        }
+
+def volcar(ruta):
+    """Guarda el resumen en 'ruta' (JSON)."""
+    ruta_temporal = ruta + ".tmp"
+    with open(ruta_temporal, "w", encoding="utf-8") as archivo:
+        json.dump(resumen(), archivo, ensure_ascii=False, indent=2)
+    os.replace(ruta_temporal, ruta)
+    return ruta
+
+def _volcar_al_salir():
+    if _archivo and _etapas:
+        try:
+            volcar(_archivo)
+        except OSError as error:
+            print(f"No se pudo guardar el resumen de rendimiento en '{_archivo}': {error}")
+
+activar_desde_entorno()
@@ -0,0 +1,366 @@
+# --- Importaciones de Módulos ---
+import argparse   # Opciones de línea de comandos
+import hashlib    # ETag de cada respuesta
+import json       # Respuestas en JSON
+import sys        # Mensajes por la salida de error
+import threading  # Candados y el hilo que vigila el CSV
+from collections import OrderedDict # Caché LRU de respuestas
+from concurrent.futures import ThreadPoolExecutor # Pool de hilos que atienden las conexiones
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from motor import armar_consulta # Consultas normalizadas
+from tablaPaises import COLUMNAS_NUMERICAS, COLUMNAS_LISTA, separar_lista # Columnas que se devuelven como números o listas
+from almacenSqlite import crear_motor, ALMACENES, ALMACEN_MEMORIA # Motor en memoria o sobre SQLite
+from instantanea import version_del_archivo # Tamaño y fecha de 'Todos.csv' (recarga en caliente)
+from consultarPaises import entero_no_negativo, claves_de_orden, RUTA_POR_DEFECTO, COLUMNAS_POR_DEFECTO
+import rendimiento # Medición de cada petición
+
+# --- Servicio HTTP de Consultas ---
+# Un servidor HTTP/JSON (sólo biblioteca estándar) que carga 'Todos.csv' UNA vez y
+# responde las mismas consultas que la interfaz: filtros, orden, primeros N y
+# estadísticas, con paginación. Por ejemplo:
+#   python servicioPaises.py --puerto 8000
+#   curl 'http://127.0.0.1:8000/paises?continente=Asia&ordenar=poblacion:desc&limite=10'
+#   curl 'http://127.0.0.1:8000/primeros?n=5&por=area&continente=Europe'
+#   curl 'http://127.0.0.1:8000/estadisticas?continente=Africa'
+# Las conexiones son keep-alive (HTTP/1.1) y las atiende un pool de hilos. Cada
+# respuesta lleva un ETag: si el cliente lo manda en If-None-Match y los datos no
+# cambiaron, recibe un 304 sin cuerpo. Si 'Todos.csv' cambia, se recarga en segundo
+# plano y se reemplaza el motor sin cortar el servicio. Para medirlo: generadorCarga.py.
+
+PUERTO_POR_DEFECTO = 8000
+HILOS_POR_DEFECTO = 32          # Conexiones atendidas a la vez
+LIMITE_POR_DEFECTO = 100        # Filas por página si no se pide 'limite'
+LIMITE_MAXIMO = 10000           # Máximo de filas por página
+INACTIVIDAD_SEGUNDOS = 5        # Una conexión keep-alive sin peticiones se cierra (libera su hilo)
+INTERVALO_RECARGA = 2.0         # Cada cuántos segundos se revisa si cambió 'Todos.csv'
+RESPUESTAS_GUARDADAS = 1024     # Respuestas (cuerpo + ETag) que se recuerdan
+
+class ErrorDeConsulta(Exception):
+    """Parámetros inválidos en la URL: se responde 400 con el mensaje."""
+
+def _parametro(parametros, nombre, convertir=None, por_defecto=None):
+    """Lee el último valor de 'nombre' en la URL, convertido con 'convertir' (un tipo de argparse)."""
+    valores = parametros.get(nombre)
+    if not valores or valores[-1] == "":
+        return por_defecto
+    if convertir is None:
+        return valores[-1]
+    try:
+        return convertir(valores[-1])
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        raise ErrorDeConsulta(f"'{nombre}': {e}")
+
+def consulta_de_parametros(parametros, orden=None):
+    """Arma la Consulta a partir de los parámetros de la URL (los mismos nombres que consultarPaises.py)."""
+    return armar_consulta(
+        continente=_parametro(parametros, "continente"),
+        termino=_parametro(parametros, "buscar", por_defecto=""),
+        min_pob=_parametro(parametros, "min_poblacion", entero_no_negativo),
+        max_pob=_parametro(parametros, "max_poblacion", entero_no_negativo),
+        min_area=_parametro(parametros, "min_area", entero_no_negativo),
+        max_area=_parametro(parametros, "max_area", entero_no_negativo),
+        orden=orden if orden is not None else _parametro(parametros, "ordenar", claves_de_orden),
+    )
+
+def _lector_de_lista(leer):
+    """Envuelve el lector de una columna de lista: "Spanish|Guaraní" -> ['Spanish', 'Guaraní']."""
+    return lambda fila: separar_lista(leer(fila))
+
+class ServicioPaises:
+    """
+    La parte del servicio que no sabe de HTTP: el motor de consultas vigente, su
+    versión y la caché de respuestas ya serializadas. 'responder(ruta, parametros,
+    etag_cliente)' devuelve (codigo, etag, cuerpo_en_bytes).
+    Se usa desde todos los hilos del pool a la vez; la recarga reemplaza el par
+    (motor, version) de una sola vez, así cada petición usa uno u otro completo.
+    """
+
+    def __init__(self, ruta_csv, almacen=ALMACEN_MEMORIA, columnas=COLUMNAS_POR_DEFECTO):
+        self.ruta_csv = ruta_csv
+        self.almacen = almacen
+        self.columnas = list(columnas)
+        self._datos = None            # (motor, version) vigentes
+        self._en_uso = {}             # motor -> peticiones que lo están usando
+        self._retirados = set()       # Motores reemplazados que se cierran cuando terminan sus peticiones
+        self._respuestas = OrderedDict()  # clave -> (etag, cuerpo)
+        self._candado = threading.Lock()
+        self._candado_recarga = threading.Lock()
+        self.recargas = 0
+        self.cargar()
+        self.rutas = {
+            "/paises": self._paises,
+            "/primeros": self._primeros,
+            "/estadisticas": self._estadisticas,
+            "/salud": self._salud,
+        }
+
+    # --- Datos (carga y recarga en caliente) ---
+
+    @property
+    def motor(self):
+        """El motor de consultas vigente."""
+        return self._datos[0]
+
+    def cargar(self):
+        """Carga el CSV (o su instantánea) y reemplaza el motor vigente. Devuelve True si cambió la versión."""
+        with self._candado_recarga:
+            version = version_del_archivo(self.ruta_csv)
+            if self._datos is not None and self._datos[1] == version:
+                return False
+            with rendimiento.etapa('recargar_servicio'):
+                motor = crear_motor(self.ruta_csv, self.almacen)
+            with self._candado:
+                anterior = self._datos[0] if self._datos is not None else None
+                self._datos = (motor, version)
+                self._respuestas.clear()  # Las respuestas guardadas son de los datos anteriores
+                if anterior is not None and self._en_uso.get(anterior):
+                    self._retirados.add(anterior)  # Lo cierra la última petición que lo usa
+                    anterior = None
+            if anterior is not None:
+                anterior.cerrar()  # Conexiones a la base anterior (o el mmap de su instantánea)
+            self.recargas += 1
+            return True
+
+    def _tomar(self):
+        """El par (motor, version) vigente, anotando que una petición lo está usando."""
+        with self._candado:
+            motor, version = self._datos
+            self._en_uso[motor] = self._en_uso.get(motor, 0) + 1
+            return motor, version
+
+    def _soltar(self, motor):
+        """La petición terminó con 'motor'; si ya se había reemplazado y nadie más lo usa, se cierra."""
+        with self._candado:
+            self._en_uso[motor] -= 1
+            if self._en_uso[motor]:
+                return
+            del self._en_uso[motor]
+            if motor not in self._retirados:
+                return
+            self._retirados.discard(motor)
+        motor.cerrar()
+
+    def vigilar(self, intervalo=INTERVALO_RECARGA, detener=None):
+        """
+        Revisa cada 'intervalo' segundos si 'Todos.csv' cambió y, si cambió, lo recarga
+        (mientras tanto se sigue respondiendo con los datos anteriores). Corre hasta que
+        se active el Event 'detener'; un error al recargar se informa y se reintenta después.
+        """
+        detener = detener or threading.Event()
+        while not detener.wait(intervalo):
+            try:
+                if self.cargar():
+                    print(f"Datos recargados: {len(self.motor.tabla)} filas.", file=sys.stderr)
+            except Exception as e:
+                print(f"No se pudo recargar '{self.ruta_csv}': {e}", file=sys.stderr)
+
+    # --- Respuestas ---
+
+    def responder(self, ruta, parametros, etag_cliente=None):
+        """Resuelve una petición GET. Devuelve (codigo_http, etag, cuerpo); el cuerpo es b"" en un 304."""
+        atender = self.rutas.get(ruta)
+        if atender is None:
+            return 404, None, self._json({"error": f"Ruta desconocida '{ruta}' (opciones: {', '.join(self.rutas)})."})
+        motor, version = self._tomar()
+        try:
+            return self._responder_con(motor, version, ruta, parametros, etag_cliente, atender)
+        finally:
+            self._soltar(motor)
+
+    def _responder_con(self, motor, version, ruta, parametros, etag_cliente, atender):
+        try:
+            clave, calcular = atender(motor, parametros)
+        except ErrorDeConsulta as e:
+            return 400, None, self._json({"error": str(e)})
+        # El resultado depende sólo de los datos y de la consulta normalizada: el ETag se
+        # conoce sin calcular nada, y un 304 no toca el motor
+        etag = '"' + hashlib.sha1(repr((version, ruta, clave)).encode('utf-8')).hexdigest()[:20] + '"'
+        if etag_cliente is not None and etag in [parte.strip() for parte in etag_cliente.split(",")]:
+            return 304, etag, b""
+        with self._candado:
+            guardada = self._respuestas.get((version, ruta, clave))
+            if guardada is not None:
+                self._respuestas.move_to_end((version, ruta, clave))
+                return 200, guardada[0], guardada[1]
+        try:
+            cuerpo = self._json(calcular())
+        except ValueError as e:
+            return 400, None, self._json({"error": str(e)})
+        with self._candado:
+            if self._datos[1] == version:  # No se guarda una respuesta de datos que ya se reemplazaron
+                self._respuestas[(version, ruta, clave)] = (etag, cuerpo)
+                while len(self._respuestas) > RESPUESTAS_GUARDADAS:
+                    self._respuestas.popitem(last=False)
+        return 200, etag, cuerpo
+
+    def _json(self, objeto):
+        return json.dumps(objeto, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+    def _columnas(self, motor, parametros):
+        texto = _parametro(parametros, "columnas")
+        if texto is None:
+            return tuple(self.columnas)
+        columnas = tuple(columna.strip() for columna in texto.split(",") if columna.strip())
+        desconocidas = [columna for columna in columnas if columna not in motor.tabla.cabecera]
+        if desconocidas:
+            raise ErrorDeConsulta(f"Columnas desconocidas: {', '.join(desconocidas)} "
+                                  f"(opciones: {', '.join(motor.tabla.cabecera)})")
+        return columnas
+
+    def _filas(self, motor, vista, desde, hasta, columnas):
+        """Las filas [desde, hasta) de la vista como diccionarios (como muestra la tabla, sólo la página pedida)."""
+        # Población y superficie van como números (se leen de 'poblacion_num' y 'area_num');
+        # idiomas, monedas, fronteras y zonas horarias, como listas
+        lectores = []
+        for columna in columnas:
+            leer = motor.tabla.lector(COLUMNAS_NUMERICAS.get(columna, columna))
+            if columna in COLUMNAS_LISTA:
+                leer = _lector_de_lista(leer)
+            lectores.append(leer)
+        return [dict(zip(columnas, [leer(fila) for leer in lectores])) for fila in vista[desde:hasta]]
+
+    # --- Rutas: cada una devuelve (clave, calcular) ---
+
+    def _paises(self, motor, parametros):
+        """/paises: filtros y orden (como 'actualizar_vista' y 'ordenar_columna'), paginado con desde/limite."""
+        consulta = consulta_de_parametros(parametros)
+        columnas = self._columnas(motor, parametros)
+        desde = _parametro(parametros, "desde", entero_no_negativo, 0)
+        limite = min(_parametro(parametros, "limite", entero_no_negativo, LIMITE_POR_DEFECTO), LIMITE_MAXIMO)
+
+        def calcular():
+            vista = motor.ejecutar(consulta)
+            respuesta = {"total": len(vista), "desde": desde, "limite": limite,
+                         "filas": self._filas(motor, vista, desde, desde + limite, columnas)}
+            if not vista and consulta.termino:
+                respuesta["sugerencias"] = motor.sugerencias(consulta.termino)
+            return respuesta
+        return (consulta, columnas, desde, limite), calcular
+
+    def _primeros(self, motor, parametros):
+        """
+        /primeros: los N primeros según 'por' (ej. por=poblacion:desc), con los mismos filtros.
+        Con ultimos=1, los del otro extremo; con por_continente=1, N por cada continente.
+        """
+        orden = _parametro(parametros, "por", claves_de_orden)
+        if orden is None:
+            raise ErrorDeConsulta("Falta 'por' (ej. por=poblacion:desc).")
+        consulta = consulta_de_parametros(parametros, orden)
+        columnas = self._columnas(motor, parametros)
+        cantidad = min(_parametro(parametros, "n", entero_no_negativo, 10), LIMITE_MAXIMO)
+        ultimos = _parametro(parametros, "ultimos", entero_no_negativo, 0) > 0
+        por_continente = _parametro(parametros, "por_continente", entero_no_negativo, 0) > 0
+
+        def calcular():
+            # Se eligen sin ordenar toda la vista (ver 'primeros' en motor.py)
+            filas = motor.primeros(consulta, cantidad, ultimos=ultimos, por_continente=por_continente)
+            return {"n": cantidad, "filas": self._filas(motor, filas, 0, len(filas), columnas)}
+        return (consulta, columnas, cantidad, ultimos, por_continente), calcular
+
+    def _estadisticas(self, motor, parametros):
+        """/estadisticas: las de la vista filtrada y las de todos los países (como la ventana de estadísticas)."""
+        consulta = consulta_de_parametros(parametros)._replace(orden=None)
+
+        def calcular():
+            return {"vista": motor.resumen(motor.filtrar(consulta), consulta), "todos": motor.resumen(None)}
+        return consulta, calcular
+
+    def _salud(self, motor, parametros):
+        """/salud: cantidad de filas, versión de los datos y recargas hechas."""
+        def calcular():
+            return {"filas": len(motor.tabla), "version": self._datos[1], "recargas": self.recargas}
+        return self.recargas, calcular
+
+class ManejadorPaises(BaseHTTPRequestHandler):
+    """Traduce cada GET a 'ServicioPaises.responder' (el servicio está en 'self.server.servicio')."""
+
+    protocol_version = "HTTP/1.1"     # Keep-alive: varias peticiones por conexión
+    timeout = INACTIVIDAD_SEGUNDOS
+    disable_nagle_algorithm = True    # Cabeceras y cuerpo salen en dos escrituras: sin esto, cada respuesta espera ~40 ms el ACK
+    server_version = "ServicioPaises/1.0"
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        with rendimiento.etapa('peticion_servicio'):
+            codigo, etag, cuerpo = self.server.servicio.responder(
+                partes.path.rstrip("/") or "/", parse_qs(partes.query), self.headers.get("If-None-Match"))
+        self.send_response(codigo)
+        if codigo != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")  # El cliente puede guardarla, pero revalidándola
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *argumentos):
+        # Un registro por petición frena mucho con miles por segundo: sólo si se pidió
+        if self.server.registrar:
+            super().log_message(formato, *argumentos)
+
+class ServidorConPool(HTTPServer):
+    """HTTPServer que atiende cada conexión en un pool de 'hilos' hilos (en lugar de un hilo nuevo por conexión)."""
+
+    request_queue_size = 128  # Conexiones en espera de ser aceptadas
+
+    def __init__(self, direccion, servicio, hilos=HILOS_POR_DEFECTO, registrar=False):
+        super().__init__(direccion, ManejadorPaises)
+        self.servicio = servicio
+        self.registrar = registrar
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="servicio")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de consultas sobre los datos de países.")
+    parser.add_argument("--csv", default=RUTA_POR_DEFECTO, help=f"Archivo de datos (por defecto {RUTA_POR_DEFECTO})")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar (por defecto sólo local)")
+    parser.add_argument("--puerto", type=int, default=PUERTO_POR_DEFECTO)
+    parser.add_argument("--hilos", type=int, default=HILOS_POR_DEFECTO, help="Conexiones atendidas a la vez")
+    parser.add_argument("--almacen", choices=ALMACENES, default=ALMACEN_MEMORIA,
+                        help="Tabla en memoria (por defecto) o en una base SQLite junto al CSV")
+    parser.add_argument("--intervalo-recarga", type=float, default=INTERVALO_RECARGA,
+                        help="Segundos entre revisiones de cambios en el CSV (0 la apaga)")
+    parser.add_argument("--registro", action="store_true", help="Muestra una línea por petición")
+    return parser
+
+def main(argv=None):
+    parser = crear_parser()
+    argumentos = parser.parse_args(argv)
+    try:
+        servicio = ServicioPaises(argumentos.csv, argumentos.almacen)
+    except FileNotFoundError:
+        parser.exit(1, f"No se encontró el archivo de datos: {argumentos.csv}\n")
+    servidor = ServidorConPool((argumentos.host, argumentos.puerto), servicio, argumentos.hilos, argumentos.registro)
+    detener = threading.Event()
+    if argumentos.intervalo_recarga > 0:
+        threading.Thread(target=servicio.vigilar, args=(argumentos.intervalo_recarga, detener),
+                         name="recarga", daemon=True).start()
+    print(f"Sirviendo {len(servicio.motor.tabla)} filas en http://{argumentos.host}:{servidor.server_port}/ "
+          f"(Ctrl+C para terminar)", file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        detener.set()
+        servidor.server_close()
+
+# --- Punto de Entrada del Script ---
+if __name__ == "__main__":
+    main()
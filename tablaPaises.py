@@ -0,0 +1,465 @@
+# --- Importaciones de Módulos ---
+import csv               # Para leer 'Todos.csv'
+import os                # Para conocer el tamaño del archivo (progreso de la carga)
+import sys               # Para medir el tamaño de los objetos en memoria
+import time              # Tiempo de la conversión numérica (con la instrumentación encendida)
+from array import array  # Arreglos compactos de números (sin un objeto Python por valor)
+from itertools import accumulate, chain, islice # Posiciones del texto empaquetado y lectura por lotes
+import rendimiento       # Medición de la lectura y de la conversión numérica
+
+# NumPy es OPCIONAL: sólo acelera la unión de los trozos leídos en paralelo (ver cargaParalela.py)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# --- Esquema de la Tabla ---
+# Columnas del CSV que se guardan como enteros (columna CSV -> columna numérica)
+COLUMNAS_NUMERICAS = {"poblacion": "poblacion_num", "area": "area_num"}
+# Columnas con pocos valores distintos: se guardan como códigos + vocabulario
+COLUMNAS_CATEGORICAS = ("region", "continente", "subregion")
+MAXIMO_CODIGO_CORTO = 0xFFFF  # Hasta este código, 2 bytes por fila; con más valores distintos, 4
+# Columnas con una lista por fila (en el CSV, los elementos van separados por SEPARADOR_LISTA):
+# columna -> cómo se guardan sus elementos (categóricos si se repiten mucho entre países)
+COLUMNAS_LISTA = {"idiomas": "categorica", "monedas": "categorica", "zonas_horarias": "categorica", "fronteras": "texto"}
+SEPARADOR_LISTA = "|"  # Ej. "Spanish|Guaraní"
+# El resto de las columnas del CSV se guardan como texto empaquetado (ColumnaTexto)
+# Columnas de 'Todos.csv' (las que genera generarPaises.py); un CSV con menos columnas también se lee
+CABECERA = ['nombre_comun_es', 'nombre_oficial_es', 'capital', 'region', 'poblacion', 'area',
+            'cca3', 'subregion', 'latitud', 'longitud', 'idiomas', 'monedas', 'fronteras', 'zonas_horarias',
+            'continente']
+FILAS_POR_LOTE = 2000  # Filas que se leen antes de informar el avance en la carga por lotes
+
+def a_entero(texto):
+    """Convierte un texto a entero; devuelve 0 si no es un número válido (igual que antes)."""
+    try:
+        return int(texto)
+    except (TypeError, ValueError):
+        return 0
+
+def convertidor(columna, invalidas):
+    """Como 'a_entero', pero cuenta en 'invalidas' (columna -> cantidad) las celdas que no son un número."""
+    def convertir(texto):
+        try:
+            return int(texto)
+        except (TypeError, ValueError):
+            invalidas[columna] = invalidas.get(columna, 0) + 1
+            return 0
+    return convertir
+
+def aviso_celdas_invalidas(celdas_invalidas):
+    """Texto que informa las celdas numéricas que no eran un número ('' si no hubo)."""
+    if not celdas_invalidas:
+        return ''
+    detalle = ", ".join(f"{cantidad:,} en '{columna}'".replace(',', '.') for columna, cantidad in celdas_invalidas.items())
+    return f"Celdas no numéricas (se tomaron como 0): {detalle}"
+
+def separar_lista(texto):
+    """Elementos de una celda de lista del CSV: "Spanish|Guaraní" -> ['Spanish', 'Guaraní'] ("" -> [])."""
+    return texto.split(SEPARADOR_LISTA) if texto else []
+
+def lotes(filas, tamano=FILAS_POR_LOTE):
+    """Agrupa las filas de un lector CSV en listas de hasta 'tamano' filas."""
+    return iter(lambda: list(islice(filas, tamano)), [])
+
+def _agregar_posiciones(destino, posiciones, base):
+    """Agrega a 'destino' las posiciones de otra columna (sin su 0 inicial) corridas en 'base'."""
+    if np is not None:
+        destino.frombytes((np.frombuffer(posiciones, dtype=np.uint64)[1:] + np.uint64(base)).tobytes())
+    else:
+        destino.extend(map(base.__add__, islice(posiciones, 1, None)))
+
+class ColumnaTexto:
+    """
+    Columna de texto empaquetada: todos los valores, codificados en UTF-8,
+    van uno detrás de otro en un único bloque de bytes ('heap') y un arreglo
+    de posiciones ('offsets') indica dónde termina cada uno.
+    Cuesta ~8 bytes por fila más el texto, en lugar de un objeto 'str' por fila.
+    El valor se decodifica recién cuando se pide.
+    """
+
+    def __init__(self, heap=None, offsets=None):
+        self.heap = bytearray() if heap is None else heap
+        self.offsets = array('Q', [0]) if offsets is None else offsets
+
+    def agregar(self, valor):
+        self.heap += valor.encode('utf-8')
+        self.offsets.append(len(self.heap))
+
+    def extender(self, valores):
+        """Agrega muchos valores de una vez (un único 'join' y las posiciones acumuladas)."""
+        codificados = [valor.encode('utf-8') for valor in valores]
+        posiciones = accumulate(map(len, codificados), initial=len(self.heap))
+        next(posiciones)
+        self.heap += b''.join(codificados)
+        self.offsets.extend(posiciones)
+
+    def unir(self, otra):
+        """Agrega al final todos los valores de otra ColumnaTexto (ej. la de un trozo leído aparte)."""
+        base = len(self.heap)
+        self.heap += otra.heap
+        _agregar_posiciones(self.offsets, otra.offsets, base)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, indice):
+        return str(self.heap[self.offsets[indice]:self.offsets[indice + 1]], 'utf-8')
+
+    def tamano_en_bytes(self):
+        return len(self.heap) + 8 * len(self.offsets)
+
+class ColumnaCategorica:
+    """
+    Columna codificada por diccionario: cada fila guarda un código de 2 bytes
+    y el texto de cada valor distinto se guarda UNA sola vez en 'vocabulario'.
+    Si aparecen más de 65.536 valores distintos, los códigos pasan a 4 bytes.
+    """
+
+    def __init__(self, codigos=None, vocabulario=None):
+        self.codigos = array('H') if codigos is None else codigos
+        self.vocabulario = [] if vocabulario is None else list(vocabulario)
+        self._indice = {valor: codigo for codigo, valor in enumerate(self.vocabulario)}
+
+    def codigo(self, valor):
+        """Devuelve el código de un valor, o None si no aparece en la columna."""
+        return self._indice.get(valor)
+
+    @property
+    def formato(self):
+        """Tipo de los códigos: 'H' (2 bytes) o 'I' (4 bytes)."""
+        return getattr(self.codigos, 'typecode', None) or self.codigos.format
+
+    def _codigo_nuevo(self, valor):
+        codigo = self._indice.get(valor)
+        if codigo is None:
+            codigo = len(self.vocabulario)
+            if codigo > MAXIMO_CODIGO_CORTO and self.formato == 'H':
+                self.codigos = array('I', self.codigos)  # Ya no entra en 2 bytes
+            self.vocabulario.append(sys.intern(valor))
+            self._indice[valor] = codigo
+        return codigo
+
+    def agregar(self, valor):
+        codigo = self._codigo_nuevo(valor)  # Antes de tomar 'codigos': puede cambiar de tipo
+        self.codigos.append(codigo)
+
+    def extender(self, valores):
+        """Agrega muchos valores de una vez (los nuevos entran al vocabulario en orden de aparición)."""
+        for valor in dict.fromkeys(valores):
+            if valor not in self._indice:
+                self._codigo_nuevo(valor)
+        self.codigos.extend(map(self._indice.__getitem__, valores))
+
+    def unir(self, otra):
+        """Agrega al final los valores de otra ColumnaCategorica, traduciendo sus códigos a este vocabulario."""
+        traduccion = [self._codigo_nuevo(valor) for valor in otra.vocabulario]
+        if traduccion == list(range(len(traduccion))) and otra.formato == self.formato:
+            self.codigos.extend(otra.codigos)  # Mismo vocabulario: se copian tal cual
+        elif np is not None:
+            codigos = np.asarray(traduccion, dtype=self.formato)[np.frombuffer(otra.codigos, dtype=otra.formato)]
+            self.codigos.frombytes(codigos.tobytes())
+        else:
+            self.codigos.extend(map(traduccion.__getitem__, otra.codigos))
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __getitem__(self, indice):
+        return self.vocabulario[self.codigos[indice]]
+
+    def tamano_en_bytes(self):
+        return self.codigos.itemsize * len(self.codigos) + sum(sys.getsizeof(v) for v in self.vocabulario)
+
+class ColumnaLista:
+    """
+    Columna con una lista de valores por fila (ej. idiomas, fronteras): los elementos
+    de todas las filas van seguidos en 'elementos' (una ColumnaCategorica si se repiten
+    mucho, como los idiomas; una ColumnaTexto si no, como las fronteras) y un arreglo de
+    posiciones ('inicios') indica dónde empieza la lista de cada fila.
+    Leer una fila devuelve el texto del CSV ("Spanish|Guaraní"); 'lista' la devuelve separada.
+    """
+
+    def __init__(self, elementos, inicios=None):
+        self.elementos = elementos
+        self.inicios = array('Q', [0]) if inicios is None else inicios
+
+    @classmethod
+    def nueva(cls, columna):
+        """Columna vacía con los elementos guardados como indica COLUMNAS_LISTA."""
+        return cls(ColumnaCategorica() if COLUMNAS_LISTA[columna] == "categorica" else ColumnaTexto())
+
+    def agregar(self, valor):
+        self.extender([valor])
+
+    def extender(self, valores):
+        """Agrega muchas filas de una vez a partir de su texto en el CSV ("a|b", "" = lista vacía)."""
+        listas = [separar_lista(valor) for valor in valores]
+        self.elementos.extender(list(chain.from_iterable(listas)))
+        posiciones = accumulate(map(len, listas), initial=self.inicios[-1])
+        next(posiciones)
+        self.inicios.extend(posiciones)
+
+    def unir(self, otra):
+        """Agrega al final las filas de otra ColumnaLista del mismo tipo."""
+        base = self.inicios[-1]
+        self.elementos.unir(otra.elementos)
+        _agregar_posiciones(self.inicios, otra.inicios, base)
+
+    def lista(self, indice):
+        """Los elementos de una fila, como lista de textos."""
+        return [self.elementos[posicion] for posicion in range(self.inicios[indice], self.inicios[indice + 1])]
+
+    def __len__(self):
+        return len(self.inicios) - 1
+
+    def __getitem__(self, indice):
+        return SEPARADOR_LISTA.join(self.lista(indice))
+
+    def tamano_en_bytes(self):
+        return 8 * len(self.inicios) + self.elementos.tamano_en_bytes()
+
+class TablaPaises:
+    """
+    Tabla maestra de países guardada por columnas.
+    - Columnas numéricas: arreglos de int64 ('poblacion_num', 'area_num').
+    - Columnas categóricas: 'continente', 'region' y 'subregion' (códigos + vocabulario).
+    - Columnas de listas: idiomas, monedas, zonas horarias y fronteras (ColumnaLista).
+    - Columnas de texto: nombres, capital, código y coordenadas empaquetados (ColumnaTexto).
+    Ningún valor se decodifica hasta que se lee su columna: mostrar cuatro columnas
+    no cuesta nada por las demás.
+    Las filas se identifican por su número (row id); las vistas filtradas y
+    ordenadas son arreglos de row ids, nunca copias de los datos.
+    """
+
+    def __init__(self, cabecera=CABECERA, texto=None, numericas=None, categoricas=None, origen=None, listas=None):
+        self.cabecera = list(cabecera)  # Columnas del CSV, en su orden original
+        self.texto = texto if texto is not None else {}
+        self.numericas = numericas if numericas is not None else {}
+        self.categoricas = categoricas if categoricas is not None else {}
+        self.listas = listas if listas is not None else {}
+        self._origen = origen  # Ej. la instantánea mapeada en memoria (hay que mantenerla abierta)
+        # Celdas numéricas que no eran un número (se guardan como 0): columna del CSV -> cantidad
+        self.celdas_invalidas = {}
+        # Índice de búsqueda ya armado (ej. el de la instantánea); se descarta si se agregan filas
+        self.busqueda = None
+        # Tiempo de convertir los números (sólo con la instrumentación encendida, ver rendimiento.py)
+        self._conversion = rendimiento.Acumulador('conversion_numerica') if rendimiento.activo() else None
+        if texto is None and numericas is None and categoricas is None and listas is None:
+            # Tabla vacía: se crean las columnas según el esquema
+            for columna in self.cabecera:
+                if columna in COLUMNAS_NUMERICAS:
+                    self.numericas[COLUMNAS_NUMERICAS[columna]] = array('q')
+                elif columna in COLUMNAS_CATEGORICAS:
+                    self.categoricas[columna] = ColumnaCategorica()
+                elif columna in COLUMNAS_LISTA:
+                    self.listas[columna] = ColumnaLista.nueva(columna)
+                else:
+                    self.texto[columna] = ColumnaTexto()
+        self._filas = self._contar_filas()
+        self._preparar_agregadores()
+
+    # --- Construcción ---
+
+    def _contar_filas(self):
+        for columnas in (self.numericas, self.categoricas, self.listas, self.texto):
+            for valores in columnas.values():
+                return len(valores)
+        return 0
+
+    def _preparar_agregadores(self):
+        """Arma, una sola vez, la función que agrega cada columna de una fila CSV."""
+        self._agregadores = []
+        for columna in self.cabecera:
+            if columna in COLUMNAS_NUMERICAS:
+                destino = self.numericas[COLUMNAS_NUMERICAS[columna]]
+                convertir = convertidor(columna, self.celdas_invalidas)
+                if self._conversion is not None:
+                    convertir = self._conversion.envolver(convertir)
+                self._agregadores.append(lambda valor, destino=destino, convertir=convertir: destino.append(convertir(valor)))
+            elif columna in COLUMNAS_CATEGORICAS:
+                self._agregadores.append(self.categoricas[columna].agregar)
+            elif columna in COLUMNAS_LISTA:
+                self._agregadores.append(self.listas[columna].agregar)
+            else:
+                self._agregadores.append(self.texto[columna].agregar)
+
+    def agregar_fila(self, valores):
+        """Agrega una fila dada como lista de textos, en el orden de 'cabecera'."""
+        for agregar, valor in zip(self._agregadores, valores):
+            agregar(valor)
+        # Si la fila vino corta, se completa con vacíos
+        for agregar in self._agregadores[len(valores):]:
+            agregar('')
+        self._filas += 1
+        self.busqueda = None
+
+    def _agregar_numeros(self, columna, valores):
+        """Convierte y agrega una columna numérica de un lote; las celdas inválidas quedan en 0 y se cuentan."""
+        destino = self.numericas[COLUMNAS_NUMERICAS[columna]]
+        inicio = len(destino)
+        try:
+            destino.extend(map(int, valores))
+        except (TypeError, ValueError):
+            # Hay celdas que no son números: se rehace el lote valor por valor
+            del destino[inicio:]
+            convertir = convertidor(columna, self.celdas_invalidas)
+            destino.extend(map(convertir, valores))
+
+    def agregar_filas(self, filas):
+        """
+        Agrega un lote de filas (listas de textos, en el orden de 'cabecera') columna por
+        columna: la conversión numérica y el empaquetado del texto se hacen sobre toda la
+        columna del lote a la vez, mucho más rápido que fila por fila.
+        """
+        ancho = len(self.cabecera)
+        # Las filas cortas se completan con vacíos y las largas se recortan (como 'agregar_fila')
+        filas = [fila if len(fila) == ancho else (fila + [''] * ancho)[:ancho] for fila in filas]
+        if not filas:
+            return
+        for columna, valores in zip(self.cabecera, zip(*filas)):
+            if columna in COLUMNAS_NUMERICAS:
+                inicio = time.perf_counter() if self._conversion is not None else None
+                self._agregar_numeros(columna, valores)
+                if inicio is not None:
+                    self._conversion.sumar(time.perf_counter() - inicio, len(valores))
+            elif columna in COLUMNAS_CATEGORICAS:
+                self.categoricas[columna].extender(valores)
+            elif columna in COLUMNAS_LISTA:
+                self.listas[columna].extender(valores)
+            else:
+                self.texto[columna].extender(valores)
+        self._filas += len(filas)
+        self.busqueda = None
+
+    def unir(self, otra):
+        """Agrega al final todas las filas de otra tabla con la misma cabecera (ej. un trozo del CSV leído aparte)."""
+        if otra.cabecera != self.cabecera:
+            raise ValueError("Las tablas no tienen las mismas columnas.")
+        for nombre, valores in otra.numericas.items():
+            self.numericas[nombre].extend(valores)
+        for columna, valores in otra.categoricas.items():
+            self.categoricas[columna].unir(valores)
+        for columna, valores in otra.listas.items():
+            self.listas[columna].unir(valores)
+        for columna, valores in otra.texto.items():
+            self.texto[columna].unir(valores)
+        for columna, cantidad in otra.celdas_invalidas.items():
+            self.celdas_invalidas[columna] = self.celdas_invalidas.get(columna, 0) + cantidad
+        self._filas += len(otra)
+        self.busqueda = None
+
+    # Para enviar una tabla entre procesos (ver cargaParalela.py): sin las funciones armadas, el origen ni el índice
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        for atributo in ('_agregadores', '_conversion', '_origen', 'busqueda'):
+            estado.pop(atributo, None)
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._conversion = self._origen = self.busqueda = None
+        self._preparar_agregadores()
+
+    @classmethod
+    def desde_csv(cls, ruta_csv):
+        """Lee un CSV con el formato de 'Todos.csv' directamente en columnas."""
+        with rendimiento.etapa('leer_csv') as medicion, \
+                open(ruta_csv, mode='r', encoding='utf-8', newline='') as archivo:
+            lector = csv.reader(archivo)
+            tabla = cls(next(lector, []))
+            for lote in lotes(lector):
+                tabla.agregar_filas(lote)
+            medicion.filas = len(tabla)
+        tabla._registrar_conversion()
+        return tabla
+
+    @classmethod
+    def desde_csv_por_lotes(cls, ruta_csv, filas_por_lote=FILAS_POR_LOTE):
+        """
+        Igual que 'desde_csv', pero como generador: cada 'filas_por_lote' filas
+        devuelve (tabla, fraccion_leida). Es SIEMPRE la misma tabla, que va creciendo;
+        las filas ya informadas no cambian, así que se pueden mostrar mientras se lee el resto.
+        """
+        tamano = os.path.getsize(ruta_csv) or 1
+        leidos = 0
+        with open(ruta_csv, mode='r', encoding='utf-8', newline='') as archivo:
+            def lineas():
+                # Cuenta lo leído (en caracteres, casi igual que en bytes) para calcular el avance
+                nonlocal leidos
+                for linea in archivo:
+                    leidos += len(linea)
+                    yield linea
+            lector = csv.reader(lineas())
+            tabla = cls(next(lector, []))
+            for lote in lotes(lector, filas_por_lote):
+                tabla.agregar_filas(lote)
+                if len(lote) == filas_por_lote:
+                    yield tabla, min(1.0, leidos / tamano)
+        tabla._registrar_conversion()
+        yield tabla, 1.0
+
+    @classmethod
+    def desde_filas(cls, filas, cabecera=CABECERA):
+        """Arma una tabla a partir de diccionarios (ej. filas generadas en memoria)."""
+        tabla = cls(cabecera)
+        for fila in filas:
+            tabla.agregar_fila([str(fila.get(columna, '')) for columna in cabecera])
+        return tabla
+
+    def _registrar_conversion(self):
+        if self._conversion is not None:
+            self._conversion.registrar()
+
+    # --- Acceso a los datos ---
+
+    def __len__(self):
+        return self._filas
+
+    def todas(self):
+        """Devuelve la vista con todas las filas (row ids 0..n-1)."""
+        return array('I', range(self._filas))
+
+    def lector(self, columna):
+        """
+        Devuelve una función fila -> valor para la columna pedida.
+        Acepta las columnas del CSV y las numéricas ('poblacion_num', 'area_num').
+        """
+        if columna in self.texto:
+            return self.texto[columna].__getitem__
+        if columna in self.categoricas:
+            return self.categoricas[columna].__getitem__
+        if columna in self.listas:
+            return self.listas[columna].__getitem__
+        if columna in self.numericas:
+            return self.numericas[columna].__getitem__
+        if columna in COLUMNAS_NUMERICAS:
+            # Versión texto de una columna numérica (ej. 'poblacion' para mostrar)
+            valores = self.numericas[COLUMNAS_NUMERICAS[columna]]
+            return lambda fila: str(valores[fila])
+        return lambda fila: ''
+
+    def valor(self, fila, columna):
+        """Devuelve un único valor."""
+        return self.lector(columna)(fila)
+
+    def fila(self, indice):
+        """Arma el diccionario de una fila (mismo formato que la antigua lista de diccionarios)."""
+        resultado = {columna: self.valor(indice, columna) for columna in self.cabecera}
+        for nombre, valores in self.numericas.items():
+            resultado[nombre] = valores[indice]
+        return resultado
+
+    def tamano_en_bytes(self):
+        """Estimación de la memoria que ocupan los datos de la tabla."""
+        total = sum(len(valores) * valores.itemsize for valores in self.numericas.values())
+        total += sum(columna.tamano_en_bytes() for columna in self.categoricas.values())
+        total += sum(columna.tamano_en_bytes() for columna in self.listas.values())
+        total += sum(columna.tamano_en_bytes() for columna in self.texto.values())
+        return total
+
+    def cerrar(self):
+        """Libera el origen de los datos (ej. el mmap de la instantánea), si lo hay."""
+        if self._origen is not None:
+            self._origen.cerrar()
+            self._origen = None
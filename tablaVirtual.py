@@ -0,0 +1,169 @@
+# --- Importaciones de Módulos ---
+from tkinter import ttk  # Para consultar el alto de fila del estilo del Treeview
+
+ALTO_FILA_POR_DEFECTO = 20     # Píxeles por fila si el estilo no define 'rowheight'
+ALTO_ENCABEZADO = 25           # Píxeles aproximados de la fila de títulos
+MARGEN_POR_DEFECTO = 50        # Filas que se mantienen creadas (ocultas) arriba y abajo de la ventana visible
+
+class TreeviewVirtual:
+    """
+    Muestra una vista (lista de números de fila) en un Treeview SIN insertar todas las filas:
+    sólo existen como items las filas visibles y un margen alrededor.
+    - Las visibles están "enganchadas" al Treeview; las del margen quedan separadas
+      (detach) y se vuelven a enganchar con move() al desplazarse, sin recrearlas.
+    - Al cambiar la vista (filtro u orden), las filas que ya existían se reutilizan
+      (se mueven); sólo se crean las nuevas y se borran las que quedaron lejos.
+    El costo de cada interacción depende del tamaño de la ventana, no del resultado.
+    El desplazamiento vertical lo maneja esta clase (scrollbar y rueda del mouse).
+    """
+
+    def __init__(self, tree, barra_vertical, obtener_valores, margen=MARGEN_POR_DEFECTO):
+        self.tree = tree
+        self.barra = barra_vertical
+        self.obtener_valores = obtener_valores  # fila -> lista de valores de las columnas
+        self.margen = margen
+        self.vista = []
+        self.inicio = 0          # Posición (dentro de la vista) de la primera fila visible
+        self.visibles = max(1, int(tree.cget('height') or 10))
+        self._items = {}         # fila -> iid del item creado
+        self._enganchados = []   # iids actualmente visibles, en orden
+
+        self.barra.configure(command=self.yview)
+        self.tree.bind('<Configure>', self._al_redimensionar)
+        self.tree.bind('<MouseWheel>', self._al_girar_rueda)
+        self.tree.bind('<Button-4>', lambda evento: self._desplazar_y_cortar(-3))
+        self.tree.bind('<Button-5>', lambda evento: self._desplazar_y_cortar(3))
+        self.tree.bind('<Prior>', lambda evento: self._desplazar_y_cortar(-self.visibles))
+        self.tree.bind('<Next>', lambda evento: self._desplazar_y_cortar(self.visibles))
+        self.tree.bind('<Up>', self._al_flecha_arriba)
+        self.tree.bind('<Down>', self._al_flecha_abajo)
+
+    # --- API pública ---
+
+    def mostrar(self, vista, conservar_posicion=False):
+        """Muestra una nueva vista (por defecto, desde el principio)."""
+        self.vista = vista
+        if not conservar_posicion:
+            self.inicio = 0
+        self._renderizar()
+
+    def invalidar(self):
+        """Borra todos los items creados (ej. cuando cambian los datos de la tabla maestra)."""
+        if self._items:
+            self.tree.delete(*self._items.values())
+        self._items = {}
+        self._enganchados = []
+
+    def olvidar_filas(self, rangos):
+        """
+        Borra sólo los items de las filas en 'rangos' (lista de [inicio, fin)), ej. las que
+        cambiaron en una actualización de la tabla maestra. Los demás se siguen reutilizando.
+        """
+        viejas = [fila for fila in self._items if any(inicio <= fila < fin for inicio, fin in rangos)]
+        if not viejas:
+            return
+        borrados = {self._items.pop(fila) for fila in viejas}
+        self.tree.delete(*borrados)
+        self._enganchados = [iid for iid in self._enganchados if iid not in borrados]
+
+    def desplazar_a(self, inicio):
+        """Hace que la fila en la posición 'inicio' de la vista sea la primera visible."""
+        self.inicio = inicio
+        self._renderizar()
+
+    def yview(self, *argumentos):
+        """Comando del scrollbar vertical ('moveto' fracción / 'scroll' n unidades|páginas)."""
+        if not argumentos:
+            return
+        if argumentos[0] == 'moveto':
+            self.desplazar_a(int(float(argumentos[1]) * len(self.vista)))
+        elif argumentos[0] == 'scroll':
+            pasos = int(argumentos[1])
+            if len(argumentos) > 2 and argumentos[2].startswith('page'):
+                pasos *= self.visibles
+            self.desplazar_a(self.inicio + pasos)
+
+    def filas_visibles(self):
+        """Devuelve los números de fila que se ven ahora en pantalla."""
+        return self.vista[self.inicio:self.inicio + self.visibles]
+
+    # --- Renderizado ---
+
+    def _renderizar(self):
+        total = len(self.vista)
+        self.inicio = max(0, min(self.inicio, total - self.visibles))
+        fin = min(total, self.inicio + self.visibles)
+
+        # --- 1. Filas que deben existir (ventana + margen) ---
+        desde = max(0, self.inicio - self.margen)
+        hasta = min(total, fin + self.margen)
+        necesarias = set(self.vista[desde:hasta])
+
+        # --- 2. Borrar los items que quedaron lejos ---
+        sobrantes = [fila for fila in self._items if fila not in necesarias]
+        if sobrantes:
+            self.tree.delete(*(self._items.pop(fila) for fila in sobrantes))
+
+        # --- 3. Enganchar las visibles, en orden (creando sólo las que faltan) ---
+        deseados = []
+        for posicion, fila in enumerate(self.vista[self.inicio:fin]):
+            iid = self._items.get(fila)
+            if iid is None:
+                iid = self.tree.insert("", posicion, values=self.obtener_valores(fila))
+                self._items[fila] = iid
+            deseados.append(iid)
+        if deseados != self._enganchados:
+            actuales = set(self._enganchados)
+            for posicion, iid in enumerate(deseados):
+                self.tree.move(iid, "", posicion)
+            # Las que ya no se ven se separan (siguen creadas, por si se vuelve a ellas)
+            quedan = set(deseados)
+            separar = [iid for iid in actuales if iid not in quedan]
+            if separar:
+                self.tree.detach(*separar)
+            self._enganchados = deseados
+
+        # --- 4. Actualizar el scrollbar ---
+        if total:
+            self.barra.set(self.inicio / total, fin / total)
+        else:
+            self.barra.set(0, 1)
+
+    # --- Eventos ---
+
+    def _al_redimensionar(self, evento):
+        alto_fila = ttk.Style().lookup('Treeview', 'rowheight')
+        try:
+            alto_fila = int(alto_fila)
+        except (TypeError, ValueError):
+            alto_fila = ALTO_FILA_POR_DEFECTO
+        visibles = max(1, (evento.height - ALTO_ENCABEZADO) // max(1, alto_fila))
+        if visibles != self.visibles:
+            self.visibles = visibles
+            self._renderizar()
+
+    def _desplazar_y_cortar(self, pasos):
+        self.desplazar_a(self.inicio + pasos)
+        return "break"  # Evita que el Treeview haga su propio desplazamiento
+
+    def _al_girar_rueda(self, evento):
+        # En Windows/macOS 'delta' es múltiplo de 120 (o pequeño en macOS); hacia arriba es positivo
+        pasos = -3 if evento.delta > 0 else 3
+        return self._desplazar_y_cortar(pasos)
+
+    def _al_flecha_arriba(self, evento):
+        # En la primera fila visible, la flecha desplaza la ventana en lugar de salir de ella
+        if self._enganchados and self.tree.focus() == self._enganchados[0] and self.inicio > 0:
+            self.desplazar_a(self.inicio - 1)
+            self._enfocar(self._enganchados[0])
+            return "break"
+
+    def _al_flecha_abajo(self, evento):
+        if self._enganchados and self.tree.focus() == self._enganchados[-1] and self.inicio + self.visibles < len(self.vista):
+            self.desplazar_a(self.inicio + 1)
+            self._enfocar(self._enganchados[-1])
+            return "break"
+
+    def _enfocar(self, iid):
+        self.tree.focus(iid)
+        self.tree.selection_set(iid)
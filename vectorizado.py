@@ -0,0 +1,279 @@
+# --- Importaciones de Módulos ---
+import os                # Variable de entorno para apagar el motor vectorizado
+from array import array  # Los resultados se devuelven como arreglos de row ids (igual que el motor puro)
+from busqueda import clave_colacion # Orden alfabético en español (tildes, ñ)
+from indices import IndicesTabla, IndiceOrdenado, IndiceCategorico, PermutacionOrden, COLUMNAS_ORDENABLES
+from estadisticas import EstadisticasTabla, Agregados, resumir
+
+# NumPy es OPCIONAL: si no está instalado, el motor usa los índices en Python puro
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# --- Motor Vectorizado (NumPy) ---
+# Misma interfaz y MISMOS resultados que IndicesTabla y EstadisticasTabla, pero
+# las columnas 'poblacion_num', 'area_num' y los códigos de 'continente' se copian
+# a arreglos de NumPy y:
+# - los filtros son máscaras booleanas sobre las filas candidatas,
+# - los órdenes usan argsort/lexsort (estables, como sorted()),
+# - las estadísticas son reducciones (sum, sort) sobre la vista.
+# Se desactiva con la variable de entorno PAISES_NUMPY=0.
+
+VARIABLE_DESACTIVAR = "PAISES_NUMPY"
+DISPONIBLE = np is not None
+COLUMNAS_NUMERICAS = ('poblacion_num', 'area_num')
+MAXIMO_LLAVE = 2 ** 63  # Los rangos de varias columnas se combinan en un int64 mientras quepan
+# Tipo de NumPy equivalente a cada código de 'array'
+TIPOS = {'I': 'uint32', 'q': 'int64', 'H': 'uint16'} if DISPONIBLE else {}
+
+def usar_vectorizado(vectorizar=None):
+    """
+    Decide si se usa el motor vectorizado.
+    - None: sí, si NumPy está instalado y PAISES_NUMPY no es '0'.
+    - True: sí (lanza ImportError si NumPy no está instalado).
+    - False: no.
+    """
+    if vectorizar is None:
+        return DISPONIBLE and os.environ.get(VARIABLE_DESACTIVAR, "1") != "0"
+    if vectorizar and not DISPONIBLE:
+        raise ImportError("El motor vectorizado necesita NumPy (pip install numpy).")
+    return bool(vectorizar)
+
+def a_numpy(valores, tipo):
+    """
+    Copia una columna o vista ('array', memoryview de la instantánea) a un arreglo de NumPy.
+    Se copia a propósito: si NumPy quedara apuntando al 'array', éste ya no podría crecer.
+    """
+    try:
+        return np.frombuffer(valores, dtype=TIPOS[tipo]).copy()
+    except (TypeError, ValueError):
+        return np.fromiter(valores, dtype=TIPOS[tipo], count=len(valores))
+
+def a_array(tipo, valores):
+    """Convierte un arreglo de NumPy a 'array' (de una vez, sin crear un objeto por valor)."""
+    return array(tipo, valores.astype(TIPOS[tipo], copy=False).tobytes())
+
+def _permutacion(rangos):
+    """(filas, posiciones) del orden ascendente por 'rangos' (los empates, por número de fila)."""
+    filas = np.argsort(rangos, kind='stable')
+    posiciones = np.empty(len(filas), dtype=np.uint32)
+    posiciones[filas] = np.arange(len(filas), dtype=np.uint32)
+    return filas, posiciones
+
+def _rangos_densos(valores_ordenados):
+    """Para valores ya ordenados: 0, 0, 1, 2, 2, ... (sube cada vez que cambia el valor)."""
+    rangos = np.zeros(len(valores_ordenados), dtype=np.uint32)
+    if len(valores_ordenados):
+        np.cumsum(valores_ordenados[1:] != valores_ordenados[:-1], out=rangos[1:])
+    return rangos
+
+class IndicesVectorizados(IndicesTabla):
+    """
+    IndicesTabla con NumPy. Guarda además, como arreglos de NumPy, las columnas
+    numéricas ('valores'), los códigos de continente ('codigos') y, por cada columna
+    ordenable, su permutación ('permutaciones'), sus posiciones y sus rangos.
+    """
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        continentes = tabla.categoricas['continente']
+        self.valores = {columna: a_numpy(tabla.numericas[columna], 'q') for columna in COLUMNAS_NUMERICAS}
+        self.codigos = a_numpy(continentes.codigos, continentes.formato)
+        self.permutaciones = {}
+        self.posiciones = {}
+        self.rangos = {}
+        self.orden = {}
+        ordenados = {}
+        for columna, origen in COLUMNAS_ORDENABLES.items():
+            if origen in self.valores:
+                filas = np.argsort(self.valores[origen], kind='stable')
+                ordenados[origen] = self.valores[origen][filas]
+                rangos = np.empty(len(filas), dtype=np.uint32)
+                rangos[filas] = _rangos_densos(ordenados[origen])
+                posiciones = np.empty(len(filas), dtype=np.uint32)
+                posiciones[filas] = np.arange(len(filas), dtype=np.uint32)
+            elif origen in tabla.categoricas:
+                # Pocos valores distintos: se ordena el vocabulario y cada fila toma el rango de su código
+                columna_categorica = tabla.categoricas[origen]
+                claves = [clave_colacion(valor) for valor in columna_categorica.vocabulario]
+                rango_por_codigo = np.zeros(len(claves), dtype=np.uint32)
+                for rango, codigo in enumerate(sorted(range(len(claves)), key=claves.__getitem__)):
+                    rango_por_codigo[codigo] = rango
+                rangos = rango_por_codigo[a_numpy(columna_categorica.codigos, columna_categorica.formato)]
+                filas, posiciones = _permutacion(rangos)
+            else:
+                # Texto (ej. el nombre): la colación se calcula en Python, una vez por fila
+                leer = tabla.lector(origen)
+                permutacion = PermutacionOrden(len(tabla), lambda fila, leer=leer: clave_colacion(leer(fila)))
+                self.orden[columna] = permutacion
+                self.permutaciones[columna] = a_numpy(permutacion.filas, 'I')
+                self.posiciones[columna] = a_numpy(permutacion.posiciones, 'I')
+                self.rangos[columna] = a_numpy(permutacion.rangos, 'I')
+                continue
+            self.orden[columna] = PermutacionOrden(len(tabla), filas=a_array('I', filas),
+                                                   posiciones=a_array('I', posiciones), rangos=a_array('I', rangos))
+            self.permutaciones[columna] = filas.astype(np.uint32)
+            self.posiciones[columna] = posiciones
+            self.rangos[columna] = rangos
+        self.poblacion = IndiceOrdenado(filas=self.orden['poblacion'].filas, valores=a_array('q', ordenados['poblacion_num']))
+        self.area = IndiceOrdenado(filas=self.orden['area'].filas, valores=a_array('q', ordenados['area_num']))
+        self.continente = IndiceCategorico(continentes, [a_array('I', np.flatnonzero(self.codigos == codigo))
+                                                         for codigo in range(len(continentes.vocabulario))])
+        # Cantidad de rangos distintos de cada columna (para combinar varias en una sola llave)
+        self.topes = {columna: int(rangos.max()) + 1 if len(rangos) else 1 for columna, rangos in self.rangos.items()}
+
+    def ascendente(self, columna, filas):
+        """
+        Las 'filas' (arreglo de NumPy) ordenadas de forma ascendente por 'columna'.
+        Como PermutacionOrden.ordenar: si son muchas, se recorre la permutación
+        quedándose con las marcadas (O(n), sin ordenar); si son pocas, argsort de sus posiciones.
+        """
+        permutacion = self.permutaciones[columna]
+        if len(filas) * max(1, len(filas).bit_length()) >= len(permutacion):
+            marcadas = np.zeros(len(permutacion), dtype=bool)
+            marcadas[filas] = True
+            return permutacion[marcadas[permutacion]]
+        return filas[np.argsort(self.posiciones[columna][filas], kind='stable')]
+
+    def ordenar(self, vista, claves):
+        """
+        Como IndicesTabla.ordenar. Con varias columnas, los rangos se combinan en UNA llave
+        entera (la primera columna pesa más) y se ordena una sola vez; los empates
+        conservan el orden de la vista porque el orden es estable.
+        """
+        filas = a_numpy(vista, 'I')
+        if len(claves) == 1:
+            columna, descendente = claves[0]
+            resultado = self.ascendente(columna, filas)
+            return a_array('I', resultado[::-1] if descendente else resultado)
+        llave = self._llave(filas, claves)
+        if llave is None:
+            # No entra en un int64 (tablas enormes con varias columnas casi únicas): lexsort usa la ÚLTIMA llave como principal
+            llaves = [-self.rangos[columna][filas].astype(np.int64) if descendente else self.rangos[columna][filas]
+                      for columna, descendente in reversed(claves)]
+            return a_array('I', filas[np.lexsort(llaves)])
+        return a_array('I', filas[np.argsort(llave, kind='stable')])
+
+    def _llave(self, filas, claves, desempatar=False):
+        """
+        Combina los rangos de varias columnas en UNA llave int64 por fila (la primera columna
+        pesa más). Con 'desempatar', la posición en la vista entra como última columna (no
+        quedan empates). None si la combinación no entra en un int64.
+        """
+        escala = len(filas) if desempatar else 1
+        for columna, _ in claves:
+            escala *= self.topes[columna]
+        if escala >= MAXIMO_LLAVE:
+            return None
+        llave = np.arange(len(filas), dtype=np.int64) if desempatar else np.zeros(len(filas), dtype=np.int64)
+        escala = len(filas) if desempatar else 1
+        for columna, descendente in reversed(claves):
+            rangos = self.rangos[columna][filas].astype(np.int64)
+            llave += ((self.topes[columna] - 1 - rangos) if descendente else rangos) * escala
+            escala *= self.topes[columna]
+        return llave
+
+    def primeros(self, vista, claves, cantidad):
+        """
+        Como IndicesTabla.primeros, con argpartition: separa las 'cantidad' llaves menores
+        en O(m) y ordena sólo esas. Las llaves no tienen empates (una sola columna: su
+        posición en la permutación; varias: se desempata por posición en la vista), así
+        que el resultado es el mismo que el de ordenar.
+        """
+        if cantidad == 0 or cantidad >= len(vista):
+            return super().primeros(vista, claves, cantidad)
+        filas = a_numpy(vista, 'I')
+        if len(claves) == 1:
+            columna, descendente = claves[0]
+            llave = self.posiciones[columna][filas].astype(np.int64)
+            if descendente:
+                llave = -llave
+        else:
+            llave = self._llave(filas, claves, desempatar=True)
+            if llave is None:
+                return super().primeros(vista, claves, cantidad)
+        elegidas = np.argpartition(llave, cantidad - 1)[:cantidad]
+        return a_array('I', filas[elegidas[np.argsort(llave[elegidas])]])
+
+    def _mascaras(self, filas, continente, min_pob, max_pob, min_area, max_area):
+        """Máscara booleana (sobre 'filas') de los filtros de continente y rangos."""
+        mascara = np.ones(len(filas), dtype=bool)
+        if continente is not None:
+            codigo = self.tabla.categoricas['continente'].codigo(continente)
+            if codigo is None:
+                return np.zeros(len(filas), dtype=bool)
+            mascara &= self.codigos[filas] == codigo
+        for columna, minimo, maximo in (('poblacion_num', min_pob, max_pob), ('area_num', min_area, max_area)):
+            if minimo is not None or maximo is not None:
+                valores = self.valores[columna][filas]
+                if minimo is not None:
+                    mascara &= valores >= minimo
+                if maximo is not None:
+                    mascara &= valores <= maximo
+        return mascara
+
+    def filtrar(self, continente=None, min_pob=None, max_pob=None, min_area=None, max_area=None, candidatos=None):
+        """
+        Como IndicesTabla.filtrar: se parte del filtro más selectivo (sus filas salen
+        de los índices) y los demás se verifican de una vez con máscaras sobre esas filas.
+        """
+        # --- 1. Filas de partida: las del filtro que deja menos ---
+        opciones = []
+        if candidatos is not None:
+            opciones.append((len(candidatos), lambda: a_numpy(candidatos, 'I')))
+        if continente is not None:
+            filas_continente = self.continente.filas(continente)
+            opciones.append((len(filas_continente), lambda: a_numpy(filas_continente, 'I')))
+        for indice, minimo, maximo in ((self.poblacion, min_pob, max_pob), (self.area, min_area, max_area)):
+            if indice.restringe(minimo, maximo):
+                inicio, fin = indice.limites(minimo, maximo)
+                opciones.append((fin - inicio, lambda indice=indice, inicio=inicio, fin=fin:
+                                 np.sort(a_numpy(indice.filas[inicio:fin], 'I'))))
+        if not opciones:
+            return self.tabla.todas()
+        filas = min(opciones, key=lambda opcion: opcion[0])[1]()
+
+        # --- 2. El resto de los filtros, vectorizados sobre esas filas ---
+        mascara = self._mascaras(filas, continente, min_pob, max_pob, min_area, max_area)
+        if candidatos is not None:
+            mascara &= np.isin(filas, a_numpy(candidatos, 'I'), assume_unique=True)
+        return a_array('I', filas[mascara])
+
+    def refinar(self, filas, continente=None, min_pob=None, max_pob=None, min_area=None, max_area=None, verificar=None):
+        """Como IndicesTabla.refinar: máscaras vectorizadas y, al final, 'verificar' sólo sobre lo que quedó."""
+        filas = a_numpy(filas, 'I')
+        filas = filas[self._mascaras(filas, continente, min_pob, max_pob, min_area, max_area)]
+        if verificar is None:
+            return a_array('I', filas)
+        return array('I', (fila for fila in filas.tolist() if verificar(fila)))
+
+class EstadisticasVectorizadas(EstadisticasTabla):
+    """EstadisticasTabla con reducciones de NumPy (usa las columnas de IndicesVectorizados)."""
+
+    def _agregar(self, filas):
+        filas = np.arange(len(self.tabla), dtype=np.uint32) if isinstance(filas, range) else a_numpy(filas, 'I')
+        poblaciones = self.indices.valores['poblacion_num'][filas]
+        areas = self.indices.valores['area_num'][filas]
+        codigos = self.indices.codigos[filas]
+        agregados = Agregados(self.tabla)
+        agregados.cantidad = len(filas)
+        agregados.suma_poblacion = int(poblaciones.sum())
+        agregados.suma_area = int(areas.sum())
+        # Los continentes en el orden en que aparecen por primera vez (igual que al recorrer las filas)
+        presentes, primeras = np.unique(codigos, return_index=True)
+        for codigo in presentes[np.argsort(primeras)].tolist():
+            del_continente = codigos == codigo
+            agregados.por_continente[codigo] = [int(del_continente.sum()), int(poblaciones[del_continente].sum()),
+                                                int(areas[del_continente].sum())]
+        return agregados
+
+    def _resumir_vista(self, vista):
+        filas = a_numpy(vista, 'I')
+        poblaciones, areas = self.indices.valores['poblacion_num'], self.indices.valores['area_num']
+        # Las filas se ordenan con las permutaciones precalculadas (igual que el motor puro)
+        filas_por_poblacion = self.indices.ascendente('poblacion', filas)
+        filas_por_area = self.indices.ascendente('area', filas)
+        # Los arreglos se pasan a 'array': así el resumen tiene números de Python (igual que el motor puro)
+        return resumir(self.tabla, a_array('I', filas_por_poblacion), a_array('q', poblaciones[filas_por_poblacion]),
+                       a_array('q', areas[filas_por_area]), self._agregar(filas))